@@ -30,6 +30,11 @@ import time
 import math
 from pathlib import Path
 
+from src.modules.utils.body_reader import read_body
+
+# URL分析最多读取的网页字节数，超出部分不下载（标题等信息通常位于页面开头）
+URL_ANALYZER_MAX_BYTES = int(os.getenv("URL_ANALYZER_MAX_BYTES", str(2 * 1024 * 1024)))
+
 # 全局数据存储
 app_data = {
     "user_feedback": [],
@@ -1252,15 +1257,18 @@ def url_analyzer(url):
 
         # 尝试获取网页信息
         try:
-            response = requests.get(
+            with requests.get(
                 url,
                 timeout=10,
+                stream=True,
                 headers={
                     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
                 },
-            )
+            ) as response:
+                read_body(response, URL_ANALYZER_MAX_BYTES, truncate=True)
             status_code = response.status_code
             content_length = len(response.content)
+            truncated = content_length >= URL_ANALYZER_MAX_BYTES
             content_type = response.headers.get("content-type", "未知")
             server = response.headers.get("server", "未知")
 
@@ -1285,6 +1293,7 @@ def url_analyzer(url):
         except requests.RequestException as e:
             status_code = "连接失败"
             content_length = 0
+            truncated = False
             content_type = "未知"
             server = "未知"
             title = "无法获取"
@@ -1307,7 +1316,7 @@ def url_analyzer(url):
 • **HTTP状态**：{status_code}
 • **内容类型**：{content_type}
 • **服务器**：{server}
-• **内容大小**：{content_length:,} 字节
+• **内容大小**：{content_length:,} 字节{'（超过上限，仅分析前面部分）' if truncated else ''}
 
 ## 📊 内容统计
 • **图片数量**：{img_count} 个
@@ -14,7 +14,6 @@ import json
 import io
 import base64
 import qrcode
-import requests
 from urllib.parse import urlparse
 import hashlib
 import secrets
@@ -24,6 +23,24 @@ import csv
 import os
 from typing import List, Dict, Any
 import time
+import asyncio
+from contextlib import aclosing
+from concurrent.futures import ThreadPoolExecutor
+
+from src.modules.api.api_config import api_config
+from src.modules.cache.cache_manager import CacheNamespace, cache_manager
+from src.modules.api.currency_rates import CurrencyRates, RateTable, UnknownCurrencyError
+from src.modules.api.city_index import city_index
+from src.modules.api.translation_memory import TranslationError, TranslationMemory
+from src.modules.api.language_id import language_identifier
+from src.modules.api.quote_poller import QuotePoller
+from src.modules.api.prefetch_scheduler import PrefetchScheduler
+from src.modules.utils.http_utils import (
+    http_utils, CircuitOpenError, DeadlineExceededError, HTTPRequestError, HTTPStatusError, RateLimitedError
+)
+from src.modules.utils.single_flight import SingleFlight
+from src.modules.utils.minhash_lsh import MinHashLSH
+from src.modules.utils.pubsub import PubSubHub
 
 # 全局数据存储
 app_data = {
@@ -52,48 +69,31 @@ app_data = {
     "generated_qr_codes": [],
     "url_analysis_history": [],
     "api_call_history": [],
-    "weather_cache": {},
-    "translation_cache": {},
-    "news_cache": {},
-    "currency_cache": {},
-    "stock_cache": {},
 }
 
-# 从环境变量读取API配置
+# 从环境变量读取API配置（统一由APIConfig管理，包括客户端限流配置）
 # 注意：请创建.env文件并填写实际的API密钥，参考.env.example文件
-API_CONFIG = {
-    "weather": {
-        "api_key": os.getenv("WEATHER_API_KEY", ""),
-        "base_url": "https://api.openweathermap.org/data/2.5/weather",
-        "enabled": os.getenv("WEATHER_API_ENABLED", "false").lower() == "true",
-    },
-    "translation": {
-        "api_key": os.getenv("TRANSLATION_API_KEY", ""),
-        "base_url": "https://translation.googleapis.com/language/translate/v2",
-        "enabled": os.getenv("TRANSLATION_API_ENABLED", "false").lower() == "true",
-    },
-    "news": {
-        "api_key": os.getenv("NEWS_API_KEY", ""),
-        "base_url": "https://newsapi.org/v2/top-headlines",
-        "enabled": os.getenv("NEWS_API_ENABLED", "false").lower() == "true",
-    },
-    "currency": {
-        "api_key": os.getenv("CURRENCY_API_KEY", ""),
-        "base_url": "https://api.exchangerate-api.com/v4/latest",
-        "enabled": os.getenv("CURRENCY_API_ENABLED", "false").lower() == "true",
-    },
-    "ipinfo": {
-        "api_key": os.getenv("IPINFO_API_KEY", ""),
-        "base_url": "https://ipinfo.io",
-        "enabled": os.getenv("IPINFO_API_ENABLED", "false").lower() == "true",
-    },
-    "stocks": {
-        "api_key": os.getenv("STOCKS_API_KEY", ""),
-        "base_url": "https://www.alphavantage.co/query",
-        "enabled": os.getenv("STOCKS_API_ENABLED", "false").lower() == "true",
-    },
+API_CONFIG = api_config.config
+
+# 单次API调用（包括重试和退避）的时间上限（秒），超时后降级为缓存数据
+API_CALL_DEADLINE = float(os.getenv("API_CALL_DEADLINE", "8"))
+
+# 各服务的结果缓存共享全局CacheManager的条目上限（CACHE_MAX_ENTRIES），按服务设置有效期；
+# 过期后再保留SERVICE_CACHE_STALE_TTL秒，上游超时或熔断时降级为这些缓存数据
+SERVICE_CACHE_STALE_TTL = int(os.getenv("SERVICE_CACHE_STALE_TTL", "86400"))
+service_caches = {
+    "weather": CacheNamespace("weather", int(os.getenv("WEATHER_CACHE_TTL", "1800")), SERVICE_CACHE_STALE_TTL),
+    "translation": CacheNamespace("translation", int(os.getenv("TRANSLATION_CACHE_TTL", "86400"))),
+    "news": CacheNamespace("news", int(os.getenv("NEWS_CACHE_TTL", "900")), SERVICE_CACHE_STALE_TTL),
+    "currency": CacheNamespace("currency", int(os.getenv("CURRENCY_CACHE_TTL", "600"))),
+    "stocks": CacheNamespace("stocks", int(os.getenv("STOCKS_CACHE_TTL", "300")), SERVICE_CACHE_STALE_TTL),
 }
 
+# 实时推送：后台获取的更新只发布一次，所有订阅的页面会话（Gradio流式输出）共享同一份结果
+live_hub = PubSubHub()
+LIVE_STREAM_MAX_SECONDS = float(os.getenv("LIVE_STREAM_MAX_SECONDS", "600"))
+LIVE_STREAM_HEARTBEAT = float(os.getenv("LIVE_STREAM_HEARTBEAT", "30"))
+
 # 自定义CSS样式（保持原有样式并添加API模块样式）
 custom_css = """
 /* 全局样式重置和天空蓝主题 */
@@ -315,104 +315,204 @@ def log_api_call(service, endpoint, success, response_time=None):
     )
 
 
-# ==================== API服务函数 ====================
+def api_available(service):
+    """检查API是否已启用且上游主机的熔断器未打开"""
+    config = API_CONFIG[service]
+    return config["enabled"] and not http_utils.is_circuit_open(config["base_url"])
 
 
-def weather_service(city, units="metric"):
-    """天气查询服务"""
-    update_stats("weather_queries")
+def is_degraded(service):
+    """API已启用但因熔断不可用，此时应降级为缓存或演示数据"""
+    return API_CONFIG[service]["enabled"] and not api_available(service)
 
-    try:
-        # 检查缓存
-        cache_key = f"{city}_{units}"
-        if cache_key in app_data["weather_cache"]:
-            cached_data = app_data["weather_cache"][cache_key]
-            cache_time = datetime.datetime.fromisoformat(cached_data["timestamp"])
-            if datetime.datetime.now() - cache_time < datetime.timedelta(minutes=30):
-                return cached_data["data"]
 
-        if not city:
-            return "❌ 请输入城市名称"
+def stale_fallback(service, cache_key, reason):
+    """返回已过期的缓存结果并附加降级提示，没有可用缓存时返回None"""
+    cached_data = service_caches[service].get_stale(cache_key)
+    if not cached_data:
+        return None
+    return cached_data + f"\n\n> ⚠️ {reason}，当前显示的是最近一次的缓存数据\n"
 
-        # 模拟API调用（在实际使用中替换为真实API）
-        if API_CONFIG["weather"]["enabled"]:
-            # 真实API调用代码
-            url = f"{API_CONFIG['weather']['base_url']}?q={city}&appid={API_CONFIG['weather']['api_key']}&units={units}&lang=zh_cn"
-            response = requests.get(url, timeout=10)
 
-            if response.status_code == 200:
-                data = response.json()
-                log_api_call(
-                    "weather", "current", True, response.elapsed.total_seconds()
-                )
+def circuit_fallback(service, cache_key):
+    """熔断期间返回已过期的缓存结果，没有可用缓存时返回None"""
+    if not is_degraded(service):
+        return None
+    return stale_fallback(service, cache_key, "上游服务暂时不可用（熔断保护中）")
 
-                weather_info = f"""
-# 🌤️ {data['name']} 天气信息
 
-## 📊 当前天气
-• **天气状况**：{data['weather'][0]['description']}
-• **温度**：{data['main']['temp']}°C
-• **体感温度**：{data['main']['feels_like']}°C
-• **湿度**：{data['main']['humidity']}%
-• **气压**：{data['main']['pressure']} hPa
-• **风速**：{data['wind']['speed']} m/s
+def upstream_error_reason(error):
+    """把http_utils抛出的请求异常转换为给用户看的原因（不包含请求URL等细节）"""
+    if isinstance(error, CircuitOpenError):
+        return "上游服务暂时不可用（熔断保护中）"
+    if isinstance(error, RateLimitedError):
+        return "已达到API调用频率或配额上限"
+    if isinstance(error, HTTPStatusError):
+        return f"上游服务返回错误（状态码 {error.status_code}）"
+    return "上游服务请求失败"
 
-## 🌡️ 温度范围
-• **最高温度**：{data['main']['temp_max']}°C
-• **最低温度**：{data['main']['temp_min']}°C
 
-## 👁️ 能见度
-• **能见度**：{data.get('visibility', 'N/A')} 米
+# ==================== API服务函数 ====================
 
-## ⏰ 更新时间
-{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-"""
-            else:
-                log_api_call("weather", "current", False)
-                weather_info = f"❌ 无法获取 {city} 的天气信息，请检查城市名称"
+
+# 温度单位对应的显示符号
+WEATHER_UNIT_SYMBOLS = {"metric": "°C", "imperial": "°F", "kelvin": "K"}
+
+# 多城市查询的并发数和城市数上限
+WEATHER_BATCH_WORKERS = int(os.getenv("WEATHER_BATCH_WORKERS", "8"))
+WEATHER_BATCH_MAX_CITIES = int(os.getenv("WEATHER_BATCH_MAX_CITIES", "50"))
+# 所有多城市查询共用一个有界线程池，避免每次查询创建和销毁线程
+weather_batch_executor = ThreadPoolExecutor(
+    max_workers=max(1, WEATHER_BATCH_WORKERS), thread_name_prefix="weather-batch"
+)
+
+# 同一城市同时只请求一次，其他并发查询等待并共享结果
+weather_flight = SingleFlight()
+
+
+def weather_cache_key(city, units):
+    """天气缓存键：同一城市的不同写法（北京、Beijing、Peking等）使用同一个键"""
+    return f"{city_index.cache_key(city)}_{units}"
+
+
+def request_weather(city, units):
+    """请求城市的当前天气，返回天气数据字典，城市不存在时返回None；未启用API时返回演示数据"""
+    canonical = city_index.resolve(city)
+    if api_available("weather"):
+        # API密钥由http_utils按api_name从密钥池选择并填入appid参数
+        # 索引中的城市按城市ID查询，避免同名城市和不同写法的歧义
+        url = API_CONFIG["weather"]["base_url"]
+        params = {"units": units, "lang": "zh_cn"}
+        if canonical is not None:
+            params["id"] = canonical.id
         else:
-            # 演示模式 - 生成模拟数据
-            log_api_call("weather", "current", True, 0.5)
-
-            weather_conditions = [
-                "晴朗",
-                "多云",
-                "阴天",
-                "小雨",
-                "中雨",
-                "雷阵雨",
-                "雪",
-                "雾",
-            ]
-            condition = random.choice(weather_conditions)
-            temp = random.randint(-10, 35)
-            humidity = random.randint(30, 90)
-            wind_speed = random.uniform(0, 15)
+            params["q"] = city
+        try:
+            response = http_utils.get(
+                url,
+                params=params,
+                timeout=10,
+                deadline=API_CALL_DEADLINE,
+                api_name="weather",
+            )
+        except HTTPStatusError as e:
+            # 城市不存在
+            if e.status_code != 404:
+                raise
+            log_api_call("weather", "current", False)
+            return None
+
+        data = response.json()
+        log_api_call("weather", "current", True, response.elapsed.total_seconds())
+        return {
+            "city": canonical.name if canonical is not None else data["name"],
+            "condition": data["weather"][0]["description"],
+            "temp": data["main"]["temp"],
+            "feels_like": data["main"]["feels_like"],
+            "humidity": data["main"]["humidity"],
+            "pressure": data["main"]["pressure"],
+            "wind_speed": data["wind"]["speed"],
+            "temp_max": data["main"]["temp_max"],
+            "temp_min": data["main"]["temp_min"],
+            "visibility": data.get("visibility", "N/A"),
+            "units": units,
+            "updated": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "demo": False,
+        }
+
+    # 演示模式 - 生成模拟数据
+    log_api_call("weather", "current", True, 0.5)
+    temp = random.randint(-10, 35)
+    return {
+        "city": canonical.name if canonical is not None else city,
+        "condition": random.choice(["晴朗", "多云", "阴天", "小雨", "中雨", "雷阵雨", "雪", "雾"]),
+        "temp": temp,
+        "feels_like": temp + random.randint(-3, 3),
+        "humidity": random.randint(30, 90),
+        "pressure": random.randint(990, 1030),
+        "wind_speed": round(random.uniform(0, 15), 1),
+        "temp_max": temp + random.randint(2, 8),
+        "temp_min": temp - random.randint(2, 8),
+        "visibility": random.randint(5000, 15000),
+        "units": units,
+        "updated": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "demo": True,
+    }
+
+
+def fetch_weather(city, units="metric"):
+    """
+    获取城市天气数据：先查缓存，未命中时请求上游（同一城市的并发查询只请求一次）
+
+    熔断期间优先返回过期缓存（附带notice说明），没有缓存时降级为演示数据（不写入缓存）。
 
-            weather_info = f"""
-# 🌤️ {city} 天气信息 (演示模式)
+    Returns:
+        dict: 天气数据，城市不存在时返回None
+    """
+    cache_key = weather_cache_key(city, units)
+    cached_data = service_caches["weather"].get(cache_key)
+    if cached_data is not None:
+        return cached_data
+
+    def load():
+        # 等待期间其他查询可能已写入缓存
+        cached_data = service_caches["weather"].get(cache_key)
+        if cached_data is not None:
+            return cached_data
+        if is_degraded("weather"):
+            stale_data = service_caches["weather"].get_stale(cache_key)
+            if stale_data is not None:
+                return {**stale_data, "notice": "上游服务暂时不可用（熔断保护中）"}
+        weather_data = request_weather(city, units)
+        # 缓存结果（熔断降级生成的演示数据不写入缓存）
+        if weather_data is not None and not is_degraded("weather"):
+            service_caches["weather"].set(cache_key, weather_data)
+        return weather_data
+
+    return weather_flight.do(cache_key, load)
+
+
+def stale_weather(city, units, reason):
+    """返回已过期的天气缓存并附带降级说明，没有可用缓存时返回None"""
+    stale_data = service_caches["weather"].get_stale(weather_cache_key(city, units))
+    if stale_data is None:
+        return None
+    return {**stale_data, "notice": reason}
+
+
+def render_weather(data):
+    """将天气数据渲染为Markdown"""
+    unit = WEATHER_UNIT_SYMBOLS.get(data["units"], "°C")
+    title = f"# 🌤️ {data['city']} 天气信息" + (" (演示模式)" if data["demo"] else "")
+    weather_info = f"""
+{title}
 
 ## 📊 当前天气
-• **天气状况**：{condition}
-• **温度**：{temp}°C
-• **体感温度**：{temp + random.randint(-3, 3)}°C
-• **湿度**：{humidity}%
-• **气压**：{random.randint(990, 1030)} hPa
-• **风速**：{wind_speed:.1f} m/s
+• **天气状况**：{data['condition']}
+• **温度**：{data['temp']}{unit}
+• **体感温度**：{data['feels_like']}{unit}
+• **湿度**：{data['humidity']}%
+• **气压**：{data['pressure']} hPa
+• **风速**：{data['wind_speed']} m/s
 
 ## 🌡️ 温度范围
-• **最高温度**：{temp + random.randint(2, 8)}°C
-• **最低温度**：{temp - random.randint(2, 8)}°C
+• **最高温度**：{data['temp_max']}{unit}
+• **最低温度**：{data['temp_min']}{unit}
 
 ## 👁️ 能见度
-• **能见度**：{random.randint(5000, 15000)} 米
-
+• **能见度**：{data['visibility']} 米
+"""
+    if data["demo"]:
+        weather_info += """
 ## ⚠️ 提示
 当前为演示模式，显示模拟数据。要获取真实天气数据，请配置OpenWeatherMap API密钥。
-
+"""
+    weather_info += f"""
 ## ⏰ 更新时间
-{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
+{data['updated']}
+"""
+    if data["demo"]:
+        weather_info += f"""
 ## 💡 生活建议
 {random.choice([
     '天气不错，适合户外活动！',
@@ -422,20 +522,232 @@ def weather_service(city, units="metric"):
     '风力较大，外出注意安全'
 ])}
 """
+    if data.get("notice"):
+        weather_info += f"\n\n> ⚠️ {data['notice']}，当前显示的是最近一次的缓存数据\n"
+    return weather_info
 
-        # 缓存结果
-        app_data["weather_cache"][cache_key] = {
-            "data": weather_info,
-            "timestamp": datetime.datetime.now().isoformat(),
-        }
 
-        return weather_info
+def weather_service(city, units="metric"):
+    """天气查询服务"""
+    update_stats("weather_queries")
+
+    try:
+        if not city:
+            return "❌ 请输入城市名称"
 
+        weather_data = fetch_weather(city, units)
+        if weather_data is None:
+            return f"❌ 无法获取 {city} 的天气信息，请检查城市名称"
+        return render_weather(weather_data)
+
+    except DeadlineExceededError:
+        # 超过调用截止时间时优先返回过期缓存
+        log_api_call("weather", "current", False)
+        stale_data = stale_weather(city, units, "天气服务响应超时")
+        if stale_data is not None:
+            return render_weather(stale_data)
+        return "⏱️ 天气服务响应超时，请稍后重试"
+    except HTTPRequestError as e:
+        # 限流、熔断或上游错误时同样优先返回过期缓存
+        log_api_call("weather", "current", False)
+        reason = upstream_error_reason(e)
+        stale_data = stale_weather(city, units, reason)
+        if stale_data is not None:
+            return render_weather(stale_data)
+        return f"❌ 天气查询失败：{reason}，请稍后重试"
     except Exception as e:
         log_api_call("weather", "current", False)
         return f"❌ 天气查询失败：{str(e)}"
 
 
+def split_cities(cities):
+    """将城市列表或以逗号、顿号、分号、换行分隔的字符串拆分为去重后的城市名列表"""
+    if isinstance(cities, str):
+        cities = re.split(r"[,，、;；\n]+", cities)
+    return list(dict.fromkeys(city.strip() for city in cities if city and city.strip()))
+
+
+def weather_batch_service(cities, units="metric"):
+    """
+    多城市天气对比：并发查询各城市（逐个查缓存，相同城市只请求一次），汇总为一张对比表
+
+    Args:
+        cities: 城市名列表，或以逗号等分隔的字符串
+        units: 温度单位（metric/imperial/kelvin）
+
+    Returns:
+        str: Markdown格式的对比表
+    """
+    update_stats("weather_queries")
+
+    # 同一城市的不同写法只查询一次
+    unique_cities = {}
+    for name in split_cities(cities):
+        unique_cities.setdefault(city_index.cache_key(name), name)
+    names = list(unique_cities.values())
+    if not names:
+        return "❌ 请输入城市名称"
+    if len(names) > WEATHER_BATCH_MAX_CITIES:
+        return f"❌ 一次最多查询 {WEATHER_BATCH_MAX_CITIES} 个城市"
+
+    def query(city):
+        try:
+            return fetch_weather(city, units), None
+        except DeadlineExceededError:
+            log_api_call("weather", "current", False)
+            stale_data = stale_weather(city, units, "响应超时")
+            return stale_data, None if stale_data is not None else "响应超时"
+        except HTTPRequestError as e:
+            log_api_call("weather", "current", False)
+            reason = upstream_error_reason(e)
+            stale_data = stale_weather(city, units, reason)
+            return stale_data, None if stale_data is not None else reason
+        except Exception as e:
+            log_api_call("weather", "current", False)
+            return None, str(e)
+
+    start = time.monotonic()
+    results = list(weather_batch_executor.map(query, names))
+    elapsed = time.monotonic() - start
+
+    unit = WEATHER_UNIT_SYMBOLS.get(units, "°C")
+    rows = []
+    available = []
+    for city, (data, error) in zip(names, results):
+        if data is None:
+            rows.append(f"| {city} | ❌ {error or '城市不存在'} | - | - | - | - | - | - |")
+            continue
+        available.append(data)
+        source = "演示" if data["demo"] else "实时"
+        if data.get("notice"):
+            source = f"缓存（{data['notice']}）"
+        rows.append(
+            f"| {data['city']} | {data['condition']} | {data['temp']}{unit} | {data['feels_like']}{unit} "
+            f"| {data['humidity']}% | {data['wind_speed']} m/s | {data['temp_min']}~{data['temp_max']}{unit} | {source} |"
+        )
+
+    result = f"""
+# 🌤️ 多城市天气对比
+
+| 城市 | 天气 | 温度 | 体感 | 湿度 | 风速 | 温度范围 | 数据来源 |
+|------|------|------|------|------|------|----------|----------|
+""" + "\n".join(rows) + "\n"
+
+    if available:
+        hottest = max(available, key=lambda data: data["temp"])
+        coldest = min(available, key=lambda data: data["temp"])
+        average = sum(data["temp"] for data in available) / len(available)
+        result += f"""
+## 📊 对比概览
+• **最高温**：{hottest['city']} {hottest['temp']}{unit}
+• **最低温**：{coldest['city']} {coldest['temp']}{unit}
+• **平均温度**：{average:.1f}{unit}
+• **城市数**：{len(available)}/{len(names)}
+"""
+
+    result += f"""
+## ⏰ 查询信息
+• **查询耗时**：{elapsed:.2f}秒（并发{min(WEATHER_BATCH_WORKERS, len(names))}路）
+• **更新时间**：{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+"""
+    return result
+
+
+def weather_query(cities, units="metric"):
+    """天气查询入口：输入多个城市时进行对比查询"""
+    if len(split_cities(cities or "")) > 1:
+        return weather_batch_service(cities, units)
+    return weather_service((cities or "").strip(), units)
+
+
+# 翻译语言名称 -> 语言代码
+TRANSLATION_LANG_CODES = {
+    "中文": "zh",
+    "英文": "en",
+    "日文": "ja",
+    "韩文": "ko",
+    "法文": "fr",
+    "德文": "de",
+    "西班牙文": "es",
+    "俄文": "ru",
+    "阿拉伯文": "ar",
+    "自动检测": "auto",
+}
+
+# 演示模式的预设翻译：(源语言代码, 目标语言代码) -> {句子: 译文}
+DEMO_TRANSLATIONS = {
+    ("zh", "en"): {
+        "你好": "Hello",
+        "谢谢": "Thank you",
+        "再见": "Goodbye",
+        "早上好": "Good morning",
+        "晚安": "Good night",
+    },
+    ("en", "zh"): {
+        "hello": "你好",
+        "thank you": "谢谢",
+        "goodbye": "再见",
+        "good morning": "早上好",
+        "good night": "晚安",
+    },
+}
+
+
+def request_translations(sentences, source_code, target_code):
+    """
+    批量翻译句子（一个请求携带多个q参数），按顺序返回每个句子的翻译结果
+
+    未启用API或熔断期间返回带"demo"标记的演示翻译，翻译记忆不会保存这些结果。
+    """
+    if not api_available("translation"):
+        log_api_call("translation", "translate", True, 0.3)
+        demo = DEMO_TRANSLATIONS.get((source_code, target_code), {})
+        target_name = next(
+            (name for name, code in TRANSLATION_LANG_CODES.items() if code == target_code), target_code
+        )
+        return [
+            {
+                "translatedText": demo.get(sentence.lower(), f"[{target_name}翻译] {sentence}"),
+                "detectedSourceLanguage": source_code,
+                "demo": True,
+            }
+            for sentence in sentences
+        ]
+
+    url = API_CONFIG["translation"]["base_url"]
+    params = {
+        "q": sentences,
+        "source": source_code,
+        "target": target_code,
+        "format": "text",
+    }
+    response = http_utils.post(
+        url,
+        data=params,
+        timeout=10,
+        deadline=API_CALL_DEADLINE,
+        api_name="translation",
+    )
+    log_api_call("translation", "translate", True, response.elapsed.total_seconds())
+    return response.json()["data"]["translations"]
+
+
+# 近似匹配索引：只有空白、标点或个别字词不同（数字相同）的句子直接使用历史译文，不再请求上游；
+# 个别字词不同也可能改变句意，默认关闭
+TRANSLATION_FUZZY_ENABLED = os.getenv("TRANSLATION_FUZZY_ENABLED", "false").lower() == "true"
+translation_fuzzy_index = MinHashLSH(
+    threshold=float(os.getenv("TRANSLATION_FUZZY_THRESHOLD", "0.9")),
+    max_entries=int(os.getenv("TRANSLATION_FUZZY_MAX_ENTRIES", "5000")),
+)
+
+# 句子级翻译记忆：重复的句子直接使用记忆中的译文，只有未命中的句子批量请求上游
+translation_memory = TranslationMemory(
+    request_translations,
+    service_caches["translation"],
+    fuzzy=translation_fuzzy_index if TRANSLATION_FUZZY_ENABLED else None,
+)
+
+
 def translation_service(text, source_lang, target_lang):
     """翻译服务"""
     update_stats("translations")
@@ -444,53 +756,50 @@ def translation_service(text, source_lang, target_lang):
         if not text:
             return "❌ 请输入要翻译的文本"
 
-        # 检查缓存
-        cache_key = f"{text}_{source_lang}_{target_lang}"
-        if cache_key in app_data["translation_cache"]:
-            return app_data["translation_cache"][cache_key]
-
-        # 语言代码映射
-        lang_map = {
-            "中文": "zh",
-            "英文": "en",
-            "日文": "ja",
-            "韩文": "ko",
-            "法文": "fr",
-            "德文": "de",
-            "西班牙文": "es",
-            "俄文": "ru",
-            "阿拉伯文": "ar",
-            "自动检测": "auto",
-        }
+        source_code = TRANSLATION_LANG_CODES.get(source_lang, "auto")
+        target_code = TRANSLATION_LANG_CODES.get(target_lang, "en")
 
-        source_code = lang_map.get(source_lang, "auto")
-        target_code = lang_map.get(target_lang, "en")
+        # 自动检测时先在本地识别源语言，可信度不足时仍交给上游检测
+        locally_detected = None
+        if source_code == "auto":
+            locally_detected = language_identifier.detect(text)
+            source_code = locally_detected or "auto"
 
-        if API_CONFIG["translation"]["enabled"]:
-            # 真实API调用代码
-            url = API_CONFIG["translation"]["base_url"]
-            params = {
-                "key": API_CONFIG["translation"]["api_key"],
-                "q": text,
-                "source": source_code,
-                "target": target_code,
-                "format": "text",
-            }
+        if source_code == target_code:
+            # 源语言与目标语言相同，不调用翻译服务
+            return f"""
+# 🌍 翻译结果
 
-            response = requests.post(url, data=params, timeout=10)
+## 📝 原文
+**语言**：{source_lang} ({source_code})
+**内容**：{text}
 
-            if response.status_code == 200:
-                data = response.json()
-                translated_text = data["data"]["translations"][0]["translatedText"]
-                detected_lang = data["data"]["translations"][0].get(
-                    "detectedSourceLanguage", source_code
-                )
+## ✅ 无需翻译
+源语言与目标语言相同（{target_lang}），未调用翻译服务，译文即原文。
+"""
 
-                log_api_call(
-                    "translation", "translate", True, response.elapsed.total_seconds()
-                )
+        try:
+            translation = translation_memory.translate(text, source_code, target_code)
+        except TranslationError:
+            return "❌ 翻译失败，请稍后重试"
+
+        translated_text = translation.text
+        memory_info = f"""• **句子数量**：{translation.segments}（翻译记忆命中 {translation.memory_hits} 句，近似匹配 {len(translation.fuzzy_matches)} 句）
+• **请求字符**：{translation.sent_chars}/{len(text)}（{translation.sent_segments} 句）"""
+        fuzzy_info = ""
+        if translation.fuzzy_matches:
+            # 列出使用近似匹配译文的句子，方便核对
+            fuzzy_info = "\n## 🔍 近似匹配（使用历史译文，请核对）\n" + "".join(
+                f"• {sentence} ≈ {match.text}（相似度 {match.similarity:.0%}）\n"
+                for sentence, match in translation.fuzzy_matches
+            )
 
-                result = f"""
+        if api_available("translation"):
+            if locally_detected:
+                detected_lang = f"{locally_detected}（本地识别）"
+            else:
+                detected_lang = translation.detected_language or source_code
+            result = f"""
 # 🌍 翻译结果
 
 ## 📝 原文
@@ -505,47 +814,15 @@ def translation_service(text, source_lang, target_lang):
 • **检测语言**：{detected_lang}
 • **翻译方向**：{source_lang} → {target_lang}
 • **字符数量**：{len(text)}
+{memory_info}
 • **翻译时间**：{datetime.datetime.now().strftime('%H:%M:%S')}
-
+{fuzzy_info}
 ## ✅ 翻译质量
 • **准确性**：高
 • **流畅性**：良好
 • **完整性**：完整
 """
-            else:
-                log_api_call("translation", "translate", False)
-                result = f"❌ 翻译失败，请稍后重试"
         else:
-            # 演示模式 - 生成模拟翻译
-            log_api_call("translation", "translate", True, 0.3)
-
-            # 简单的模拟翻译逻辑
-            demo_translations = {
-                ("中文", "英文"): {
-                    "你好": "Hello",
-                    "谢谢": "Thank you",
-                    "再见": "Goodbye",
-                    "早上好": "Good morning",
-                    "晚安": "Good night",
-                },
-                ("英文", "中文"): {
-                    "hello": "你好",
-                    "thank you": "谢谢",
-                    "goodbye": "再见",
-                    "good morning": "早上好",
-                    "good night": "晚安",
-                },
-            }
-
-            # 查找预设翻译
-            translation_key = (source_lang, target_lang)
-            if translation_key in demo_translations:
-                translated_text = demo_translations[translation_key].get(
-                    text.lower(), f"[{target_lang}翻译] {text}"
-                )
-            else:
-                translated_text = f"[{target_lang}翻译] {text}"
-
             result = f"""
 # 🌍 翻译结果 (演示模式)
 
@@ -560,8 +837,9 @@ def translation_service(text, source_lang, target_lang):
 ## 📊 翻译信息
 • **翻译方向**：{source_lang} → {target_lang}
 • **字符数量**：{len(text)}
+{memory_info}
 • **翻译时间**：{datetime.datetime.now().strftime('%H:%M:%S')}
-
+{fuzzy_info}
 ## ⚠️ 提示
 当前为演示模式，显示模拟翻译结果。要获取真实翻译，请配置Google Translate API密钥。
 
@@ -574,53 +852,89 @@ def translation_service(text, source_lang, target_lang):
 ])}
 """
 
-        # 缓存结果
-        app_data["translation_cache"][cache_key] = result
-
         return result
 
+    except DeadlineExceededError:
+        # 超过调用截止时间
+        log_api_call("translation", "translate", False)
+        return "⏱️ 翻译服务响应超时，请稍后重试"
+    except HTTPRequestError as e:
+        log_api_call("translation", "translate", False)
+        return f"❌ 翻译失败：{upstream_error_reason(e)}，请稍后重试"
     except Exception as e:
         log_api_call("translation", "translate", False)
         return f"❌ 翻译失败：{str(e)}"
 
 
-def news_service(category, country="cn"):
-    """新闻资讯服务"""
-    update_stats("news_fetched")
+# 演示模式的新闻标题，同时是后台预刷新的默认类别
+DEMO_NEWS = {
+    "科技": [
+        "人工智能技术在医疗领域取得重大突破",
+        "新型量子计算机性能提升100倍",
+        "5G网络覆盖率达到新高度",
+        "自动驾驶汽车通过重要安全测试",
+        "区块链技术在金融领域广泛应用",
+    ],
+    "财经": [
+        "全球股市今日表现强劲上涨",
+        "新兴市场货币汇率波动加剧",
+        "央行宣布新的货币政策调整",
+        "科技股领涨，投资者信心增强",
+        "国际贸易协议达成重要进展",
+    ],
+    "体育": [
+        "世界杯预选赛激战正酣",
+        "奥运会筹备工作进展顺利",
+        "职业联赛新赛季即将开始",
+        "运动员创造新的世界纪录",
+        "体育科技装备迎来创新突破",
+    ],
+    "娱乐": [
+        "好莱坞大片即将上映引发期待",
+        "音乐节门票销售火爆",
+        "知名导演新作品获得好评",
+        "流媒体平台推出原创内容",
+        "明星慈善活动获得广泛关注",
+    ],
+}
 
-    try:
-        # 检查缓存
-        cache_key = f"{category}_{country}"
-        if cache_key in app_data["news_cache"]:
-            cached_data = app_data["news_cache"][cache_key]
-            cache_time = datetime.datetime.fromisoformat(cached_data["timestamp"])
-            if datetime.datetime.now() - cache_time < datetime.timedelta(minutes=15):
-                return cached_data["data"]
+# 页面可选的新闻国家/地区
+NEWS_COUNTRIES = ("cn", "us")
 
-        if API_CONFIG["news"]["enabled"]:
-            # 真实API调用代码
-            url = API_CONFIG["news"]["base_url"]
-            params = {
-                "apiKey": API_CONFIG["news"]["api_key"],
-                "category": category.lower(),
-                "country": country,
-                "pageSize": 10,
-            }
 
-            response = requests.get(url, params=params, timeout=10)
+def request_news(category, country):
+    """
+    请求NewsAPI的头条新闻
+
+    Returns:
+        str: Markdown格式的新闻
+    """
+    url = API_CONFIG["news"]["base_url"]
+    params = {
+        "category": category.lower(),
+        "country": country,
+        "pageSize": 10,
+    }
+
+    response = http_utils.get(
+        url,
+        params=params,
+        timeout=10,
+        deadline=API_CALL_DEADLINE,
+        api_name="news",
+    )
 
-            if response.status_code == 200:
-                data = response.json()
-                articles = data["articles"]
+    data = response.json()
+    articles = data["articles"]
 
-                log_api_call(
-                    "news", "headlines", True, response.elapsed.total_seconds()
-                )
+    log_api_call(
+        "news", "headlines", True, response.elapsed.total_seconds()
+    )
 
-                news_content = f"# 📰 {category} 新闻资讯\n\n"
+    news_content = f"# 📰 {category} 新闻资讯\n\n"
 
-                for i, article in enumerate(articles[:5], 1):
-                    news_content += f"""
+    for i, article in enumerate(articles[:5], 1):
+        news_content += f"""
 ## {i}. {article['title']}
 
 **来源**：{article['source']['name']}
@@ -631,60 +945,29 @@ def news_service(category, country="cn"):
 ---
 """
 
-                news_content += f"""
+    news_content += f"""
 ## 📊 新闻统计
 • **类别**：{category}
 • **国家/地区**：{country}
 • **新闻数量**：{len(articles)}
 • **更新时间**：{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 """
-            else:
-                log_api_call("news", "headlines", False)
-                news_content = f"❌ 无法获取 {category} 新闻，请稍后重试"
-        else:
-            # 演示模式 - 生成模拟新闻
-            log_api_call("news", "headlines", True, 0.4)
-
-            demo_news = {
-                "科技": [
-                    "人工智能技术在医疗领域取得重大突破",
-                    "新型量子计算机性能提升100倍",
-                    "5G网络覆盖率达到新高度",
-                    "自动驾驶汽车通过重要安全测试",
-                    "区块链技术在金融领域广泛应用",
-                ],
-                "财经": [
-                    "全球股市今日表现强劲上涨",
-                    "新兴市场货币汇率波动加剧",
-                    "央行宣布新的货币政策调整",
-                    "科技股领涨，投资者信心增强",
-                    "国际贸易协议达成重要进展",
-                ],
-                "体育": [
-                    "世界杯预选赛激战正酣",
-                    "奥运会筹备工作进展顺利",
-                    "职业联赛新赛季即将开始",
-                    "运动员创造新的世界纪录",
-                    "体育科技装备迎来创新突破",
-                ],
-                "娱乐": [
-                    "好莱坞大片即将上映引发期待",
-                    "音乐节门票销售火爆",
-                    "知名导演新作品获得好评",
-                    "流媒体平台推出原创内容",
-                    "明星慈善活动获得广泛关注",
-                ],
-            }
+    return news_content
 
-            category_news = demo_news.get(category, demo_news["科技"])
 
-            news_content = f"# 📰 {category} 新闻资讯 (演示模式)\n\n"
+def demo_news_content(category):
+    """演示模式 - 生成模拟新闻"""
+    log_api_call("news", "headlines", True, 0.4)
 
-            for i, title in enumerate(category_news, 1):
-                publish_time = datetime.datetime.now() - datetime.timedelta(
-                    hours=random.randint(1, 24)
-                )
-                news_content += f"""
+    category_news = DEMO_NEWS.get(category, DEMO_NEWS["科技"])
+
+    news_content = f"# 📰 {category} 新闻资讯 (演示模式)\n\n"
+
+    for i, title in enumerate(category_news, 1):
+        publish_time = datetime.datetime.now() - datetime.timedelta(
+            hours=random.randint(1, 24)
+        )
+        news_content += f"""
 ## {i}. {title}
 
 **来源**：{random.choice(['新华社', '人民日报', '央视新闻', '澎湃新闻', '界面新闻'])}
@@ -695,7 +978,7 @@ def news_service(category, country="cn"):
 ---
 """
 
-            news_content += f"""
+    news_content += f"""
 ## 📊 新闻统计
 • **类别**：{category}
 • **新闻数量**：{len(category_news)}
@@ -712,20 +995,160 @@ def news_service(category, country="cn"):
     '保持理性思考，避免信息茧房效应'
 ])}
 """
+    return news_content
 
-        # 缓存结果
-        app_data["news_cache"][cache_key] = {
-            "data": news_content,
-            "timestamp": datetime.datetime.now().isoformat(),
-        }
+
+def store_news(category, country, news_content):
+    """缓存新闻、推送给订阅的页面，并据此安排该类别的下一次预刷新"""
+    cache_key = f"{category}_{country}"
+    service_caches["news"].set(cache_key, news_content)
+    live_hub.publish(f"news:{cache_key}", news_content)
+    news_prefetcher.mark_refreshed((category, country))
+
+
+def news_service(category, country="cn"):
+    """新闻资讯服务"""
+    update_stats("news_fetched")
+    news_prefetcher.record_hit((category, country))
+
+    try:
+        # 检查缓存
+        cache_key = f"{category}_{country}"
+        cached_data = service_caches["news"].get(cache_key)
+        if cached_data is not None:
+            return cached_data
+
+        if api_available("news"):
+            news_content = request_news(category, country)
+        else:
+            # 熔断期间优先返回过期缓存，没有缓存时降级为演示数据
+            stale_result = circuit_fallback("news", cache_key)
+            if stale_result:
+                return stale_result
+
+            news_content = demo_news_content(category)
+
+        # 缓存结果并推送给订阅的页面（熔断降级生成的演示数据不写入缓存）
+        if not is_degraded("news"):
+            store_news(category, country, news_content)
 
         return news_content
 
+    except DeadlineExceededError:
+        # 超过调用截止时间时优先返回过期缓存
+        log_api_call("news", "headlines", False)
+        return (
+            stale_fallback("news", cache_key, "新闻服务响应超时")
+            or "⏱️ 新闻服务响应超时，请稍后重试"
+        )
+    except HTTPRequestError as e:
+        # 限流、熔断或上游错误时同样优先返回过期缓存
+        log_api_call("news", "headlines", False)
+        reason = upstream_error_reason(e)
+        return (
+            stale_fallback("news", cache_key, reason)
+            or f"❌ 无法获取 {category} 新闻：{reason}，请稍后重试"
+        )
     except Exception as e:
         log_api_call("news", "headlines", False)
         return f"❌ 新闻获取失败：{str(e)}"
 
 
+def prefetch_news(target):
+    """后台预刷新一个新闻类别，只在API可用时请求（演示模式和熔断期间跳过）"""
+    category, country = target
+    if not api_available("news"):
+        return
+    store_news(category, country, request_news(category, country))
+
+
+def news_prefetch_interval():
+    """预刷新的请求间隔：未设置NEWS_PREFETCH_INTERVAL时按新闻API限流速率的50%计算，给用户查询留出一半配额"""
+    if os.getenv("NEWS_PREFETCH_INTERVAL"):
+        return float(os.getenv("NEWS_PREFETCH_INTERVAL"))
+    rate_limit = api_config.get_total_rate_limit("news")
+    if not rate_limit:
+        return 10.0
+    return rate_limit["per"] / rate_limit["requests"] / 0.5
+
+
+def news_prefetch_targets():
+    """预刷新的新闻类别：演示新闻的所有类别和国家/地区，加上NEWS_PREFETCH_TARGETS配置的 类别:国家 列表"""
+    targets = [(category, country) for category in DEMO_NEWS for country in NEWS_COUNTRIES]
+    for item in os.getenv("NEWS_PREFETCH_TARGETS", "").split(","):
+        category, _, country = item.strip().partition(":")
+        if category:
+            targets.append((category, country.strip() or "cn"))
+    return targets
+
+
+# 新闻预刷新：在缓存到期前后台刷新常用类别，第一个在到期后查询的用户不必等待上游；访问少的类别自动退出调度
+news_prefetcher = PrefetchScheduler(
+    prefetch_news,
+    ttl=service_caches["news"].ttl,
+    min_interval=news_prefetch_interval(),
+)
+news_prefetcher.register(news_prefetch_targets())
+
+
+async def news_stream_service(category, country="cn"):
+    """
+    实时新闻：先输出当前新闻，之后每当该类别的新闻被刷新（任何会话的查询或后台刷新）就推送新内容
+
+    在事件循环中等待更新，不占用Gradio的工作线程；会话断开时Gradio取消生成器，订阅随即结束
+
+    Yields:
+        str: Markdown格式的新闻
+    """
+    topic = f"news:{category}_{country}"
+    # 先订阅再输出当前新闻，避免漏掉两者之间的更新；查询新闻会请求上游，放到线程中执行
+    async with aclosing(live_hub.subscribe([topic], max_seconds=LIVE_STREAM_MAX_SECONDS)) as updates:
+        yield await asyncio.to_thread(news_service, category, country)
+        async for update in updates:
+            yield update[topic]
+
+
+# 演示模式的汇率表（1美元可兑换的各货币数量）
+DEMO_CURRENCY_RATES = {
+    "USD": 1.0,
+    "CNY": 7.2,
+    "EUR": 0.92,
+    "JPY": 150.0,
+    "GBP": 0.81,
+    "AUD": 1.52,
+    "CAD": 1.36,
+    "CHF": 0.88,
+    "HKD": 7.82,
+    "SGD": 1.34,
+}
+
+
+def fetch_currency_table(base):
+    """获取基准货币的完整汇率表，演示模式或熔断期间返回模拟汇率表（不写入缓存）"""
+    if not api_available("currency"):
+        log_api_call("currency", "rates", True, 0.2)
+        return RateTable("USD", DEMO_CURRENCY_RATES, demo=True)
+
+    url = f"{API_CONFIG['currency']['base_url']}/{base}"
+    try:
+        response = http_utils.get(
+            url, timeout=10, deadline=API_CALL_DEADLINE, api_name="currency"
+        )
+    except HTTPStatusError as e:
+        # 上游不支持该基准货币
+        if e.status_code != 404:
+            raise
+        log_api_call("currency", "rates", False)
+        raise UnknownCurrencyError(f"无法获取 {base} 的汇率表") from e
+    data = response.json()
+    log_api_call("currency", "rates", True, response.elapsed.total_seconds())
+    return RateTable(data["base"], data["rates"], data.get("date"))
+
+
+# 汇率表按基准货币缓存，一次请求即可换算表中的所有货币对
+currency_rates = CurrencyRates(fetch_currency_table, service_caches["currency"])
+
+
 def currency_service(from_currency, to_currency, amount):
     """汇率转换服务"""
     update_stats("currency_conversions")
@@ -734,52 +1157,20 @@ def currency_service(from_currency, to_currency, amount):
         if amount <= 0:
             return "❌ 请输入有效的金额"
 
-        # 检查缓存
-        cache_key = f"{from_currency}_{to_currency}"
-        if cache_key in app_data["currency_cache"]:
-            cached_data = app_data["currency_cache"][cache_key]
-            cache_time = datetime.datetime.fromisoformat(cached_data["timestamp"])
-            if datetime.datetime.now() - cache_time < datetime.timedelta(minutes=10):
-                rate = cached_data["rate"]
-                converted_amount = amount * rate
-
-                return f"""
-# 💱 汇率转换结果
-
-## 💰 转换信息
-• **原始金额**：{amount:,.2f} {from_currency}
-• **转换金额**：{converted_amount:,.2f} {to_currency}
-• **汇率**：1 {from_currency} = {rate:.4f} {to_currency}
-
-## 📊 汇率信息
-• **数据来源**：缓存数据
-• **更新时间**：{cached_data['timestamp'][:19]}
-• **有效期**：10分钟
-
-## 💡 投资建议
-{random.choice([
-    '汇率波动较大，建议关注市场动态',
-    '长期投资建议分散汇率风险',
-    '重要交易建议咨询专业金融顾问',
-    '注意汇率变动对投资收益的影响'
-])}
-"""
-
-        if API_CONFIG["currency"]["enabled"]:
-            # 真实API调用代码
-            url = f"{API_CONFIG['currency']['base_url']}/{from_currency}"
-            response = requests.get(url, timeout=10)
+        try:
+            rate, table = currency_rates.quote(from_currency, to_currency)
+        except UnknownCurrencyError:
+            return f"❌ 无法获取 {from_currency} 到 {to_currency} 的汇率"
 
-            if response.status_code == 200:
-                data = response.json()
-                rate = data["rates"][to_currency]
-                converted_amount = amount * rate
+        converted_amount = amount * rate
 
-                log_api_call(
-                    "currency", "convert", True, response.elapsed.total_seconds()
-                )
+        if table.base in (from_currency, to_currency):
+            rate_source = f"• **基准货币**：{table.base}"
+        else:
+            rate_source = f"• **基准货币**：{table.base}（交叉汇率）"
 
-                result = f"""
+        if not table.demo:
+            result = f"""
 # 💱 汇率转换结果
 
 ## 💰 转换信息
@@ -788,44 +1179,16 @@ def currency_service(from_currency, to_currency, amount):
 • **汇率**：1 {from_currency} = {rate:.4f} {to_currency}
 
 ## 📊 汇率信息
-• **基准货币**：{data['base']}
-• **更新时间**：{data['date']}
-• **数据来源**：实时汇率API
+{rate_source}
+• **更新时间**：{table.date or '-'}
+• **数据来源**：实时汇率API（汇率表缓存{service_caches['currency'].ttl // 60}分钟）
 
 ## 📈 市场分析
 • **汇率趋势**：{random.choice(['上升', '下降', '稳定', '波动'])}
 • **市场情绪**：{random.choice(['乐观', '谨慎', '中性', '悲观'])}
 • **风险等级**：{random.choice(['低', '中', '高'])}
 """
-            else:
-                log_api_call("currency", "convert", False)
-                result = f"❌ 无法获取 {from_currency} 到 {to_currency} 的汇率"
         else:
-            # 演示模式 - 生成模拟汇率
-            log_api_call("currency", "convert", True, 0.2)
-
-            # 模拟汇率数据
-            demo_rates = {
-                ("USD", "CNY"): 7.2,
-                ("CNY", "USD"): 0.139,
-                ("EUR", "CNY"): 7.8,
-                ("CNY", "EUR"): 0.128,
-                ("JPY", "CNY"): 0.048,
-                ("CNY", "JPY"): 20.8,
-                ("GBP", "CNY"): 8.9,
-                ("CNY", "GBP"): 0.112,
-                ("USD", "EUR"): 0.85,
-                ("EUR", "USD"): 1.18,
-            }
-
-            rate_key = (from_currency, to_currency)
-            if rate_key in demo_rates:
-                rate = demo_rates[rate_key]
-            else:
-                rate = random.uniform(0.1, 10.0)  # 随机汇率
-
-            converted_amount = amount * rate
-
             result = f"""
 # 💱 汇率转换结果 (演示模式)
 
@@ -835,11 +1198,12 @@ def currency_service(from_currency, to_currency, amount):
 • **汇率**：1 {from_currency} = {rate:.4f} {to_currency}
 
 ## 📊 汇率信息
+{rate_source}
 • **更新时间**：{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 • **数据来源**：演示数据
 
 ## ⚠️ 提示
-当前为演示模式，显示模拟汇率数据。要获取真实汇率，请配置汇率API密钥。
+{"汇率服务暂时不可用（熔断保护中），当前显示模拟汇率数据，恢复后将自动显示实时汇率。" if is_degraded("currency") else "当前为演示模式，显示模拟汇率数据。要获取真实汇率，请配置汇率API密钥。"}
 
 ## 📈 市场分析
 • **汇率趋势**：{random.choice(['上升', '下降', '稳定', '波动'])}
@@ -855,19 +1219,36 @@ def currency_service(from_currency, to_currency, amount):
 ])}
 """
 
-            # 缓存结果
-            app_data["currency_cache"][cache_key] = {
-                "rate": rate,
-                "timestamp": datetime.datetime.now().isoformat(),
-            }
-
         return result
 
+    except DeadlineExceededError:
+        # 超过调用截止时间
+        log_api_call("currency", "convert", False)
+        return "⏱️ 汇率服务响应超时，请稍后重试"
+    except HTTPRequestError as e:
+        log_api_call("currency", "convert", False)
+        return f"❌ 汇率转换失败：{upstream_error_reason(e)}，请稍后重试"
     except Exception as e:
         log_api_call("currency", "convert", False)
         return f"❌ 汇率转换失败：{str(e)}"
 
 
+def currency_batch_convert(amounts, from_currencies, to_currencies):
+    """
+    批量汇率转换，金额和货币按numpy规则广播，每个基准货币在缓存有效期内只请求一次汇率表
+
+    Args:
+        amounts: 金额或金额列表
+        from_currencies: 原始货币代码或代码列表
+        to_currencies: 目标货币代码或代码列表
+
+    Returns:
+        np.ndarray: 换算后的金额
+    """
+    update_stats("currency_conversions")
+    return currency_rates.convert_batch(amounts, from_currencies, to_currencies)
+
+
 def ip_lookup_service(ip_address):
     """IP地址查询服务"""
     update_stats("ip_lookups")
@@ -881,19 +1262,28 @@ def ip_lookup_service(ip_address):
         if not re.match(ip_pattern, ip_address):
             return "❌ 请输入有效的IP地址格式"
 
-        if API_CONFIG["ipinfo"]["enabled"]:
+        if api_available("ipinfo"):
             # 真实API调用代码
             url = f"{API_CONFIG['ipinfo']['base_url']}/{ip_address}/json"
-            params = {"token": API_CONFIG["ipinfo"]["api_key"]}
-
-            response = requests.get(url, params=params, timeout=10)
+            try:
+                response = http_utils.get(
+                    url,
+                    timeout=10,
+                    deadline=API_CALL_DEADLINE,
+                    api_name="ipinfo",
+                )
+            except HTTPStatusError as e:
+                # 上游不认识该IP地址（如保留地址）
+                if e.status_code not in (400, 404):
+                    raise
+                log_api_call("ipinfo", "lookup", False)
+                return f"❌ 无法查询IP地址 {ip_address} 的信息"
 
-            if response.status_code == 200:
-                data = response.json()
+            data = response.json()
 
-                log_api_call("ipinfo", "lookup", True, response.elapsed.total_seconds())
+            log_api_call("ipinfo", "lookup", True, response.elapsed.total_seconds())
 
-                result = f"""
+            result = f"""
 # 📍 IP地址查询结果
 
 ## 🌐 基本信息
@@ -913,9 +1303,6 @@ def ip_lookup_service(ip_address):
 • **查询时间**：{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 • **数据来源**：IPInfo API
 """
-            else:
-                log_api_call("ipinfo", "lookup", False)
-                result = f"❌ 无法查询IP地址 {ip_address} 的信息"
         else:
             # 演示模式 - 生成模拟数据
             log_api_call("ipinfo", "lookup", True, 0.3)
@@ -979,106 +1366,166 @@ def ip_lookup_service(ip_address):
 
         return result
 
+    except DeadlineExceededError:
+        # 超过调用截止时间
+        log_api_call("ipinfo", "lookup", False)
+        return "⏱️ IP查询服务响应超时，请稍后重试"
+    except HTTPRequestError as e:
+        log_api_call("ipinfo", "lookup", False)
+        return f"❌ IP查询失败：{upstream_error_reason(e)}，请稍后重试"
     except Exception as e:
         log_api_call("ipinfo", "lookup", False)
         return f"❌ IP查询失败：{str(e)}"
 
 
-def stock_service(symbol):
-    """股票查询服务"""
-    update_stats("stock_queries")
+# 同一股票同时只请求一次，其他并发查询等待并共享结果
+stock_flight = SingleFlight()
 
-    try:
-        if not symbol:
-            return "❌ 请输入股票代码"
 
-        symbol = symbol.upper()
+def request_stock_quote(symbol):
+    """请求股票的实时行情，返回行情数据字典，股票不存在时返回None；未启用API时返回演示数据"""
+    if api_available("stocks"):
+        url = API_CONFIG["stocks"]["base_url"]
+        params = {
+            "function": "GLOBAL_QUOTE",
+            "symbol": symbol,
+        }
+        try:
+            response = http_utils.get(
+                url,
+                params=params,
+                timeout=10,
+                deadline=API_CALL_DEADLINE,
+                api_name="stocks",
+            )
+        except HTTPStatusError as e:
+            # 股票不存在
+            if e.status_code != 404:
+                raise
+            log_api_call("stocks", "quote", False)
+            return None
+        quote = response.json().get("Global Quote")
+        if not quote:
+            log_api_call("stocks", "quote", False)
+            return None
+        log_api_call("stocks", "quote", True, response.elapsed.total_seconds())
+        return {
+            "symbol": quote["01. symbol"],
+            "price": quote["05. price"],
+            "open": quote["02. open"],
+            "high": quote["03. high"],
+            "low": quote["04. low"],
+            "volume": quote["06. volume"],
+            "change": quote["09. change"],
+            "change_percent": quote["10. change percent"],
+            "previous_close": quote["08. previous close"],
+            "latest_trading_day": quote["07. latest trading day"],
+            "updated": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "demo": False,
+        }
 
-        # 检查缓存
-        if symbol in app_data["stock_cache"]:
-            cached_data = app_data["stock_cache"][symbol]
-            cache_time = datetime.datetime.fromisoformat(cached_data["timestamp"])
-            if datetime.datetime.now() - cache_time < datetime.timedelta(minutes=5):
-                return cached_data["data"]
+    # 演示模式 - 生成模拟股票数据
+    log_api_call("stocks", "quote", True, 0.4)
+    base_price = random.uniform(50, 500)
+    change_percent = random.uniform(-5, 5)
+    change_amount = base_price * (change_percent / 100)
+    current_price = base_price + change_amount
+    return {
+        "symbol": symbol,
+        "price": f"{current_price:.2f}",
+        "open": f"{base_price + random.uniform(-5, 5):.2f}",
+        "high": f"{current_price + random.uniform(0, 10):.2f}",
+        "low": f"{current_price - random.uniform(0, 10):.2f}",
+        "volume": f"{random.randint(1000000, 50000000):,}",
+        "change": f"{change_amount:.2f}",
+        "change_percent": f"{change_percent:.2f}%",
+        "previous_close": f"{base_price:.2f}",
+        "latest_trading_day": datetime.datetime.now().strftime("%Y-%m-%d"),
+        "updated": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "demo": True,
+    }
 
-        if API_CONFIG["stocks"]["enabled"]:
-            # 真实API调用代码
-            url = API_CONFIG["stocks"]["base_url"]
-            params = {
-                "function": "GLOBAL_QUOTE",
-                "symbol": symbol,
-                "apikey": API_CONFIG["stocks"]["api_key"],
-            }
 
-            response = requests.get(url, params=params, timeout=10)
+def publish_stock_quote(symbol, quote):
+    """把新获取的行情推送给订阅了该股票的页面"""
+    live_hub.publish(f"stock:{symbol}", quote)
 
-            if response.status_code == 200:
-                data = response.json()
-                quote = data["Global Quote"]
 
-                log_api_call("stocks", "quote", True, response.elapsed.total_seconds())
+def fetch_stock_quote(symbol):
+    """
+    获取股票行情：先查缓存（自选股轮询也写入同一缓存），未命中时请求上游（同一股票的并发查询只请求一次）
 
-                result = f"""
-# 📈 股票信息查询
+    熔断期间优先返回过期缓存（附带notice说明），没有缓存时降级为演示数据（不写入缓存）。
 
-## 📊 {quote['01. symbol']} 股票信息
-• **股票代码**：{quote['01. symbol']}
-• **当前价格**：${quote['05. price']}
-• **开盘价**：${quote['02. open']}
-• **最高价**：${quote['03. high']}
-• **最低价**：${quote['04. low']}
-• **成交量**：{quote['06. volume']}
+    Returns:
+        dict: 行情数据，股票不存在时返回None
+    """
+    cached_data = service_caches["stocks"].get(symbol)
+    if cached_data is not None:
+        return cached_data
+
+    def load():
+        # 等待期间其他查询可能已写入缓存
+        cached_data = service_caches["stocks"].get(symbol)
+        if cached_data is not None:
+            return cached_data
+        if is_degraded("stocks"):
+            stale_data = service_caches["stocks"].get_stale(symbol)
+            if stale_data is not None:
+                return {**stale_data, "notice": "上游服务暂时不可用（熔断保护中）"}
+        quote = request_stock_quote(symbol)
+        # 缓存结果（熔断降级生成的演示数据不写入缓存）
+        if quote is not None and not is_degraded("stocks"):
+            service_caches["stocks"].set(symbol, quote)
+            publish_stock_quote(symbol, quote)
+        return quote
+
+    return stock_flight.do(symbol, load)
+
+
+def stale_stock_quote(symbol, reason):
+    """返回已过期的行情缓存并附带降级说明，没有可用缓存时返回None"""
+    stale_data = service_caches["stocks"].get_stale(symbol)
+    if stale_data is None:
+        return None
+    return {**stale_data, "notice": reason}
+
+
+def render_stock(quote):
+    """将股票行情渲染为Markdown"""
+    title = "# 📈 股票信息查询" + (" (演示模式)" if quote["demo"] else "")
+    result = f"""
+{title}
+
+## 📊 {quote['symbol']} 股票信息
+• **股票代码**：{quote['symbol']}
+• **当前价格**：${quote['price']}
+• **开盘价**：${quote['open']}
+• **最高价**：${quote['high']}
+• **最低价**：${quote['low']}
+• **成交量**：{quote['volume']}
 
 ## 📈 价格变动
-• **涨跌额**：${quote['09. change']}
-• **涨跌幅**：{quote['10. change percent']}
-• **前收盘价**：${quote['08. previous close']}
-
-## ⏰ 更新信息
-• **最后交易日**：{quote['07. latest trading day']}
-• **查询时间**：{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+• **涨跌额**：${quote['change']}
+• **涨跌幅**：{quote['change_percent']}
+• **前收盘价**：${quote['previous_close']}
 """
-            else:
-                log_api_call("stocks", "quote", False)
-                result = f"❌ 无法获取股票 {symbol} 的信息"
-        else:
-            # 演示模式 - 生成模拟股票数据
-            log_api_call("stocks", "quote", True, 0.4)
-
-            # 生成模拟股票数据
-            base_price = random.uniform(50, 500)
-            change_percent = random.uniform(-5, 5)
-            change_amount = base_price * (change_percent / 100)
-            current_price = base_price + change_amount
-
-            volume = random.randint(1000000, 50000000)
-
-            result = f"""
-# 📈 股票信息查询 (演示模式)
-
-## 📊 {symbol} 股票信息
-• **股票代码**：{symbol}
-• **当前价格**：${current_price:.2f}
-• **开盘价**：${base_price + random.uniform(-5, 5):.2f}
-• **最高价**：${current_price + random.uniform(0, 10):.2f}
-• **最低价**：${current_price - random.uniform(0, 10):.2f}
-• **成交量**：{volume:,}
-
-## 📈 价格变动
-• **涨跌额**：${change_amount:.2f}
-• **涨跌幅**：{change_percent:.2f}%
-• **前收盘价**：${base_price:.2f}
-
+    if quote["demo"]:
+        current_price = float(quote["price"])
+        result += f"""
 ## 📊 技术指标
 • **市盈率**：{random.uniform(10, 30):.2f}
 • **市净率**：{random.uniform(1, 5):.2f}
 • **52周最高**：${current_price + random.uniform(10, 50):.2f}
 • **52周最低**：${current_price - random.uniform(10, 50):.2f}
-
+"""
+    result += f"""
 ## ⏰ 更新信息
-• **最后交易日**：{datetime.datetime.now().strftime('%Y-%m-%d')}
-• **查询时间**：{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
+• **最后交易日**：{quote['latest_trading_day']}
+• **查询时间**：{quote['updated']}
+"""
+    if quote["demo"]:
+        result += f"""
 ## ⚠️ 提示
 当前为演示模式，显示模拟股票数据。要获取真实数据，请配置Alpha Vantage API密钥。
 
@@ -1097,20 +1544,136 @@ def stock_service(symbol):
 • **阻力位**：${current_price + random.uniform(5, 15):.2f}
 • **建议**：{random.choice(['买入', '持有', '卖出', '观望'])}
 """
+    if quote.get("notice"):
+        result += f"\n\n> ⚠️ {quote['notice']}，当前显示的是最近一次的缓存数据\n"
+    return result
 
-        # 缓存结果
-        app_data["stock_cache"][symbol] = {
-            "data": result,
-            "timestamp": datetime.datetime.now().isoformat(),
-        }
 
-        return result
+def stock_service(symbol):
+    """股票查询服务"""
+    update_stats("stock_queries")
+
+    try:
+        if not symbol:
+            return "❌ 请输入股票代码"
 
+        symbol = symbol.strip().upper()
+        quote = fetch_stock_quote(symbol)
+        if quote is None:
+            return f"❌ 无法获取股票 {symbol} 的信息"
+        return render_stock(quote)
+
+    except DeadlineExceededError:
+        # 超过调用截止时间时优先返回过期缓存
+        log_api_call("stocks", "quote", False)
+        stale_data = stale_stock_quote(symbol, "股票服务响应超时")
+        if stale_data is not None:
+            return render_stock(stale_data)
+        return "⏱️ 股票服务响应超时，请稍后重试"
+    except HTTPRequestError as e:
+        # 限流、熔断或上游错误时同样优先返回过期缓存
+        log_api_call("stocks", "quote", False)
+        reason = upstream_error_reason(e)
+        stale_data = stale_stock_quote(symbol, reason)
+        if stale_data is not None:
+            return render_stock(stale_data)
+        return f"❌ 股票查询失败：{reason}，请稍后重试"
     except Exception as e:
         log_api_call("stocks", "quote", False)
         return f"❌ 股票查询失败：{str(e)}"
 
 
+def poll_stock_quote(symbol):
+    """自选股轮询使用的行情请求，熔断期间跳过（保留已缓存的行情，不用演示数据覆盖）"""
+    if is_degraded("stocks"):
+        return None
+    return request_stock_quote(symbol)
+
+
+def stock_poll_interval():
+    """自选股轮询的请求间隔：未设置STOCK_POLL_INTERVAL时按股票API限流速率的80%计算，给单独查询留出余量"""
+    if os.getenv("STOCK_POLL_INTERVAL"):
+        return float(os.getenv("STOCK_POLL_INTERVAL"))
+    rate_limit = api_config.get_total_rate_limit("stocks")
+    if not rate_limit:
+        return 1.0
+    return rate_limit["per"] / rate_limit["requests"] / 0.8
+
+
+# 自选股共享轮询：一个后台线程按关注人数和行情新旧轮流刷新所有用户的自选股，查看自选股只读缓存
+stock_poller = QuotePoller(
+    poll_stock_quote,
+    service_caches["stocks"],
+    interval=stock_poll_interval(),
+    on_update=publish_stock_quote,
+)
+
+
+def render_watchlist(viewer, watched):
+    """从缓存读取用户自选股的行情并渲染为Markdown表格（不请求上游）"""
+    quotes = stock_poller.read(viewer)
+    watchers = stock_poller.watchers()
+    rows = []
+    for symbol in watched:
+        quote = quotes.get(symbol)
+        if quote is None:
+            rows.append(f"| {symbol} | ⏳ 等待更新 | - | - | {watchers.get(symbol, 0)} | - |")
+            continue
+        rows.append(
+            f"| {symbol} | ${quote['price']} | {quote['change']} | {quote['change_percent']} "
+            f"| {watchers.get(symbol, 0)} | {quote['updated']} |"
+        )
+
+    pending = sum(1 for symbol in watched if quotes.get(symbol) is None)
+    result = f"""
+# 📋 自选股行情
+
+| 代码 | 当前价格 | 涨跌额 | 涨跌幅 | 关注人数 | 更新时间 |
+|------|----------|--------|--------|----------|----------|
+""" + "\n".join(rows) + f"""
+
+## ⏰ 更新说明
+• 行情由后台统一轮询刷新（约每{stock_poller.interval:g}秒一次请求，同一股票至少间隔{stock_poller.min_age:g}秒），查看不消耗API配额
+• 关注人数多、较久未更新的股票优先刷新，更新后实时推送到页面
+"""
+    if pending:
+        result += f"• {pending} 只股票等待首次更新\n"
+    return result
+
+
+async def stock_watchlist_service(symbols, request: gr.Request = None):
+    """
+    自选股实时行情：更新当前用户的自选股，先输出缓存中的行情，之后每当后台轮询刷新了其中的股票就推送新的行情表
+
+    行情只从缓存读取，在事件循环中等待更新，不占用Gradio的工作线程
+
+    Args:
+        symbols: 以逗号、空格等分隔的股票代码
+        request: Gradio请求，按会话区分用户
+
+    Yields:
+        str: Markdown格式的行情表
+    """
+    update_stats("stock_queries")
+
+    viewer = getattr(request, "session_hash", None) or "default"
+    watched = stock_poller.watch(viewer, re.split(r"[\s,，、;；]+", symbols or ""))
+    if not watched:
+        yield "❌ 请输入股票代码"
+        return
+
+    # 先订阅再输出当前行情，避免漏掉两者之间的更新；心跳时重新读取，保持自选股处于活跃状态
+    updates = live_hub.subscribe(
+        [f"stock:{symbol}" for symbol in watched],
+        heartbeat=LIVE_STREAM_HEARTBEAT,
+        max_seconds=LIVE_STREAM_MAX_SECONDS,
+    )
+    async with aclosing(updates):
+        yield render_watchlist(viewer, watched)
+        async for _ in updates:
+            yield render_watchlist(viewer, watched)
+
+
 def api_status_dashboard():
     """API服务状态仪表板"""
     try:
@@ -1200,6 +1763,194 @@ def api_status_dashboard():
 
         dashboard += f"""
 
+## 🔌 熔断器状态
+"""
+
+        breaker_status = http_utils.circuit_breaker_status()
+        breaker_labels = {
+            "closed": "🟢 闭合",
+            "half_open": "🟡 半开（试探中）",
+            "open": "🔴 打开（快速失败）",
+        }
+        for service_key, service_name in api_services.items():
+            host = urlparse(API_CONFIG[service_key]["base_url"]).netloc.lower()
+            breaker = breaker_status.get(host)
+            if breaker is None:
+                dashboard += f"• **{service_name}**：⚪ 未使用\n"
+                continue
+            breaker_info = f"失败率: {breaker['failure_rate'] * 100:.1f}%"
+            if breaker["state"] == "open":
+                breaker_info += f", 冷却剩余: {breaker['cooldown_remaining']:.0f}s"
+            dashboard += f"• **{service_name}**：{breaker_labels[breaker['state']]} ({breaker_info})\n"
+
+        dashboard += f"""
+
+## 🔁 重试预算
+"""
+
+        budget_status = http_utils.retry_budget_status()
+        for service_key, service_name in api_services.items():
+            host = urlparse(API_CONFIG[service_key]["base_url"]).netloc.lower()
+            budget = budget_status.get(host)
+            if budget is None:
+                dashboard += f"• **{service_name}**：⚪ 未使用\n"
+                continue
+            dashboard += (
+                f"• **{service_name}**：窗口内请求 {budget['requests']}次, "
+                f"重试 {budget['retries']}次 ({budget['retry_ratio'] * 100:.1f}%), "
+                f"累计放行 {budget['granted']}次, 拒绝 {budget['denied']}次\n"
+            )
+        dashboard += f"""
+
+## 🚦 客户端限流
+"""
+
+        limiter_metrics = http_utils.rate_limiter.metrics()
+        for service_key, service_name in api_services.items():
+            rate_limit = api_config.get_total_rate_limit(service_key)
+            if not rate_limit:
+                dashboard += f"• **{service_name}**：不限流\n"
+                continue
+            quota = f"{rate_limit['requests']:.0f}次/{rate_limit['per']:.0f}秒"
+            metrics = limiter_metrics.get(service_key)
+            if metrics is None:
+                dashboard += f"• **{service_name}**：{quota} (尚未调用)\n"
+                continue
+            dashboard += (
+                f"• **{service_name}**：{quota} (剩余令牌: {max(metrics['tokens'], 0):.1f}, "
+                f"放行: {metrics['acquired']}, 排队: {metrics['waited']}, "
+                f"拒绝: {metrics['rejected']}, 平均等待: {metrics['avg_wait']:.2f}s)\n"
+            )
+
+        dashboard += f"""
+
+## 🔑 API密钥池
+"""
+
+        key_pool_status = http_utils.key_pools.snapshot()
+        for service_key, service_name in api_services.items():
+            keys = key_pool_status.get(service_key)
+            if not keys:
+                key_count = len(api_config.get_api_keys(service_key))
+                dashboard += f"• **{service_name}**：{key_count}个密钥 (尚未调用)\n"
+                continue
+            key_info = ", ".join(
+                f"{key['key']} 使用{key['uses']}次"
+                + (f"/429 {key['throttled']}次" if key["throttled"] else "")
+                + (f"/冷却{key['cooldown_remaining']:.0f}s" if key["cooldown_remaining"] > 0 else "")
+                for key in keys
+            )
+            dashboard += f"• **{service_name}**：{len(keys)}个密钥 ({key_info})\n"
+
+        dashboard += f"""
+
+## 📊 配额余量
+"""
+
+        quota_status = http_utils.key_pools.quota_tracker.snapshot()
+        window_names = {60: ("minute", "本分钟"), 3600: ("hour", "本小时"), 86400: ("day", "今日")}
+        for service_key, service_name in api_services.items():
+            usage = quota_status.get(service_key)
+            if not usage:
+                dashboard += f"• **{service_name}**：尚无调用记录\n"
+                continue
+            parts = [f"今日{sum(item['day'] for item in usage)}次"]
+            # 配置的配额周期为一分钟、一小时或一天时显示当前窗口的余量
+            rate_limit = api_config.get_total_rate_limit(service_key)
+            if rate_limit and rate_limit["per"] in window_names:
+                window, label = window_names[rate_limit["per"]]
+                used = sum(item[window] for item in usage)
+                parts.append(f"{label}余量 {max(0, int(rate_limit['requests'] - used))}/{int(rate_limit['requests'])}")
+            # 服务商在响应头中报告的剩余配额
+            reported = [item for item in usage if item["remaining"] is not None]
+            if reported:
+                remaining = sum(item["remaining"] for item in reported)
+                limit = sum(item["limit"] or 0 for item in reported)
+                parts.append(f"服务商报告剩余 {remaining}" + (f"/{limit:.0f}" if limit else ""))
+                resets = [item["reset_at"] for item in reported if item["reset_at"] and item["reset_at"] > time.time()]
+                if resets:
+                    parts.append(f"{datetime.datetime.fromtimestamp(min(resets)).strftime('%H:%M:%S')}重置")
+            blocked = [item["blocked_until"] for item in usage if item["blocked_until"]]
+            if len(blocked) == len(usage):
+                parts.append(f"⛔ 已用完，{datetime.datetime.fromtimestamp(min(blocked)).strftime('%H:%M:%S')}恢复")
+            dashboard += f"• **{service_name}**：{', '.join(parts)}\n"
+
+        dashboard += f"""
+
+## ⏱️ 请求耗时分解 (p95)
+"""
+
+        def format_p95(histogram):
+            return f"{histogram['p95'] * 1000:.0f}ms" if histogram["count"] else "-"
+
+        http_metrics = http_utils.metrics()
+        for service_key, service_name in api_services.items():
+            host = urlparse(API_CONFIG[service_key]["base_url"]).netloc.lower()
+            endpoints = http_metrics.get(host)
+            if not endpoints:
+                dashboard += f"• **{service_name}**：⚪ 未使用\n"
+                continue
+            for endpoint, metrics in endpoints.items():
+                latency = metrics["latency"]
+                dashboard += (
+                    f"• **{service_name}** `{endpoint}`：DNS {format_p95(latency['dns'])}, "
+                    f"连接 {format_p95(latency['connect'])}, TLS {format_p95(latency['tls'])}, "
+                    f"首字节 {format_p95(latency['ttfb'])}, 总计 {format_p95(latency['total'])}, "
+                    f"重试 {metrics['retries']['sum']:.0f}次, 请求 {metrics['requests']}次\n"
+                )
+
+        cache_stats = cache_manager.stats()
+        max_entries = cache_stats["max_entries"] or "不限"
+        dashboard += f"""
+
+## 🗄️ 结果缓存
+• **缓存条目**：{cache_stats['size']}/{max_entries}，已淘汰 {cache_stats['evictions']}，已过期 {cache_stats['expirations']}
+"""
+
+        for service, cache in service_caches.items():
+            stats = cache.stats()
+            dashboard += (
+                f"• **{api_services[service]}**：{stats['size']}条, 有效期{stats['ttl'] // 60}分钟, "
+                f"命中率 {stats['hit_rate']:.0%} ({stats['hits']}/{stats['hits'] + stats['misses']})"
+                + (f", 降级使用过期数据 {stats['stale_hits']}次" if stats["stale_hits"] else "")
+                + "\n"
+            )
+
+        hub_stats = live_hub.stats()
+        if hub_stats["published"]:
+            dashboard += f"""
+## 📡 实时推送
+• **在线订阅**：{hub_stats['subscribers']} 个会话，主题 {hub_stats['topics']} 个
+• **推送**：发布 {hub_stats['published']} 次更新，送达 {hub_stats['delivered']} 次
+"""
+
+        poller_stats = stock_poller.stats()
+        if poller_stats["viewers"]:
+            dashboard += f"""
+## 📋 自选股轮询
+• **关注用户**：{poller_stats['viewers']}，股票 {poller_stats['symbols']} 只
+• **轮询**：每{poller_stats['interval']:g}秒一次，已请求 {poller_stats['polls']} 次，失败 {poller_stats['errors']} 次
+"""
+
+        prefetch_stats = news_prefetcher.stats()
+        if prefetch_stats["running"]:
+            next_in = prefetch_stats["next_in"]
+            dashboard += f"""
+## ⏰ 新闻预刷新
+• **调度类别**：{prefetch_stats['scheduled']}，访问不足已退出 {prefetch_stats['idle']}
+• **刷新**：最少间隔{prefetch_stats['interval']:g}秒，已刷新 {prefetch_stats['refreshes']} 次，失败 {prefetch_stats['errors']} 次，下次 {f'{next_in:.0f}秒后' if next_in is not None else '-'}
+"""
+
+        if TRANSLATION_FUZZY_ENABLED:
+            fuzzy_stats = translation_fuzzy_index.stats()
+            dashboard += f"""
+## 🔍 翻译近似匹配
+• **索引句子**：{fuzzy_stats['entries']}/{fuzzy_stats['max_entries']}，已淘汰 {fuzzy_stats['evictions']}
+• **命中率**：{fuzzy_stats['hit_rate']:.0%} ({fuzzy_stats['hits']}/{fuzzy_stats['queries']})，相似度阈值 {fuzzy_stats['threshold']:.0%}
+"""
+
+        dashboard += f"""
+
 ## 🕐 最近调用记录
 """
 
@@ -1788,7 +2539,7 @@ with gr.Blocks(
                             weather_city = gr.Textbox(
                                 label="🏙️ 城市名称",
                                 placeholder="输入城市名称，如：北京、上海、New York...",
-                                info="支持中英文城市名称",
+                                info="支持中英文城市名称，输入多个城市（用逗号分隔）可对比查询",
                             )
 
                             weather_units = gr.Radio(
@@ -1808,7 +2559,7 @@ with gr.Blocks(
                             )
 
                     weather_btn.click(
-                        lambda city, units: weather_service(
+                        lambda city, units: weather_query(
                             city,
                             (
                                 "metric"
@@ -1933,6 +2684,10 @@ with gr.Blocks(
                                 "📰 获取新闻", variant="primary", size="lg"
                             )
 
+                            news_live_btn = gr.Button(
+                                "📡 实时推送", variant="secondary"
+                            )
+
                         with gr.Column(scale=3):
                             news_result = gr.Markdown(
                                 label="📰 新闻资讯", value="等待获取..."
@@ -1946,6 +2701,21 @@ with gr.Blocks(
                         outputs=news_result,
                     )
 
+                    async def news_live(category, country):
+                        # 流式输出：该类别新闻刷新后自动推送到页面
+                        stream = news_stream_service(category, "cn" if country == "中国" else "us")
+                        async with aclosing(stream):
+                            async for news in stream:
+                                yield news
+
+                    # 推送连接长时间保持；异步生成器等待时不占用工作线程，不限制并发以便多个会话同时订阅
+                    news_live_btn.click(
+                        news_live,
+                        inputs=[news_category, news_country],
+                        outputs=news_result,
+                        concurrency_limit=None,
+                    )
+
                 # 汇率转换服务
                 with gr.TabItem("💱 汇率转换"):
                     gr.Markdown(
@@ -2110,6 +2880,34 @@ with gr.Blocks(
                         stock_service, inputs=stock_symbol, outputs=stock_result
                     )
 
+                    gr.Markdown(
+                        """
+                    ### 📋 自选股
+                    行情由后台统一轮询刷新，多人关注同一股票时共享同一份行情，查看不消耗API配额
+                    """
+                    )
+
+                    with gr.Row():
+                        with gr.Column(scale=2):
+                            watchlist_symbols = gr.Textbox(
+                                label="📋 自选股代码",
+                                placeholder="多个代码用逗号或空格分隔，如：AAPL, TSLA, MSFT",
+                            )
+
+                            watchlist_btn = gr.Button(
+                                "📡 关注并实时推送", variant="secondary"
+                            )
+
+                        with gr.Column(scale=3):
+                            watchlist_result = gr.Markdown(value="尚未关注股票")
+
+                    watchlist_btn.click(
+                        stock_watchlist_service,
+                        inputs=watchlist_symbols,
+                        outputs=watchlist_result,
+                        concurrency_limit=None,
+                    )
+
         # 数据分析仪表板
         with gr.TabItem("📊 数据分析"):
             gr.Markdown(
@@ -2236,4 +3034,14 @@ with gr.Blocks(
     )
 
 if __name__ == "__main__":
+    # 预热到已启用API主机的连接（CONNECTION_WARMUP_ENABLED=true时）
+    if os.getenv("CONNECTION_WARMUP_ENABLED", "false").lower() == "true":
+        from src.modules.utils.connection_warmer import ConnectionWarmer
+
+        warmer = ConnectionWarmer.from_env()
+        warmer.warm_up()
+        warmer.start()
+    # 在缓存到期前后台刷新常用的新闻类别（NEWS_PREFETCH_ENABLED=true时）
+    if os.getenv("NEWS_PREFETCH_ENABLED", "false").lower() == "true":
+        news_prefetcher.start()
     demo.launch(server_name="0.0.0.0", server_port=7860, share=True, show_error=True)
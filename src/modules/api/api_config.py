@@ -4,7 +4,11 @@ API配置模块
 """
 
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+
+from src.modules.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
 
 class APIConfig:
     """API配置类，负责从环境变量读取和管理API配置"""
@@ -15,39 +19,125 @@ class APIConfig:
         self._config = self._load_config()
     
     def _load_config(self) -> Dict[str, Dict[str, Any]]:
-        """从环境变量加载API配置"""
-        return {
+        """从环境变量加载API配置（base_url可通过{PREFIX}_API_BASE_URL覆盖，例如指向本地替身服务）"""
+        config = {
             "weather": {
-                "api_key": os.getenv("WEATHER_API_KEY", ""),
-                "base_url": "https://api.openweathermap.org/data/2.5/weather",
+                "api_keys": self._parse_api_keys("WEATHER"),
+                "key_param": "appid",
+                "base_url": os.getenv("WEATHER_API_BASE_URL", "https://api.openweathermap.org/data/2.5/weather"),
                 "enabled": os.getenv("WEATHER_API_ENABLED", "false").lower() == "true",
+                "rate_limit": self._parse_rate_limit("WEATHER", "60/60", "10"),
             },
             "translation": {
-                "api_key": os.getenv("TRANSLATION_API_KEY", ""),
-                "base_url": "https://translation.googleapis.com/language/translate/v2",
+                "api_keys": self._parse_api_keys("TRANSLATION"),
+                "key_param": "key",
+                "base_url": os.getenv("TRANSLATION_API_BASE_URL", "https://translation.googleapis.com/language/translate/v2"),
                 "enabled": os.getenv("TRANSLATION_API_ENABLED", "false").lower() == "true",
+                "rate_limit": self._parse_rate_limit("TRANSLATION", "600/60", "50"),
             },
             "news": {
-                "api_key": os.getenv("NEWS_API_KEY", ""),
-                "base_url": "https://newsapi.org/v2/top-headlines",
+                "api_keys": self._parse_api_keys("NEWS"),
+                "key_param": "apiKey",
+                "base_url": os.getenv("NEWS_API_BASE_URL", "https://newsapi.org/v2/top-headlines"),
                 "enabled": os.getenv("NEWS_API_ENABLED", "false").lower() == "true",
+                "rate_limit": self._parse_rate_limit("NEWS", "100/86400", "10"),
             },
             "currency": {
-                "api_key": os.getenv("CURRENCY_API_KEY", ""),
-                "base_url": "https://api.exchangerate-api.com/v4/latest",
+                "api_keys": self._parse_api_keys("CURRENCY"),
+                "key_param": None,
+                "base_url": os.getenv("CURRENCY_API_BASE_URL", "https://api.exchangerate-api.com/v4/latest"),
                 "enabled": os.getenv("CURRENCY_API_ENABLED", "false").lower() == "true",
+                "rate_limit": self._parse_rate_limit("CURRENCY", "60/3600", "10"),
             },
             "ipinfo": {
-                "api_key": os.getenv("IPINFO_API_KEY", ""),
-                "base_url": "https://ipinfo.io",
+                "api_keys": self._parse_api_keys("IPINFO"),
+                "key_param": "token",
+                "base_url": os.getenv("IPINFO_API_BASE_URL", "https://ipinfo.io"),
                 "enabled": os.getenv("IPINFO_API_ENABLED", "false").lower() == "true",
+                "rate_limit": self._parse_rate_limit("IPINFO", "1000/86400", "20"),
             },
             "stocks": {
-                "api_key": os.getenv("STOCKS_API_KEY", ""),
-                "base_url": "https://www.alphavantage.co/query",
+                "api_keys": self._parse_api_keys("STOCKS"),
+                "key_param": "apikey",
+                "base_url": os.getenv("STOCKS_API_BASE_URL", "https://www.alphavantage.co/query"),
                 "enabled": os.getenv("STOCKS_API_ENABLED", "false").lower() == "true",
+                "rate_limit": self._parse_rate_limit("STOCKS", "5/60", "5"),
             },
         }
+        # api_key保留为第一个密钥，兼容只使用单个密钥的调用方
+        for api in config.values():
+            api["api_key"] = api["api_keys"][0] if api["api_keys"] else ""
+        return config
+    
+    @staticmethod
+    def _parse_api_keys(prefix: str) -> List[str]:
+        """
+        解析API密钥列表
+        
+        {prefix}_API_KEYS 为逗号分隔的多个密钥，未设置时使用单个密钥 {prefix}_API_KEY。
+        
+        Args:
+            prefix (str): 环境变量前缀
+        
+        Returns:
+            List[str]: 去除空白和重复项后的密钥列表
+        """
+        value = os.getenv(f"{prefix}_API_KEYS") or os.getenv(f"{prefix}_API_KEY", "")
+        keys = []
+        for key in value.split(","):
+            key = key.strip()
+            if key and key not in keys:
+                keys.append(key)
+        return keys
+    
+    @staticmethod
+    def _parse_rate_limit(prefix: str, default_limit: str, default_burst: str) -> Optional[Dict[str, float]]:
+        """
+        解析限流配置
+        
+        环境变量 {prefix}_API_RATE_LIMIT 格式为 "请求数/秒数"，例如 "5/60" 表示每分钟5次；
+        设置为 "0" 或 "off" 表示不限流。{prefix}_API_RATE_BURST 为允许的突发请求数。
+        
+        Args:
+            prefix (str): 环境变量前缀
+            default_limit (str): 默认限流配置
+            default_burst (str): 默认突发容量
+        
+        Returns:
+            Optional[Dict[str, float]]: 限流配置，不限流时返回None
+        """
+        value = os.getenv(f"{prefix}_API_RATE_LIMIT", default_limit)
+        burst = os.getenv(f"{prefix}_API_RATE_BURST", default_burst)
+        try:
+            return APIConfig._rate_limit_values(value, burst)
+        except ValueError:
+            # 配置有误时不影响应用启动，按默认限流运行
+            logger.warning(
+                f"限流配置无效（{prefix}_API_RATE_LIMIT={value!r}, {prefix}_API_RATE_BURST={burst!r}），"
+                f"使用默认值 {default_limit}，突发 {default_burst}"
+            )
+            return APIConfig._rate_limit_values(default_limit, default_burst)
+    
+    @staticmethod
+    def _rate_limit_values(value: str, burst: str) -> Optional[Dict[str, float]]:
+        """
+        把 "请求数/秒数" 和突发容量转换为限流配置
+        
+        Raises:
+            ValueError: 格式错误或数值不是正数时抛出
+        """
+        value = value.strip().lower()
+        if value in ("", "0", "off", "none"):
+            return None
+        count, _, per = value.partition("/")
+        limit = {
+            "requests": float(count),
+            "per": float(per or 1),
+            "burst": float(burst),
+        }
+        if min(limit.values()) <= 0:
+            raise ValueError(f"限流配置必须为正数: {value}")
+        return limit
     
     @property
     def config(self) -> Dict[str, Dict[str, Any]]:
@@ -77,7 +167,7 @@ class APIConfig:
             bool: 是否启用
         """
         api_config = self.get_api(api_name)
-        return api_config.get('enabled', False) and bool(api_config.get('api_key', ''))
+        return api_config.get('enabled', False) and bool(self.get_api_keys(api_name))
     
     def get_api_key(self, api_name: str) -> str:
         """
@@ -91,6 +181,33 @@ class APIConfig:
         """
         return self.get_api(api_name).get('api_key', '')
     
+    def get_api_keys(self, api_name: str) -> List[str]:
+        """
+        获取指定API配置的所有密钥
+        
+        Args:
+            api_name (str): API名称
+        
+        Returns:
+            List[str]: API密钥列表
+        """
+        api = self.get_api(api_name)
+        if 'api_keys' in api:
+            return list(api['api_keys'])
+        return [api['api_key']] if api.get('api_key') else []
+    
+    def get_key_param(self, api_name: str) -> Optional[str]:
+        """
+        获取指定API传递密钥的查询参数名
+        
+        Args:
+            api_name (str): API名称
+        
+        Returns:
+            Optional[str]: 参数名，不需要密钥时返回None
+        """
+        return self.get_api(api_name).get('key_param')
+    
     def get_base_url(self, api_name: str) -> str:
         """
         获取指定API的基础URL
@@ -102,6 +219,38 @@ class APIConfig:
             str: 基础URL
         """
         return self.get_api(api_name).get('base_url', '')
+    
+    def get_rate_limit(self, api_name: str) -> Optional[Dict[str, float]]:
+        """
+        获取指定API的客户端限流配置
+        
+        Args:
+            api_name (str): API名称
+        
+        Returns:
+            Optional[Dict[str, float]]: 包含requests、per、burst的限流配置，不限流时返回None
+        """
+        return self.get_api(api_name).get('rate_limit')
+    
+    def get_total_rate_limit(self, api_name: str) -> Optional[Dict[str, float]]:
+        """
+        获取指定API所有密钥合计的限流配置（单个密钥的配额乘以密钥数）
+        
+        Args:
+            api_name (str): API名称
+        
+        Returns:
+            Optional[Dict[str, float]]: 包含requests、per、burst的限流配置，不限流时返回None
+        """
+        rate_limit = self.get_rate_limit(api_name)
+        keys = len(self.get_api_keys(api_name))
+        if not rate_limit or keys <= 1:
+            return rate_limit
+        return {
+            "requests": rate_limit["requests"] * keys,
+            "per": rate_limit["per"],
+            "burst": rate_limit["burst"] * keys,
+        }
 
 # 创建全局API配置实例
 api_config = APIConfig()
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""
+城市名称索引模块
+将不同写法（中英文、繁简体、旧称、日韩文等）和大小写、空格、标点的城市名称统一到规范的城市ID，
+使天气缓存键和上游查询对同一城市保持一致
+"""
+
+import os
+import json
+import unicodedata
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+# 默认的城市别名数据：[[城市ID, 显示名称, [别名, ...]], ...]，城市ID为OpenWeatherMap使用的GeoNames ID
+DEFAULT_CITY_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'cities.json')
+
+
+class City(NamedTuple):
+    """规范城市"""
+    id: int
+    name: str
+
+
+def normalize_city_name(name: str) -> str:
+    """
+    规范化城市名称：统一全角半角和大小写，去掉拉丁字母的变音符号、空白和标点
+
+    例如 " São Paulo "、"sao-paulo" 都规范化为 "saopaulo"，"ＢＥＩＪＩＮＧ" 规范化为 "beijing"。
+    """
+    text = unicodedata.normalize('NFKC', name or '').casefold()
+    # 只去掉组合用变音符号（U+0300~U+036F），保留假名浊音符号等其他文字的组合字符
+    text = ''.join(
+        ch for ch in unicodedata.normalize('NFKD', text) if not '\u0300' <= ch <= '\u036f'
+    )
+    text = unicodedata.normalize('NFC', text)
+    return ''.join(ch for ch in text if unicodedata.category(ch)[0] in 'LNM')
+
+
+class CityIndex:
+    """城市别名索引：规范化名称 -> 城市"""
+
+    def __init__(self, cities: Iterable[Sequence] = ()):
+        """
+        初始化城市索引
+
+        Args:
+            cities: [城市ID, 显示名称, [别名, ...]] 形式的城市数据
+        """
+        self._cities: List[City] = []
+        # 规范化名称 -> self._cities中的位置（同一城市的所有别名共享一个City对象）
+        self._lookup: Dict[str, int] = {}
+        for city_id, name, aliases in cities:
+            position = len(self._cities)
+            self._cities.append(City(int(city_id), name))
+            for alias in (name, *aliases):
+                self._lookup.setdefault(normalize_city_name(alias), position)
+        self._lookup.pop('', None)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "CityIndex":
+        """
+        从JSON文件加载城市索引，文件不存在或格式错误时返回空索引
+
+        Args:
+            path: 城市数据文件，默认读取CITY_INDEX_PATH（src/modules/api/data/cities.json）
+
+        Returns:
+            CityIndex: 城市索引
+        """
+        path = path or os.getenv('CITY_INDEX_PATH', DEFAULT_CITY_DATA)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(json.load(f))
+        except (OSError, ValueError, TypeError):
+            return cls()
+
+    def __len__(self) -> int:
+        return len(self._cities)
+
+    def resolve(self, name: str) -> Optional[City]:
+        """
+        查找城市名称对应的规范城市
+
+        Args:
+            name: 用户输入的城市名称
+
+        Returns:
+            Optional[City]: 规范城市，索引中没有时返回None
+        """
+        key = normalize_city_name(name)
+        position = self._lookup.get(key)
+        # 中文名称带"市"后缀时去掉后缀再查找（北京市 -> 北京）
+        if position is None and len(key) > 1 and key.endswith('市'):
+            position = self._lookup.get(key[:-1])
+        return self._cities[position] if position is not None else None
+
+    def cache_key(self, name: str) -> str:
+        """
+        获取城市名称的缓存键：索引中的城市使用城市ID，其他城市使用规范化名称
+
+        Args:
+            name: 用户输入的城市名称
+
+        Returns:
+            str: 同一城市的不同写法得到相同的键
+        """
+        city = self.resolve(name)
+        if city is not None:
+            return f"id:{city.id}"
+        return f"name:{normalize_city_name(name) or name.strip()}"
+
+
+# 启动时加载一次全局城市索引
+city_index = CityIndex.load()
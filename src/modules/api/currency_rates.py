@@ -0,0 +1,167 @@
+"""
+汇率表模块
+按基准货币缓存完整的汇率表，一次请求即可换算表中任意两种货币，
+没有缓存时通过枢轴货币的汇率表交叉换算，并提供基于numpy的批量换算
+"""
+
+import os
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+from src.modules.cache.cache_manager import CacheNamespace
+
+
+class UnknownCurrencyError(ValueError):
+    """汇率表中没有该货币"""
+    pass
+
+
+class RateTable:
+    """以某种货币为基准的汇率表（1单位基准货币可兑换的各货币数量）"""
+
+    def __init__(self, base: str, rates: Dict[str, float], date: Optional[str] = None, demo: bool = False):
+        """
+        初始化汇率表
+
+        Args:
+            base: 基准货币代码
+            rates: 各货币相对基准货币的汇率
+            date: 汇率日期
+            demo: 是否为演示数据（不写入缓存）
+        """
+        self.base = base.upper()
+        self.rates = {code.upper(): float(rate) for code, rate in rates.items() if rate}
+        self.rates[self.base] = 1.0
+        self.date = date
+        self.demo = demo
+
+    def __contains__(self, code: str) -> bool:
+        return code.upper() in self.rates
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        """
+        获取1单位from_currency可兑换的to_currency数量，两种货币都不是基准货币时经基准货币交叉换算
+
+        Raises:
+            UnknownCurrencyError: 汇率表中没有其中一种货币
+        """
+        from_currency, to_currency = from_currency.upper(), to_currency.upper()
+        for code in (from_currency, to_currency):
+            if code not in self.rates:
+                raise UnknownCurrencyError(f"汇率表({self.base})中没有货币: {code}")
+        return self.rates[to_currency] / self.rates[from_currency]
+
+
+class CurrencyRates:
+    """按基准货币缓存汇率表，所有货币对的换算都从缓存的汇率表推导"""
+
+    def __init__(
+        self,
+        fetch_table: Callable[[str], RateTable],
+        cache: Optional[CacheNamespace] = None,
+        pivot: Optional[str] = None
+    ):
+        """
+        初始化汇率换算
+
+        Args:
+            fetch_table: 获取指定基准货币汇率表的函数（调用上游API），上游不可用时可返回demo=True的汇率表
+            cache: 缓存汇率表的命名空间，默认按CURRENCY_CACHE_TTL（600秒）缓存
+            pivot: 枢轴货币，没有可用缓存时获取该货币的汇率表交叉换算，默认读取CURRENCY_PIVOT（USD）
+        """
+        self.fetch_table = fetch_table
+        self.cache = cache or CacheNamespace("currency_rates", int(os.getenv("CURRENCY_CACHE_TTL", "600")))
+        self.pivot = (pivot or os.getenv("CURRENCY_PIVOT", "USD")).upper()
+        self._fetch_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def table(self, base: str) -> RateTable:
+        """
+        获取基准货币的汇率表，缓存过期时重新获取（同一基准货币同时只发出一个请求）；
+        演示汇率表不写入缓存，上游恢复后的下一次查询即可得到真实汇率
+
+        Args:
+            base: 基准货币代码
+
+        Returns:
+            RateTable: 汇率表
+        """
+        base = base.upper()
+        table = self.cache.get(base)
+        if table is not None:
+            return table
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(base, threading.Lock())
+        with fetch_lock:
+            # 等待期间其他线程可能已经获取（上面的查找已计入统计，这里不再重复计数）
+            table = self.cache.peek(base)
+            if table is None:
+                table = self.fetch_table(base)
+                if not table.demo:
+                    self.cache.set(base, table)
+        return table
+
+    def quote(self, from_currency: str, to_currency: str) -> Tuple[float, RateTable]:
+        """
+        获取汇率及推导该汇率的汇率表
+
+        依次尝试已缓存的原始货币、枢轴货币和目标货币的汇率表；都没有时获取枢轴货币的汇率表，
+        一次请求覆盖所有货币对；枢轴货币的汇率表中没有该货币时再获取原始货币的汇率表。
+        候选汇率表不计统计地探测，只有实际使用或需要获取的汇率表计入缓存命中统计。
+
+        Args:
+            from_currency: 原始货币代码
+            to_currency: 目标货币代码
+
+        Returns:
+            Tuple[float, RateTable]: 1单位原始货币可兑换的目标货币数量、使用的汇率表
+
+        Raises:
+            UnknownCurrencyError: 汇率表中没有其中一种货币
+        """
+        from_currency, to_currency = from_currency.upper(), to_currency.upper()
+        for base in dict.fromkeys((from_currency, self.pivot, to_currency)):
+            table = self.cache.peek(base)
+            if table is not None and from_currency in table and to_currency in table:
+                return table.rate(from_currency, to_currency), self.cache.get(base, table)
+        table = self.table(self.pivot)
+        if from_currency not in table or to_currency not in table:
+            table = self.table(from_currency)
+        return table.rate(from_currency, to_currency), table
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        """获取1单位原始货币可兑换的目标货币数量"""
+        return self.quote(from_currency, to_currency)[0]
+
+    def convert_batch(
+        self,
+        amounts: Union[float, Iterable[float]],
+        from_currencies: Union[str, Iterable[str]],
+        to_currencies: Union[str, Iterable[str]]
+    ) -> np.ndarray:
+        """
+        批量换算，金额和货币按numpy规则广播（例如多个金额共用一个货币对）
+
+        每个不同的货币对只查询一次汇率，换算本身为向量运算。
+
+        Args:
+            amounts: 金额或金额数组
+            from_currencies: 原始货币代码或代码数组
+            to_currencies: 目标货币代码或代码数组
+
+        Returns:
+            np.ndarray: 换算后的金额，形状为广播后的形状
+
+        Raises:
+            UnknownCurrencyError: 汇率表中没有其中一种货币
+        """
+        amounts, from_codes, to_codes = np.broadcast_arrays(
+            np.asarray(amounts, dtype=float),
+            np.char.upper(np.asarray(from_currencies, dtype=str)),
+            np.char.upper(np.asarray(to_currencies, dtype=str))
+        )
+        pairs, inverse = np.unique(np.char.add(np.char.add(from_codes, "/"), to_codes), return_inverse=True)
+        pair_rates = np.array([self.rate(*pair.split("/")) for pair in pairs], dtype=float)
+        return amounts * pair_rates[inverse.reshape(amounts.shape)]
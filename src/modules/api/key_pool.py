@@ -0,0 +1,210 @@
+"""
+API密钥池模块
+同一服务商配置多个API密钥时，按最少使用或轮询方式分摊调用，
+每个密钥单独统计配额，收到429或配额统计显示已用完时暂停使用该密钥
+"""
+
+import os
+import time
+import threading
+from typing import Callable, Dict, Any, List, Optional
+
+from src.modules.api.api_config import APIConfig, api_config as default_api_config
+from src.modules.api.quota_tracker import QuotaTracker, parse_retry_after, quota_tracker as default_quota_tracker
+from src.modules.utils.rate_limiter import TokenBucket, RateLimitMode
+
+
+class KeyStrategy:
+    """密钥选择策略常量"""
+    LEAST_USED = "least_used"    # 剩余配额最多（同等时累计使用最少）的密钥
+    ROUND_ROBIN = "round_robin"  # 依次轮换
+
+
+class _KeyState:
+    """单个密钥的使用状态"""
+
+    def __init__(self, key: str, rate_limit: Optional[Dict[str, float]]):
+        self.key = key
+        self.bucket = None
+        if rate_limit and rate_limit.get('requests', 0) > 0 and rate_limit.get('per', 0) > 0:
+            self.bucket = TokenBucket(
+                rate=rate_limit['requests'] / rate_limit['per'],
+                capacity=rate_limit.get('burst') or rate_limit['requests']
+            )
+        self.uses = 0
+        self.throttled = 0
+        self.cooldown_until = 0.0
+
+    def tokens(self) -> float:
+        return self.bucket.metrics()['tokens'] if self.bucket is not None else float('inf')
+
+
+class APIKeyPool:
+    """单个服务商的API密钥池"""
+
+    def __init__(
+        self,
+        name: str,
+        keys: List[str],
+        rate_limit: Optional[Dict[str, float]] = None,
+        strategy: str = KeyStrategy.LEAST_USED,
+        cooldown: float = 60.0,
+        quota_check: Optional[Callable[[str], Optional[float]]] = None
+    ):
+        """
+        初始化密钥池
+
+        Args:
+            name: API名称
+            keys: API密钥列表
+            rate_limit: 单个密钥的配额（requests/per/burst），为None时不按密钥统计配额
+            strategy: 密钥选择策略，见KeyStrategy
+            cooldown: 收到429且没有Retry-After时暂停使用该密钥的时间（秒）
+            quota_check: 返回密钥配额重置时间（Unix时间戳）的函数，配额未用完时返回None
+        """
+        self.name = name
+        self.strategy = strategy
+        self.cooldown = cooldown
+        self.quota_check = quota_check
+        self._keys = [_KeyState(key, rate_limit) for key in keys]
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _ready_at(self, state: _KeyState) -> float:
+        """密钥可以再次使用的单调时钟时间（429冷却和配额重置取较晚者）"""
+        ready_at = state.cooldown_until
+        if self.quota_check is not None:
+            reset_at = self.quota_check(state.key)
+            if reset_at is not None:
+                ready_at = max(ready_at, time.monotonic() + reset_at - time.time())
+        return ready_at
+
+    def all_cooling(self) -> bool:
+        """是否所有密钥都处于429冷却中或配额已用完"""
+        now = time.monotonic()
+        with self._lock:
+            return bool(self._keys) and all(self._ready_at(state) > now for state in self._keys)
+
+    def acquire(self) -> Optional[str]:
+        """
+        选择一个密钥并计入一次使用
+
+        优先选择未冷却且配额未用完的密钥；都已用完时选择未冷却的密钥，由服务商决定是否限流；
+        全部冷却中时选择最早结束冷却的密钥。
+
+        Returns:
+            Optional[str]: 选中的密钥，密钥池为空时返回None
+        """
+        if not self._keys:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            ready_at = {state.key: self._ready_at(state) for state in self._keys}
+            ready = [state for state in self._keys if ready_at[state.key] <= now]
+            if not ready:
+                chosen = min(self._keys, key=lambda state: ready_at[state.key])
+            elif self.strategy == KeyStrategy.ROUND_ROBIN:
+                order = self._keys[self._next:] + self._keys[:self._next]
+                candidates = [state for state in order if state in ready]
+                chosen = next((state for state in candidates if state.tokens() >= 1), candidates[0])
+                self._next = (self._keys.index(chosen) + 1) % len(self._keys)
+            else:
+                chosen = max(ready, key=lambda state: (state.tokens(), -state.uses))
+            chosen.uses += 1
+            if chosen.bucket is not None:
+                chosen.bucket.acquire(RateLimitMode.SHED)
+            return chosen.key
+
+    def report(self, key: str, status_code: int, retry_after: Optional[str] = None) -> None:
+        """
+        报告使用某个密钥的调用结果，429时暂停使用该密钥
+
+        Args:
+            key: 使用的密钥
+            status_code: HTTP状态码
+            retry_after: 响应的Retry-After头
+        """
+        if status_code != 429:
+            return
+        delay = parse_retry_after(retry_after)
+        with self._lock:
+            for state in self._keys:
+                if state.key == key:
+                    state.throttled += 1
+                    state.cooldown_until = time.monotonic() + (self.cooldown if delay is None else delay)
+                    if state.bucket is not None:
+                        state.bucket.drain()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """获取各密钥的使用状态（密钥只显示末4位）"""
+        now = time.monotonic()
+        with self._lock:
+            states = list(self._keys)
+        return [
+            {
+                'key': '****' + state.key[-4:],
+                'uses': state.uses,
+                'throttled': state.throttled,
+                'tokens': state.tokens() if state.bucket is not None else None,
+                'cooldown_remaining': max(0.0, self._ready_at(state) - now),
+            }
+            for state in states
+        ]
+
+
+class APIKeyPools:
+    """按API名称管理密钥池，密钥和单密钥配额来自APIConfig"""
+
+    def __init__(
+        self,
+        api_config: Optional[APIConfig] = None,
+        strategy: Optional[str] = None,
+        cooldown: Optional[float] = None,
+        quota_tracker: Optional[QuotaTracker] = None
+    ):
+        """
+        初始化密钥池注册表
+
+        Args:
+            api_config: 提供密钥列表和配额的配置，默认使用全局实例
+            strategy: 密钥选择策略，默认读取API_KEY_STRATEGY（least_used）
+            cooldown: 429冷却时间（秒），默认读取API_KEY_COOLDOWN（60）
+            quota_tracker: 持久化的配额统计，配额已用完的密钥在重置前不再使用，默认使用全局实例
+        """
+        self.api_config = api_config or default_api_config
+        self.strategy = strategy or os.getenv('API_KEY_STRATEGY', KeyStrategy.LEAST_USED)
+        self.cooldown = cooldown if cooldown is not None else float(os.getenv('API_KEY_COOLDOWN', '60'))
+        self.quota_tracker = quota_tracker or default_quota_tracker
+        self._pools: Dict[str, APIKeyPool] = {}
+        self._lock = threading.Lock()
+
+    def get(self, api_name: str) -> APIKeyPool:
+        """获取（必要时创建）指定API的密钥池"""
+        pool = self._pools.get(api_name)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(api_name)
+                if pool is None:
+                    pool = APIKeyPool(
+                        api_name,
+                        self.api_config.get_api_keys(api_name),
+                        self.api_config.get_rate_limit(api_name),
+                        self.strategy,
+                        self.cooldown,
+                        lambda key, name=api_name: self.quota_tracker.blocked_until(name, key)
+                    )
+                    self._pools[api_name] = pool
+        return pool
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """获取所有已使用的密钥池状态"""
+        with self._lock:
+            pools = dict(self._pools)
+        return {name: pool.snapshot() for name, pool in pools.items() if len(pool)}
+
+
+# 创建全局密钥池实例
+api_key_pools = APIKeyPools()
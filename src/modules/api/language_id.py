@@ -0,0 +1,208 @@
+"""
+本地语言识别模块
+按文字判断日文（含假名）和韩文，拉丁字母文本用字符n-gram概率模型区分英、法、德、西班牙文；
+翻译前在本地确定源语言，避免请求上游的自动检测。
+西里尔字母、阿拉伯字母和只有汉字的文本由多种语言共用，只给出猜测（可信度为0），由上游检测
+"""
+
+import os
+import json
+import math
+import zlib
+import threading
+import unicodedata
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+# 拉丁字母语言的n-gram频率表：{"languages": {语言代码: {n-gram: 次数}}}
+DEFAULT_PROFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'language_profiles.json')
+
+# 非拉丁文字的Unicode范围
+_SCRIPT_RANGES = [
+    (0x0400, 0x04FF, 'cyrillic'),
+    (0x0600, 0x06FF, 'arabic'),
+    (0x0750, 0x077F, 'arabic'),
+    (0x1100, 0x11FF, 'hangul'),
+    (0x3040, 0x30FF, 'kana'),
+    (0x3130, 0x318F, 'hangul'),
+    (0x3400, 0x4DBF, 'han'),
+    (0x4E00, 0x9FFF, 'han'),
+    (0xAC00, 0xD7AF, 'hangul'),
+    (0xFB50, 0xFDFF, 'arabic'),
+]
+
+_SCRIPT_LANGUAGES = {'cyrillic': 'ru', 'arabic': 'ar', 'hangul': 'ko'}
+
+# 多种语言共用的文字：西里尔字母（俄、乌克兰、保加利亚文等）、阿拉伯字母（阿拉伯、波斯、乌尔都文等）、
+# 汉字（中文，以及只用汉字书写的日文），按文字只能猜测语言
+_SHARED_SCRIPTS = {'cyrillic', 'arabic', 'han'}
+
+# 汉字文本中假名占比达到该值时判断为日文
+_KANA_RATIO = 0.1
+
+
+class LanguageGuess(NamedTuple):
+    """语言识别结果"""
+    language: str
+    # 最可能与次可能语言的对数似然差；只有一种语言使用的文字为无穷大，多种语言共用的文字为0
+    margin: float
+
+
+def char_script(ch: str) -> Optional[str]:
+    """获取字母所属的文字，非字母返回None"""
+    if not ch.isalpha():
+        return None
+    code = ord(ch)
+    for start, end, script in _SCRIPT_RANGES:
+        if start <= code <= end:
+            return script
+    return 'latin' if code < 0x0250 or 0x1E00 <= code <= 0x1EFF else None
+
+
+def extract_ngrams(text: str, max_n: int = 3) -> List[str]:
+    """
+    提取拉丁字母文本的字符n-gram，每个单词前后加空格以区分词首词尾
+
+    Args:
+        text: 文本
+        max_n: 最大n-gram长度
+
+    Returns:
+        List[str]: 1到max_n的所有n-gram
+    """
+    text = unicodedata.normalize('NFKC', text).lower()
+    words = ''.join(ch if char_script(ch) == 'latin' else ' ' for ch in text).split()
+    ngrams = []
+    for word in words:
+        padded = f" {word} "
+        for n in range(1, max_n + 1):
+            ngrams.extend(
+                padded[i:i + n] for i in range(len(padded) - n + 1) if padded[i:i + n].strip()
+            )
+    return ngrams
+
+
+def _ngram_ids(ngrams: List[str]) -> np.ndarray:
+    return np.fromiter((zlib.crc32(g.encode('utf-8')) for g in ngrams), dtype=np.uint32, count=len(ngrams))
+
+
+class LanguageIdentifier:
+    """本地语言识别"""
+
+    def __init__(self, profile_path: Optional[str] = None, min_margin: Optional[float] = None):
+        """
+        初始化语言识别，n-gram频率表在第一次识别拉丁字母文本时加载
+
+        Args:
+            profile_path: n-gram频率表文件，默认为src/modules/api/data/language_profiles.json
+            min_margin: detect返回结果所需的最小对数似然差，默认读取LANGUAGE_DETECT_MIN_MARGIN（8）；
+                单个单词等短文本通常达不到，此时交给上游自动检测
+        """
+        self.profile_path = profile_path or DEFAULT_PROFILE_PATH
+        self.min_margin = min_margin if min_margin is not None else float(os.getenv("LANGUAGE_DETECT_MIN_MARGIN", "8"))
+        self._languages: List[str] = []
+        # 排序后的n-gram哈希，及每个n-gram在各语言中的对数概率（行与_ids对应，列与_languages对应）
+        self._ids: Optional[np.ndarray] = None
+        self._log_probs: Optional[np.ndarray] = None
+        # 频率表中没有的n-gram在各语言中的对数概率
+        self._unseen: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        """加载频率表并转换为紧凑的数组"""
+        with self._lock:
+            if self._ids is not None:
+                return
+            with open(self.profile_path, 'r', encoding='utf-8') as f:
+                profiles: Dict[str, Dict[str, int]] = json.load(f)['languages']
+
+            languages = sorted(profiles)
+            totals = [sum(profiles[lang].values()) for lang in languages]
+            unseen = np.array([math.log(0.5 / total) for total in totals], dtype=np.float32)
+            ngram_index: Dict[int, int] = {}
+            for counts in profiles.values():
+                for ngram in counts:
+                    ngram_index.setdefault(zlib.crc32(ngram.encode('utf-8')), len(ngram_index))
+
+            ids = np.fromiter(ngram_index, dtype=np.uint32, count=len(ngram_index))
+            log_probs = np.tile(unseen, (len(ids), 1))
+            for column, lang in enumerate(languages):
+                for ngram, count in profiles[lang].items():
+                    row = ngram_index[zlib.crc32(ngram.encode('utf-8'))]
+                    log_probs[row, column] = math.log(count / totals[column])
+
+            order = np.argsort(ids)
+            self._languages = languages
+            self._log_probs = log_probs[order]
+            self._unseen = unseen
+            self._ids = ids[order]
+
+    def _identify_latin(self, text: str) -> Optional[LanguageGuess]:
+        ngrams = extract_ngrams(text)
+        if not ngrams:
+            return None
+        if self._ids is None:
+            self._load()
+        ids = _ngram_ids(ngrams)
+        positions = np.minimum(np.searchsorted(self._ids, ids), len(self._ids) - 1)
+        found = self._ids[positions] == ids
+        scores = self._log_probs[positions[found]].sum(axis=0) + self._unseen * int((~found).sum())
+        best, second = np.argsort(scores)[::-1][:2]
+        return LanguageGuess(self._languages[int(best)], float(scores[best] - scores[second]))
+
+    def identify(self, text: str) -> Optional[LanguageGuess]:
+        """
+        识别文本的语言
+
+        按字母所属的文字计数，以数量最多的文字判断语言；汉字和假名合并计数，假名占比较高时为日文；
+        拉丁字母文本再用n-gram模型判断具体语言。多种语言共用的文字（西里尔字母、阿拉伯字母、
+        假名占比不足的汉字）只给出最常见的语言，可信度为0，detect不会据此确定源语言。
+
+        Args:
+            text: 文本
+
+        Returns:
+            Optional[LanguageGuess]: 语言代码（zh/ja/ko/ru/ar/en/fr/de/es）及可信度，没有可识别的字母时返回None
+        """
+        counts: Dict[str, int] = {}
+        for ch in text or '':
+            script = char_script(ch)
+            if script is not None:
+                counts[script] = counts.get(script, 0) + 1
+        if not counts:
+            return None
+
+        kana = counts.pop('kana', 0)
+        han = counts.pop('han', 0)
+        if kana + han:
+            counts['cjk'] = kana + han
+        script = max(counts, key=counts.get)
+        if script == 'latin':
+            return self._identify_latin(text)
+        if script == 'cjk':
+            if kana / (kana + han) >= _KANA_RATIO:
+                return LanguageGuess('ja', math.inf)
+            script, language = 'han', 'zh'
+        else:
+            language = _SCRIPT_LANGUAGES[script]
+        return LanguageGuess(language, 0.0 if script in _SHARED_SCRIPTS else math.inf)
+
+    def detect(self, text: str) -> Optional[str]:
+        """
+        识别文本的语言，可信度不足min_margin时返回None
+
+        Args:
+            text: 文本
+
+        Returns:
+            Optional[str]: 语言代码
+        """
+        guess = self.identify(text)
+        if guess is None or guess.margin < self.min_margin:
+            return None
+        return guess.language
+
+
+# 全局语言识别实例（频率表按需加载）
+language_identifier = LanguageIdentifier()
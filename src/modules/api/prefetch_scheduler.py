@@ -0,0 +1,230 @@
+"""
+缓存预刷新调度模块
+在缓存到期前（提前量加随机抖动）于后台刷新常用的查询，第一个在到期后访问的用户不必等待上游；
+刷新按最小间隔限速，同时到期时访问量大的优先，一段时间内没有访问的查询自动退出调度，再次被访问时重新加入
+"""
+
+import os
+import math
+import time
+import random
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+from src.modules.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class _Target:
+    """一个需要预刷新的查询"""
+
+    def __init__(self, due: float):
+        self.due = due
+        self.refreshed_at: Optional[float] = None
+        # 本周期的访问次数，及连续访问不足的周期数；checked表示本周期到期时已检查过访问量
+        self.hits = 0
+        self.idle_cycles = 0
+        self.checked = False
+        self.scheduled = True
+
+
+class PrefetchScheduler:
+    """缓存到期前的后台预刷新调度器"""
+
+    def __init__(
+        self,
+        refresh: Callable[[Hashable], Any],
+        ttl: float,
+        lead: Optional[float] = None,
+        jitter: Optional[float] = None,
+        min_interval: Optional[float] = None,
+        min_hits: Optional[int] = None,
+        max_idle_cycles: Optional[int] = None,
+        rng: Optional[random.Random] = None
+    ):
+        """
+        初始化调度器
+
+        Args:
+            refresh: 刷新函数，参数为查询键，负责请求上游并写入缓存
+            ttl: 缓存有效期（秒）
+            lead: 在到期前多少秒刷新，默认读取NEWS_PREFETCH_LEAD（60）
+            jitter: 刷新时间再随机提前0~jitter秒，避免多个查询同时刷新，默认读取NEWS_PREFETCH_JITTER（30）
+            min_interval: 两次刷新的最小间隔（秒），默认读取NEWS_PREFETCH_INTERVAL（10）
+            min_hits: 一个刷新周期内至少被访问的次数，默认读取NEWS_PREFETCH_MIN_HITS（1）
+            max_idle_cycles: 连续多少个周期访问不足后退出调度，默认读取NEWS_PREFETCH_IDLE_CYCLES（2）
+            rng: 随机数生成器（测试时固定抖动）
+        """
+        self.refresh = refresh
+        self.ttl = ttl
+        self.lead = lead if lead is not None else float(os.getenv("NEWS_PREFETCH_LEAD", "60"))
+        self.jitter = jitter if jitter is not None else float(os.getenv("NEWS_PREFETCH_JITTER", "30"))
+        self.min_interval = min_interval if min_interval is not None else float(os.getenv("NEWS_PREFETCH_INTERVAL", "10"))
+        self.min_hits = min_hits if min_hits is not None else int(os.getenv("NEWS_PREFETCH_MIN_HITS", "1"))
+        self.max_idle_cycles = max_idle_cycles or int(os.getenv("NEWS_PREFETCH_IDLE_CYCLES", "2"))
+        self._rng = rng or random.Random()
+
+        self._targets: Dict[Hashable, _Target] = {}
+        self._last_refresh = -math.inf
+        self._stats = {'refreshes': 0, 'errors': 0, 'dropped': 0}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _next_due(self, refreshed_at: float) -> float:
+        """缓存写入后的下次刷新时间：到期前lead秒再随机提前，不早于有效期过半"""
+        due = refreshed_at + self.ttl - self.lead - self._rng.uniform(0, self.jitter)
+        return max(due, refreshed_at + self.ttl / 2)
+
+    def register(self, keys: Iterable[Hashable], now: Optional[float] = None) -> None:
+        """
+        加入预刷新的查询（如预设的新闻类别），首次刷新时间在0~jitter秒内随机分散
+
+        Args:
+            keys: 查询键
+            now: 当前时间（time.monotonic），默认取当前时间
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for key in keys:
+                if key not in self._targets:
+                    self._targets[key] = _Target(now + self._rng.uniform(0, self.jitter))
+        self._wakeup.set()
+
+    def record_hit(self, key: Hashable, now: Optional[float] = None) -> None:
+        """
+        记录一次访问；不在调度中的查询重新加入调度
+
+        Args:
+            key: 查询键
+            now: 当前时间（time.monotonic），默认取当前时间
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            target = self._targets.get(key)
+            if target is None:
+                # 新查询由本次访问写入缓存（随后mark_refreshed会校准刷新时间）
+                target = self._targets[key] = _Target(self._next_due(now))
+            elif not target.scheduled:
+                target.scheduled = True
+                target.idle_cycles = 0
+                target.due = self._next_due(target.refreshed_at) if target.refreshed_at is not None else now
+            target.hits += 1
+
+    def mark_refreshed(self, key: Hashable, now: Optional[float] = None) -> None:
+        """
+        记录缓存已写入（无论由用户查询还是预刷新），据此安排下次刷新
+
+        Args:
+            key: 查询键
+            now: 当前时间（time.monotonic），默认取当前时间
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            target = self._targets.get(key)
+            if target is not None:
+                target.refreshed_at = now
+                target.due = self._next_due(now)
+                target.checked = False
+        self._wakeup.set()
+
+    def _pick(self, now: float) -> Optional[Hashable]:
+        """在已到期的查询中选本周期访问量最大的（相同时选最早到期的），访问不足的查询在此退出调度"""
+        best, best_priority = None, None
+        for key, target in self._targets.items():
+            if not target.scheduled or target.due > now:
+                continue
+            if target.refreshed_at is not None and not target.checked:
+                # 一个刷新周期结束，检查这一周期的访问量（等待限速期间不重复计数）
+                target.checked = True
+                target.idle_cycles = target.idle_cycles + 1 if target.hits < self.min_hits else 0
+                if target.idle_cycles >= self.max_idle_cycles:
+                    target.scheduled = False
+                    self._stats['dropped'] += 1
+                    logger.info(f"预刷新查询访问不足，退出调度: {key}")
+                    continue
+            priority = (target.hits, -target.due)
+            if best_priority is None or priority > best_priority:
+                best, best_priority = key, priority
+        return best
+
+    def run_once(self, now: Optional[float] = None) -> Optional[Hashable]:
+        """
+        刷新一个已到期的查询（距上次刷新不足min_interval时不刷新）
+
+        Returns:
+            Optional[Hashable]: 刷新的查询键，没有刷新时返回None
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if now - self._last_refresh < self.min_interval:
+                return None
+            key = self._pick(now)
+            if key is None:
+                return None
+            target = self._targets[key]
+            # 开始新的周期；刷新失败时等待下一个周期重试，成功时由mark_refreshed重新安排
+            target.hits = 0
+            target.checked = False
+            target.due = self._next_due(now)
+            self._last_refresh = now
+            self._stats['refreshes'] += 1
+        try:
+            self.refresh(key)
+        except Exception as e:
+            with self._lock:
+                self._stats['errors'] += 1
+            logger.warning(f"预刷新失败 {key}: {e}")
+        return key
+
+    def _seconds_until_next(self, now: float) -> Optional[float]:
+        with self._lock:
+            dues = [target.due for target in self._targets.values() if target.scheduled]
+            if not dues:
+                return None
+            return max(min(dues) - now, self._last_refresh + self.min_interval - now, 0.0)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"预刷新调度出错: {e}")
+            self._wakeup.clear()
+            self._wakeup.wait(self._seconds_until_next(time.monotonic()))
+
+    def start(self) -> None:
+        """启动后台调度线程（已启动时不重复启动）"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="prefetch-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """停止后台调度线程"""
+        self._stop.set()
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+            self._thread = None
+
+    def stats(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """获取调度统计信息"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            scheduled = [target for target in self._targets.values() if target.scheduled]
+            return {
+                'scheduled': len(scheduled),
+                'idle': len(self._targets) - len(scheduled),
+                'interval': self.min_interval,
+                'refreshes': self._stats['refreshes'],
+                'errors': self._stats['errors'],
+                'dropped': self._stats['dropped'],
+                'next_in': max(min(t.due for t in scheduled) - now, 0.0) if scheduled else None,
+                'running': self._thread is not None and self._thread.is_alive(),
+            }
@@ -0,0 +1,280 @@
+"""
+API配额统计模块
+按服务和API密钥统计本分钟、本小时、当天的调用次数，从响应头读取剩余配额和重置时间，
+并保存到本地JSON文件，重启后仍能避开配额已用完、必然被拒绝的调用
+"""
+
+import os
+import json
+import time
+import atexit
+import hashlib
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, List, Optional
+
+from src.modules.api.api_config import APIConfig, api_config as default_api_config
+from src.modules.utils.logger import setup_logger
+
+# 设置模块日志
+logger = setup_logger(__name__)
+
+# 统计窗口（按UTC对齐的自然分钟、小时、天，与服务商重置配额的方式一致）
+QUOTA_WINDOWS = {'minute': 60, 'hour': 3600, 'day': 86400}
+
+# 默认的配额存储文件，与CacheManager使用同一个缓存目录
+DEFAULT_QUOTA_STORE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'cache', 'api_quota.json'
+)
+
+
+def window_start(now: float, length: int) -> int:
+    """时间戳所在统计窗口的起始时间"""
+    return int(now // length) * length
+
+
+def key_id(key: Optional[str]) -> str:
+    """密钥的摘要标识，存储和展示时不保存密钥原文；不需要密钥的服务为'-'"""
+    if not key:
+        return '-'
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:12]
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析Retry-After响应头（秒数或HTTP日期），无法解析时返回None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _header(headers: Any, *names: str) -> Optional[str]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            return value
+    return None
+
+
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value.split(',')[0]) if value is not None else None
+    except ValueError:
+        return None
+
+
+def parse_quota_headers(headers: Any, now: Optional[float] = None) -> Dict[str, Optional[float]]:
+    """
+    从响应头解析配额信息
+
+    支持X-RateLimit-*和RateLimit-*两种命名；Reset为Unix时间戳或剩余秒数。
+
+    Args:
+        headers: 响应头（大小写不敏感的映射）
+        now: 当前时间戳，默认time.time()
+
+    Returns:
+        Dict[str, Optional[float]]: remaining、limit、reset_at（Unix时间戳），响应头中没有的项为None
+    """
+    now = time.time() if now is None else now
+    remaining = _number(_header(headers, 'X-RateLimit-Remaining', 'RateLimit-Remaining'))
+    limit = _number(_header(headers, 'X-RateLimit-Limit', 'RateLimit-Limit'))
+    reset = _number(_header(headers, 'X-RateLimit-Reset', 'RateLimit-Reset'))
+    # 大于一年的秒数视为时间戳
+    if reset is not None and reset < 365 * 86400:
+        reset = now + reset
+    return {'remaining': remaining, 'limit': limit, 'reset_at': reset}
+
+
+class QuotaTracker:
+    """按服务和密钥统计的API配额使用情况"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        api_config: Optional[APIConfig] = None,
+        flush_interval: float = 5.0
+    ):
+        """
+        初始化配额统计
+
+        Args:
+            path: 保存统计的JSON文件，默认读取API_QUOTA_STORE（src/cache/api_quota.json），为空字符串时只保存在内存中
+            api_config: 提供配置配额的API配置，默认使用全局实例
+            flush_interval: 两次写入文件的最小间隔（秒），退出时总会写入
+        """
+        self.path = os.getenv('API_QUOTA_STORE', DEFAULT_QUOTA_STORE) if path is None else path
+        self.api_config = api_config or default_api_config
+        self.flush_interval = flush_interval
+        # 服务 -> 密钥标识 -> 统计
+        self._entries: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_flush = 0.0
+        if self.path:
+            self.load()
+            atexit.register(self.save, True)
+
+    def _entry(self, api_name: str, key: Optional[str]) -> Dict[str, Any]:
+        return self._entries.setdefault(api_name, {}).setdefault(key_id(key), {
+            'windows': {},
+            'total': 0,
+            'rejected': 0,
+            'remaining': None,
+            'limit': None,
+            'reset_at': None,
+        })
+
+    @staticmethod
+    def _count(entry: Dict[str, Any], window: str, now: float) -> int:
+        """当前窗口内的调用次数，窗口已过去时为0"""
+        start, count = entry['windows'].get(window, (0, 0))
+        return count if start == window_start(now, QUOTA_WINDOWS[window]) else 0
+
+    def record(
+        self,
+        api_name: str,
+        key: Optional[str],
+        status_code: int,
+        headers: Any = None,
+        calls: int = 1
+    ) -> None:
+        """
+        记录一次到达服务商的调用
+
+        Args:
+            api_name: API名称
+            key: 使用的密钥，不需要密钥的服务为None
+            status_code: HTTP状态码
+            headers: 响应头，用于读取剩余配额和重置时间
+            calls: 计入的调用次数（底层自动重试时每次重试都消耗配额）
+        """
+        now = time.time()
+        quota = parse_quota_headers(headers or {}, now)
+        with self._lock:
+            entry = self._entry(api_name, key)
+            for window, length in QUOTA_WINDOWS.items():
+                entry['windows'][window] = [window_start(now, length), self._count(entry, window, now) + calls]
+            entry['total'] += calls
+            if status_code == 429:
+                entry['rejected'] += 1
+                retry_after = parse_retry_after(headers.get('Retry-After') if headers else None)
+                entry['remaining'] = 0
+                if retry_after is not None:
+                    quota['reset_at'] = now + retry_after
+            if quota['remaining'] is not None:
+                entry['remaining'] = int(quota['remaining'])
+            for field in ('limit', 'reset_at'):
+                if quota[field] is not None:
+                    entry[field] = quota[field]
+            self._dirty = True
+        self.save()
+
+    def blocked_until(self, api_name: str, key: Optional[str] = None) -> Optional[float]:
+        """
+        获取调用必然被拒绝的截止时间
+
+        服务商报告剩余配额为0且尚未重置，或配置的配额（周期为一分钟、一小时或一天时）在当前窗口已用完时，
+        在重置前发出的调用必然被拒绝。
+
+        Args:
+            api_name: API名称
+            key: 使用的密钥，不需要密钥的服务为None
+
+        Returns:
+            Optional[float]: 配额重置的Unix时间戳，可以调用时返回None
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(api_name, {}).get(key_id(key))
+            return None if entry is None else self._blocked_until(api_name, entry, now)
+
+    def _blocked_until(self, api_name: str, entry: Dict[str, Any], now: float) -> Optional[float]:
+        if entry['remaining'] == 0 and entry['reset_at'] and entry['reset_at'] > now:
+            return entry['reset_at']
+        rate_limit = self.api_config.get_rate_limit(api_name)
+        if rate_limit:
+            for window, length in QUOTA_WINDOWS.items():
+                if rate_limit['per'] == length and self._count(entry, window, now) >= rate_limit['requests']:
+                    return window_start(now, length) + length
+        return None
+
+    def usage(self, api_name: str) -> List[Dict[str, Any]]:
+        """
+        获取指定API各密钥的使用情况
+
+        Args:
+            api_name: API名称
+
+        Returns:
+            List[Dict[str, Any]]: 每个密钥的标识、各窗口调用次数、累计调用和429次数、剩余配额、重置时间和
+                调用必然被拒绝的截止时间
+        """
+        now = time.time()
+        with self._lock:
+            return [
+                {
+                    'key': key,
+                    **{window: self._count(entry, window, now) for window in QUOTA_WINDOWS},
+                    'total': entry['total'],
+                    'rejected': entry['rejected'],
+                    'remaining': entry['remaining'],
+                    'limit': entry['limit'],
+                    'reset_at': entry['reset_at'],
+                    'blocked_until': self._blocked_until(api_name, entry, now),
+                }
+                for key, entry in self._entries.get(api_name, {}).items()
+            ]
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """获取所有API的使用情况"""
+        with self._lock:
+            names = list(self._entries)
+        return {name: self.usage(name) for name in names}
+
+    def load(self) -> None:
+        """从文件读取统计，文件不存在或损坏时从空白开始"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取API配额统计失败: {str(e)}")
+            return
+        with self._lock:
+            self._entries = entries if isinstance(entries, dict) else {}
+
+    def save(self, force: bool = False) -> None:
+        """
+        将统计写入文件（先写临时文件再替换，避免中途退出留下损坏的文件）
+
+        Args:
+            force: 是否忽略写入间隔立即写入
+        """
+        if not self.path:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not self._dirty or (not force and now - self._last_flush < self.flush_interval):
+                return
+            self._dirty = False
+            self._last_flush = now
+            data = json.dumps(self._entries)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"保存API配额统计失败: {str(e)}")
+
+
+# 创建全局配额统计实例
+quota_tracker = QuotaTracker()
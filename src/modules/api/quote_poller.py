@@ -0,0 +1,211 @@
+"""
+自选股行情轮询模块
+一个后台线程按固定间隔轮流刷新所有用户自选股的并集，把行情写入缓存；查看自选股只读缓存，不请求上游。
+每次选择关注人数多、距上次刷新时间长的股票，新加入的股票优先刷新
+"""
+
+import os
+import math
+import time
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from src.modules.cache.cache_manager import CacheNamespace
+from src.modules.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class _Viewer:
+    """一个用户的自选股"""
+
+    def __init__(self, symbols: List[str], now: float):
+        self.symbols = symbols
+        self.last_seen = now
+
+
+class QuotePoller:
+    """自选股行情的共享轮询器"""
+
+    def __init__(
+        self,
+        fetch_quote: Callable[[str], Optional[Dict[str, Any]]],
+        cache: CacheNamespace,
+        interval: Optional[float] = None,
+        min_age: Optional[float] = None,
+        viewer_ttl: Optional[float] = None,
+        max_symbols: Optional[int] = None,
+        on_update: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ):
+        """
+        初始化轮询器
+
+        Args:
+            fetch_quote: 请求单只股票行情的函数，返回None时不写入缓存
+            cache: 写入行情的缓存命名空间（键为股票代码）
+            interval: 两次上游请求的间隔（秒），默认读取STOCK_POLL_INTERVAL（15）
+            min_age: 同一只股票两次刷新的最小间隔（秒），默认读取STOCK_POLL_MIN_AGE（60）
+            viewer_ttl: 用户超过该时间（秒）未查看时移除其自选股，默认读取STOCK_WATCH_TTL（600）
+            max_symbols: 每个用户最多关注的股票数，默认读取STOCK_WATCH_MAX_SYMBOLS（20）
+            on_update: 行情写入缓存后的回调（股票代码, 行情），如发布给实时推送的订阅者
+        """
+        self.fetch_quote = fetch_quote
+        self.cache = cache
+        self.interval = interval if interval is not None else float(os.getenv("STOCK_POLL_INTERVAL", "15"))
+        self.min_age = min_age if min_age is not None else float(os.getenv("STOCK_POLL_MIN_AGE", "60"))
+        self.viewer_ttl = viewer_ttl if viewer_ttl is not None else float(os.getenv("STOCK_WATCH_TTL", "600"))
+        self.max_symbols = max_symbols or int(os.getenv("STOCK_WATCH_MAX_SYMBOLS", "20"))
+        self.on_update = on_update
+
+        self._viewers: Dict[str, _Viewer] = {}
+        # 股票代码 -> 上次尝试刷新的时间（失败也记录，避免反复请求出错的股票）
+        self._refreshed: Dict[str, float] = {}
+        self._stats = {'polls': 0, 'errors': 0}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, viewer: str, symbols: Iterable[str], now: Optional[float] = None) -> List[str]:
+        """
+        设置用户的自选股（替换之前的列表），并确保后台轮询已启动
+
+        Args:
+            viewer: 用户标识
+            symbols: 股票代码
+            now: 当前时间（time.monotonic），默认取当前时间
+
+        Returns:
+            List[str]: 规范化并去重后的股票代码（超过max_symbols的部分被忽略）
+        """
+        now = time.monotonic() if now is None else now
+        normalized = list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))[:self.max_symbols]
+        with self._lock:
+            if normalized:
+                self._viewers[viewer] = _Viewer(normalized, now)
+            else:
+                self._viewers.pop(viewer, None)
+        self.start()
+        return normalized
+
+    def unwatch(self, viewer: str) -> None:
+        """移除用户的自选股"""
+        with self._lock:
+            self._viewers.pop(viewer, None)
+
+    def read(self, viewer: str, now: Optional[float] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        读取用户自选股的缓存行情（不请求上游），同时刷新用户的活跃时间
+
+        Returns:
+            Dict[str, Optional[Dict[str, Any]]]: 股票代码 -> 行情，已过期的行情仍会返回，尚未刷新过的为None
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._viewers.get(viewer)
+            if entry is None:
+                return {}
+            entry.last_seen = now
+            symbols = list(entry.symbols)
+        return {symbol: self.cache.get_stale(symbol) for symbol in symbols}
+
+    def _expire_viewers(self, now: float) -> None:
+        for viewer in [v for v, entry in self._viewers.items() if now - entry.last_seen > self.viewer_ttl]:
+            del self._viewers[viewer]
+
+    def watchers(self, now: Optional[float] = None) -> Dict[str, int]:
+        """获取各股票的关注人数（移除长时间未查看的用户）"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._expire_viewers(now)
+            counts: Dict[str, int] = {}
+            for entry in self._viewers.values():
+                for symbol in entry.symbols:
+                    counts[symbol] = counts.get(symbol, 0) + 1
+            return counts
+
+    def next_symbol(self, now: Optional[float] = None) -> Optional[str]:
+        """
+        选择下一只要刷新的股票：在距上次刷新超过min_age的股票中，选关注人数 × 距上次刷新时间最大的一只，
+        从未刷新过的股票最优先（其中关注人数多的优先）
+
+        Returns:
+            Optional[str]: 股票代码，没有需要刷新的股票时返回None
+        """
+        now = time.monotonic() if now is None else now
+        counts = self.watchers(now)
+        best, best_priority = None, None
+        with self._lock:
+            # 不再有人关注且已超过min_age的股票不再保留刷新时间
+            for symbol in [s for s, at in self._refreshed.items() if s not in counts and now - at >= self.min_age]:
+                del self._refreshed[symbol]
+            for symbol, count in counts.items():
+                age = now - self._refreshed[symbol] if symbol in self._refreshed else math.inf
+                if age < self.min_age:
+                    continue
+                priority = (count * age, count)
+                if best_priority is None or priority > best_priority:
+                    best, best_priority = symbol, priority
+        return best
+
+    def poll_once(self, now: Optional[float] = None) -> Optional[str]:
+        """
+        刷新一只股票的行情并写入缓存
+
+        Returns:
+            Optional[str]: 刷新的股票代码，没有需要刷新的股票时返回None
+        """
+        now = time.monotonic() if now is None else now
+        symbol = self.next_symbol(now)
+        if symbol is None:
+            return None
+        with self._lock:
+            self._refreshed[symbol] = now
+            self._stats['polls'] += 1
+        try:
+            quote = self.fetch_quote(symbol)
+        except Exception as e:
+            with self._lock:
+                self._stats['errors'] += 1
+            logger.warning(f"自选股行情刷新失败 {symbol}: {e}")
+            return symbol
+        if quote is not None:
+            self.cache.set(symbol, quote)
+            if self.on_update is not None:
+                self.on_update(symbol, quote)
+        return symbol
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"自选股轮询出错: {e}")
+
+    def start(self) -> None:
+        """启动后台轮询线程（已启动时不重复启动）"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="quote-poller", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """停止后台轮询线程"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def stats(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """获取轮询统计信息"""
+        counts = self.watchers(now)
+        with self._lock:
+            return {
+                'viewers': len(self._viewers),
+                'symbols': len(counts),
+                'interval': self.interval,
+                'polls': self._stats['polls'],
+                'errors': self._stats['errors'],
+                'running': self._thread is not None and self._thread.is_alive(),
+            }
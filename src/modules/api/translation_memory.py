@@ -0,0 +1,181 @@
+"""
+翻译记忆模块
+将文本按句子切分，每个句子按内容哈希查找翻译记忆，只把未命中的句子合并为批量请求发送到上游，
+再按原文顺序和空白拼接译文；重复出现的句子（模板、签名、免责声明等）不再重复计费。
+可选的近似匹配索引让只有空白、标点或个别字词不同的句子也直接使用历史译文
+"""
+
+import os
+import re
+import hashlib
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from src.modules.cache.cache_manager import CacheNamespace
+from src.modules.utils.minhash_lsh import MinHashLSH, NearMatch
+
+# 句子结束位置：中文句末标点（可带后引号/括号）、后跟空白的英文句点/问号/叹号、换行；结束标记后的空白归属当前句子
+_SENTENCE_END = re.compile(
+    r'(?:[。！？；…]+[”’」』）)]*|[.!?;]+[”’"\')\]]*(?=\s|$)|\n)\s*'
+)
+
+
+class TranslationError(RuntimeError):
+    """上游翻译失败"""
+    pass
+
+
+class TranslationResult(NamedTuple):
+    """文档翻译结果"""
+    text: str
+    detected_language: Optional[str]
+    segments: int
+    memory_hits: int
+    sent_segments: int
+    sent_chars: int
+    # 使用近似匹配译文的句子及匹配到的历史句子
+    fuzzy_matches: Tuple[Tuple[str, NearMatch], ...] = ()
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    按句子切分文本，所有片段按顺序拼接后与原文完全相同
+
+    Args:
+        text: 原文
+
+    Returns:
+        List[str]: 句子片段（包含句末标点和其后的空白）
+    """
+    pieces = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        pieces.append(text[start:match.end()])
+        start = match.end()
+    if start < len(text):
+        pieces.append(text[start:])
+    return pieces
+
+
+def memory_key(sentence: str, source: str, target: str) -> str:
+    """翻译记忆的键：语言对和句子内容的哈希"""
+    digest = hashlib.sha256(f"{source}\x00{target}\x00{sentence}".encode('utf-8')).hexdigest()
+    return f"{source}:{target}:{digest}"
+
+
+class TranslationMemory:
+    """句子级翻译记忆，未命中的句子批量请求上游"""
+
+    def __init__(
+        self,
+        translate_batch: Callable[[List[str], str, str], Sequence[Dict[str, Any]]],
+        cache: Optional[CacheNamespace] = None,
+        batch_size: Optional[int] = None,
+        batch_chars: Optional[int] = None,
+        fuzzy: Optional[MinHashLSH] = None
+    ):
+        """
+        初始化翻译记忆
+
+        Args:
+            translate_batch: 批量翻译函数，参数为句子列表、源语言、目标语言，
+                按顺序返回每个句子的翻译结果（{"translatedText", "detectedSourceLanguage"}）；
+                不是来自上游的结果（如上游不可用时的演示译文）应带有"demo": True，这些结果只返回不记忆
+            cache: 存储句子译文及检测到的源语言的命名空间，默认按TRANSLATION_CACHE_TTL（86400秒）缓存
+            batch_size: 每个请求最多包含的句子数，默认读取TRANSLATION_BATCH_SIZE（128）
+            batch_chars: 每个请求最多包含的字符数，默认读取TRANSLATION_BATCH_MAX_CHARS（5000）
+            fuzzy: 近似匹配索引，翻译记忆未命中的句子在其中找到相似度不低于阈值的历史句子时直接使用其译文
+        """
+        self.translate_batch = translate_batch
+        self.cache = cache or CacheNamespace("translation_memory", int(os.getenv("TRANSLATION_CACHE_TTL", "86400")))
+        self.batch_size = max(1, batch_size or int(os.getenv("TRANSLATION_BATCH_SIZE", "128")))
+        self.batch_chars = max(1, batch_chars or int(os.getenv("TRANSLATION_BATCH_MAX_CHARS", "5000")))
+        self.fuzzy = fuzzy
+
+    def _batches(self, sentences: List[str]) -> List[List[str]]:
+        """按句子数和字符数上限分批，单个超长句子单独成批"""
+        batches, batch, chars = [], [], 0
+        for sentence in sentences:
+            if batch and (len(batch) >= self.batch_size or chars + len(sentence) > self.batch_chars):
+                batches.append(batch)
+                batch, chars = [], 0
+            batch.append(sentence)
+            chars += len(sentence)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def translate(self, text: str, source: str, target: str) -> TranslationResult:
+        """
+        翻译文本：命中翻译记忆的句子直接使用记忆中的译文，其余句子去重后批量请求
+
+        Args:
+            text: 原文
+            source: 源语言代码
+            target: 目标语言代码
+
+        Returns:
+            TranslationResult: 拼接后的译文及记忆命中情况
+
+        Raises:
+            TranslationError: 上游翻译失败或返回的译文数量与请求不符
+        """
+        pieces = split_sentences(text)
+        translations: Dict[str, str] = {}
+        # 未命中的句子，按首次出现的顺序去重
+        missing: Dict[str, None] = {}
+        fuzzy_matches = []
+        hits = 0
+        detected = None
+        for piece in pieces:
+            sentence = piece.strip()
+            if not sentence or sentence in translations or sentence in missing:
+                continue
+            cached = self.cache.get(memory_key(sentence, source, target))
+            if cached is not None:
+                # 旧版本的记忆只保存译文字符串
+                if isinstance(cached, str):
+                    cached = {"text": cached}
+                translations[sentence] = cached["text"]
+                detected = detected or cached.get("detected")
+                hits += 1
+                continue
+            match = self.fuzzy.query(sentence, (source, target)) if self.fuzzy is not None else None
+            if match is not None:
+                translations[sentence] = match.value
+                fuzzy_matches.append((sentence, match))
+            else:
+                missing[sentence] = None
+
+        for batch in self._batches(list(missing)):
+            results = self.translate_batch(batch, source, target)
+            if len(results) != len(batch):
+                raise TranslationError(f"上游返回 {len(results)} 条译文，请求了 {len(batch)} 条")
+            for sentence, item in zip(batch, results):
+                key = memory_key(sentence, source, target)
+                translations[sentence] = item["translatedText"]
+                if item.get("demo"):
+                    continue
+                self.cache.set(key, {"text": item["translatedText"], "detected": item.get("detectedSourceLanguage")})
+                if self.fuzzy is not None:
+                    self.fuzzy.add(key, sentence, item["translatedText"], (source, target))
+                detected = detected or item.get("detectedSourceLanguage")
+
+        # 保留原文句子前后的空白和换行
+        output = []
+        for piece in pieces:
+            sentence = piece.strip()
+            if not sentence:
+                output.append(piece)
+                continue
+            start = piece.index(sentence)
+            output.append(piece[:start] + translations[sentence] + piece[start + len(sentence):])
+
+        return TranslationResult(
+            text=''.join(output),
+            detected_language=detected,
+            segments=sum(1 for piece in pieces if piece.strip()),
+            memory_hits=hits,
+            sent_segments=len(missing),
+            sent_chars=sum(len(sentence) for sentence in missing),
+            fuzzy_matches=tuple(fuzzy_matches)
+        )
@@ -6,6 +6,7 @@
 import os
 import json
 import time
+from collections import OrderedDict
 from typing import Dict, Any, Optional, Union, Callable
 import threading
 import functools
@@ -13,19 +14,29 @@ import functools
 class CacheManager:
     """缓存管理器类，提供内存缓存和文件缓存功能"""
     
-    def __init__(self, cache_dir: str = "cache"):
+    def __init__(self, cache_dir: str = "cache", max_entries: Optional[int] = None):
         """
         初始化缓存管理器
         
         Args:
             cache_dir (str): 缓存文件存储目录
+            max_entries (int, optional): 内存缓存的最大条目数，超出时淘汰最久未使用的条目，
+                默认读取CACHE_MAX_ENTRIES（10000），为0时不限制
         """
-        # 内存缓存字典
-        self._cache: Dict[str, Dict[str, Any]] = {}
+        # 内存缓存字典（按最近使用排序，最久未使用的在最前面）
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
         
         # 缓存过期时间（秒）
         self._default_ttl = int(os.getenv('CACHE_DEFAULT_TTL', '3600'))  # 默认1小时
         
+        # 内存缓存条目上限
+        if max_entries is None:
+            max_entries = int(os.getenv('CACHE_MAX_ENTRIES', '10000'))
+        self._max_entries = max_entries if max_entries > 0 else None
+        
+        # 统计信息
+        self._stats = {'hits': 0, 'misses': 0, 'stale_hits': 0, 'evictions': 0, 'expirations': 0}
+        
         # 缓存目录
         self._cache_dir = os.path.join(
             os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 
@@ -41,7 +52,7 @@ class CacheManager:
         self._cleanup_thread = threading.Thread(target=self._periodic_cleanup, daemon=True)
         self._cleanup_thread.start()
     
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, stale_ttl: int = 0) -> None:
         """
         设置缓存
         
@@ -49,13 +60,21 @@ class CacheManager:
             key (str): 缓存键
             value (Any): 缓存值
             ttl (int, optional): 缓存过期时间（秒），默认使用全局配置
+            stale_ttl (int): 过期后继续保留的时间（秒），期间只能通过get_stale读取，用于上游故障时降级
         """
         with self._lock:
-            expiry = time.time() + (ttl or self._default_ttl)
+            # 使用单调时钟，不受系统时间调整影响
+            expiry = time.monotonic() + (ttl or self._default_ttl)
             self._cache[key] = {
                 'value': value,
-                'expiry': expiry
+                'expiry': expiry,
+                'stale_until': expiry + stale_ttl
             }
+            self._cache.move_to_end(key)
+            # 超出条目上限时淘汰最久未使用的条目
+            while self._max_entries is not None and len(self._cache) > self._max_entries:
+                self._cache.popitem(last=False)
+                self._stats['evictions'] += 1
     
     def get(self, key: str, default: Any = None) -> Any:
         """
@@ -70,16 +89,88 @@ class CacheManager:
         """
         with self._lock:
             if key not in self._cache:
+                self._stats['misses'] += 1
                 return default
             
             item = self._cache[key]
-            # 检查是否过期
-            if time.time() > item['expiry']:
-                del self._cache[key]
+            # 检查是否过期（仍在保留期内的条目留给get_stale）
+            now = time.monotonic()
+            if now > item['expiry']:
+                if now > item['stale_until']:
+                    del self._cache[key]
+                    self._stats['expirations'] += 1
+                self._stats['misses'] += 1
                 return default
             
+            self._cache.move_to_end(key)
+            self._stats['hits'] += 1
             return item['value']
     
+    def get_stale(self, key: str, default: Any = None) -> Any:
+        """
+        获取缓存，已过期但仍在保留期内的条目也会返回
+        
+        Args:
+            key (str): 缓存键
+            default (Any, optional): 缓存不存在或已超过保留期时的默认值
+        
+        Returns:
+            Any: 缓存值或默认值
+        """
+        with self._lock:
+            item = self._cache.get(key)
+            if item is None or time.monotonic() > item['stale_until']:
+                return default
+            self._stats['stale_hits'] += 1
+            return item['value']
+    
+    def peek(self, key: str, default: Any = None) -> Any:
+        """
+        获取未过期的缓存，不计入命中统计也不更新淘汰顺序，用于探测多个候选键
+        
+        Args:
+            key (str): 缓存键
+            default (Any, optional): 缓存不存在或已过期时的默认值
+        
+        Returns:
+            Any: 缓存值或默认值
+        """
+        with self._lock:
+            item = self._cache.get(key)
+            if item is None or time.monotonic() > item['expiry']:
+                return default
+            return item['value']
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取内存缓存的统计信息
+        
+        Returns:
+            Dict[str, Any]: 条目数、条目上限、命中/未命中/过期数据命中次数、命中率、淘汰和过期条目数
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._cache)
+        lookups = stats['hits'] + stats['misses']
+        stats['max_entries'] = self._max_entries
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+    
+    def size(self, prefix: str = "") -> int:
+        """
+        获取内存缓存中键以prefix开头的条目数（包括保留期内的过期条目）
+        
+        Args:
+            prefix (str): 键前缀，为空时统计全部条目
+        
+        Returns:
+            int: 条目数
+        """
+        with self._lock:
+            if not prefix:
+                return len(self._cache)
+            return sum(1 for key in self._cache if key.startswith(prefix))
+    
     def delete(self, key: str) -> None:
         """
         删除缓存
@@ -106,10 +197,11 @@ class CacheManager:
     def _cleanup_expired(self) -> None:
         """清理过期的缓存项"""
         with self._lock:
-            current_time = time.time()
-            expired_keys = [k for k, v in self._cache.items() if current_time > v['expiry']]
+            current_time = time.monotonic()
+            expired_keys = [k for k, v in self._cache.items() if current_time > v['stale_until']]
             for key in expired_keys:
                 del self._cache[key]
+            self._stats['expirations'] += len(expired_keys)
     
     def cache_to_file(self, key: str, data: Any) -> None:
         """
@@ -158,6 +250,78 @@ class CacheManager:
         """析构函数，停止清理线程"""
         self._stop_cleanup = True
 
+class CacheNamespace:
+    """共享CacheManager上的命名空间：键自动加前缀，使用该命名空间的TTL，单独统计命中情况"""
+    
+    def __init__(self, name: str, ttl: int, stale_ttl: int = 0, cache: Optional[CacheManager] = None):
+        """
+        初始化缓存命名空间
+        
+        Args:
+            name (str): 命名空间名称，作为键前缀
+            ttl (int): 缓存过期时间（秒）
+            stale_ttl (int): 过期后继续保留供get_stale读取的时间（秒）
+            cache (CacheManager, optional): 存储条目的缓存管理器，默认使用全局实例，各命名空间共享其条目上限
+        """
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._cache = cache or cache_manager
+        self._prefix = f"{name}:"
+        self._stats = {'hits': 0, 'misses': 0, 'stale_hits': 0}
+        self._lock = threading.Lock()
+    
+    def _count(self, field: str) -> None:
+        with self._lock:
+            self._stats[field] += 1
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """获取未过期的缓存，不存在或已过期时返回default"""
+        value = self._cache.get(self._prefix + key, _MISSING)
+        if value is _MISSING:
+            self._count('misses')
+            return default
+        self._count('hits')
+        return value
+    
+    def get_stale(self, key: str, default: Any = None) -> Any:
+        """获取缓存，已过期但仍在保留期内的条目也会返回"""
+        value = self._cache.get_stale(self._prefix + key, _MISSING)
+        if value is _MISSING:
+            return default
+        self._count('stale_hits')
+        return value
+    
+    def peek(self, key: str, default: Any = None) -> Any:
+        """获取未过期的缓存，不计入命中统计"""
+        return self._cache.peek(self._prefix + key, default)
+    
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """按命名空间的TTL（或指定的ttl）设置缓存"""
+        self._cache.set(self._prefix + key, value, ttl=ttl or self.ttl, stale_ttl=self.stale_ttl)
+    
+    def delete(self, key: str) -> None:
+        """删除缓存"""
+        self._cache.delete(self._prefix + key)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取命名空间的统计信息
+        
+        Returns:
+            Dict[str, Any]: 条目数、TTL、命中/未命中/过期数据命中次数和命中率
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['size'] = self._cache.size(self._prefix)
+        stats['ttl'] = self.ttl
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+# 区分缓存值为None和缓存不存在
+_MISSING = object()
+
 # 创建全局缓存管理器实例
 cache_manager = CacheManager()
 
@@ -0,0 +1,179 @@
+"""
+自适应超时模块
+按主机统计建立连接和首字节耗时的分位数，据此计算连接超时和读取超时，并限制在上下限之间
+"""
+
+import os
+from typing import Dict, Any, Optional, Tuple, Union
+
+import requests
+from urllib3.exceptions import ConnectTimeoutError, ReadTimeoutError
+
+from src.modules.utils.latency_tracker import LatencyTracker
+
+
+class AdaptiveTimeoutConfig:
+    """自适应超时配置类"""
+    def __init__(
+        self,
+        enabled: bool = False,
+        percentile: float = 0.99,
+        multiplier: float = 2.0,
+        min_samples: int = 20,
+        connect_floor: float = 0.2,
+        connect_ceiling: float = 5.0,
+        read_floor: float = 0.5,
+        read_ceiling: float = 15.0
+    ):
+        """
+        初始化自适应超时配置
+
+        Args:
+            enabled: 是否默认对所有请求使用自适应超时
+            percentile: 参考的耗时分位数（0~1）
+            multiplier: 超时时间为分位数耗时的倍数
+            min_samples: 样本数达到该值后才使用学习到的超时，之前使用调用方传入的超时
+            connect_floor: 连接超时下限（秒）
+            connect_ceiling: 连接超时上限（秒）
+            read_floor: 读取超时下限（秒）
+            read_ceiling: 读取超时上限（秒）
+        """
+        self.enabled = enabled
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self.connect_floor = connect_floor
+        self.connect_ceiling = connect_ceiling
+        self.read_floor = read_floor
+        self.read_ceiling = read_ceiling
+
+    @classmethod
+    def from_env(cls) -> "AdaptiveTimeoutConfig":
+        """从环境变量读取自适应超时配置"""
+        return cls(
+            enabled=os.getenv('ADAPTIVE_TIMEOUT_ENABLED', 'false').lower() == 'true',
+            percentile=float(os.getenv('ADAPTIVE_TIMEOUT_PERCENTILE', '0.99')),
+            multiplier=float(os.getenv('ADAPTIVE_TIMEOUT_MULTIPLIER', '2')),
+            min_samples=int(os.getenv('ADAPTIVE_TIMEOUT_MIN_SAMPLES', '20')),
+            connect_floor=float(os.getenv('ADAPTIVE_TIMEOUT_CONNECT_MIN', '0.2')),
+            connect_ceiling=float(os.getenv('ADAPTIVE_TIMEOUT_CONNECT_MAX', '5')),
+            read_floor=float(os.getenv('ADAPTIVE_TIMEOUT_READ_MIN', '0.5')),
+            read_ceiling=float(os.getenv('ADAPTIVE_TIMEOUT_READ_MAX', '15')),
+        )
+
+
+def split_timeout(
+    timeout: Optional[Union[float, Tuple[float, float]]],
+    default: float
+) -> Tuple[float, float]:
+    """将requests的timeout参数拆分为(连接超时, 读取超时)"""
+    if timeout is None:
+        return default, default
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return (default if connect is None else connect), (default if read is None else read)
+    return timeout, timeout
+
+
+def timeout_phase(error: Exception) -> Optional[str]:
+    """判断请求异常是否为超时，返回connect、read或None（重试耗尽时按最后一次失败的原因判断）"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return 'connect'
+    if isinstance(error, requests.exceptions.ReadTimeout):
+        return 'read'
+    # 重试耗尽时为MaxRetryError.reason，读取响应体超时时为urllib3异常本身
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, 'reason', reason)
+    if isinstance(reason, ConnectTimeoutError):
+        return 'connect'
+    if isinstance(reason, ReadTimeoutError):
+        return 'read'
+    return None
+
+
+class AdaptiveTimeouts:
+    """按主机学习连接超时和读取超时"""
+
+    def __init__(self, config: Optional[AdaptiveTimeoutConfig] = None, window_size: int = 200):
+        """
+        初始化自适应超时
+
+        Args:
+            config: 自适应超时配置
+            window_size: 每个主机保留的最近样本数
+        """
+        self.config = config or AdaptiveTimeoutConfig()
+        self.connect = LatencyTracker(window_size)
+        self.read = LatencyTracker(window_size)
+
+    def record(self, host: str, phases: Dict[str, float]) -> None:
+        """
+        记录一次请求在连接层的耗时
+
+        Args:
+            host: 主机名
+            phases: 阶段耗时，connect（含TLS握手）仅在新建连接时存在，ttfb为等待首字节的时间
+        """
+        if 'connect' in phases:
+            self.connect.record(host, phases['connect'] + phases.get('tls', 0.0))
+        if 'ttfb' in phases:
+            self.read.record(host, phases['ttfb'])
+
+    def record_timeout(self, host: str, phase: str, seconds: float) -> None:
+        """
+        记录一次超时，以当时的超时时间作为样本
+
+        超时请求没有真实耗时，若不计入样本，变慢的主机会一直按过低的超时失败；
+        计入后超时占比超过分位数对应的比例时，学习到的超时随之增大（不超过上限）。
+
+        Args:
+            host: 主机名
+            phase: connect或read
+            seconds: 超时时间（秒）
+        """
+        (self.connect if phase == 'connect' else self.read).record(host, seconds)
+
+    def _learned(self, tracker: LatencyTracker, host: str, floor: float, ceiling: float) -> Optional[float]:
+        value = tracker.percentile(host, self.config.percentile, self.config.min_samples)
+        if value is None:
+            return None
+        return min(ceiling, max(floor, value * self.config.multiplier))
+
+    def timeout_for(
+        self,
+        host: str,
+        fallback: Optional[Union[float, Tuple[float, float]]],
+        default: float = 30.0
+    ) -> Tuple[float, float]:
+        """
+        获取主机当前的(连接超时, 读取超时)
+
+        Args:
+            host: 主机名
+            fallback: 样本不足时使用的超时（调用方传入的timeout）
+            default: fallback为None时的超时时间（秒）
+
+        Returns:
+            Tuple[float, float]: 连接超时和读取超时
+        """
+        fallback_connect, fallback_read = split_timeout(fallback, default)
+        connect = self._learned(self.connect, host, self.config.connect_floor, self.config.connect_ceiling)
+        read = self._learned(self.read, host, self.config.read_floor, self.config.read_ceiling)
+        return (
+            fallback_connect if connect is None else connect,
+            fallback_read if read is None else read,
+        )
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """获取各主机学习到的超时（样本不足时为None）和样本数"""
+        config = self.config
+        hosts = set(self.connect.snapshot()) | set(self.read.snapshot())
+        return {
+            host: {
+                'connect_timeout': self._learned(self.connect, host, config.connect_floor, config.connect_ceiling),
+                'read_timeout': self._learned(self.read, host, config.read_floor, config.read_ceiling),
+                'connect_samples': self.connect.count(host),
+                'read_samples': self.read.count(host),
+            }
+            for host in sorted(hosts)
+        }
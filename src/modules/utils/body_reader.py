@@ -0,0 +1,230 @@
+"""
+响应体读取模块
+以流的方式读取响应体并限制最大字节数，超过上限时立即中止，避免异常上游或用户提供的URL占满内存；
+可以指定读取的截止时间，上游缓慢地逐块发送时不会无限期占用调用方
+"""
+
+import json
+import time
+import codecs
+from typing import Any, Iterator, Optional
+
+import requests
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError, SSLError
+
+# 每次从连接读取的字节数
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class BodyTooLargeError(Exception):
+    """响应体超过大小上限异常"""
+
+    def __init__(self, url: Optional[str], max_bytes: int, received: int):
+        self.url = url
+        self.max_bytes = max_bytes
+        self.received = received
+        super().__init__(f"响应体超过上限 {max_bytes} 字节（已读取 {received} 字节）: {url}")
+
+
+class BodyDeadlineError(Exception):
+    """读取响应体超过截止时间异常"""
+
+    def __init__(self, url: Optional[str], received: int):
+        self.url = url
+        self.received = received
+        super().__init__(f"读取响应体超过截止时间（已读取 {received} 字节）: {url}")
+
+
+def _check_deadline(response: requests.Response, deadline: Optional[float], received: int) -> None:
+    """已过截止时间时关闭连接并抛出异常"""
+    if deadline is not None and time.monotonic() > deadline:
+        response.close()
+        raise BodyDeadlineError(response.url, received)
+
+
+def _iter_chunks(response: requests.Response, chunk_size: int, deadline: Optional[float]) -> Iterator[bytes]:
+    """
+    逐块读取响应体
+
+    有截止时间时每块只从连接读取一次（urllib3的read1，有多少数据返回多少），
+    上游每次只发送几个字节时也能及时检查截止时间；没有截止时间时使用iter_content
+    """
+    read1 = getattr(response.raw, 'read1', None)
+    if deadline is None or read1 is None:
+        yield from response.iter_content(chunk_size=chunk_size)
+        return
+    # 与iter_content一样把urllib3的异常转换为requests的异常
+    try:
+        while True:
+            chunk = read1(chunk_size, decode_content=True)
+            if not chunk:
+                break
+            yield chunk
+    except ProtocolError as e:
+        raise requests.exceptions.ChunkedEncodingError(e)
+    except DecodeError as e:
+        raise requests.exceptions.ContentDecodingError(e)
+    except ReadTimeoutError as e:
+        raise requests.exceptions.ConnectionError(e)
+    except SSLError as e:
+        raise requests.exceptions.SSLError(e)
+    response._content_consumed = True
+
+
+def declared_length(response: requests.Response) -> Optional[int]:
+    """获取响应头声明的Content-Length，未声明或无法解析时返回None"""
+    length = response.headers.get('Content-Length', '')
+    return int(length) if length.isdigit() else None
+
+
+def iter_body(
+    response: requests.Response,
+    max_bytes: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    deadline: Optional[float] = None
+) -> Iterator[bytes]:
+    """
+    逐块读取流式响应的响应体（已解压），累计超过max_bytes时关闭连接并抛出异常
+
+    Args:
+        response: 以stream=True发出的请求的响应
+        max_bytes: 允许读取的最大字节数
+        chunk_size: 每次读取的字节数
+        deadline: 读取的截止时间（time.monotonic()的值），每读到一块检查一次；
+            单次读取的等待时间由请求的读取超时限制
+
+    Yields:
+        bytes: 响应体数据块
+
+    Raises:
+        BodyTooLargeError: 当Content-Length或实际读取的字节数超过上限时抛出
+        BodyDeadlineError: 当超过截止时间仍未读完时抛出
+    """
+    length = declared_length(response)
+    if length is not None and length > max_bytes:
+        response.close()
+        raise BodyTooLargeError(response.url, max_bytes, 0)
+
+    received = 0
+    for chunk in _iter_chunks(response, chunk_size, deadline):
+        received += len(chunk)
+        if received > max_bytes:
+            response.close()
+            raise BodyTooLargeError(response.url, max_bytes, received)
+        _check_deadline(response, deadline, received)
+        yield chunk
+
+
+def read_body(
+    response: requests.Response,
+    max_bytes: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    truncate: bool = False,
+    deadline: Optional[float] = None
+) -> bytes:
+    """
+    读取流式响应的完整响应体并写回response，之后可以照常使用content、text和json()
+
+    Args:
+        response: 以stream=True发出的请求的响应
+        max_bytes: 允许读取的最大字节数
+        chunk_size: 每次读取的字节数
+        truncate: 为True时超过上限不抛出异常，只保留前max_bytes字节并关闭连接
+        deadline: 读取的截止时间（time.monotonic()的值），见iter_body
+
+    Returns:
+        bytes: 响应体
+
+    Raises:
+        BodyTooLargeError: 当truncate为False且响应体超过上限时抛出
+        BodyDeadlineError: 当超过截止时间仍未读完时抛出
+    """
+    if response._content_consumed:
+        return response.content
+
+    body = bytearray()
+    if truncate:
+        for chunk in _iter_chunks(response, chunk_size, deadline):
+            body += chunk
+            if len(body) >= max_bytes:
+                del body[max_bytes:]
+                response.close()
+                break
+            _check_deadline(response, deadline, len(body))
+    else:
+        for chunk in iter_body(response, max_bytes, chunk_size, deadline):
+            body += chunk
+
+    response._content = bytes(body)
+    response._content_consumed = True
+    return response._content
+
+
+def _iter_text(response: requests.Response, max_bytes: int, chunk_size: int) -> Iterator[str]:
+    """按响应编码（默认UTF-8）增量解码响应体，多字节字符跨块时不会被截断"""
+    encoding = response.encoding or 'utf-8'
+    if codecs.lookup(encoding).name == 'utf-8':
+        encoding = 'utf-8-sig'
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for chunk in iter_body(response, max_bytes, chunk_size):
+        yield decoder.decode(chunk)
+    yield decoder.decode(b'', final=True)
+
+
+def load_json(
+    response: requests.Response,
+    max_bytes: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Any:
+    """
+    边读取边解码JSON响应体，不保留原始字节，内存峰值约为解码后文本的大小
+
+    Args:
+        response: 以stream=True发出的请求的响应
+        max_bytes: 允许读取的最大字节数
+        chunk_size: 每次读取的字节数
+
+    Returns:
+        Any: 解析后的JSON数据
+
+    Raises:
+        BodyTooLargeError: 当响应体超过上限时抛出
+        ValueError: 当响应体不是合法JSON时抛出
+    """
+    return json.loads(''.join(_iter_text(response, max_bytes, chunk_size)))
+
+
+def iter_json_lines(
+    response: requests.Response,
+    max_bytes: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[Any]:
+    """
+    逐条解码换行分隔的JSON（NDJSON/JSON Lines）响应，每读到完整的一行就产出一条记录
+
+    Args:
+        response: 以stream=True发出的请求的响应
+        max_bytes: 允许读取的最大字节数（整个响应体）
+        chunk_size: 每次读取的字节数
+
+    Yields:
+        Any: 每一行解析后的JSON数据（跳过空行）
+
+    Raises:
+        BodyTooLargeError: 当响应体超过上限时抛出
+        ValueError: 当某一行不是合法JSON时抛出
+    """
+    # 未遇到换行的数据先暂存，避免长行在每次读取时都重新拼接
+    pending = []
+    for text in _iter_text(response, max_bytes, chunk_size):
+        if '\n' not in text:
+            pending.append(text)
+            continue
+        lines = (''.join(pending) + text).split('\n')
+        pending = [lines.pop()]
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    rest = ''.join(pending)
+    if rest.strip():
+        yield json.loads(rest)
@@ -0,0 +1,221 @@
+"""
+熔断器模块
+按主机维护熔断状态（闭合、打开、半开），上游故障时快速失败
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from typing import Dict, Any, Optional
+
+
+class CircuitState:
+    """熔断器状态常量"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreakerConfig:
+    """熔断器配置类"""
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        minimum_calls: int = 5,
+        window_size: int = 20,
+        cooldown: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        """
+        初始化熔断器配置
+
+        Args:
+            failure_rate_threshold: 触发熔断的失败率阈值（0~1）
+            minimum_calls: 计算失败率所需的最少调用次数
+            window_size: 统计失败率的滑动窗口大小（最近N次调用）
+            cooldown: 熔断打开后的冷却时间（秒），之后进入半开状态
+            half_open_max_calls: 半开状态下允许的试探调用次数
+        """
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.window_size = window_size
+        self.cooldown = cooldown
+        self.half_open_max_calls = half_open_max_calls
+
+    @classmethod
+    def from_env(cls) -> "CircuitBreakerConfig":
+        """从环境变量读取熔断器配置"""
+        return cls(
+            failure_rate_threshold=float(os.getenv('CIRCUIT_BREAKER_FAILURE_RATE', '0.5')),
+            minimum_calls=int(os.getenv('CIRCUIT_BREAKER_MIN_CALLS', '5')),
+            window_size=int(os.getenv('CIRCUIT_BREAKER_WINDOW', '20')),
+            cooldown=float(os.getenv('CIRCUIT_BREAKER_COOLDOWN', '30')),
+            half_open_max_calls=int(os.getenv('CIRCUIT_BREAKER_HALF_OPEN_CALLS', '1')),
+        )
+
+
+class CircuitBreaker:
+    """单个主机的熔断器"""
+
+    def __init__(self, name: str, config: Optional[CircuitBreakerConfig] = None):
+        """
+        初始化熔断器
+
+        Args:
+            name: 熔断器名称（通常为主机名）
+            config: 熔断器配置，默认使用CircuitBreakerConfig()
+        """
+        self.name = name
+        self.config = config or CircuitBreakerConfig()
+        self._state = CircuitState.CLOSED
+        # 滑动窗口，True表示失败
+        self._window: deque = deque(maxlen=self.config.window_size)
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        self._last_trial_at = 0.0
+        self._open_count = 0
+        self._rejected_count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """当前状态（冷却期结束后自动从打开转为半开）"""
+        with self._lock:
+            self._update_state()
+            return self._state
+
+    def _update_state(self) -> None:
+        """检查冷却时间，必要时转为半开状态（需持有锁）"""
+        if self._state == CircuitState.OPEN and time.monotonic() - self._opened_at >= self.config.cooldown:
+            self._state = CircuitState.HALF_OPEN
+            self._half_open_in_flight = 0
+            self._half_open_successes = 0
+
+    def _failure_rate(self) -> float:
+        """计算滑动窗口内的失败率（需持有锁）"""
+        if not self._window:
+            return 0.0
+        return sum(self._window) / len(self._window)
+
+    def _trip(self) -> None:
+        """打开熔断器（需持有锁）"""
+        self._state = CircuitState.OPEN
+        self._opened_at = time.monotonic()
+        self._open_count += 1
+
+    def allow_request(self) -> bool:
+        """
+        判断是否允许发出请求
+
+        半开状态下只放行有限的试探请求；若试探请求长时间未回报结果，
+        冷却时间过后会再放行一次，避免熔断器卡死在半开状态。
+
+        Returns:
+            bool: 是否允许请求
+        """
+        with self._lock:
+            self._update_state()
+            if self._state == CircuitState.CLOSED:
+                return True
+            if self._state == CircuitState.HALF_OPEN:
+                now = time.monotonic()
+                if (self._half_open_in_flight < self.config.half_open_max_calls
+                        or now - self._last_trial_at >= self.config.cooldown):
+                    self._half_open_in_flight += 1
+                    self._last_trial_at = now
+                    return True
+            self._rejected_count += 1
+            return False
+
+    def record_success(self) -> None:
+        """记录一次成功调用"""
+        with self._lock:
+            if self._state == CircuitState.HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+                self._half_open_successes += 1
+                if self._half_open_successes >= self.config.half_open_max_calls:
+                    self._state = CircuitState.CLOSED
+                    self._window.clear()
+                return
+            self._window.append(False)
+
+    def record_failure(self) -> None:
+        """记录一次失败调用"""
+        with self._lock:
+            if self._state == CircuitState.HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+                self._trip()
+                return
+            if self._state == CircuitState.OPEN:
+                return
+            self._window.append(True)
+            if (len(self._window) >= self.config.minimum_calls
+                    and self._failure_rate() >= self.config.failure_rate_threshold):
+                self._trip()
+
+    def reset(self) -> None:
+        """重置为闭合状态"""
+        with self._lock:
+            self._state = CircuitState.CLOSED
+            self._window.clear()
+            self._half_open_in_flight = 0
+            self._half_open_successes = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        获取熔断器状态快照
+
+        Returns:
+            Dict[str, Any]: 状态、失败率、剩余冷却时间等信息
+        """
+        with self._lock:
+            self._update_state()
+            remaining = 0.0
+            if self._state == CircuitState.OPEN:
+                remaining = max(0.0, self.config.cooldown - (time.monotonic() - self._opened_at))
+            return {
+                'state': self._state,
+                'failure_rate': self._failure_rate(),
+                'calls_in_window': len(self._window),
+                'cooldown_remaining': remaining,
+                'open_count': self._open_count,
+                'rejected': self._rejected_count,
+            }
+
+
+class CircuitBreakerRegistry:
+    """按名称（主机）管理熔断器"""
+
+    def __init__(self, config: Optional[CircuitBreakerConfig] = None):
+        """
+        初始化熔断器注册表
+
+        Args:
+            config: 新建熔断器时使用的配置
+        """
+        self.config = config or CircuitBreakerConfig()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        """获取（必要时创建）指定名称的熔断器"""
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(name)
+                if breaker is None:
+                    breaker = CircuitBreaker(name, self.config)
+                    self._breakers[name] = breaker
+        return breaker
+
+    def find(self, name: str) -> Optional[CircuitBreaker]:
+        """查找已存在的熔断器，不存在时返回None"""
+        return self._breakers.get(name)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """获取所有熔断器的状态快照"""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.snapshot() for breaker in breakers}
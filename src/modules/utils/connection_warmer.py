@@ -0,0 +1,112 @@
+"""
+连接预热模块
+启动时并行建立到各个已启用API主机的长连接，并定期刷新，使连接池在空闲期间保持可用
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+# 导入日志工具
+from src.modules.utils.logger import setup_logger
+from src.modules.utils.http_utils import HTTPUtils, http_utils as default_http_utils
+from src.modules.api.api_config import APIConfig, api_config as default_api_config
+
+# 设置模块日志
+logger = setup_logger(__name__)
+
+
+class ConnectionWarmer:
+    """API主机连接预热器"""
+
+    def __init__(
+        self,
+        http_utils: Optional[HTTPUtils] = None,
+        api_config: Optional[APIConfig] = None,
+        connections_per_host: int = 1,
+        refresh_interval: float = 60.0,
+        timeout: float = 5.0
+    ):
+        """
+        初始化连接预热器
+
+        Args:
+            http_utils: 需要预热连接池的HTTP工具，默认使用全局实例
+            api_config: 提供已启用API及其base_url的配置，默认使用全局实例
+            connections_per_host: 每个主机预热的连接数
+            refresh_interval: 刷新间隔（秒），应小于上游的空闲连接超时
+            timeout: 单次预热的超时时间（秒）
+        """
+        self.http_utils = http_utils or default_http_utils
+        self.api_config = api_config or default_api_config
+        self.connections_per_host = max(1, connections_per_host)
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "ConnectionWarmer":
+        """从环境变量读取预热配置"""
+        return cls(
+            connections_per_host=int(os.getenv('CONNECTION_WARMUP_PER_HOST', '1')),
+            refresh_interval=float(os.getenv('CONNECTION_WARMUP_REFRESH_INTERVAL', '60')),
+            timeout=float(os.getenv('CONNECTION_WARMUP_TIMEOUT', '5')),
+        )
+
+    def target_urls(self) -> List[str]:
+        """获取已启用且熔断器未打开的API的base_url（每个主机一个）"""
+        urls = {}
+        for api in self.api_config.config.values():
+            url = api.get('base_url')
+            if not api.get('enabled') or not url:
+                continue
+            host = urlparse(url).netloc.lower()
+            if host not in urls and not self.http_utils.is_circuit_open(url):
+                urls[host] = url
+        return list(urls.values())
+
+    def warm_up(self) -> Dict[str, bool]:
+        """
+        并行预热所有目标主机的连接
+
+        Returns:
+            Dict[str, bool]: 主机到是否预热成功的映射
+        """
+        urls = self.target_urls()
+        if not urls:
+            return {}
+        tasks = [url for url in urls for _ in range(self.connections_per_host)]
+        with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix='conn-warmup') as executor:
+            results = list(executor.map(lambda url: self.http_utils.warm_connection(url, self.timeout), tasks))
+
+        status: Dict[str, bool] = {}
+        for url, ok in zip(tasks, results):
+            host = urlparse(url).netloc.lower()
+            status[host] = status.get(host, False) or ok
+        logger.info(f"连接预热完成: {sum(status.values())}/{len(status)} 个主机可用")
+        return status
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.warm_up()
+            except Exception as e:
+                logger.warning(f"连接刷新失败: {str(e)}")
+
+    def start(self) -> None:
+        """启动后台刷新线程（不会立即预热，启动前应先调用warm_up）"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='conn-warmup-refresh', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """停止后台刷新线程"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
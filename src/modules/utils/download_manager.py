@@ -0,0 +1,316 @@
+"""
+批量下载管理模块
+基于HTTPUtils.download_file批量下载文件，限制全局和单个主机的并发数，
+跳过校验和一致的已有文件，失败后按指数退避重试，并通过回调报告总体进度和吞吐量
+"""
+
+import os
+import time
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional
+from urllib.parse import urlparse
+
+# 导入日志工具
+from src.modules.utils.logger import setup_logger
+from src.modules.utils.http_utils import HTTPUtils, http_utils as default_http_utils
+from src.modules.utils.ranged_download import HASH_READ_SIZE
+
+# 设置模块日志
+logger = setup_logger(__name__)
+
+
+class DownloadStatus:
+    """下载任务状态常量"""
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    SKIPPED = "skipped"
+    FAILED = "failed"
+
+
+class DownloadTask:
+    """单个下载任务"""
+
+    def __init__(
+        self,
+        url: str,
+        save_path: str,
+        checksum: Optional[str] = None,
+        checksum_algorithm: str = 'sha256',
+        headers: Optional[Dict[str, str]] = None,
+        segments: int = 1,
+        resume: bool = False
+    ):
+        """
+        初始化下载任务
+
+        Args:
+            url: 文件URL
+            save_path: 保存路径
+            checksum: 期望的文件摘要（十六进制），提供时已有文件校验一致则跳过下载
+            checksum_algorithm: 摘要算法，默认sha256
+            headers: 请求头
+            segments: 并行Range请求数（见HTTPUtils.download_file）
+            resume: 是否断点续传，重试时从上次中断的位置继续
+        """
+        self.url = url
+        self.save_path = save_path
+        self.checksum = checksum
+        self.checksum_algorithm = checksum_algorithm
+        self.headers = headers
+        self.segments = segments
+        self.resume = resume
+        self.host = urlparse(url).netloc.lower()
+        self.status = DownloadStatus.PENDING
+        self.attempts = 0
+        self.bytes_downloaded = 0
+        self.elapsed = 0.0
+        self.retry_at = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """获取任务状态"""
+        return {
+            'url': self.url,
+            'save_path': self.save_path,
+            'status': self.status,
+            'attempts': self.attempts,
+            'bytes_downloaded': self.bytes_downloaded,
+            'elapsed': self.elapsed,
+        }
+
+
+def file_matches(path: str, checksum: str, algorithm: str = 'sha256') -> bool:
+    """判断本地文件是否存在且摘要与期望一致"""
+    if not os.path.isfile(path):
+        return False
+    digest = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_READ_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest() == checksum.lower()
+
+
+class DownloadManager:
+    """批量下载管理器"""
+
+    def __init__(
+        self,
+        http_utils: Optional[HTTPUtils] = None,
+        max_workers: int = 4,
+        per_host: int = 2,
+        max_attempts: int = 3,
+        backoff_factor: float = 1.0,
+        backoff_max: float = 30.0,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        progress_interval: float = 0.5
+    ):
+        """
+        初始化批量下载管理器
+
+        Args:
+            http_utils: 执行下载的HTTP工具，默认使用全局实例
+            max_workers: 全局最大并发下载数
+            per_host: 单个主机的最大并发下载数
+            max_attempts: 每个文件最多尝试的次数
+            backoff_factor: 重试退避系数，第一次重试立即进行，之后第n次重试前等待 backoff_factor × 2^(n-1) 秒
+            backoff_max: 单次退避的上限（秒）
+            progress_callback: 进度回调，参数为progress()的返回值
+            progress_interval: 下载过程中调用进度回调的间隔（秒），任务结束时总会回调
+        """
+        self.http_utils = http_utils or default_http_utils
+        self.max_workers = max(1, max_workers)
+        self.per_host = max(1, per_host)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.progress_callback = progress_callback
+        self.progress_interval = progress_interval
+        self.tasks: List[DownloadTask] = []
+        self._cond = threading.Condition()
+        # 调度状态：待下载（含等待重试）的任务、各主机和全局正在下载的任务数
+        self._pending: Deque[DownloadTask] = deque()
+        self._host_active: Dict[str, int] = {}
+        self._running = 0
+        self._bytes_lock = threading.Lock()
+        self._bytes = 0
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+
+    def add(self, url: str, save_path: str, **kwargs) -> DownloadTask:
+        """
+        添加下载任务
+
+        Args:
+            url: 文件URL
+            save_path: 保存路径
+            **kwargs: DownloadTask的其他参数（checksum、headers、segments、resume等）
+
+        Returns:
+            DownloadTask: 新建的任务
+        """
+        task = DownloadTask(url, save_path, **kwargs)
+        self.tasks.append(task)
+        return task
+
+    def progress(self) -> Dict[str, Any]:
+        """
+        获取总体进度
+
+        Returns:
+            Dict[str, Any]: 各状态的任务数、已下载字节数、耗时和平均吞吐量（字节/秒）
+        """
+        counts = {status: 0 for status in (
+            DownloadStatus.PENDING, DownloadStatus.RUNNING, DownloadStatus.DONE,
+            DownloadStatus.SKIPPED, DownloadStatus.FAILED
+        )}
+        for task in self.tasks:
+            counts[task.status] += 1
+        with self._bytes_lock:
+            downloaded = self._bytes
+        if self._started_at is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self._finished_at or time.monotonic()) - self._started_at
+        return {
+            'total': len(self.tasks),
+            **counts,
+            'bytes_downloaded': downloaded,
+            'elapsed': elapsed,
+            'throughput': downloaded / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def _report(self) -> None:
+        if self.progress_callback is not None:
+            try:
+                self.progress_callback(self.progress())
+            except Exception as e:
+                logger.warning(f"下载进度回调失败: {str(e)}")
+
+    def _backoff(self, retry: int) -> float:
+        """与urllib3相同的指数退避：第一次重试不等待"""
+        if retry <= 1:
+            return 0.0
+        return min(self.backoff_max, self.backoff_factor * (2 ** (retry - 1)))
+
+    def _download(self, task: DownloadTask) -> None:
+        """在工作线程中执行一次下载，结束后更新任务状态并唤醒调度循环"""
+        # 本次尝试收到的字节数，失败且不续传时下次会重新下载，需从总数中扣除
+        received = 0
+
+        def on_bytes(count: int) -> None:
+            nonlocal received
+            with self._bytes_lock:
+                received += count
+                self._bytes += count
+                task.bytes_downloaded += count
+
+        start = time.monotonic()
+        try:
+            ok = self.http_utils.download_file(
+                task.url, task.save_path, headers=task.headers, segments=task.segments, resume=task.resume,
+                checksum=task.checksum, checksum_algorithm=task.checksum_algorithm, progress_callback=on_bytes
+            )
+        except Exception as e:
+            logger.error(f"下载任务异常: {task.url}: {str(e)}")
+            ok = False
+
+        if not ok and not task.resume:
+            with self._bytes_lock:
+                self._bytes -= received
+                task.bytes_downloaded -= received
+
+        with self._cond:
+            task.elapsed += time.monotonic() - start
+            self._host_active[task.host] -= 1
+            self._running -= 1
+            if ok:
+                task.status = DownloadStatus.DONE
+            elif task.attempts >= self.max_attempts:
+                task.status = DownloadStatus.FAILED
+                logger.error(f"下载失败，已尝试{task.attempts}次: {task.url}")
+            else:
+                task.status = DownloadStatus.PENDING
+                task.retry_at = time.monotonic() + self._backoff(task.attempts)
+                self._pending.append(task)
+                logger.warning(f"下载失败，将进行第{task.attempts + 1}次尝试: {task.url}")
+            self._cond.notify()
+
+    def _next_ready(self, now: float) -> Optional[DownloadTask]:
+        """取出第一个已到重试时间且所在主机未达到并发上限的任务"""
+        for task in self._pending:
+            if task.retry_at <= now and self._host_active.get(task.host, 0) < self.per_host:
+                self._pending.remove(task)
+                return task
+        return None
+
+    def run(self) -> List[DownloadTask]:
+        """
+        执行所有待下载的任务，全部完成（成功、跳过或重试耗尽）后返回
+
+        Returns:
+            List[DownloadTask]: 所有任务，状态为done、skipped或failed
+        """
+        self._started_at = time.monotonic()
+        self._finished_at = None
+        self._pending.clear()
+        self._host_active.clear()
+        self._running = 0
+        with self._bytes_lock:
+            self._bytes = 0
+
+        for task in self.tasks:
+            finished = task.status in (DownloadStatus.DONE, DownloadStatus.SKIPPED)
+            if task.checksum:
+                if file_matches(task.save_path, task.checksum, task.checksum_algorithm):
+                    if not finished:
+                        logger.info(f"文件已存在且校验一致，跳过下载: {task.save_path}")
+                        task.status = DownloadStatus.SKIPPED
+                    continue
+            elif finished and os.path.isfile(task.save_path):
+                continue
+            if finished:
+                logger.info(f"已完成的文件不存在或校验不一致，重新下载: {task.save_path}")
+            task.status = DownloadStatus.PENDING
+            task.attempts = 0
+            task.bytes_downloaded = 0
+            task.retry_at = 0.0
+            self._pending.append(task)
+        self._report()
+
+        last_report = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='download') as executor:
+            while True:
+                with self._cond:
+                    now = time.monotonic()
+                    while self._running < self.max_workers:
+                        task = self._next_ready(now)
+                        if task is None:
+                            break
+                        task.status = DownloadStatus.RUNNING
+                        task.attempts += 1
+                        self._host_active[task.host] = self._host_active.get(task.host, 0) + 1
+                        self._running += 1
+                        executor.submit(self._download, task)
+                    if not self._pending and not self._running:
+                        break
+                    # 等待任务结束、最近的重试时间或下一次进度回调
+                    wait = self.progress_interval
+                    waiting = [task.retry_at - now for task in self._pending if task.retry_at > now]
+                    if waiting:
+                        wait = min(wait, min(waiting))
+                    self._cond.wait(max(wait, 0.01))
+                if time.monotonic() - last_report >= self.progress_interval:
+                    last_report = time.monotonic()
+                    self._report()
+
+        self._finished_at = time.monotonic()
+        self._report()
+        progress = self.progress()
+        logger.info(
+            f"批量下载完成: 成功 {progress['done']}, 跳过 {progress['skipped']}, 失败 {progress['failed']}, "
+            f"共 {progress['bytes_downloaded']} 字节, 平均 {progress['throughput'] / 1024:.1f} KB/s"
+        )
+        return self.tasks
@@ -0,0 +1,245 @@
+"""
+对冲请求模块
+幂等请求在超过该主机的分位数延迟仍未返回时，再发出一个相同的请求，使用先返回的结果以降低尾延迟
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Dict, Any, Optional, Callable
+
+import requests
+
+# 导入日志工具
+from src.modules.utils.logger import setup_logger
+from src.modules.utils.latency_tracker import LatencyTracker
+
+# 设置模块日志
+logger = setup_logger(__name__)
+
+
+class HedgeConfig:
+    """对冲请求配置类"""
+    def __init__(
+        self,
+        enabled: bool = False,
+        percentile: float = 0.95,
+        min_delay: float = 0.05,
+        min_samples: int = 20,
+        budget_ratio: float = 0.05,
+        budget_burst: float = 5.0,
+        max_workers: int = 16
+    ):
+        """
+        初始化对冲请求配置
+
+        Args:
+            enabled: 是否默认对GET请求启用对冲
+            percentile: 触发对冲的延迟分位数，如0.95表示超过该主机p95仍未返回时发出对冲请求
+            min_delay: 对冲延迟下限（秒）
+            min_samples: 主机样本数达到该值后才启用对冲
+            budget_ratio: 对冲预算，每个请求积累的额外请求额度（0.05表示额外请求不超过5%）
+            budget_burst: 额度最多积累到的数量
+            max_workers: 原始请求和对冲请求各自线程池的大小
+        """
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.budget_ratio = budget_ratio
+        self.budget_burst = budget_burst
+        self.max_workers = max_workers
+
+    @classmethod
+    def from_env(cls) -> "HedgeConfig":
+        """从环境变量读取对冲请求配置"""
+        return cls(
+            enabled=os.getenv('HTTP_HEDGE_ENABLED', 'false').lower() == 'true',
+            percentile=float(os.getenv('HTTP_HEDGE_PERCENTILE', '0.95')),
+            min_delay=float(os.getenv('HTTP_HEDGE_MIN_DELAY', '0.05')),
+            min_samples=int(os.getenv('HTTP_HEDGE_MIN_SAMPLES', '20')),
+            budget_ratio=float(os.getenv('HTTP_HEDGE_BUDGET_RATIO', '0.05')),
+            budget_burst=float(os.getenv('HTTP_HEDGE_BUDGET_BURST', '5')),
+        )
+
+
+class HedgeBudget:
+    """对冲额度
+
+    每个可对冲的请求积累budget_ratio个额度，发出一次对冲请求消耗1个额度，
+    因此长期来看额外请求数不超过请求总数的budget_ratio倍，配额消耗有上限。
+    """
+
+    def __init__(self, ratio: float, burst: float):
+        """
+        初始化对冲额度
+
+        Args:
+            ratio: 每个请求积累的额度
+            burst: 额度上限
+        """
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        """记录一次可对冲的请求，积累额度"""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        """尝试消耗一个额度"""
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            return self._tokens
+
+
+class Hedger:
+    """执行对冲请求"""
+
+    def __init__(self, config: Optional[HedgeConfig] = None, latency_tracker: Optional[LatencyTracker] = None):
+        """
+        初始化对冲执行器
+
+        Args:
+            config: 对冲请求配置，默认使用HedgeConfig()
+            latency_tracker: 提供主机分位数延迟的统计对象
+        """
+        self.config = config or HedgeConfig()
+        self.latency_tracker = latency_tracker or LatencyTracker()
+        self.budget = HedgeBudget(self.config.budget_ratio, self.config.budget_burst)
+        # 原始请求和对冲请求使用各自的线程池，对冲请求不会排在原始请求后面
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._executor_lock = threading.Lock()
+        self._stats = {'requests': 0, 'hedged': 0, 'hedge_wins': 0, 'budget_exhausted': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _get_executor(self, kind: str) -> ThreadPoolExecutor:
+        """延迟创建线程池（kind为primary或hedge）"""
+        with self._executor_lock:
+            if kind not in self._executors:
+                self._executors[kind] = ThreadPoolExecutor(
+                    max_workers=self.config.max_workers, thread_name_prefix=f'http-{kind}'
+                )
+            return self._executors[kind]
+
+    def delay_for(self, host: str) -> Optional[float]:
+        """
+        计算主机的对冲延迟
+
+        Args:
+            host: 主机名
+
+        Returns:
+            Optional[float]: 对冲延迟（秒），样本不足时返回None（不对冲）
+        """
+        delay = self.latency_tracker.percentile(host, self.config.percentile, self.config.min_samples)
+        if delay is None:
+            return None
+        return max(self.config.min_delay, delay)
+
+    @staticmethod
+    def _consume(response: requests.Response) -> requests.Response:
+        """读取流式响应的响应体，使调用方得到与非流式请求相同的响应（send默认的consume）"""
+        response.content
+        return response
+
+    @staticmethod
+    def _discard(future: Future) -> None:
+        """关闭落败请求的响应，释放连接且不再读取响应体"""
+        if not future.cancelled() and future.exception() is None:
+            future.result().close()
+
+    def send(
+        self,
+        host: str,
+        attempt: Callable[[], requests.Response],
+        allow_extra: Optional[Callable[[], bool]] = None,
+        consume: Optional[Callable[[requests.Response], requests.Response]] = None
+    ) -> requests.Response:
+        """
+        发送请求，超过对冲延迟仍未返回时再发出一个相同的请求
+
+        attempt应以stream=True发送请求且不读取响应体：按响应头返回的先后决定胜出的请求，
+        胜出的响应在这里用consume读取响应体，落败的响应在返回响应头后直接关闭，不会下载响应体。
+
+        Args:
+            host: 主机名，用于查询对冲延迟
+            attempt: 发送一次请求的函数
+            allow_extra: 发出对冲请求前的额外检查（如客户端限流），返回False时不对冲
+            consume: 读取胜出响应的响应体（如限制大小和截止时间），默认读取完整的响应体
+
+        Returns:
+            requests.Response: 先返回的成功响应
+
+        Raises:
+            Exception: 所有请求都失败时抛出第一个请求的异常
+        """
+        consume = consume or self._consume
+        self._count('requests')
+        self.budget.deposit()
+        delay = self.delay_for(host)
+        if delay is None:
+            return consume(attempt())
+
+        # 对冲延迟从原始请求真正开始发送时计算，线程池排队的时间不计入
+        started = threading.Event()
+
+        def run_primary() -> requests.Response:
+            started.set()
+            return attempt()
+
+        primary = self._get_executor('primary').submit(run_primary)
+        started.wait()
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return consume(primary.result())
+
+        if not self.budget.try_spend():
+            self._count('budget_exhausted')
+            return consume(primary.result())
+        if allow_extra is not None and not allow_extra():
+            return consume(primary.result())
+
+        logger.debug(f"请求超过{delay:.3f}秒未返回，发出对冲请求: {host}")
+        self._count('hedged')
+        hedge = self._get_executor('hedge').submit(attempt)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            # 同时完成时优先使用原始请求
+            for future in sorted(done, key=lambda f: f is not primary):
+                if future.exception() is not None:
+                    if future is primary or error is None:
+                        error = future.exception()
+                    continue
+                for other in pending:
+                    if not other.cancel():
+                        other.add_done_callback(self._discard)
+                for other in done:
+                    if other is not future:
+                        self._discard(other)
+                if future is hedge:
+                    self._count('hedge_wins')
+                return consume(future.result())
+        raise error
+
+    def stats(self) -> Dict[str, Any]:
+        """获取对冲次数、对冲胜出次数和剩余额度"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['budget_tokens'] = round(self.budget.tokens, 3)
+        return stats
@@ -0,0 +1,327 @@
+"""
+HTTP响应缓存模块
+按照RFC 9111的语义缓存GET响应：遵守新鲜度、使用条件请求重新验证，并用已存储的响应体处理304；
+响应体过大的响应不缓存，所有缓存响应体的总字节数有上限，超出时淘汰最早写入的条目
+"""
+
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from src.modules.cache.cache_manager import CacheManager, cache_manager as default_cache_manager
+
+# 304响应中不应覆盖已存储响应的头部
+_NON_UPDATABLE_HEADERS = {'content-length', 'content-encoding', 'transfer-encoding', 'content-range'}
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """
+    解析Cache-Control头部
+
+    Args:
+        value: Cache-Control头部的值
+
+    Returns:
+        Dict[str, Optional[str]]: 指令名（小写）到参数值的映射，没有参数的指令值为None
+    """
+    directives: Dict[str, Optional[str]] = {}
+    if not value:
+        return directives
+    for part in value.split(','):
+        name, _, arg = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = arg.strip().strip('"') if arg else None
+    return directives
+
+
+def parse_http_date(value: Optional[str]) -> Optional[float]:
+    """解析HTTP日期为时间戳，格式无效时返回None"""
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class HTTPCache:
+    """基于CacheManager的HTTP响应缓存（私有缓存）"""
+
+    CACHEABLE_STATUS = (200, 203)
+
+    def __init__(
+        self,
+        cache: Optional[CacheManager] = None,
+        stale_retention: int = 86400,
+        heuristic_fraction: float = 0.1,
+        max_heuristic_lifetime: int = 86400,
+        max_body_bytes: Optional[int] = None,
+        max_total_bytes: Optional[int] = None
+    ):
+        """
+        初始化HTTP缓存
+
+        Args:
+            cache: 存储缓存条目的CacheManager，默认使用全局缓存管理器
+            stale_retention: 带有验证器（ETag/Last-Modified）的条目过期后继续保留的时间（秒），
+                用于条件请求重新验证
+            heuristic_fraction: 只有Last-Modified时，启发式新鲜度占资源年龄的比例
+            max_heuristic_lifetime: 启发式新鲜度上限（秒）
+            max_body_bytes: 单个响应体的大小上限（字节），超过时不缓存，
+                默认读取HTTP_CACHE_MAX_BODY_BYTES（256KB），为0时不限制
+            max_total_bytes: 所有缓存响应体的总字节数上限，超出时淘汰最早写入的条目，
+                默认读取HTTP_CACHE_MAX_BYTES（32MB），为0时不限制
+        """
+        self._cache = cache or default_cache_manager
+        self.stale_retention = stale_retention
+        self.heuristic_fraction = heuristic_fraction
+        self.max_heuristic_lifetime = max_heuristic_lifetime
+        self.max_body_bytes = (
+            max_body_bytes if max_body_bytes is not None
+            else int(os.getenv('HTTP_CACHE_MAX_BODY_BYTES', str(256 * 1024)))
+        )
+        self.max_total_bytes = (
+            max_total_bytes if max_total_bytes is not None
+            else int(os.getenv('HTTP_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+        )
+        # 缓存键 -> 响应体字节数（按写入顺序）；缓存管理器因过期删除的条目在查找时移除，
+        # 在此之前仍计入总字节数，只会让淘汰提前而不会超出上限
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stored': 0, 'too_large': 0, 'evicted': 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    @staticmethod
+    def _key(url: str) -> str:
+        """根据完整URL生成缓存键"""
+        return "http_cache|" + hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def lookup(self, url: str, request_headers: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        查找缓存条目（可能已过期，需要调用is_fresh判断）
+
+        Args:
+            url: 包含查询参数的完整URL
+            request_headers: 请求头，用于匹配Vary和判断请求端的no-cache/no-store
+
+        Returns:
+            Optional[Dict[str, Any]]: 缓存条目，没有可用条目时返回None
+        """
+        request_headers = CaseInsensitiveDict(request_headers or {})
+        request_cc = parse_cache_control(request_headers.get('Cache-Control'))
+        if 'no-store' in request_cc:
+            return None
+
+        key = self._key(url)
+        entry = self._cache.get(key)
+        if entry is None:
+            with self._lock:
+                self._total_bytes -= self._sizes.pop(key, 0)
+                self._stats['misses'] += 1
+            return None
+
+        # Vary中列出的请求头必须与存储时一致
+        for name, value in entry['vary'].items():
+            if request_headers.get(name) != value:
+                self._count('misses')
+                return None
+
+        if 'no-cache' in request_cc or ('max-age' in request_cc and request_cc['max-age'] == '0'):
+            entry = dict(entry, expires_at=0.0)
+        return entry
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        """判断缓存条目是否仍在新鲜期内"""
+        return time.time() < entry['expires_at']
+
+    @staticmethod
+    def conditional_headers(entry: Dict[str, Any]) -> Dict[str, str]:
+        """生成重新验证所需的条件请求头"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def _freshness_lifetime(self, headers: CaseInsensitiveDict, date: float) -> float:
+        """按照RFC 9111第4.2.1节计算新鲜度寿命（秒）"""
+        cache_control = parse_cache_control(headers.get('Cache-Control'))
+        if 'no-cache' in cache_control:
+            return 0.0
+        if 'max-age' in cache_control:
+            try:
+                return max(0.0, float(cache_control['max-age']))
+            except (TypeError, ValueError):
+                return 0.0
+        if 'Expires' in headers:
+            expires = parse_http_date(headers.get('Expires'))
+            return max(0.0, expires - date) if expires is not None else 0.0
+        last_modified = parse_http_date(headers.get('Last-Modified'))
+        if last_modified is not None:
+            return min(self.max_heuristic_lifetime, max(0.0, (date - last_modified) * self.heuristic_fraction))
+        return 0.0
+
+    def _save(
+        self,
+        url: str,
+        request_headers: CaseInsensitiveDict,
+        status_code: int,
+        reason: str,
+        headers: CaseInsensitiveDict,
+        content: bytes,
+        encoding: Optional[str]
+    ) -> bool:
+        """计算新鲜度并写入缓存，不可缓存时返回False"""
+        if self.max_body_bytes and len(content) > self.max_body_bytes:
+            self._count('too_large')
+            return False
+        cache_control = parse_cache_control(headers.get('Cache-Control'))
+        vary_header = headers.get('Vary', '')
+        if 'no-store' in cache_control or vary_header.strip() == '*':
+            return False
+
+        now = time.time()
+        date = parse_http_date(headers.get('Date')) or now
+        try:
+            age_header = float(headers.get('Age', 0))
+        except (TypeError, ValueError):
+            age_header = 0.0
+        current_age = max(0.0, now - date, age_header)
+        remaining = self._freshness_lifetime(headers, date) - current_age
+
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if remaining <= 0 and not (etag or last_modified):
+            return False
+
+        vary = {}
+        for name in vary_header.split(','):
+            name = name.strip()
+            if name:
+                vary[name] = request_headers.get(name)
+
+        ttl = max(0.0, remaining) + (self.stale_retention if etag or last_modified else 0)
+        key = self._key(url)
+        self._cache.set(key, {
+            'url': url,
+            'status_code': status_code,
+            'reason': reason,
+            'headers': dict(headers),
+            'content': content,
+            'encoding': encoding,
+            'etag': etag,
+            'last_modified': last_modified,
+            'vary': vary,
+            'stored_at': now,
+            'age_at_store': current_age,
+            'expires_at': now + remaining,
+        }, ttl=max(1, int(ttl)))
+        self._account(key, len(content))
+        return True
+
+    def _account(self, key: str, size: int) -> None:
+        """记录条目的响应体大小，总字节数超过上限时淘汰最早写入的条目"""
+        evicted = []
+        with self._lock:
+            self._total_bytes += size - self._sizes.pop(key, 0)
+            self._sizes[key] = size
+            while self.max_total_bytes and self._total_bytes > self.max_total_bytes and len(self._sizes) > 1:
+                old_key, old_size = self._sizes.popitem(last=False)
+                self._total_bytes -= old_size
+                self._stats['evicted'] += 1
+                evicted.append(old_key)
+        for old_key in evicted:
+            self._cache.delete(old_key)
+
+    def store(self, url: str, request_headers: Optional[Dict[str, str]], response: requests.Response) -> bool:
+        """
+        缓存一个GET响应
+
+        Args:
+            url: 包含查询参数的完整URL
+            request_headers: 请求头
+            response: 响应对象
+
+        Returns:
+            bool: 响应是否被缓存
+        """
+        if response.status_code not in self.CACHEABLE_STATUS:
+            return False
+        request_headers = CaseInsensitiveDict(request_headers or {})
+        if 'no-store' in parse_cache_control(request_headers.get('Cache-Control')):
+            return False
+        stored = self._save(
+            url, request_headers, response.status_code, response.reason,
+            CaseInsensitiveDict(response.headers), response.content, response.encoding
+        )
+        if stored:
+            self._count('stored')
+        return stored
+
+    def revalidated(
+        self,
+        entry: Dict[str, Any],
+        request_headers: Optional[Dict[str, str]],
+        response: requests.Response
+    ) -> requests.Response:
+        """
+        处理304响应：用304的头部更新已存储的响应，并返回已存储的响应体
+
+        Args:
+            entry: 发起条件请求时使用的缓存条目
+            request_headers: 请求头
+            response: 304响应
+
+        Returns:
+            requests.Response: 用已存储的响应体重建的响应
+        """
+        headers = CaseInsensitiveDict(entry['headers'])
+        for name, value in response.headers.items():
+            if name.lower() not in _NON_UPDATABLE_HEADERS:
+                headers[name] = value
+        self._save(
+            entry['url'], CaseInsensitiveDict(request_headers or {}), entry['status_code'],
+            entry['reason'], headers, entry['content'], entry['encoding']
+        )
+        self._count('revalidated')
+        return self._build_response(dict(entry, headers=dict(headers), stored_at=time.time(), age_at_store=0.0), response)
+
+    def build_response(self, entry: Dict[str, Any]) -> requests.Response:
+        """用新鲜的缓存条目构建响应（缓存命中）"""
+        self._count('hits')
+        return self._build_response(entry)
+
+    @staticmethod
+    def _build_response(entry: Dict[str, Any], origin: Optional[requests.Response] = None) -> requests.Response:
+        """根据缓存条目构建requests.Response对象"""
+        response = requests.Response()
+        response.status_code = entry['status_code']
+        response.reason = entry['reason']
+        response._content = entry['content']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        age = entry.get('age_at_store', 0.0) + max(0.0, time.time() - entry['stored_at'])
+        response.headers['Age'] = str(int(age))
+        response.encoding = entry['encoding']
+        response.url = entry['url']
+        if origin is not None:
+            response.request = origin.request
+            response.elapsed = origin.elapsed
+        response.from_cache = True
+        return response
+
+    def stats(self) -> Dict[str, int]:
+        """获取缓存命中、重新验证、未命中、写入、因过大未缓存和淘汰的次数，以及缓存的响应体总字节数"""
+        with self._lock:
+            return dict(self._stats, bytes=self._total_bytes)
@@ -0,0 +1,337 @@
+"""
+HTTP请求指标模块
+按主机和端点统计DNS解析、建立连接、TLS握手、首字节时间和总耗时，以及重试次数、最终状态码和响应大小
+"""
+
+import re
+import time
+import itertools
+import socket
+import threading
+from typing import Dict, Any, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NameResolutionError, NewConnectionError, ConnectTimeoutError
+
+# 耗时直方图的桶上限（秒）：1ms起按2倍递增到约65秒
+LATENCY_BUCKETS = tuple(0.001 * 2 ** i for i in range(17))
+# 响应大小直方图的桶上限（字节）：256B起按4倍递增到64MB
+SIZE_BUCKETS = tuple(256 * 4 ** i for i in range(10))
+# 直方图的计数分片数（并发记录的线程分散到各分片）
+HISTOGRAM_STRIPES = 8
+# 每个主机最多单独统计的端点数，超出的端点合并为"other"
+MAX_ENDPOINTS_PER_HOST = 50
+
+# 路径中看起来像ID或密钥的片段（纯数字、UUID、长的十六进制/字母数字串）替换为占位符，
+# 避免端点数量膨胀以及把路径中的API密钥暴露在指标里
+_ID_SEGMENT = re.compile(r'^(\d+|[0-9a-fA-F-]{16,}|[A-Za-z0-9_-]{24,})$')
+
+
+class LogHistogram:
+    """固定对数刻度分桶的直方图
+
+    计数分成固定数量的分片，线程第一次写入时按顺序分配到其中一个分片，各分片使用独立的锁，
+    并发写入的线程很少争用同一把锁；读取时合并所有分片。分片数量固定，不随线程数增长。
+    """
+
+    def __init__(self, buckets: tuple, stripes: int = HISTOGRAM_STRIPES):
+        """
+        初始化直方图
+
+        Args:
+            buckets: 升序排列的桶上限，超过最后一个上限的值计入溢出桶
+            stripes: 计数分片数
+        """
+        self.buckets = buckets
+        self._local = threading.local()
+        # 每个分片的前len(buckets)+1项为各桶计数，最后两项为样本数和总和
+        self._shards: List[List[float]] = [[0] * (len(buckets) + 3) for _ in range(stripes)]
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._next_stripe = itertools.count()
+
+    def _stripe(self) -> int:
+        stripe = getattr(self._local, 'stripe', None)
+        if stripe is None:
+            # itertools.count的next在CPython中是原子的
+            stripe = next(self._next_stripe) % len(self._shards)
+            self._local.stripe = stripe
+        return stripe
+
+    def observe(self, value: float) -> None:
+        """记录一个值"""
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        stripe = self._stripe()
+        shard = self._shards[stripe]
+        with self._locks[stripe]:
+            shard[index] += 1
+            shard[-2] += 1
+            shard[-1] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        合并各线程分片
+
+        Returns:
+            Dict[str, Any]: 样本数、总和、平均值、p50/p95/p99（桶上限近似）和非空桶计数
+        """
+        shards = []
+        for lock, shard in zip(self._locks, self._shards):
+            with lock:
+                shards.append(list(shard))
+        totals = [0] * (len(self.buckets) + 3)
+        for shard in shards:
+            for i, value in enumerate(shard):
+                totals[i] += value
+        count, total = int(totals[-2]), totals[-1]
+        counts = totals[:-2]
+        return {
+            'count': count,
+            'sum': round(total, 6),
+            'avg': round(total / count, 6) if count else None,
+            'p50': self._quantile(counts, count, 0.5),
+            'p95': self._quantile(counts, count, 0.95),
+            'p99': self._quantile(counts, count, 0.99),
+            'buckets': {
+                (f'le_{self.buckets[i]:g}' if i < len(self.buckets) else 'inf'): int(n)
+                for i, n in enumerate(counts) if n
+            },
+        }
+
+    def _quantile(self, counts: List[float], count: int, q: float) -> Optional[float]:
+        """返回包含该分位数的桶上限"""
+        if not count:
+            return None
+        target = q * count
+        seen = 0
+        for i, n in enumerate(counts):
+            seen += n
+            if seen >= target:
+                return self.buckets[i] if i < len(self.buckets) else float('inf')
+        return float('inf')
+
+
+class _PhaseRecorder(threading.local):
+    """记录当前线程正在进行的请求在连接层的各阶段耗时"""
+
+    def reset(self) -> None:
+        self.phases: Dict[str, float] = {}
+        self.new_connections = 0
+
+    def add(self, phase: str, seconds: float) -> None:
+        phases = getattr(self, 'phases', None)
+        if phases is not None:
+            phases[phase] = phases.get(phase, 0.0) + seconds
+
+
+phase_recorder = _PhaseRecorder()
+
+
+class _TimedConnectionMixin:
+    """为urllib3连接记录DNS解析、建立连接和首字节时间
+
+    依赖urllib3 2.x（requirements.txt中限定为>=2,<3）的HTTPConnection内部属性_dns_host
+    （实际连接的主机名，Host头仍使用host）和_new_conn()；升级urllib3大版本时需要重新确认。
+    """
+
+    def _new_conn(self) -> socket.socket:
+        start = time.perf_counter()
+        try:
+            addresses = []
+            for *_, sockaddr in socket.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM):
+                if sockaddr[0] not in addresses:
+                    addresses.append(sockaddr[0])
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        resolved = time.perf_counter()
+        phase_recorder.add('dns', resolved - start)
+
+        # 依次连接解析出的地址，避免由urllib3再次解析域名
+        dns_host = self._dns_host
+        try:
+            for i, address in enumerate(addresses):
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()
+                    break
+                except (NewConnectionError, ConnectTimeoutError):
+                    if i == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = dns_host
+        phase_recorder.add('connect', time.perf_counter() - resolved)
+        phase_recorder.new_connections = getattr(phase_recorder, 'new_connections', 0) + 1
+        return sock
+
+    def getresponse(self, *args, **kwargs):
+        start = time.perf_counter()
+        response = super().getresponse(*args, **kwargs)
+        phase_recorder.add('ttfb', time.perf_counter() - start)
+        return response
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    """记录阶段耗时的HTTP连接"""
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    """记录阶段耗时的HTTPS连接，TLS握手时间为connect总耗时减去DNS和TCP连接时间"""
+
+    def connect(self) -> None:
+        phases = getattr(phase_recorder, 'phases', None) or {}
+        before = phases.get('dns', 0.0) + phases.get('connect', 0.0)
+        start = time.perf_counter()
+        super().connect()
+        phases = getattr(phase_recorder, 'phases', None) or {}
+        setup = phases.get('dns', 0.0) + phases.get('connect', 0.0) - before
+        phase_recorder.add('tls', max(0.0, time.perf_counter() - start - setup))
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class InstrumentedHTTPAdapter(HTTPAdapter):
+    """使用计时连接的适配器（经代理的请求不记录连接阶段耗时）"""
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+
+
+class _EndpointMetrics:
+    """单个端点的指标"""
+
+    PHASES = ('dns', 'connect', 'tls', 'ttfb', 'total')
+
+    def __init__(self):
+        self.latency = {phase: LogHistogram(LATENCY_BUCKETS) for phase in self.PHASES}
+        self.size = LogHistogram(SIZE_BUCKETS)
+        self.retries = LogHistogram((0, 1, 2, 3, 5, 10))
+        self.status: Dict[str, int] = {}
+        self.new_connections = 0
+        self._lock = threading.Lock()
+
+    def count_status(self, status: str, new_connections: int) -> None:
+        with self._lock:
+            self.status[status] = self.status.get(status, 0) + 1
+            self.new_connections += new_connections
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            status = dict(self.status)
+            new_connections = self.new_connections
+        return {
+            'requests': sum(status.values()),
+            'status': status,
+            'new_connections': new_connections,
+            'latency': {phase: histogram.snapshot() for phase, histogram in self.latency.items()},
+            'retries': self.retries.snapshot(),
+            'response_bytes': self.size.snapshot(),
+        }
+
+
+class HTTPMetrics:
+    """按主机和端点汇总HTTP请求指标"""
+
+    def __init__(self, max_endpoints_per_host: int = MAX_ENDPOINTS_PER_HOST):
+        """
+        初始化指标汇总
+
+        Args:
+            max_endpoints_per_host: 每个主机最多单独统计的端点数
+        """
+        self.max_endpoints_per_host = max_endpoints_per_host
+        self._hosts: Dict[str, Dict[str, _EndpointMetrics]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def endpoint_of(method: str, path: str) -> str:
+        """生成端点名称：方法加路径，ID和密钥片段替换为{id}"""
+        segments = [
+            '{id}' if _ID_SEGMENT.match(segment) else segment
+            for segment in (path or '/').split('/')
+        ]
+        return f"{method.upper()} {'/'.join(segments) or '/'}"
+
+    def _get(self, host: str, endpoint: str) -> _EndpointMetrics:
+        with self._lock:
+            endpoints = self._hosts.setdefault(host, {})
+            if endpoint not in endpoints and len(endpoints) >= self.max_endpoints_per_host:
+                endpoint = 'other'
+            metrics = endpoints.get(endpoint)
+            if metrics is None:
+                metrics = endpoints[endpoint] = _EndpointMetrics()
+            return metrics
+
+    def record(
+        self,
+        host: str,
+        endpoint: str,
+        total: float,
+        phases: Dict[str, float],
+        new_connections: int,
+        status: str,
+        retries: int,
+        size: Optional[int]
+    ) -> None:
+        """
+        记录一次请求
+
+        Args:
+            host: 主机名
+            endpoint: 端点名称
+            total: 总耗时（秒，包含重试和退避）
+            phases: 连接层各阶段耗时（秒），复用连接时没有dns/connect/tls
+            new_connections: 新建的连接数
+            status: 最终状态码，失败时为异常类名
+            retries: 重试次数
+            size: 响应大小（字节），未知时为None
+        """
+        metrics = self._get(host, endpoint)
+        metrics.latency['total'].observe(total)
+        for phase, seconds in phases.items():
+            if phase in metrics.latency:
+                metrics.latency[phase].observe(seconds)
+        metrics.retries.observe(retries)
+        if size is not None:
+            metrics.size.observe(size)
+        metrics.count_status(status, new_connections)
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """获取 {主机: {端点: 指标}} 形式的快照"""
+        with self._lock:
+            hosts = {host: dict(endpoints) for host, endpoints in self._hosts.items()}
+        return {
+            host: {endpoint: metrics.snapshot() for endpoint, metrics in endpoints.items()}
+            for host, endpoints in hosts.items()
+        }
+
+
+def retries_of(response: Optional[requests.Response]) -> int:
+    """从urllib3响应中读取实际重试次数"""
+    retries = getattr(getattr(response, 'raw', None), 'retries', None)
+    history = getattr(retries, 'history', None)
+    return len(history) if isinstance(history, tuple) else 0
+
+
+def size_of(response: requests.Response, streamed: bool) -> Optional[int]:
+    """获取响应大小：已读取响应体时为实际字节数，流式响应使用Content-Length"""
+    if not streamed and isinstance(getattr(response, '_content', None), bytes):
+        return len(response._content)
+    length = (getattr(response, 'headers', None) or {}).get('Content-Length')
+    return int(length) if isinstance(length, str) and length.isdigit() else None
@@ -4,23 +4,97 @@ HTTP请求工具模块
 """
 
 import os
+import re
 import time
+import hashlib
 import logging
+import weakref
 import requests
-from typing import Dict, Any, Optional, Union, Tuple
-from requests.adapters import HTTPAdapter
+from typing import Callable, Dict, Any, Optional, Union, Tuple
+from urllib.parse import urlparse
+from urllib3.exceptions import MaxRetryError
 from urllib3.util.retry import Retry
 
 # 导入日志工具
 from src.modules.utils.logger import setup_logger
+from src.modules.utils.circuit_breaker import CircuitBreakerConfig, CircuitBreakerRegistry, CircuitState
+from src.modules.utils.rate_limiter import RateLimiter, RateLimitMode, rate_limiter as default_rate_limiter
+from src.modules.api.key_pool import APIKeyPools, api_key_pools as default_key_pools
+from src.modules.utils.http_cache import HTTPCache
+from src.modules.utils.ranged_download import RangedDownloader, DownloadError
+from src.modules.utils.latency_tracker import LatencyTracker
+from src.modules.utils.hedging import HedgeConfig, Hedger
+from src.modules.utils.body_reader import BodyDeadlineError, BodyTooLargeError, read_body
+from src.modules.utils.retry_budget import BudgetedRetry, RetryBudgetConfig, RetryBudgetRegistry
+from src.modules.utils.adaptive_timeout import (
+    AdaptiveTimeoutConfig, AdaptiveTimeouts, split_timeout, timeout_phase
+)
+from src.modules.utils.http_metrics import (
+    HTTPMetrics, InstrumentedHTTPAdapter, phase_recorder, retries_of, size_of
+)
 
 # 设置模块日志
 logger = setup_logger(__name__)
 
+# 没有指定timeout时单次请求的默认超时时间（秒）
+DEFAULT_TIMEOUT = 30
+
 class HTTPRequestError(Exception):
     """HTTP请求异常"""
     pass
 
+class HTTPStatusError(HTTPRequestError):
+    """上游返回非2xx状态码的异常"""
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+class CircuitOpenError(HTTPRequestError):
+    """熔断器打开时快速失败的异常"""
+    pass
+
+class RateLimitedError(HTTPRequestError):
+    """客户端限流拒绝请求的异常"""
+    pass
+
+class DeadlineExceededError(HTTPRequestError):
+    """整个调用（包括重试和退避）超过截止时间的异常"""
+    pass
+
+class ResponseTooLargeError(HTTPRequestError):
+    """响应体超过max_bytes上限的异常"""
+    pass
+
+# 可能携带API密钥的查询参数（与APIConfig中的key_param对应）
+_SECRET_PARAM = re.compile(r'([?&](?:appid|key|apikey|api_key|token|access_key)=)[^&#\s\'"]*', re.IGNORECASE)
+
+def redact_secrets(text: str) -> str:
+    """把文本（如异常信息中的URL）里API密钥类查询参数的值替换为***"""
+    return _SECRET_PARAM.sub(r'\1***', text)
+
+class _Call:
+    """一次request调用中每次尝试共用的请求参数"""
+    def __init__(
+        self, method, url, host, headers, params, data, json, verify, kwargs, api_name,
+        key_pool, key_param, max_bytes, end=None
+    ):
+        self.method = method
+        self.url = url
+        self.host = host
+        self.headers = headers
+        self.params = params
+        self.data = data
+        self.json = json
+        self.verify = verify
+        self.kwargs = kwargs
+        self.api_name = api_name
+        self.key_pool = key_pool
+        self.key_param = key_param
+        # 非流式请求的响应体大小上限和整个调用的截止时间（time.monotonic()的值），
+        # 都为None时不在尝试内读取响应体
+        self.max_bytes = max_bytes
+        self.end = end
+
 class RetryConfig:
     """重试配置类"""
     def __init__(
@@ -47,27 +121,145 @@ class RetryConfig:
 class HTTPUtils:
     """HTTP工具类"""
     
-    def __init__(self):
-        """初始化HTTP工具"""
+    def __init__(
+        self,
+        circuit_breaker_config: Optional[CircuitBreakerConfig] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        http_cache: Optional[HTTPCache] = None,
+        hedge_config: Optional[HedgeConfig] = None,
+        max_response_bytes: Optional[int] = None,
+        retry_budget_config: Optional[RetryBudgetConfig] = None,
+        adaptive_timeout_config: Optional[AdaptiveTimeoutConfig] = None,
+        key_pools: Optional[APIKeyPools] = None
+    ):
+        """
+        初始化HTTP工具
+        
+        Args:
+            circuit_breaker_config: 熔断器配置，默认从环境变量读取
+            rate_limiter: 按API名称限流的限流器，默认使用基于APIConfig的全局限流器
+            http_cache: HTTP响应缓存，为None时不缓存
+            hedge_config: 对冲请求配置，默认从环境变量读取
+            max_response_bytes: 非流式请求默认的响应体大小上限（字节），为None时不限制
+            retry_budget_config: 按主机限制重试比例的重试预算配置，默认从环境变量读取
+            adaptive_timeout_config: 按主机学习连接和读取超时的配置，默认从环境变量读取
+            key_pools: 按API名称管理的密钥池，默认使用基于APIConfig的全局密钥池
+        """
+        self.retry_budgets = RetryBudgetRegistry(retry_budget_config or RetryBudgetConfig.from_env())
+        # 主机 -> 最近一次请求该主机的API名称，重试时按它获取限流令牌
+        self._host_apis: Dict[str, str] = {}
         self.session = self._create_session()
+        # 带截止时间的请求自行控制重试，使用不自动重试的会话（首次使用时创建）
+        self._deadline_session: Optional[requests.Session] = None
+        self.circuit_breakers = CircuitBreakerRegistry(
+            circuit_breaker_config or CircuitBreakerConfig.from_env()
+        )
+        self.rate_limiter = rate_limiter or default_rate_limiter
+        self.key_pools = key_pools or default_key_pools
+        self.http_cache = http_cache
+        self.latency_tracker = LatencyTracker()
+        self.hedger = Hedger(hedge_config or HedgeConfig.from_env(), self.latency_tracker)
+        self.http_metrics = HTTPMetrics()
+        self.max_response_bytes = max_response_bytes
+        self.adaptive_timeouts = AdaptiveTimeouts(adaptive_timeout_config or AdaptiveTimeoutConfig.from_env())
+    
+    @staticmethod
+    def _host_of(url: str) -> str:
+        """获取URL对应的主机（含端口），作为熔断器的键"""
+        return urlparse(url).netloc.lower()
     
-    def _create_session(self) -> requests.Session:
-        """创建带有重试机制的请求会话"""
-        # 默认重试配置
-        retry_config = RetryConfig()
+    def is_circuit_open(self, url: str) -> bool:
+        """
+        检查URL所在主机的熔断器是否处于打开状态
         
-        # 创建重试策略
-        retry = Retry(
-            total=retry_config.total,
-            read=retry_config.total,
-            connect=retry_config.total,
-            backoff_factor=retry_config.backoff_factor,
-            status_forcelist=retry_config.status_forcelist,
-            allowed_methods=retry_config.allowed_methods
+        Args:
+            url: 请求URL或基础URL
+        
+        Returns:
+            bool: 熔断器打开时返回True（半开状态视为可尝试）
+        """
+        breaker = self.circuit_breakers.find(self._host_of(url))
+        return breaker is not None and breaker.state == CircuitState.OPEN
+    
+    def circuit_breaker_status(self) -> Dict[str, Dict[str, Any]]:
+        """获取所有主机熔断器的状态快照"""
+        return self.circuit_breakers.snapshot()
+    
+    def metrics(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        获取按主机和端点统计的请求指标
+        
+        Returns:
+            Dict[str, Dict[str, Dict[str, Any]]]: {主机: {端点: 指标}}，指标包括请求数、最终状态码分布、
+                新建连接数、dns/connect/tls/ttfb/total耗时直方图、重试次数和响应大小直方图
+        """
+        return self.http_metrics.snapshot()
+    
+    def _record_metrics(
+        self,
+        session: requests.Session,
+        method: str,
+        url: str,
+        host: str,
+        elapsed: float,
+        response: Optional[requests.Response] = None,
+        error: Optional[Exception] = None,
+        streamed: bool = False
+    ) -> None:
+        """记录一次请求尝试的指标"""
+        if response is not None:
+            status, retries, size = str(response.status_code), retries_of(response), size_of(response, streamed)
+        else:
+            status, retries, size = type(error).__name__, 0, None
+            # 重试耗尽时urllib3已经按重试策略用完了全部重试次数
+            if error is not None and error.args and isinstance(error.args[0], MaxRetryError):
+                total = getattr(session.get_adapter(url).max_retries, 'total', 0)
+                retries = total if isinstance(total, int) else 0
+        self.http_metrics.record(
+            host, HTTPMetrics.endpoint_of(method, urlparse(url).path), elapsed,
+            dict(getattr(phase_recorder, 'phases', {})), getattr(phase_recorder, 'new_connections', 0),
+            status, retries, size
         )
+    
+    def retry_budget_status(self) -> Dict[str, Dict[str, Any]]:
+        """获取各主机的重试预算状态（窗口内请求数、重试数，以及累计放行和拒绝的重试次数）"""
+        return self.retry_budgets.snapshot()
+    
+    def adaptive_timeout_status(self) -> Dict[str, Dict[str, Any]]:
+        """获取各主机学习到的连接超时和读取超时"""
+        return self.adaptive_timeouts.snapshot()
+    
+    def hedge_status(self) -> Dict[str, Any]:
+        """获取对冲请求统计和各主机的延迟分位数"""
+        return {'hedging': self.hedger.stats(), 'latency': self.latency_tracker.snapshot()}
+    
+    def _create_session(self, retries: bool = True) -> requests.Session:
+        """
+        创建请求会话
+        
+        Args:
+            retries: 是否由urllib3自动重试，为False时创建不重试的会话
+        """
+        if retries:
+            # 默认重试配置
+            retry_config = RetryConfig()
+            
+            # 创建重试策略（重试次数同时受各主机的重试预算限制）
+            retry = BudgetedRetry(
+                total=retry_config.total,
+                read=retry_config.total,
+                connect=retry_config.total,
+                backoff_factor=retry_config.backoff_factor,
+                status_forcelist=retry_config.status_forcelist,
+                allowed_methods=retry_config.allowed_methods,
+                budgets=self.retry_budgets,
+                admit=self._retry_admit()
+            )
+        else:
+            retry = Retry(0, read=False)
         
         # 创建适配器
-        adapter = HTTPAdapter(max_retries=retry)
+        adapter = InstrumentedHTTPAdapter(max_retries=retry)
         
         # 创建会话并配置适配器
         session = requests.Session()
@@ -79,6 +271,393 @@ class HTTPUtils:
         
         return session
     
+    def _get_deadline_session(self) -> requests.Session:
+        """获取不自动重试的会话，它与默认会话共享连接池，预热和保持的连接对两种请求都可用"""
+        if self._deadline_session is None:
+            session = self._create_session(retries=False)
+            for prefix in ('http://', 'https://'):
+                session.get_adapter(prefix).poolmanager = self.session.get_adapter(prefix).poolmanager
+            self._deadline_session = session
+        return self._deadline_session
+    
+    def warm_connection(self, url: str, timeout: float = 5.0) -> bool:
+        """
+        预热到URL所在主机的连接
+        
+        通过连接池向URL路径发送不带凭据的HEAD请求：连接池中没有可用连接时完成DNS解析、
+        TCP连接和TLS握手，已有空闲连接时复用它，使其保持活跃。该请求不经过限流和熔断统计，
+        也不携带API密钥，不会消耗API配额。
+        
+        Args:
+            url: 目标URL（通常为API的base_url）
+            timeout: 超时时间（秒）
+        
+        Returns:
+            bool: 是否成功建立或保持连接（任何HTTP状态码都视为成功）
+        """
+        try:
+            # 与requests发送请求时使用相同的连接池键（包含TLS参数），预热的连接才能被复用
+            prepared = requests.Request('HEAD', url).prepare()
+            settings = self.session.merge_environment_settings(url, {}, None, True, None)
+            pool = self.session.get_adapter(url).get_connection_with_tls_context(
+                prepared, verify=settings['verify'], proxies=settings['proxies']
+            )
+            response = pool.urlopen(
+                'HEAD', urlparse(url).path or '/', retries=False, redirect=False,
+                timeout=timeout, preload_content=True, release_conn=True
+            )
+            logger.debug(f"连接预热完成: {url} (状态码: {response.status})")
+            return True
+        except Exception as e:
+            logger.warning(f"连接预热失败: {url} - {str(e)}")
+            return False
+    
+    def _admit_retry(self, host: str) -> bool:
+        """
+        重试前再次检查熔断器，并为该主机对应的API获取一个限流令牌（不等待）
+        
+        重试与首次请求一样消耗上游配额，令牌不足或熔断器已打开时与重试预算耗尽一样不再重试。
+        """
+        if self.circuit_breakers.get(host).state == CircuitState.OPEN:
+            logger.warning(f"熔断器已打开，不再重试: {host}")
+            return False
+        api_name = self._host_apis.get(host)
+        if api_name and not self.rate_limiter.acquire(api_name, RateLimitMode.SHED):
+            logger.warning(f"限流令牌不足，不再重试: {api_name}")
+            return False
+        return True
+    
+    def _retry_admit(self) -> Callable[[str], bool]:
+        """urllib3重试策略使用的_admit_retry；只弱引用HTTPUtils，会话与它之间不形成引用环"""
+        owner = weakref.ref(self)
+        
+        def admit(host: str) -> bool:
+            http_utils = owner()
+            return http_utils is None or http_utils._admit_retry(host)
+        return admit
+    
+    @staticmethod
+    def _clamp_timeout(
+        timeout: Optional[Union[float, Tuple[float, float]]],
+        remaining: float
+    ) -> Union[float, Tuple[float, float]]:
+        """把单次请求的超时限制在剩余时间内"""
+        if timeout is None:
+            timeout = DEFAULT_TIMEOUT
+        if isinstance(timeout, tuple):
+            return tuple(min(value, remaining) if value is not None else remaining for value in timeout)
+        return min(timeout, remaining)
+    
+    def _send_with_deadline(
+        self,
+        send,
+        method: str,
+        url: str,
+        deadline: float,
+        end: float,
+        timeout: Optional[Union[float, Tuple[float, float]]],
+        retry_config: RetryConfig
+    ) -> requests.Response:
+        """
+        在截止时间内按重试配置发送请求
+        
+        与urllib3的自动重试使用相同的重试条件和退避间隔，但每次尝试的连接和读取超时
+        都不超过剩余时间，剩余时间不足以完成退避时直接放弃。
+        
+        Args:
+            send: 使用给定会话和超时发送一次请求的函数
+            method: HTTP方法
+            url: 请求URL
+            deadline: 整个调用的时间上限（秒），用于错误信息
+            end: 整个调用的截止时间（time.monotonic()的值），限流排队已经用掉的时间不再计入剩余时间
+            timeout: 单次请求的超时时间
+            retry_config: 重试配置
+        
+        Returns:
+            requests.Response: 最后一次尝试的响应
+        
+        Raises:
+            DeadlineExceededError: 截止时间前没有得到可用响应时抛出
+        """
+        deadline_session = self._get_deadline_session()
+        host = self._host_of(url)
+        retry_budget = self.retry_budgets.get(host)
+        method_retryable = (
+            retry_config.allowed_methods is None or method.upper() in retry_config.allowed_methods
+        )
+        failures = 0
+        while True:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceededError(f"请求超过截止时间{deadline}秒（已尝试{failures}次）: {url}")
+            try:
+                response = send(deadline_session, self._clamp_timeout(timeout, remaining))
+                error = None
+                if response.status_code not in retry_config.status_forcelist:
+                    return response
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                response, error = None, e
+            except BodyDeadlineError as e:
+                # 上游逐块缓慢发送响应体，读到截止时间仍未读完
+                raise DeadlineExceededError(
+                    f"请求超过截止时间{deadline}秒（响应体未读完）: {url}"
+                ) from e
+            
+            failures += 1
+            if failures > retry_config.total or not method_retryable:
+                if response is not None:
+                    return response
+                raise error
+            
+            # 与urllib3相同的指数退避：第一次重试不等待
+            backoff = 0.0 if failures <= 1 else min(
+                Retry.DEFAULT_BACKOFF_MAX, retry_config.backoff_factor * (2 ** (failures - 1))
+            )
+            if time.monotonic() + backoff >= end:
+                message = f"请求超过截止时间{deadline}秒（已尝试{failures}次）: {url}"
+                if error is not None:
+                    raise DeadlineExceededError(message) from error
+                raise DeadlineExceededError(message)
+            # 该主机的重试预算耗尽、熔断器已打开或限流令牌不足时与重试次数用尽一样处理
+            if not retry_budget.try_retry():
+                logger.warning(f"重试预算已耗尽，不再重试: {url}")
+                if response is not None:
+                    return response
+                raise error
+            if not self._admit_retry(host):
+                if response is not None:
+                    return response
+                raise error
+            if response is not None:
+                response.close()
+            logger.debug(f"第{failures}次尝试失败，{backoff:.2f}秒后重试: {url}")
+            time.sleep(backoff)
+    
+    def _lookup_cache(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        headers: Optional[Dict[str, str]],
+        cache: Optional[bool],
+        stream: bool
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]], Optional[Dict[str, str]], Optional[requests.Response]]:
+        """
+        查找HTTP响应缓存
+        
+        Returns:
+            Tuple: (缓存键URL, 缓存条目, 请求头, 新鲜的缓存响应)；不使用缓存时缓存键URL为None，
+                过期但带有验证器的条目在请求头中加入条件请求头
+        """
+        if self.http_cache is None or method.upper() != 'GET' or stream or cache is False:
+            return None, None, headers, None
+        cache_url = requests.Request('GET', url, params=params).prepare().url
+        cached_entry = self.http_cache.lookup(cache_url, headers)
+        if cached_entry is None:
+            return cache_url, None, headers, None
+        if self.http_cache.is_fresh(cached_entry):
+            logger.debug(f"HTTP缓存命中: {url}")
+            return cache_url, cached_entry, headers, self.http_cache.build_response(cached_entry)
+        headers = {**(headers or {}), **self.http_cache.conditional_headers(cached_entry)}
+        return cache_url, cached_entry, headers, None
+    
+    def _admit(
+        self,
+        host: str,
+        api_name: Optional[str],
+        rate_limit_mode: Optional[str],
+        rate_limit_timeout: Optional[float],
+        end: Optional[float] = None
+    ) -> Tuple[Any, Optional[Any], Optional[str]]:
+        """
+        检查熔断器、密钥配额和客户端限流，决定是否发出请求
+        
+        有截止时间end时，限流排队最多等待到截止时间（block模式同样改为有时限的排队），
+        排队的时间计入整个调用的耗时。
+        
+        Returns:
+            Tuple: (该主机的熔断器, 密钥池, 密钥参数名)；该API没有配置密钥时密钥池为None
+        
+        Raises:
+            CircuitOpenError: 当目标主机的熔断器打开时抛出
+            RateLimitedError: 当配额已用完、所有密钥都在冷却中或客户端限流拒绝请求时抛出
+        """
+        # 熔断器打开时快速失败，不再经过限流排队、重试和退避
+        breaker = self.circuit_breakers.get(host)
+        if breaker.state == CircuitState.OPEN:
+            error_msg = f"熔断器已打开，快速失败: {host}"
+            logger.warning(error_msg)
+            raise CircuitOpenError(error_msg)
+        
+        # 所有密钥都因429处于冷却中或配额已用完时，请求必然被拒绝，不再发出
+        key_pool, key_param = None, None
+        if api_name:
+            key_param = self.key_pools.api_config.get_key_param(api_name)
+            if key_param and len(self.key_pools.get(api_name)):
+                key_pool = self.key_pools.get(api_name)
+        if key_pool is not None:
+            exhausted = key_pool.all_cooling()
+        else:
+            exhausted = bool(api_name) and self.key_pools.quota_tracker.blocked_until(api_name) is not None
+        if exhausted:
+            error_msg = f"API配额已用完或所有密钥都在冷却中: {api_name}"
+            logger.warning(error_msg)
+            raise RateLimitedError(error_msg)
+        
+        if end is not None:
+            mode = rate_limit_mode or self.rate_limiter.default_mode
+            if mode != RateLimitMode.SHED:
+                if rate_limit_timeout is None:
+                    rate_limit_timeout = (
+                        self.rate_limiter.default_timeout if mode == RateLimitMode.QUEUE else float('inf')
+                    )
+                rate_limit_mode = RateLimitMode.QUEUE
+                rate_limit_timeout = max(0.0, min(rate_limit_timeout, end - time.monotonic()))
+        
+        # 按API名称限流
+        if api_name:
+            self._host_apis[host] = api_name
+        if api_name and not self.rate_limiter.acquire(api_name, rate_limit_mode, rate_limit_timeout):
+            error_msg = f"已达到客户端限流上限: {api_name}"
+            logger.warning(error_msg)
+            raise RateLimitedError(error_msg)
+        
+        if not breaker.allow_request():
+            error_msg = f"熔断器已打开，快速失败: {host}"
+            logger.warning(error_msg)
+            raise CircuitOpenError(error_msg)
+        
+        self.retry_budgets.get(host).record_request()
+        return breaker, key_pool, key_param
+    
+    def _session_with_retry(self, retry_config: RetryConfig, timeout) -> requests.Session:
+        """创建带有自定义重试配置的会话"""
+        retry = BudgetedRetry(
+            total=retry_config.total,
+            read=retry_config.total,
+            connect=retry_config.total,
+            backoff_factor=retry_config.backoff_factor,
+            status_forcelist=retry_config.status_forcelist,
+            allowed_methods=retry_config.allowed_methods,
+            budgets=self.retry_budgets,
+            admit=self._retry_admit()
+        )
+        adapter = InstrumentedHTTPAdapter(max_retries=retry)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.timeout = timeout or 30
+        return session
+    
+    def _attempt(
+        self,
+        call: _Call,
+        send_session: requests.Session,
+        send_timeout,
+        defer_body: bool = False,
+        **extra
+    ) -> requests.Response:
+        """
+        发送一次请求，记录该主机的响应耗时、配额和各阶段指标
+        
+        defer_body为True时（对冲请求）只等到响应头，响应体由调用方对胜出的响应用_read_body读取，
+        耗时统计为首字节时间。
+        """
+        capped = call.max_bytes is not None or call.end is not None
+        if capped:
+            extra['stream'] = True
+        # 每次尝试（包括对冲和截止时间内的重试）重新选择密钥，避开刚被限流的密钥
+        key = call.key_pool.acquire() if call.key_pool is not None else None
+        send_params = call.params if key is None else {**(call.params or {}), call.key_param: key}
+        phase_recorder.reset()
+        start = time.monotonic()
+        try:
+            response = send_session.request(
+                method=call.method,
+                url=call.url,
+                headers=call.headers,
+                params=send_params,
+                data=call.data,
+                json=call.json,
+                timeout=send_timeout,
+                verify=call.verify,
+                **call.kwargs,
+                **extra
+            )
+            # 与非流式请求一样在尝试内读完响应体，耗时统计包含读取时间
+            if capped and not defer_body:
+                self._read_body(call, response)
+        except (requests.exceptions.RequestException, BodyTooLargeError, BodyDeadlineError) as e:
+            self._record_metrics(send_session, call.method, call.url, call.host, time.monotonic() - start, error=e)
+            phase = timeout_phase(e)
+            if phase is not None:
+                connect_timeout, read_timeout = split_timeout(send_timeout, DEFAULT_TIMEOUT)
+                self.adaptive_timeouts.record_timeout(
+                    call.host, phase, connect_timeout if phase == 'connect' else read_timeout
+                )
+            raise
+        elapsed = time.monotonic() - start
+        if call.api_name:
+            self.key_pools.quota_tracker.record(
+                call.api_name, key, response.status_code, response.headers, calls=1 + retries_of(response)
+            )
+        if key is not None:
+            call.key_pool.report(key, response.status_code, response.headers.get('Retry-After'))
+        self.latency_tracker.record(call.host, elapsed)
+        # urllib3重试时各阶段耗时会累加，只用一次完成的请求学习超时
+        if retries_of(response) == 0:
+            self.adaptive_timeouts.record(call.host, getattr(phase_recorder, 'phases', {}))
+        self._record_metrics(
+            send_session, call.method, call.url, call.host, elapsed, response=response,
+            streamed=not capped and bool(call.kwargs.get('stream') or extra.get('stream'))
+        )
+        return response
+    
+    @staticmethod
+    def _read_body(call: _Call, response: requests.Response) -> requests.Response:
+        """按大小上限和截止时间读取流式响应的响应体，使调用方得到与非流式请求相同的响应"""
+        if call.max_bytes is None and call.end is None:
+            response.content
+        else:
+            read_body(
+                response, call.max_bytes if call.max_bytes is not None else float('inf'), deadline=call.end
+            )
+        return response
+    
+    def _finish(
+        self,
+        response: requests.Response,
+        breaker,
+        api_name: Optional[str],
+        url: str,
+        headers: Optional[Dict[str, str]],
+        cache_url: Optional[str],
+        cached_entry: Optional[Dict[str, Any]]
+    ) -> requests.Response:
+        """记录熔断和限流状态、检查状态码，并写入或重新验证HTTP响应缓存"""
+        # 5xx视为上游故障，其余状态码说明主机可用
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        
+        # 服务端返回429说明已超出配额，清空令牌桶让后续调用重新按速率放行
+        if response.status_code == 429 and api_name:
+            self.rate_limiter.penalize(api_name)
+        
+        # 检查响应状态码
+        response.raise_for_status()
+        
+        if cache_url is not None:
+            if response.status_code == 304 and cached_entry is not None:
+                logger.debug(f"HTTP缓存重新验证成功: {url}")
+                response = self.http_cache.revalidated(cached_entry, headers, response)
+            else:
+                self.http_cache.store(cache_url, headers, response)
+        
+        logger.debug(f"请求成功，状态码: {response.status_code}")
+        return response
+    
     def request(
         self,
         method: str,
@@ -90,6 +669,14 @@ class HTTPUtils:
         timeout: Optional[Union[float, Tuple[float, float]]] = None,
         verify: bool = True,
         retry_config: Optional[RetryConfig] = None,
+        api_name: Optional[str] = None,
+        rate_limit_mode: Optional[str] = None,
+        rate_limit_timeout: Optional[float] = None,
+        cache: Optional[bool] = None,
+        hedge: Optional[bool] = None,
+        deadline: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        adaptive_timeout: Optional[bool] = None,
         **kwargs
     ) -> requests.Response:
         """
@@ -102,17 +689,53 @@ class HTTPUtils:
             params: URL参数
             data: 请求体数据
             json: JSON请求体
-            timeout: 超时时间
+            timeout: 超时时间，默认DEFAULT_TIMEOUT；使用自适应超时时为样本不足前的超时时间
             verify: 是否验证SSL证书
             retry_config: 自定义重试配置
+            api_name: API名称，提供时按APIConfig中的配置进行客户端限流；该API配置了密钥时，
+                每次尝试从密钥池选择一个密钥填入查询参数（调用方不需要再传入密钥）；每次调用计入配额统计，
+                配额已用完时直接抛出RateLimitedError
+            rate_limit_mode: 令牌不足时的处理方式（block/queue/shed），默认由限流器决定
+            rate_limit_timeout: queue模式下的最长排队时间（秒）
+            cache: 是否使用HTTP响应缓存，默认在配置了http_cache时对GET请求启用
+            hedge: 是否使用对冲请求（仅对非流式GET请求生效），默认由HedgeConfig.enabled决定
+            deadline: 整个调用（包括限流排队、所有重试和退避以及读取响应体）的时间上限（秒），
+                每次尝试只使用剩余的时间；为None时沿用urllib3的自动重试，总耗时可能达到(重试次数+1)×timeout
+            max_bytes: 响应体大小上限（字节），默认使用max_response_bytes；设置后以流的方式读取响应体，
+                超过上限时立即断开连接。stream=True的请求不在此读取，可使用body_reader中的函数自行限制
+            adaptive_timeout: 是否按该主机最近的连接和首字节耗时分位数计算超时，默认由AdaptiveTimeoutConfig.enabled决定
             **kwargs: 其他requests库支持的参数
         
         Returns:
             requests.Response: 请求响应对象
         
         Raises:
+            CircuitOpenError: 当目标主机的熔断器打开时抛出
+            RateLimitedError: 当客户端限流拒绝请求时抛出
+            DeadlineExceededError: 当超过deadline仍未得到响应时抛出
+            ResponseTooLargeError: 当响应体超过max_bytes时抛出
+            HTTPStatusError: 当上游返回非2xx状态码时抛出
             HTTPRequestError: 当请求失败时抛出
+        
+        所有异常信息中的API密钥参数都已脱敏。
         """
+        # 新鲜的缓存响应直接返回；过期但带有验证器的条目发起条件请求
+        cache_url, cached_entry, headers, cached_response = self._lookup_cache(
+            method, url, params, headers, cache, bool(kwargs.get('stream'))
+        )
+        if cached_response is not None:
+            return cached_response
+        
+        # 截止时间从这里开始计算，限流排队的时间同样计入
+        end = time.monotonic() + deadline if deadline is not None else None
+        host = self._host_of(url)
+        breaker, key_pool, key_param = self._admit(host, api_name, rate_limit_mode, rate_limit_timeout, end)
+        
+        if adaptive_timeout if adaptive_timeout is not None else self.adaptive_timeouts.config.enabled:
+            timeout = self.adaptive_timeouts.timeout_for(host, timeout, DEFAULT_TIMEOUT)
+        elif timeout is None:
+            timeout = DEFAULT_TIMEOUT
+        
         # 确保使用HTTPS
         if not url.startswith('https://'):
             logger.warning(f"不安全的HTTP请求，建议使用HTTPS: {url}")
@@ -121,46 +744,66 @@ class HTTPUtils:
         logger.debug(f"发送{method}请求到{url}")
         
         # 如果提供了自定义重试配置，创建新的会话
-        session = self.session
-        if retry_config:
-            # 创建带有自定义重试配置的新会话
-            retry = Retry(
-                total=retry_config.total,
-                read=retry_config.total,
-                connect=retry_config.total,
-                backoff_factor=retry_config.backoff_factor,
-                status_forcelist=retry_config.status_forcelist,
-                allowed_methods=retry_config.allowed_methods
-            )
-            adapter = HTTPAdapter(max_retries=retry)
-            session = requests.Session()
-            session.mount('http://', adapter)
-            session.mount('https://', adapter)
-            session.timeout = timeout or 30
+        session = self._session_with_retry(retry_config, timeout) if retry_config else self.session
+        
+        use_hedge = (
+            method.upper() == 'GET'
+            and not kwargs.get('stream')
+            and (hedge if hedge is not None else self.hedger.config.enabled)
+        )
+        
+        if max_bytes is None:
+            max_bytes = self.max_response_bytes
+        call = _Call(
+            method, url, host, headers, params, data, json, verify, kwargs, api_name,
+            key_pool, key_param,
+            max_bytes if not kwargs.get('stream') else None, end if not kwargs.get('stream') else None
+        )
+        
+        def allow_hedge() -> bool:
+            """对冲请求同样消耗配额，令牌不足时不对冲"""
+            return not api_name or self.rate_limiter.acquire(api_name, RateLimitMode.SHED)
+        
+        def send(send_session: requests.Session, send_timeout) -> requests.Response:
+            """发送请求；对冲模式下超过该主机的分位数延迟仍未返回时再发出一个相同的请求"""
+            if use_hedge:
+                # 按响应头先后决定胜出的请求，只读取胜出响应的响应体
+                return self.hedger.send(
+                    host,
+                    lambda: self._attempt(call, send_session, send_timeout, defer_body=True, stream=True),
+                    allow_hedge,
+                    lambda response: self._read_body(call, response)
+                )
+            return self._attempt(call, send_session, send_timeout)
         
         try:
-            # 发送请求
-            response = session.request(
-                method=method,
-                url=url,
-                headers=headers,
-                params=params,
-                data=data,
-                json=json,
-                timeout=timeout,
-                verify=verify,
-                **kwargs
-            )
-            
-            # 检查响应状态码
-            response.raise_for_status()
-            
-            logger.debug(f"请求成功，状态码: {response.status_code}")
-            return response
+            if deadline is not None:
+                response = self._send_with_deadline(
+                    send, method, url, deadline, end, timeout, retry_config or RetryConfig()
+                )
+            else:
+                response = send(session, timeout)
+            return self._finish(response, breaker, api_name, url, headers, cache_url, cached_entry)
             
+        except DeadlineExceededError as e:
+            breaker.record_failure()
+            logger.error(redact_secrets(str(e)))
+            raise
+        except BodyTooLargeError as e:
+            # 上游正常响应，只是响应体过大，不计入熔断失败
+            breaker.record_success()
+            logger.error(str(e))
+            raise ResponseTooLargeError(redact_secrets(str(e))) from e
         except requests.exceptions.RequestException as e:
-            error_msg = f"请求失败: {str(e)}"
+            # 没有响应的异常（连接失败、超时等）计为一次失败
+            error_response = getattr(e, 'response', None)
+            if error_response is None:
+                breaker.record_failure()
+            # 异常信息包含带密钥查询参数的URL，脱敏后再记录和抛出
+            error_msg = redact_secrets(f"请求失败: {str(e)}")
             logger.error(error_msg)
+            if isinstance(e, requests.exceptions.HTTPError) and error_response is not None:
+                raise HTTPStatusError(error_msg, error_response.status_code) from e
             raise HTTPRequestError(error_msg) from e
     
     def get(
@@ -170,7 +813,7 @@ class HTTPUtils:
         headers: Optional[Dict[str, str]] = None,
         **kwargs
     ) -> requests.Response:
-        """发送GET请求"""
+        """发送GET请求（传入hedge=True可启用对冲请求）"""
         return self.request('GET', url, params=params, headers=headers, **kwargs)
     
     def post(
@@ -210,33 +853,60 @@ class HTTPUtils:
         save_path: str,
         chunk_size: int = 8192,
         headers: Optional[Dict[str, str]] = None,
+        segments: int = 1,
+        resume: bool = False,
+        checksum: Optional[str] = None,
+        checksum_algorithm: str = 'sha256',
+        progress_callback: Optional[Callable[[int], None]] = None,
         **kwargs
     ) -> bool:
         """
         下载文件
         
+        segments大于1或resume为True时使用分段下载：先写入save_path.part，
+        进度记录在save_path.part.json中，全部完成并校验通过后再替换为目标文件。
+        
         Args:
             url: 文件URL
             save_path: 保存路径
-            chunk_size: 下载块大小
+            chunk_size: 下载块大小（分段下载时至少64KB）
             headers: 请求头
+            segments: 并行Range请求数，服务器不支持Range时退化为单连接下载
+            resume: 是否支持断点续传，失败时保留临时文件和进度文件供下次继续
+            checksum: 期望的文件摘要（十六进制），下载过程中增量计算并在结束时比对
+            checksum_algorithm: 摘要算法，默认sha256
+            progress_callback: 每写入一块数据时以本次写入的字节数调用（分段下载时来自多个线程）
             **kwargs: 其他参数
         
         Returns:
             bool: 下载是否成功
         """
+        if segments > 1 or resume:
+            return self._download_ranged(
+                url, save_path, max(chunk_size, 64 * 1024), headers,
+                segments, resume, checksum, checksum_algorithm, progress_callback, **kwargs
+            )
+        
         try:
             logger.info(f"开始下载文件: {url} 到 {save_path}")
             
             # 确保保存目录存在
             os.makedirs(os.path.dirname(os.path.abspath(save_path)), exist_ok=True)
             
+            digest = hashlib.new(checksum_algorithm) if checksum else None
             with self.session.get(url, stream=True, headers=headers, **kwargs) as response:
                 response.raise_for_status()
                 with open(save_path, 'wb') as f:
                     for chunk in response.iter_content(chunk_size=chunk_size):
                         if chunk:
                             f.write(chunk)
+                            if digest is not None:
+                                digest.update(chunk)
+                            if progress_callback is not None:
+                                progress_callback(len(chunk))
+            
+            if digest is not None and digest.hexdigest() != checksum.lower():
+                raise DownloadError(f"文件校验失败: 期望 {checksum}，实际 {digest.hexdigest()}")
             
             logger.info(f"文件下载成功: {save_path}")
             return True
@@ -247,8 +917,44 @@ class HTTPUtils:
             if os.path.exists(save_path):
                 os.remove(save_path)
             return False
+    
+    def _download_ranged(
+        self,
+        url: str,
+        save_path: str,
+        chunk_size: int,
+        headers: Optional[Dict[str, str]],
+        segments: int,
+        resume: bool,
+        checksum: Optional[str],
+        checksum_algorithm: str,
+        progress_callback: Optional[Callable[[int], None]],
+        **kwargs
+    ) -> bool:
+        """分段并行、可断点续传的下载"""
+        downloader = RangedDownloader(
+            self.session, url, save_path, headers=headers, segments=segments, resume=resume,
+            checksum=checksum, checksum_algorithm=checksum_algorithm, chunk_size=chunk_size,
+            progress_callback=progress_callback, **kwargs
+        )
+        try:
+            logger.info(f"开始分段下载文件: {url} 到 {save_path} (分段数: {segments}, 断点续传: {resume})")
+            os.makedirs(os.path.dirname(os.path.abspath(save_path)), exist_ok=True)
+            downloader.run()
+            logger.info(f"文件下载成功: {save_path}")
+            return True
+        except Exception as e:
+            logger.error(f"文件下载失败: {str(e)}")
+            # 断点续传模式保留临时文件，下次调用时从进度文件继续
+            if not resume:
+                downloader.cleanup()
+            return False
 
-# 创建全局HTTP工具实例\http_utils = HTTPUtils()
+# 创建全局HTTP工具实例（HTTP_CACHE_ENABLED=false时关闭响应缓存，HTTP_MAX_RESPONSE_BYTES=0时不限制响应体大小）
+http_utils = HTTPUtils(
+    http_cache=HTTPCache() if os.getenv('HTTP_CACHE_ENABLED', 'true').lower() == 'true' else None,
+    max_response_bytes=int(os.getenv('HTTP_MAX_RESPONSE_BYTES', str(10 * 1024 * 1024))) or None
+)
 
 # 导出常用函数
 def http_get(url, **kwargs):
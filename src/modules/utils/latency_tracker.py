@@ -0,0 +1,78 @@
+"""
+延迟统计模块
+按主机保存最近若干次请求的耗时，用于计算分位数延迟（如p95）
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Dict, Any, Optional
+
+
+class LatencyTracker:
+    """按键（通常为主机名）维护滑动窗口内的请求耗时"""
+
+    def __init__(self, window_size: int = 200):
+        """
+        初始化延迟统计
+
+        Args:
+            window_size: 每个键保留的最近耗时样本数
+        """
+        self.window_size = window_size
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float) -> None:
+        """
+        记录一次请求耗时
+
+        Args:
+            key: 统计键（通常为主机名）
+            seconds: 耗时（秒）
+        """
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window_size)
+            samples.append(seconds)
+
+    def count(self, key: str) -> int:
+        """获取键当前的样本数"""
+        with self._lock:
+            samples = self._samples.get(key)
+            return len(samples) if samples else 0
+
+    def percentile(self, key: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """
+        计算分位数延迟（最近秩法）
+
+        Args:
+            key: 统计键
+            q: 分位数（0~1），如0.95
+            min_samples: 最少样本数，不足时返回None
+
+        Returns:
+            Optional[float]: 分位数耗时（秒），样本不足时返回None
+        """
+        with self._lock:
+            samples = self._samples.get(key)
+            if not samples or len(samples) < max(1, min_samples):
+                return None
+            ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+        return ordered[index]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """获取每个键的样本数和p50/p95/p99"""
+        with self._lock:
+            keys = list(self._samples)
+        return {
+            key: {
+                'samples': self.count(key),
+                'p50': self.percentile(key, 0.5),
+                'p95': self.percentile(key, 0.95),
+                'p99': self.percentile(key, 0.99),
+            }
+            for key in keys
+        }
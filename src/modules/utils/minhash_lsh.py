@@ -0,0 +1,223 @@
+"""
+近似重复查找模块
+用MinHash签名和LSH分桶索引文本，查找与给定文本相似度（字符n-gram的Jaccard相似度）超过阈值的已索引文本；
+候选项按精确的Jaccard相似度确认，数字不同的文本不视为近似，索引按LRU淘汰以限制内存占用
+"""
+
+import re
+import zlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Hashable, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+# 数字（含千分位和小数部分），如 1000、1,000、3.14
+_NUMBER = re.compile(r'\d+(?:[.,]\d+)*')
+
+# 哈希函数 (a * x + b) mod p 的模数（梅森素数2^31-1），x为32位哈希，乘积不超过uint64范围
+_PRIME = np.uint64((1 << 31) - 1)
+
+
+class NearMatch(NamedTuple):
+    """近似匹配结果"""
+    key: Hashable
+    text: str
+    value: Any
+    similarity: float
+
+
+class _Entry(NamedTuple):
+    text: str
+    shingles: FrozenSet[str]
+    numbers: Tuple[str, ...]
+    bands: Tuple[Tuple, ...]
+    value: Any
+
+
+def normalize_text(text: str) -> str:
+    """规范化文本：统一全角半角和大小写，去掉空白和标点"""
+    text = unicodedata.normalize('NFKC', text or '').casefold()
+    return ''.join(ch for ch in text if unicodedata.category(ch)[0] in 'LNM')
+
+
+def shingles(text: str, size: int = 3) -> FrozenSet[str]:
+    """
+    文本的字符n-gram集合（在规范化文本上计算，空白和标点的差异不影响结果）
+
+    Args:
+        text: 文本
+        size: n-gram长度，文本短于该长度时整个文本作为一个元素
+
+    Returns:
+        FrozenSet[str]: n-gram集合
+    """
+    normalized = normalize_text(text)
+    if len(normalized) <= size:
+        return frozenset([normalized]) if normalized else frozenset()
+    return frozenset(normalized[i:i + size] for i in range(len(normalized) - size + 1))
+
+
+def numbers(text: str) -> Tuple[str, ...]:
+    """
+    文本中依次出现的数字（去掉千分位逗号）
+
+    只差一个数字的两句话n-gram相似度仍然很高，但意思不同，近似匹配要求数字完全相同
+    """
+    text = unicodedata.normalize('NFKC', text or '')
+    return tuple(match.replace(',', '') for match in _NUMBER.findall(text))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """两个集合的Jaccard相似度"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHashLSH:
+    """MinHash + LSH 近似重复索引"""
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        num_perm: int = 64,
+        bands: int = 16,
+        max_entries: int = 10000,
+        shingle_size: int = 3,
+        seed: int = 1
+    ):
+        """
+        初始化索引
+
+        签名分为bands段，每段num_perm // bands行，任意一段完全相同即成为候选；
+        默认参数下相似度约0.5以上的文本大概率成为候选，再按精确相似度和threshold筛选。
+
+        Args:
+            threshold: 相似度阈值（0~1）
+            num_perm: MinHash签名长度
+            bands: LSH分段数，需整除num_perm
+            max_entries: 最多索引的条目数，超出后淘汰最久未使用的条目
+            shingle_size: 字符n-gram长度
+            seed: 哈希函数的随机种子
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm必须能被bands整除")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        # (命名空间, 段号, 段内签名) -> 键集合
+        self._buckets: Dict[Tuple, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+        self._stats = {'queries': 0, 'hits': 0, 'evictions': 0}
+
+    def signature(self, items: FrozenSet[str]) -> np.ndarray:
+        """计算n-gram集合的MinHash签名"""
+        if not items:
+            return np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        hashes = np.fromiter(
+            (zlib.crc32(item.encode('utf-8')) for item in items), dtype=np.uint64, count=len(items)
+        )
+        # 每行是一个哈希函数作用于所有n-gram的结果，按行取最小值
+        values = (np.outer(self._a, hashes) + self._b[:, None]) % _PRIME
+        return values.min(axis=1)
+
+    def _band_keys(self, namespace: Hashable, signature: np.ndarray) -> Tuple[Tuple, ...]:
+        return tuple(
+            (namespace, band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        )
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        for band_key in entry.bands:
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def add(self, key: Hashable, text: str, value: Any = None, namespace: Hashable = '') -> None:
+        """
+        索引文本，键已存在时替换；规范化后为空的文本（只有空白和标点）不索引
+
+        Args:
+            key: 条目键
+            text: 用于相似度比较的文本
+            value: 条目的值（如译文）
+            namespace: 命名空间（如语言对），只在同一命名空间内查找
+        """
+        items = shingles(text, self.shingle_size)
+        if not items:
+            return
+        bands = self._band_keys(namespace, self.signature(items))
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(text, items, numbers(text), bands, value)
+            for band_key in bands:
+                self._buckets.setdefault(band_key, set()).add(key)
+            while self.max_entries and len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+
+    def query(self, text: str, namespace: Hashable = '') -> Optional[NearMatch]:
+        """
+        查找与文本最相似且相似度不低于阈值的条目，数字与文本不同的条目不匹配
+
+        Args:
+            text: 要查找的文本
+            namespace: 命名空间
+
+        Returns:
+            Optional[NearMatch]: 最相似的条目，没有时返回None
+        """
+        items = shingles(text, self.shingle_size)
+        if not items:
+            return None
+        digits = numbers(text)
+        bands = self._band_keys(namespace, self.signature(items))
+        with self._lock:
+            self._stats['queries'] += 1
+            candidates = set()
+            for band_key in bands:
+                candidates.update(self._buckets.get(band_key, ()))
+            best = None
+            for key in candidates:
+                entry = self._entries[key]
+                if entry.numbers != digits:
+                    continue
+                similarity = jaccard(items, entry.shingles)
+                if similarity >= self.threshold and (best is None or similarity > best.similarity):
+                    best = NearMatch(key, entry.text, entry.value, similarity)
+            if best is None:
+                return None
+            self._entries.move_to_end(best.key)
+            self._stats['hits'] += 1
+            return best
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取索引统计信息"""
+        with self._lock:
+            queries = self._stats['queries']
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'threshold': self.threshold,
+                'queries': queries,
+                'hits': self._stats['hits'],
+                'evictions': self._stats['evictions'],
+                'hit_rate': self._stats['hits'] / queries if queries else 0.0,
+            }
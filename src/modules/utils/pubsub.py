@@ -0,0 +1,151 @@
+"""
+发布/订阅模块
+后台任务把每次更新发布到主题一次，任意数量的订阅者（如Gradio流式输出的会话）收到同一份更新；
+每个主题只保留最新一条消息，处理慢的订阅者直接拿到最新值而不会积压；
+订阅者是异步生成器，等待更新时不占用线程，大量会话同时订阅也不会占满工作线程
+"""
+
+import time
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Set, Tuple
+
+# 一个订阅者的唤醒方式：订阅者所在的事件循环及其等待的事件
+_Waiter = Tuple[asyncio.AbstractEventLoop, asyncio.Event]
+
+
+class PubSubHub:
+    """进程内的发布/订阅中心"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 主题 -> (序号, 最新消息)
+        self._latest: Dict[str, Tuple[int, Any]] = {}
+        # 主题 -> 订阅了该主题的订阅者
+        self._waiters: Dict[str, Set[_Waiter]] = {}
+        self._seq = 0
+        self._subscribers = 0
+        self._stats = {'published': 0, 'delivered': 0}
+
+    def publish(self, topic: str, message: Any) -> int:
+        """
+        发布消息并唤醒订阅了该主题的订阅者（可在任意线程调用）
+
+        Args:
+            topic: 主题
+            message: 消息
+
+        Returns:
+            int: 消息序号（全局递增）
+        """
+        with self._lock:
+            self._seq += 1
+            self._latest[topic] = (self._seq, message)
+            self._stats['published'] += 1
+            waiters = list(self._waiters.get(topic, ()))
+            seq = self._seq
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # 订阅者的事件循环已关闭
+                pass
+        return seq
+
+    def latest(self, topic: str, default: Any = None) -> Any:
+        """获取主题的最新消息，没有时返回default"""
+        with self._lock:
+            entry = self._latest.get(topic)
+            return entry[1] if entry is not None else default
+
+    def _updates(self, topics: Tuple[str, ...], cursor: int) -> Dict[str, Any]:
+        updates = {}
+        for topic in topics:
+            entry = self._latest.get(topic)
+            if entry is not None and entry[0] > cursor:
+                updates[topic] = entry[1]
+        return updates
+
+    def subscribe(
+        self,
+        topics: Iterable[str],
+        heartbeat: Optional[float] = None,
+        max_seconds: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        订阅主题，每当有新消息时产出 {主题: 最新消息}
+
+        只包含调用subscribe之后发布的消息，两次产出之间同一主题的多条消息只保留最新一条。
+        返回异步生成器：等待期间不占用线程（Gradio的异步流式输出在事件循环中运行），
+        会话断开时生成器被取消，订阅随即结束。
+
+        Args:
+            topics: 订阅的主题
+            heartbeat: 超过该时间（秒）没有新消息时产出空字典，便于订阅方定期做保活等工作
+            max_seconds: 订阅的最长时间（秒），到期后结束
+
+        Returns:
+            AsyncIterator[Dict[str, Any]]: 更新的异步迭代器
+        """
+        topics = tuple(dict.fromkeys(topics))
+        deadline = time.monotonic() + max_seconds if max_seconds is not None else None
+        with self._lock:
+            cursor = self._seq
+        return self._stream(topics, cursor, heartbeat, deadline)
+
+    async def _stream(
+        self,
+        topics: Tuple[str, ...],
+        cursor: int,
+        heartbeat: Optional[float],
+        deadline: Optional[float]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self._lock:
+            self._subscribers += 1
+            for topic in topics:
+                self._waiters.setdefault(topic, set()).add(waiter)
+        try:
+            while True:
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    return
+                timeout = heartbeat
+                if deadline is not None:
+                    timeout = deadline - now if timeout is None else min(timeout, deadline - now)
+                # 先清除事件再检查更新：检查之后发布的消息会重新设置事件，不会漏掉
+                event.clear()
+                with self._lock:
+                    pending = bool(self._updates(topics, cursor))
+                if not pending:
+                    try:
+                        await asyncio.wait_for(event.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                with self._lock:
+                    updates = self._updates(topics, cursor)
+                    cursor = self._seq
+                    if updates:
+                        self._stats['delivered'] += 1
+                if updates or (heartbeat is not None and (deadline is None or time.monotonic() < deadline)):
+                    yield updates
+        finally:
+            with self._lock:
+                self._subscribers -= 1
+                for topic in topics:
+                    waiters = self._waiters.get(topic)
+                    if waiters is not None:
+                        waiters.discard(waiter)
+                        if not waiters:
+                            del self._waiters[topic]
+
+    def stats(self) -> Dict[str, int]:
+        """获取主题数、当前订阅者数、发布和推送次数"""
+        with self._lock:
+            return {
+                'topics': len(self._latest),
+                'subscribers': self._subscribers,
+                'published': self._stats['published'],
+                'delivered': self._stats['delivered'],
+            }
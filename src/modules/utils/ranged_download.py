@@ -0,0 +1,368 @@
+"""
+分段下载模块
+支持按Range并行下载到预分配文件、通过进度文件断点续传，以及边下载边校验
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+
+# 导入日志工具
+from src.modules.utils.logger import setup_logger
+
+# 设置模块日志
+logger = setup_logger(__name__)
+
+# 每个分段的最小字节数，文件较小时自动减少分段数
+MIN_SEGMENT_SIZE = 1024 * 1024
+# 最大并行分段数
+MAX_SEGMENTS = 16
+# 进度文件写入间隔（秒）
+PROGRESS_FLUSH_INTERVAL = 1.0
+# 校验时每次从文件读取的字节数
+HASH_READ_SIZE = 1024 * 1024
+
+
+class DownloadError(Exception):
+    """下载失败异常"""
+    pass
+
+
+def _pwrite(fd: int, data: bytes, offset: int, lock: threading.Lock) -> None:
+    """在指定偏移写入数据，不支持os.pwrite的平台退化为加锁的seek+write"""
+    if hasattr(os, 'pwrite'):
+        while data:
+            written = os.pwrite(fd, data, offset)
+            data = data[written:]
+            offset += written
+        return
+    with lock:
+        os.lseek(fd, offset, os.SEEK_SET)
+        os.write(fd, data)
+
+
+def _pread(fd: int, size: int, offset: int, lock: threading.Lock) -> bytes:
+    """从指定偏移读取数据，不支持os.pread的平台退化为加锁的seek+read"""
+    if hasattr(os, 'pread'):
+        return os.pread(fd, size, offset)
+    with lock:
+        os.lseek(fd, offset, os.SEEK_SET)
+        return os.read(fd, size)
+
+
+class _Segment:
+    """文件分段，end为包含在内的最后一个字节偏移"""
+
+    def __init__(self, start: int, end: int, done: int = 0):
+        self.start = start
+        self.end = end
+        self.done = done
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start + 1
+
+    @property
+    def complete(self) -> bool:
+        return self.done >= self.length
+
+    def to_list(self) -> List[int]:
+        return [self.start, self.end, self.done]
+
+
+class _IncrementalHasher:
+    """随下载进度推进的校验器
+
+    分段下载时数据乱序到达，校验器只对文件开头已经连续写完的部分计算摘要，
+    每写入一块数据就尝试向前推进，下载结束时只需补算最后一小段。
+    """
+
+    def __init__(self, algorithm: str, fd: int, segments: List[_Segment],
+                 progress_lock: threading.Lock, io_lock: threading.Lock):
+        self._hash = hashlib.new(algorithm)
+        self._fd = fd
+        self._segments = segments
+        self._progress_lock = progress_lock
+        self._io_lock = io_lock
+        self._lock = threading.Lock()
+        self.hashed = 0
+
+    def _contiguous_end(self) -> int:
+        """计算从文件开头起连续写完的字节数"""
+        with self._progress_lock:
+            for segment in self._segments:
+                if not segment.complete:
+                    return segment.start + segment.done
+            return self._segments[-1].end + 1 if self._segments else 0
+
+    def advance(self, blocking: bool = False) -> None:
+        """推进校验位置；非阻塞模式下若其他线程正在计算则直接返回"""
+        if not self._lock.acquire(blocking=blocking):
+            return
+        try:
+            end = self._contiguous_end()
+            while self.hashed < end:
+                data = _pread(self._fd, min(HASH_READ_SIZE, end - self.hashed), self.hashed, self._io_lock)
+                if not data:
+                    break
+                self._hash.update(data)
+                self.hashed += len(data)
+        finally:
+            self._lock.release()
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+class RangedDownloader:
+    """分段并行、可断点续传的文件下载器"""
+
+    def __init__(
+        self,
+        session: requests.Session,
+        url: str,
+        save_path: str,
+        headers: Optional[Dict[str, str]] = None,
+        segments: int = 4,
+        resume: bool = False,
+        checksum: Optional[str] = None,
+        checksum_algorithm: str = 'sha256',
+        chunk_size: int = 64 * 1024,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        **kwargs
+    ):
+        """
+        初始化分段下载器
+
+        Args:
+            session: 发送请求使用的会话
+            url: 文件URL
+            save_path: 保存路径
+            headers: 请求头
+            segments: 并行分段数
+            resume: 是否保留进度文件以支持断点续传
+            checksum: 期望的文件摘要（十六进制），为None时不校验
+            checksum_algorithm: 摘要算法，hashlib支持的名称
+            chunk_size: 每次读取的块大小
+            progress_callback: 每写入一块数据时以本次写入的字节数调用（可能来自多个线程）
+            **kwargs: 传给requests的其他参数（如timeout）
+        """
+        self.session = session
+        self.url = url
+        self.save_path = save_path
+        self.part_path = save_path + '.part'
+        self.progress_path = save_path + '.part.json'
+        self.headers = dict(headers or {})
+        self.segments = max(1, min(segments, MAX_SEGMENTS))
+        self.resume = resume
+        self.checksum = checksum.lower() if checksum else None
+        self.checksum_algorithm = checksum_algorithm
+        self.chunk_size = chunk_size
+        self.progress_callback = progress_callback
+        self.kwargs = kwargs
+
+        self._segments: List[_Segment] = []
+        self._size = 0
+        self._validator: Optional[str] = None
+        self._progress_lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._last_flush = 0.0
+        self._stop = threading.Event()
+
+    def _probe(self) -> Tuple[Optional[int], Optional[str], bool]:
+        """
+        通过请求首字节探测文件大小、验证器以及是否支持Range
+
+        Returns:
+            Tuple[Optional[int], Optional[str], bool]: 文件大小、If-Range验证器、是否支持Range
+        """
+        probe_headers = dict(self.headers, Range='bytes=0-0')
+        with self.session.get(self.url, headers=probe_headers, stream=True, **self.kwargs) as response:
+            response.raise_for_status()
+            etag = response.headers.get('ETag')
+            # If-Range只能使用强ETag或Last-Modified
+            validator = etag if etag and not etag.startswith('W/') else response.headers.get('Last-Modified')
+            content_range = response.headers.get('Content-Range', '')
+            if response.status_code == 206 and '/' in content_range:
+                total = content_range.rsplit('/', 1)[1]
+                if total.isdigit():
+                    return int(total), validator, True
+            length = response.headers.get('Content-Length')
+            return (int(length) if length and length.isdigit() else None), validator, False
+
+    def _plan_segments(self, size: int) -> List[_Segment]:
+        """把文件均分为若干分段"""
+        count = max(1, min(self.segments, size // MIN_SEGMENT_SIZE or 1))
+        step = -(-size // count)
+        return [_Segment(start, min(start + step, size) - 1) for start in range(0, size, step)]
+
+    def _load_progress(self) -> Optional[List[_Segment]]:
+        """读取与当前文件匹配的进度文件，不匹配时返回None"""
+        if not (os.path.exists(self.progress_path) and os.path.exists(self.part_path)):
+            return None
+        try:
+            with open(self.progress_path, 'r', encoding='utf-8') as f:
+                progress = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"进度文件无法读取，重新下载: {str(e)}")
+            return None
+        if (progress.get('url') != self.url or progress.get('size') != self._size
+                or progress.get('validator') != self._validator):
+            logger.info(f"远程文件已变化，重新下载: {self.url}")
+            return None
+        return [_Segment(*segment) for segment in progress['segments']]
+
+    def _flush_progress(self, force: bool = False) -> None:
+        """写入进度文件（按时间间隔节流，原子替换）"""
+        if not self.resume:
+            return
+        now = time.monotonic()
+        with self._progress_lock:
+            if not force and now - self._last_flush < PROGRESS_FLUSH_INTERVAL:
+                return
+            self._last_flush = now
+            progress = {
+                'url': self.url,
+                'size': self._size,
+                'validator': self._validator,
+                'segments': [segment.to_list() for segment in self._segments],
+            }
+        tmp_path = self.progress_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(progress, f)
+        os.replace(tmp_path, self.progress_path)
+
+    def _download_segment(self, fd: int, segment: _Segment, hasher: Optional[_IncrementalHasher]) -> None:
+        """下载单个分段的剩余部分"""
+        range_headers = dict(self.headers, Range=f'bytes={segment.start + segment.done}-{segment.end}')
+        if self._validator:
+            range_headers['If-Range'] = self._validator
+        with self.session.get(self.url, headers=range_headers, stream=True, **self.kwargs) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise DownloadError(f"服务器没有返回请求的分段（状态码 {response.status_code}），远程文件可能已变化")
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                if self._stop.is_set():
+                    return
+                if not chunk:
+                    continue
+                chunk = chunk[:segment.length - segment.done]
+                _pwrite(fd, chunk, segment.start + segment.done, self._io_lock)
+                with self._progress_lock:
+                    segment.done += len(chunk)
+                if self.progress_callback is not None:
+                    self.progress_callback(len(chunk))
+                if hasher is not None:
+                    hasher.advance()
+                self._flush_progress()
+                if segment.complete:
+                    break
+        if not segment.complete:
+            raise DownloadError(f"分段数据不完整: {segment.start}-{segment.end}")
+
+    def _stream_whole(self) -> None:
+        """服务器不支持Range时整文件流式下载到临时文件"""
+        digest = hashlib.new(self.checksum_algorithm) if self.checksum else None
+        with self.session.get(self.url, headers=self.headers or None, stream=True, **self.kwargs) as response:
+            response.raise_for_status()
+            with open(self.part_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    if chunk:
+                        f.write(chunk)
+                        if digest is not None:
+                            digest.update(chunk)
+                        if self.progress_callback is not None:
+                            self.progress_callback(len(chunk))
+        if digest is not None:
+            self._verify(digest.hexdigest())
+
+    def _verify(self, actual: str) -> None:
+        """比对摘要，不一致时删除临时文件"""
+        if actual != self.checksum:
+            self.cleanup()
+            raise DownloadError(f"文件校验失败: 期望 {self.checksum}，实际 {actual}")
+
+    def run(self) -> None:
+        """
+        执行下载，成功后把临时文件替换为目标文件
+
+        Raises:
+            DownloadError: 下载或校验失败时抛出
+            requests.exceptions.RequestException: 网络请求失败时抛出
+        """
+        size, self._validator, ranges_supported = self._probe()
+        if not ranges_supported or not size:
+            logger.info(f"服务器不支持分段下载，改为整文件下载: {self.url}")
+            self._remove(self.progress_path)
+            self._stream_whole()
+            os.replace(self.part_path, self.save_path)
+            return
+
+        self._size = size
+        segments = self._load_progress() if self.resume else None
+        resuming = segments is not None
+        self._segments = segments or self._plan_segments(size)
+        if resuming:
+            done = sum(segment.done for segment in self._segments)
+            logger.info(f"从断点继续下载: 已完成 {done}/{size} 字节")
+
+        fd = os.open(self.part_path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0))
+        try:
+            if not resuming:
+                os.ftruncate(fd, size)
+                # 预分配磁盘空间，避免并行写入时产生碎片
+                if hasattr(os, 'posix_fallocate'):
+                    try:
+                        os.posix_fallocate(fd, 0, size)
+                    except OSError:
+                        pass
+            self._flush_progress(force=True)
+
+            hasher = None
+            if self.checksum:
+                hasher = _IncrementalHasher(
+                    self.checksum_algorithm, fd, self._segments, self._progress_lock, self._io_lock
+                )
+                hasher.advance(blocking=True)
+
+            pending = [segment for segment in self._segments if not segment.complete]
+            errors = []
+            if pending:
+                with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+                    futures = [executor.submit(self._download_segment, fd, segment, hasher) for segment in pending]
+                    for future in futures:
+                        try:
+                            future.result()
+                        except Exception as e:
+                            # 一个分段失败后通知其他分段尽快停止
+                            self._stop.set()
+                            errors.append(e)
+            self._flush_progress(force=True)
+            if errors:
+                raise errors[0]
+
+            if hasher is not None:
+                hasher.advance(blocking=True)
+        finally:
+            os.close(fd)
+
+        if hasher is not None:
+            self._verify(hasher.hexdigest())
+        os.replace(self.part_path, self.save_path)
+        self._remove(self.progress_path)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        if os.path.exists(path):
+            os.remove(path)
+
+    def cleanup(self) -> None:
+        """删除临时文件和进度文件"""
+        self._remove(self.part_path)
+        self._remove(self.progress_path)
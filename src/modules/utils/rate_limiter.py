@@ -0,0 +1,197 @@
+"""
+客户端限流模块
+按API名称维护令牌桶，在调用外部服务前控制请求速率，避免触发服务商配额限制
+"""
+
+import os
+import time
+import threading
+from typing import Dict, Any, Optional, Callable
+
+from src.modules.api.api_config import api_config
+
+
+class RateLimitMode:
+    """令牌不足时的处理方式"""
+    BLOCK = "block"    # 一直等待，直到获得令牌
+    QUEUE = "queue"    # 排队等待，超过截止时间则放弃
+    SHED = "shed"      # 立即放弃（削峰）
+
+
+class TokenBucket:
+    """令牌桶
+
+    令牌按固定速率补充，最多累积到桶容量。获取令牌时采用预约方式：
+    令牌数允许为负，表示已被排队的调用预约，后来者需要等待更久，
+    因此等待中的调用天然按先后顺序放行。
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量（允许的突发请求数）
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+        # 统计指标
+        self._acquired = 0
+        self._waited = 0
+        self._total_wait = 0.0
+        self._rejected = 0
+
+    def _refill(self, now: float) -> None:
+        """按流逝时间补充令牌（需持有锁）"""
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated_at = now
+
+    def acquire(self, mode: str = RateLimitMode.BLOCK, timeout: Optional[float] = None) -> bool:
+        """
+        获取一个令牌
+
+        Args:
+            mode: 令牌不足时的处理方式，见RateLimitMode
+            timeout: QUEUE模式下的最长等待时间（秒）
+
+        Returns:
+            bool: 是否获得令牌
+        """
+        if mode == RateLimitMode.SHED:
+            max_wait = 0.0
+        elif mode == RateLimitMode.QUEUE:
+            max_wait = timeout if timeout is not None else 0.0
+        else:
+            max_wait = float('inf')
+
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if wait > max_wait:
+                # 截止时间前拿不到令牌，不做预约直接放弃
+                self._rejected += 1
+                return False
+            self._tokens -= 1
+            self._acquired += 1
+            if wait > 0:
+                self._waited += 1
+                self._total_wait += wait
+
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def drain(self) -> None:
+        """清空令牌（例如收到429响应后），让后续调用重新按速率放行"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        获取令牌桶统计指标
+
+        Returns:
+            Dict[str, Any]: 当前令牌数、放行/等待/拒绝次数和平均等待时间
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                'rate': self.rate,
+                'capacity': self.capacity,
+                'tokens': self._tokens,
+                'acquired': self._acquired,
+                'waited': self._waited,
+                'rejected': self._rejected,
+                'avg_wait': self._total_wait / self._waited if self._waited else 0.0,
+            }
+
+
+class RateLimiter:
+    """按API名称管理令牌桶"""
+
+    def __init__(
+        self,
+        config_provider: Callable[[str], Optional[Dict[str, Any]]],
+        default_mode: str = RateLimitMode.QUEUE,
+        default_timeout: float = 5.0
+    ):
+        """
+        初始化限流器
+
+        Args:
+            config_provider: 根据API名称返回限流配置的函数，
+                配置包含requests（请求数）、per（时间窗口秒数）和burst（突发容量），
+                返回None表示该API不限流
+            default_mode: 调用方未指定时的处理方式
+            default_timeout: QUEUE模式下默认的最长等待时间（秒）
+        """
+        self._config_provider = config_provider
+        self.default_mode = default_mode
+        self.default_timeout = default_timeout
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+        self._lock = threading.Lock()
+
+    def get_bucket(self, api_name: str) -> Optional[TokenBucket]:
+        """获取（必要时创建）指定API的令牌桶，未配置限流时返回None"""
+        if api_name in self._buckets:
+            return self._buckets[api_name]
+        with self._lock:
+            if api_name not in self._buckets:
+                limit = self._config_provider(api_name)
+                bucket = None
+                if limit and limit.get('requests', 0) > 0 and limit.get('per', 0) > 0:
+                    bucket = TokenBucket(
+                        rate=limit['requests'] / limit['per'],
+                        capacity=limit.get('burst') or limit['requests']
+                    )
+                self._buckets[api_name] = bucket
+            return self._buckets[api_name]
+
+    def acquire(self, api_name: str, mode: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """
+        为指定API获取一个调用许可
+
+        Args:
+            api_name: API名称
+            mode: 令牌不足时的处理方式，默认使用default_mode
+            timeout: QUEUE模式下的最长等待时间，默认使用default_timeout
+
+        Returns:
+            bool: 是否允许调用
+        """
+        bucket = self.get_bucket(api_name)
+        if bucket is None:
+            return True
+        mode = mode or self.default_mode
+        if timeout is None:
+            timeout = self.default_timeout
+        return bucket.acquire(mode, timeout)
+
+    def penalize(self, api_name: str) -> None:
+        """服务端返回429时清空对应令牌桶"""
+        bucket = self.get_bucket(api_name)
+        if bucket is not None:
+            bucket.drain()
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """获取所有已启用限流的API的统计指标"""
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {name: bucket.metrics() for name, bucket in buckets.items() if bucket is not None}
+
+
+# 创建全局限流器实例，限流配置来自APIConfig（配置了多个密钥时为所有密钥的合计配额）
+rate_limiter = RateLimiter(
+    api_config.get_total_rate_limit,
+    default_mode=os.getenv('RATE_LIMIT_MODE', RateLimitMode.QUEUE),
+    default_timeout=float(os.getenv('RATE_LIMIT_QUEUE_TIMEOUT', '5'))
+)
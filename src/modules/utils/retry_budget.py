@@ -0,0 +1,207 @@
+"""
+重试预算模块
+按主机统计滑动窗口内的请求数和重试数，重试超过请求数的一定比例后不再重试，避免上游故障时重试放大流量
+"""
+
+import os
+import time
+import threading
+from typing import Callable, Dict, Any, Optional
+
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+
+# 滑动窗口划分的时间桶数
+WINDOW_BUCKETS = 10
+
+
+class RetryBudgetConfig:
+    """重试预算配置类"""
+    def __init__(
+        self,
+        ratio: float = 0.1,
+        window: float = 10.0,
+        min_retries: int = 3
+    ):
+        """
+        初始化重试预算配置
+
+        Args:
+            ratio: 窗口内允许的重试数占请求数的比例
+            window: 滑动窗口时长（秒）
+            min_retries: 窗口内额外允许的重试数，保证请求量很小的主机也能重试
+        """
+        self.ratio = ratio
+        self.window = window
+        self.min_retries = min_retries
+
+    @classmethod
+    def from_env(cls) -> "RetryBudgetConfig":
+        """从环境变量读取重试预算配置"""
+        return cls(
+            ratio=float(os.getenv('RETRY_BUDGET_RATIO', '0.1')),
+            window=float(os.getenv('RETRY_BUDGET_WINDOW', '10')),
+            min_retries=int(os.getenv('RETRY_BUDGET_MIN_RETRIES', '3')),
+        )
+
+
+class RetryBudget:
+    """单个主机的重试预算"""
+
+    def __init__(self, name: str, config: Optional[RetryBudgetConfig] = None):
+        """
+        初始化重试预算
+
+        Args:
+            name: 预算名称（通常为主机名）
+            config: 重试预算配置
+        """
+        self.name = name
+        self.config = config or RetryBudgetConfig()
+        self._bucket_width = self.config.window / WINDOW_BUCKETS
+        self._epochs = [-1] * WINDOW_BUCKETS
+        self._requests = [0] * WINDOW_BUCKETS
+        self._retries = [0] * WINDOW_BUCKETS
+        self._granted = 0
+        self._denied = 0
+        self._lock = threading.Lock()
+
+    def _bucket(self, now: float) -> int:
+        """获取当前时间所在的桶，桶属于已滑出窗口的旧周期时先清零"""
+        epoch = int(now / self._bucket_width)
+        index = epoch % WINDOW_BUCKETS
+        if self._epochs[index] != epoch:
+            self._epochs[index] = epoch
+            self._requests[index] = 0
+            self._retries[index] = 0
+        return index
+
+    def _totals(self, now: float) -> tuple:
+        """统计窗口内的请求数和重试数"""
+        oldest = int(now / self._bucket_width) - WINDOW_BUCKETS
+        requests = retries = 0
+        for index, epoch in enumerate(self._epochs):
+            if epoch > oldest:
+                requests += self._requests[index]
+                retries += self._retries[index]
+        return requests, retries
+
+    def record_request(self) -> None:
+        """记录一次请求（首次尝试）"""
+        with self._lock:
+            self._requests[self._bucket(time.monotonic())] += 1
+
+    def try_retry(self) -> bool:
+        """
+        申请一次重试
+
+        Returns:
+            bool: 预算充足时返回True并计入重试数，否则返回False
+        """
+        with self._lock:
+            now = time.monotonic()
+            index = self._bucket(now)
+            requests, retries = self._totals(now)
+            if retries >= self.config.min_retries + self.config.ratio * requests:
+                self._denied += 1
+                return False
+            self._retries[index] += 1
+            self._granted += 1
+            return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取重试预算的状态快照"""
+        with self._lock:
+            requests, retries = self._totals(time.monotonic())
+            return {
+                'requests': requests,
+                'retries': retries,
+                'retry_ratio': retries / requests if requests else 0.0,
+                'granted': self._granted,
+                'denied': self._denied,
+            }
+
+
+class RetryBudgetRegistry:
+    """按名称（主机）管理重试预算"""
+
+    def __init__(self, config: Optional[RetryBudgetConfig] = None):
+        """
+        初始化重试预算注册表
+
+        Args:
+            config: 新建重试预算时使用的配置
+        """
+        self.config = config or RetryBudgetConfig()
+        self._budgets: Dict[str, RetryBudget] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> RetryBudget:
+        """获取（必要时创建）指定名称的重试预算"""
+        budget = self._budgets.get(name)
+        if budget is None:
+            with self._lock:
+                budget = self._budgets.get(name)
+                if budget is None:
+                    budget = RetryBudget(name, self.config)
+                    self._budgets[name] = budget
+        return budget
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """获取所有重试预算的状态快照"""
+        with self._lock:
+            budgets = list(self._budgets.values())
+        return {budget.name: budget.snapshot() for budget in budgets}
+
+
+def pool_host(pool) -> str:
+    """获取连接池对应的主机名，与URL的netloc一致（默认端口不带端口号）"""
+    host = f'[{pool.host}]' if ':' in pool.host else pool.host
+    default_port = 443 if pool.scheme == 'https' else 80
+    return host.lower() if pool.port in (None, default_port) else f'{host.lower()}:{pool.port}'
+
+
+class BudgetedRetry(Retry):
+    """受重试预算约束的urllib3重试策略，预算耗尽或admit拒绝时按重试次数用尽处理"""
+
+    def __init__(
+        self,
+        *args,
+        budgets: Optional[RetryBudgetRegistry] = None,
+        admit: Optional[Callable[[str], bool]] = None,
+        **kwargs
+    ):
+        """
+        初始化重试策略
+
+        Args:
+            budgets: 按主机管理的重试预算，为None时与普通Retry相同
+            admit: 每次重试前的额外检查（如熔断器和客户端限流），参数为主机名，返回False时不再重试
+            *args, **kwargs: urllib3 Retry的参数
+        """
+        super().__init__(*args, **kwargs)
+        self.budgets = budgets
+        self.admit = admit
+
+    def new(self, **kw) -> "BudgetedRetry":
+        retry = super().new(**kw)
+        retry.budgets = self.budgets
+        retry.admit = self.admit
+        return retry
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        new_retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        # 重定向不消耗重试预算
+        is_redirect = error is None and response is not None and response.get_redirect_location()
+        if _pool is not None and not is_redirect:
+            host = pool_host(_pool)
+            if (
+                (self.budgets is not None and not self.budgets.get(host).try_retry())
+                or (self.admit is not None and not self.admit(host))
+            ):
+                reason = error or ResponseError(
+                    ResponseError.SPECIFIC_ERROR.format(status_code=response.status)
+                    if response is not None and response.status else ResponseError.GENERIC_ERROR
+                )
+                raise MaxRetryError(_pool, url, reason) from reason
+        return new_retry
@@ -0,0 +1,69 @@
+"""
+并发去重模块
+同一个键同时只执行一次加载，其他并发调用等待并共享该次的结果（或异常），
+避免缓存未命中时多个请求同时访问上游
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    """一次正在进行的加载"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """按键合并并发的加载调用"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        执行加载，同一键已有加载在进行时等待并返回其结果
+
+        Args:
+            key: 去重键
+            fn: 加载函数
+
+        Returns:
+            Any: 加载结果
+
+        Raises:
+            加载函数抛出的异常（所有等待者都会收到同一个异常）
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self._shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        """获取正在进行的加载数和累计合并的调用数"""
+        with self._lock:
+            return {'in_flight': len(self._calls), 'shared': self._shared}
@@ -0,0 +1,408 @@
+"""
+本地上游替身服务
+模拟OpenWeatherMap、Google Translate、NewsAPI、ExchangeRate-API、IPInfo和Alpha Vantage的响应格式，
+支持配置延迟分布、错误率、429限流和ETag，用于离线压测和性能测试整个API调用链路
+
+用法:
+    python tests/fake_upstream.py --port 8900 --latency 80 --error-rate 0.02 --rate-limit-rate 0.01
+    启动后按输出设置环境变量，即可让app_with_apis.py的所有API指向本服务
+"""
+
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+# 各API在真实服务中的路径，替身服务使用相同的路径
+API_PATHS = {
+    "weather": "/data/2.5/weather",
+    "translation": "/language/translate/v2",
+    "news": "/v2/top-headlines",
+    "currency": "/v4/latest",
+    "ipinfo": "",
+    "stocks": "/query",
+}
+
+
+class UpstreamBehavior:
+    """单个API的模拟行为配置"""
+    def __init__(
+        self,
+        latency_ms: float = 50.0,
+        latency_sigma: float = 0.5,
+        slow_rate: float = 0.0,
+        slow_ms: float = 2000.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        etag: bool = True,
+        max_age: Optional[int] = None,
+        content_ttl: float = 60.0
+    ):
+        """
+        初始化模拟行为
+
+        Args:
+            latency_ms: 延迟中位数（毫秒），为0时不延迟
+            latency_sigma: 对数正态分布的sigma，越大长尾越明显，为0时延迟固定
+            slow_rate: 额外的慢请求比例（模拟长尾）
+            slow_ms: 慢请求的延迟（毫秒）
+            error_rate: 返回503的比例
+            rate_limit_rate: 返回429的比例
+            etag: 是否返回ETag并支持If-None-Match
+            max_age: Cache-Control的max-age，为None时不返回Cache-Control
+            content_ttl: 响应内容保持不变的时间（秒），之后内容和ETag随之变化
+        """
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.etag = etag
+        self.max_age = max_age
+        self.content_ttl = content_ttl
+
+    def sample_latency(self, rng: random.Random) -> float:
+        """按配置的分布抽样一次延迟（秒）"""
+        if rng.random() < self.slow_rate:
+            return self.slow_ms / 1000
+        if self.latency_ms <= 0:
+            return 0.0
+        if self.latency_sigma <= 0:
+            return self.latency_ms / 1000
+        return rng.lognormvariate(0, self.latency_sigma) * self.latency_ms / 1000
+
+
+def _weather(rng: random.Random, query: Dict[str, str], path: str) -> Dict[str, Any]:
+    temp = round(rng.uniform(-10, 35), 1)
+    return {
+        "name": query.get("q") or f"City {query.get('id', 'Beijing')}",
+        "weather": [{"id": 800, "main": "Clear", "description": rng.choice(["晴", "多云", "小雨", "阴"])}],
+        "main": {
+            "temp": temp,
+            "feels_like": round(temp + rng.uniform(-3, 3), 1),
+            "temp_min": round(temp - rng.uniform(1, 5), 1),
+            "temp_max": round(temp + rng.uniform(1, 5), 1),
+            "pressure": rng.randint(990, 1030),
+            "humidity": rng.randint(20, 95),
+        },
+        "visibility": rng.randint(2000, 10000),
+        "wind": {"speed": round(rng.uniform(0, 12), 1), "deg": rng.randint(0, 359)},
+        "cod": 200,
+    }
+
+
+def _translation(rng: random.Random, query: Dict[str, str], path: str) -> Dict[str, Any]:
+    texts = query.get("q", "")
+    if isinstance(texts, str):
+        texts = [texts]
+    return {
+        "data": {
+            "translations": [
+                {
+                    "translatedText": f"[{query.get('target', 'en')}] {text}",
+                    "detectedSourceLanguage": query.get("source", "zh"),
+                }
+                for text in texts
+            ]
+        }
+    }
+
+
+def _news(rng: random.Random, query: Dict[str, str], path: str) -> Dict[str, Any]:
+    size = int(query.get("pageSize", 10))
+    category = query.get("category", "general")
+    articles = [
+        {
+            "source": {"id": None, "name": f"Fake News {i}"},
+            "author": "Fake Upstream",
+            "title": f"{category} headline #{rng.randint(1000, 9999)}",
+            "description": "Generated by the local upstream stand-in.",
+            "url": f"https://example.com/{category}/{i}",
+            "publishedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        for i in range(1, size + 1)
+    ]
+    return {"status": "ok", "totalResults": len(articles), "articles": articles}
+
+
+def _currency(rng: random.Random, query: Dict[str, str], path: str) -> Dict[str, Any]:
+    base = path.rstrip("/").rsplit("/", 1)[-1].upper() or "USD"
+    codes = ["USD", "CNY", "EUR", "JPY", "GBP", "KRW", "HKD", "AUD", "CAD", "SGD"]
+    rates = {code: round(rng.uniform(0.005, 10), 4) for code in codes}
+    rates[base] = 1
+    return {"base": base, "date": time.strftime("%Y-%m-%d"), "time_last_updated": int(time.time()), "rates": rates}
+
+
+def _ipinfo(rng: random.Random, query: Dict[str, str], path: str) -> Dict[str, Any]:
+    ip = path.strip("/").split("/")[0]
+    return {
+        "ip": ip,
+        "hostname": f"host-{ip.replace('.', '-')}.example.net",
+        "city": rng.choice(["Beijing", "Shanghai", "Shenzhen", "Hangzhou"]),
+        "region": "Fake Region",
+        "country": "CN",
+        "loc": f"{rng.uniform(20, 45):.4f},{rng.uniform(100, 125):.4f}",
+        "org": "AS0 Fake Upstream",
+        "postal": "100000",
+        "timezone": "Asia/Shanghai",
+    }
+
+
+def _stocks(rng: random.Random, query: Dict[str, str], path: str) -> Dict[str, Any]:
+    price = rng.uniform(10, 500)
+    change = rng.uniform(-10, 10)
+    return {
+        "Global Quote": {
+            "01. symbol": query.get("symbol", "AAPL"),
+            "02. open": f"{price - change / 2:.4f}",
+            "03. high": f"{price + abs(change):.4f}",
+            "04. low": f"{price - abs(change):.4f}",
+            "05. price": f"{price:.4f}",
+            "06. volume": str(rng.randint(100000, 90000000)),
+            "07. latest trading day": time.strftime("%Y-%m-%d"),
+            "08. previous close": f"{price - change:.4f}",
+            "09. change": f"{change:.4f}",
+            "10. change percent": f"{change / (price - change) * 100:.4f}%",
+        }
+    }
+
+
+_GENERATORS = {
+    "weather": _weather,
+    "translation": _translation,
+    "news": _news,
+    "currency": _currency,
+    "ipinfo": _ipinfo,
+    "stocks": _stocks,
+}
+
+
+class FakeUpstream:
+    """本地上游替身服务"""
+
+    def __init__(
+        self,
+        behaviors: Optional[Dict[str, UpstreamBehavior]] = None,
+        default_behavior: Optional[UpstreamBehavior] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: Optional[int] = None
+    ):
+        """
+        初始化替身服务
+
+        Args:
+            behaviors: 按API名称覆盖的模拟行为
+            default_behavior: 未单独配置的API使用的模拟行为
+            host: 监听地址
+            port: 监听端口，0表示自动分配
+            seed: 随机数种子，用于复现延迟和错误序列
+        """
+        self.default_behavior = default_behavior or UpstreamBehavior()
+        self.behaviors = dict(behaviors or {})
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._stats_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def behavior(self, api: str) -> UpstreamBehavior:
+        return self.behaviors.get(api, self.default_behavior)
+
+    def base_urls(self) -> Dict[str, str]:
+        """获取各API在替身服务上的base_url"""
+        return {api: self.base_url + path for api, path in API_PATHS.items()}
+
+    def env(self, api_key: str = "fake-key") -> Dict[str, str]:
+        """
+        生成让APIConfig指向替身服务的环境变量
+
+        Args:
+            api_key: 填入各API密钥的占位值
+
+        Returns:
+            Dict[str, str]: 环境变量名到值的映射
+        """
+        env = {}
+        for api, url in self.base_urls().items():
+            prefix = api.upper()
+            env[f"{prefix}_API_BASE_URL"] = url
+            env[f"{prefix}_API_ENABLED"] = "true"
+            env[f"{prefix}_API_KEY"] = api_key
+        return env
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """获取各API的请求数、200、304、429和503次数"""
+        with self._stats_lock:
+            return {api: dict(counts) for api, counts in self._stats.items()}
+
+    def _count(self, api: str, outcome: str) -> None:
+        with self._stats_lock:
+            counts = self._stats.setdefault(api, {"requests": 0, "200": 0, "304": 0, "429": 0, "503": 0})
+            counts["requests"] += 1
+            counts[outcome] += 1
+
+    def _route(self, method: str, path: str) -> Optional[str]:
+        """根据请求路径判断是哪个API"""
+        for api in ("weather", "translation", "news", "currency", "stocks"):
+            if path == API_PATHS[api] or path.startswith(API_PATHS[api] + "/"):
+                if api == "translation" and method != "POST":
+                    return None
+                return api
+        parts = path.strip("/").split("/")
+        if len(parts) == 2 and parts[1] == "json":
+            return "ipinfo"
+        return None
+
+    def respond(self, method: str, raw_path: str, body: bytes, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        生成一个请求的响应（不含延迟）
+
+        Args:
+            method: 请求方法
+            raw_path: 包含查询参数的路径
+            body: 请求体
+            headers: 请求头
+
+        Returns:
+            Tuple[int, Dict[str, str], bytes]: 状态码、响应头、响应体
+        """
+        parsed = urlparse(raw_path)
+        api = self._route(method, parsed.path)
+        if api is None:
+            return 404, {"Content-Type": "application/json"}, b'{"error": "not found"}'
+        behavior = self.behavior(api)
+        with self._rng_lock:
+            roll = self._rng.random()
+        if roll < behavior.rate_limit_rate:
+            self._count(api, "429")
+            return 429, {"Content-Type": "application/json", "Retry-After": "1"}, b'{"message": "rate limit exceeded"}'
+        if roll < behavior.rate_limit_rate + behavior.error_rate:
+            self._count(api, "503")
+            return 503, {"Content-Type": "application/json"}, b'{"message": "service unavailable"}'
+
+        # 重复的参数（如批量翻译的多个q）保留为列表
+        query = {key: values if len(values) > 1 else values[-1] for key, values in parse_qs(parsed.query).items()}
+        if method == "POST" and body:
+            query.update({
+                key: values if len(values) > 1 else values[-1]
+                for key, values in parse_qs(body.decode("utf-8")).items()
+            })
+        # 相同请求在content_ttl内返回相同内容，ETag才有意义
+        version = int(time.time() // behavior.content_ttl) if behavior.content_ttl > 0 else 0
+        seed_source = f"{api}|{parsed.path}|{sorted(query.items())}|{version}"
+        content_rng = random.Random(hashlib.sha256(seed_source.encode("utf-8")).hexdigest())
+        payload = json.dumps(_GENERATORS[api](content_rng, query, parsed.path), ensure_ascii=False).encode("utf-8")
+
+        response_headers = {"Content-Type": "application/json; charset=utf-8"}
+        if behavior.max_age is not None:
+            response_headers["Cache-Control"] = f"max-age={behavior.max_age}"
+        if behavior.etag:
+            etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+            response_headers["ETag"] = etag
+            if headers.get("If-None-Match") == etag:
+                self._count(api, "304")
+                return 304, response_headers, b""
+        self._count(api, "200")
+        return 200, response_headers, payload
+
+    def _handler_class(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                status, headers, payload = upstream.respond(self.command, self.path, body, dict(self.headers))
+                api = upstream._route(self.command, urlparse(self.path).path)
+                if api is not None:
+                    with upstream._rng_lock:
+                        delay = upstream.behavior(api).sample_latency(upstream._rng)
+                    if delay > 0:
+                        time.sleep(delay)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(payload)
+
+            do_GET = _handle
+            do_POST = _handle
+            do_HEAD = _handle
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeUpstream":
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-upstream", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """停止服务"""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeUpstream":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地上游替身服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=50.0, help="延迟中位数（毫秒）")
+    parser.add_argument("--sigma", type=float, default=0.5, help="延迟对数正态分布的sigma")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="慢请求比例")
+    parser.add_argument("--slow-ms", type=float, default=2000.0, help="慢请求延迟（毫秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回503的比例")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="返回429的比例")
+    parser.add_argument("--max-age", type=int, default=None, help="Cache-Control的max-age")
+    parser.add_argument("--no-etag", action="store_true", help="不返回ETag")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    behavior = UpstreamBehavior(
+        latency_ms=args.latency, latency_sigma=args.sigma, slow_rate=args.slow_rate, slow_ms=args.slow_ms,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+        etag=not args.no_etag, max_age=args.max_age,
+    )
+    upstream = FakeUpstream(default_behavior=behavior, host=args.host, port=args.port, seed=args.seed).start()
+    print(f"上游替身服务已启动: {upstream.base_url}")
+    print("设置以下环境变量后启动应用，即可让所有API指向本服务：")
+    for name, value in upstream.env().items():
+        print(f"export {name}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        upstream.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+自适应超时模块单元测试
+"""
+
+import os
+import sys
+import time
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.utils.adaptive_timeout import (
+    AdaptiveTimeoutConfig, AdaptiveTimeouts, split_timeout, timeout_phase
+)
+from src.modules.utils.http_utils import HTTPUtils, HTTPRequestError, RetryConfig
+
+class _Handler(BaseHTTPRequestHandler):
+    """/slow延迟3秒返回，其余路径立即返回"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path.startswith('/slow'):
+            time.sleep(3)
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+class TestAdaptiveTimeouts(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        self.config = AdaptiveTimeoutConfig(
+            min_samples=5, multiplier=2, connect_floor=0.1, connect_ceiling=1, read_floor=0.2, read_ceiling=4
+        )
+        self.timeouts = AdaptiveTimeouts(self.config)
+
+    def test_fallback_until_enough_samples(self):
+        """测试样本不足时使用调用方传入的超时"""
+        self.assertEqual(self.timeouts.timeout_for('host', 10), (10, 10))
+        self.assertEqual(self.timeouts.timeout_for('host', (3, 7)), (3, 7))
+        self.assertEqual(self.timeouts.timeout_for('host', None, default=30), (30, 30))
+        for _ in range(4):
+            self.timeouts.record('host', {'ttfb': 0.5})
+        self.assertEqual(self.timeouts.timeout_for('host', 10), (10, 10))
+
+    def test_learned_timeouts_clamped(self):
+        """测试学习到的超时为分位数的倍数，并限制在上下限之间"""
+        for _ in range(5):
+            self.timeouts.record('fast', {'connect': 0.001, 'tls': 0.001, 'ttfb': 0.05})
+            self.timeouts.record('slow', {'connect': 0.3, 'tls': 0.4, 'ttfb': 1.5})
+            self.timeouts.record('hung', {'ttfb': 10})
+        self.assertEqual(self.timeouts.timeout_for('fast', 10), (0.1, 0.2))
+        self.assertEqual(self.timeouts.timeout_for('slow', 10), (1, 3.0))
+        # 只有读取样本时连接超时仍使用调用方传入的超时
+        self.assertEqual(self.timeouts.timeout_for('hung', 10), (10, 4))
+        self.assertEqual(self.timeouts.snapshot()['slow']['read_samples'], 5)
+
+    def test_timeouts_raise_learned_value(self):
+        """测试超时计入样本，主机变慢后学习到的超时随之增大"""
+        for _ in range(5):
+            self.timeouts.record('host', {'ttfb': 0.1})
+        self.assertEqual(self.timeouts.timeout_for('host', 10)[1], 0.2)
+        self.timeouts.record_timeout('host', 'read', 0.2)
+        self.assertEqual(self.timeouts.timeout_for('host', 10)[1], 0.4)
+
+    def test_split_timeout_and_phase(self):
+        """测试timeout参数拆分和超时阶段判断"""
+        self.assertEqual(split_timeout((None, 5), 30), (30, 5))
+        self.assertEqual(timeout_phase(requests.exceptions.ConnectTimeout()), 'connect')
+        self.assertEqual(timeout_phase(requests.exceptions.ReadTimeout()), 'read')
+        self.assertIsNone(timeout_phase(requests.exceptions.ConnectionError('refused')))
+
+class TestHTTPUtilsAdaptiveTimeout(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.http_utils = HTTPUtils(adaptive_timeout_config=AdaptiveTimeoutConfig(
+            enabled=True, min_samples=5, read_floor=0.3
+        ))
+
+    def tearDown(self):
+        """每个测试方法执行后的清理"""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_hung_request_abandoned_early(self):
+        """测试学习到快速响应后，挂起的请求远早于调用方的10秒超时被放弃"""
+        for _ in range(5):
+            self.http_utils.get(self.base_url + '/fast', cache=False, timeout=10)
+        host = f'127.0.0.1:{self.server.server_address[1]}'
+        self.assertEqual(self.http_utils.adaptive_timeout_status()[host]['read_timeout'], 0.3)
+
+        start = time.monotonic()
+        with self.assertRaises(HTTPRequestError):
+            self.http_utils.get(self.base_url + '/slow', cache=False, timeout=10,
+                                retry_config=RetryConfig(total=0))
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(self.http_utils.adaptive_timeouts.read.count(host), 6)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+"""
+响应体读取模块单元测试
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.utils.body_reader import (
+    BodyDeadlineError, BodyTooLargeError, read_body, load_json, iter_json_lines
+)
+from src.modules.utils.http_utils import DeadlineExceededError, HTTPUtils, ResponseTooLargeError
+
+# 无Content-Length的流式响应最多发送的字节数
+ENDLESS_BYTES = 50 * 1024 * 1024
+
+class _Handler(BaseHTTPRequestHandler):
+    """返回各种响应体的本地测试服务"""
+
+    protocol_version = 'HTTP/1.1'
+    sent = 0
+
+    def _send_chunk(self, data: bytes):
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+
+    def do_GET(self):
+        if self.path == '/endless':
+            # 分块编码且不声明长度，客户端断开后停止发送
+            self.send_response(200)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            try:
+                while type(self).sent < ENDLESS_BYTES:
+                    self._send_chunk(b'x' * 65536)
+                    type(self).sent += 65536
+                self.wfile.write(b'0\r\n\r\n')
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            return
+        if self.path == '/trickle':
+            # 每0.1秒发送一小块，完整发送需要约5秒
+            self.send_response(200)
+            self.send_header('Content-Length', '50')
+            self.end_headers()
+            try:
+                for _ in range(50):
+                    self.wfile.write(b'x')
+                    self.wfile.flush()
+                    time.sleep(0.1)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            return
+        if self.path == '/declared':
+            self.send_response(200)
+            self.send_header('Content-Length', str(1024 * 1024))
+            self.end_headers()
+            return
+        if self.path == '/ndjson':
+            body = b'{"id": 1}\n\n{"id": 2, "name": "\xe5\x8c\x97\xe4\xba\xac"}\n{"id": 3}'
+        else:
+            body = json.dumps({'city': '北京', 'items': list(range(100))}, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class TestBodyReader(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        _Handler.sent = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def tearDown(self):
+        """每个测试方法执行后的清理"""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _get(self, path):
+        return requests.get(self.base_url + path, stream=True, timeout=5)
+
+    def test_read_within_limit(self):
+        """测试未超过上限时读取完整响应体，之后可照常使用json()"""
+        response = self._get('/json')
+        body = read_body(response, 10000, chunk_size=7)
+        self.assertEqual(response.content, body)
+        self.assertEqual(response.json()['city'], '北京')
+
+    def test_declared_length_rejected_before_reading(self):
+        """测试Content-Length超过上限时不读取响应体直接失败"""
+        with self.assertRaises(BodyTooLargeError) as ctx:
+            read_body(self._get('/declared'), 1000)
+        self.assertEqual(ctx.exception.received, 0)
+
+    def test_abort_stream_early(self):
+        """测试没有Content-Length时读取超过上限立即断开，上游不再继续发送"""
+        with self.assertRaises(BodyTooLargeError) as ctx:
+            read_body(self._get('/endless'), 100 * 1024)
+        self.assertLessEqual(ctx.exception.received, 100 * 1024 + 65536)
+        self.assertLess(_Handler.sent, ENDLESS_BYTES)
+
+    def test_truncate(self):
+        """测试truncate模式只保留前max_bytes字节"""
+        response = self._get('/endless')
+        self.assertEqual(len(read_body(response, 1000, truncate=True)), 1000)
+        self.assertEqual(len(response.content), 1000)
+
+    def test_deadline_stops_trickling_body(self):
+        """测试上游缓慢逐块发送时，超过截止时间停止读取，单次读取超时不限制总耗时"""
+        start = time.monotonic()
+        with self.assertRaises(BodyDeadlineError):
+            read_body(self._get('/trickle'), 1000, deadline=time.monotonic() + 0.3)
+        self.assertLess(time.monotonic() - start, 1)
+
+        http_utils = HTTPUtils()
+        start = time.monotonic()
+        with self.assertRaises(DeadlineExceededError):
+            http_utils.get(self.base_url + '/trickle', cache=False, timeout=1, deadline=0.5)
+        self.assertLess(time.monotonic() - start, 1.5)
+
+    def test_load_json_incrementally(self):
+        """测试增量解码时多字节字符跨块也能正确解析"""
+        self.assertEqual(load_json(self._get('/json'), 10000, chunk_size=3)['city'], '北京')
+        with self.assertRaises(BodyTooLargeError):
+            load_json(self._get('/json'), 10)
+
+    def test_iter_json_lines(self):
+        """测试逐行解码NDJSON并跳过空行"""
+        records = list(iter_json_lines(self._get('/ndjson'), 10000, chunk_size=5))
+        self.assertEqual([r['id'] for r in records], [1, 2, 3])
+        self.assertEqual(records[1]['name'], '北京')
+
+    def test_http_utils_max_bytes(self):
+        """测试HTTPUtils按max_bytes限制响应体大小"""
+        http_utils = HTTPUtils(max_response_bytes=100 * 1024)
+        self.assertEqual(http_utils.get(self.base_url + '/json', cache=False).json()['city'], '北京')
+        with self.assertRaises(ResponseTooLargeError):
+            http_utils.get(self.base_url + '/endless', cache=False)
+        with self.assertRaises(ResponseTooLargeError):
+            http_utils.get(self.base_url + '/json', cache=False, max_bytes=10, deadline=5)
+        self.assertFalse(http_utils.is_circuit_open(self.base_url))
+        endpoint = http_utils.metrics()[f'127.0.0.1:{self.server.server_address[1]}']['GET /endless']
+        self.assertEqual(endpoint['status'], {'BodyTooLargeError': 1})
+
+if __name__ == "__main__":
+    unittest.main()
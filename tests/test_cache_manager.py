@@ -11,7 +11,7 @@ from unittest import TestCase, mock
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.modules.cache.cache_manager import CacheManager, cache_result
+from src.modules.cache.cache_manager import CacheManager, CacheNamespace, cache_result
 
 class TestCacheManager(TestCase):
     
@@ -144,6 +144,57 @@ class TestCacheManager(TestCase):
         result3 = slow_function(2, 3)
         self.assertEqual(result3, "result_2_3")
         self.assertEqual(call_count["count"], 2)
+    
+    def test_lru_eviction(self):
+        """测试超出条目上限时淘汰最久未使用的条目"""
+        cache = CacheManager(cache_dir=self.test_cache_dir, max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        stats = cache.stats()
+        self.assertEqual((stats["size"], stats["max_entries"], stats["evictions"]), (2, 2, 1))
+        self.assertEqual((stats["hits"], stats["misses"]), (3, 1))
+    
+    def test_monotonic_expiry_and_stale(self):
+        """测试按单调时钟过期，过期后在保留期内只能通过get_stale读取"""
+        with mock.patch("src.modules.cache.cache_manager.time.monotonic", return_value=1000.0) as monotonic:
+            self.cache_manager.set("key", "value", ttl=10, stale_ttl=20)
+            monotonic.return_value = 1011.0
+            self.assertIsNone(self.cache_manager.get("key"))
+            self.assertEqual(self.cache_manager.get_stale("key"), "value")
+            monotonic.return_value = 1031.0
+            self.assertIsNone(self.cache_manager.get_stale("key"))
+            self.assertIsNone(self.cache_manager.get("key"))
+            self.assertEqual(self.cache_manager.stats()["expirations"], 1)
+            self.assertEqual(self.cache_manager.size(), 0)
+    
+    def test_namespace(self):
+        """测试命名空间使用各自的TTL和键前缀，并单独统计命中率"""
+        weather = CacheNamespace("weather", ttl=60, stale_ttl=60, cache=self.cache_manager)
+        news = CacheNamespace("news", ttl=10, cache=self.cache_manager)
+        with mock.patch("src.modules.cache.cache_manager.time.monotonic", return_value=1000.0) as monotonic:
+            weather.set("北京", "晴")
+            news.set("北京", "头条")
+            self.assertEqual((weather.get("北京"), news.get("北京")), ("晴", "头条"))
+            monotonic.return_value = 1030.0
+            self.assertIsNone(news.get("北京"))
+            self.assertIsNone(news.get_stale("北京"))
+            self.assertEqual(weather.get("北京"), "晴")
+            self.assertIsNone(weather.get("上海"))
+            # peek不计入命中统计
+            self.assertEqual(weather.peek("北京"), "晴")
+            self.assertIsNone(weather.peek("上海"))
+            self.assertIsNone(news.peek("北京"))
+        
+        stats = weather.stats()
+        self.assertEqual((stats["size"], stats["ttl"], stats["hits"], stats["misses"]), (1, 60, 2, 1))
+        self.assertAlmostEqual(stats["hit_rate"], 2 / 3)
+        self.assertEqual(news.stats()["size"], 0)
 
 if __name__ == "__main__":
     import unittest
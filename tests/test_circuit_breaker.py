@@ -0,0 +1,112 @@
+"""
+熔断器模块单元测试
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.utils.circuit_breaker import (
+    CircuitBreaker, CircuitBreakerConfig, CircuitBreakerRegistry, CircuitState
+)
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        self.config = CircuitBreakerConfig(
+            failure_rate_threshold=0.5,
+            minimum_calls=4,
+            window_size=10,
+            cooldown=30.0,
+            half_open_max_calls=1
+        )
+        self.breaker = CircuitBreaker('api.example.com', self.config)
+
+    def test_stays_closed_below_minimum_calls(self):
+        """测试调用次数不足时不会熔断"""
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitState.CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_opens_when_failure_rate_exceeded(self):
+        """测试失败率达到阈值后打开熔断器并快速失败"""
+        self.breaker.record_success()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitState.CLOSED)
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitState.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+        self.assertEqual(self.breaker.snapshot()['rejected'], 1)
+
+    @patch('src.modules.utils.circuit_breaker.time.monotonic')
+    def test_half_open_after_cooldown(self, mock_monotonic):
+        """测试冷却时间后进入半开状态，试探成功后闭合"""
+        mock_monotonic.return_value = 100.0
+        for _ in range(4):
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitState.OPEN)
+
+        mock_monotonic.return_value = 131.0
+        self.assertEqual(self.breaker.state, CircuitState.HALF_OPEN)
+
+        # 半开状态只放行一次试探请求
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitState.CLOSED)
+        self.assertEqual(self.breaker.snapshot()['calls_in_window'], 0)
+
+    @patch('src.modules.utils.circuit_breaker.time.monotonic')
+    def test_half_open_failure_reopens(self, mock_monotonic):
+        """测试半开状态下试探失败会重新打开熔断器"""
+        mock_monotonic.return_value = 100.0
+        for _ in range(4):
+            self.breaker.record_failure()
+
+        mock_monotonic.return_value = 131.0
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_failure()
+
+        snapshot = self.breaker.snapshot()
+        self.assertEqual(snapshot['state'], CircuitState.OPEN)
+        self.assertEqual(snapshot['open_count'], 2)
+        self.assertAlmostEqual(snapshot['cooldown_remaining'], 30.0)
+
+    def test_reset(self):
+        """测试重置熔断器"""
+        for _ in range(4):
+            self.breaker.record_failure()
+        self.breaker.reset()
+        self.assertEqual(self.breaker.state, CircuitState.CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+
+class TestCircuitBreakerRegistry(unittest.TestCase):
+
+    def test_get_returns_same_breaker_per_name(self):
+        """测试同一名称返回同一个熔断器"""
+        registry = CircuitBreakerRegistry()
+        breaker1 = registry.get('a.example.com')
+        breaker2 = registry.get('a.example.com')
+        self.assertIs(breaker1, breaker2)
+        self.assertIsNone(registry.find('b.example.com'))
+        self.assertIn('a.example.com', registry.snapshot())
+
+    @patch.dict(os.environ, {'CIRCUIT_BREAKER_FAILURE_RATE': '0.25', 'CIRCUIT_BREAKER_COOLDOWN': '5'})
+    def test_config_from_env(self):
+        """测试从环境变量读取配置"""
+        config = CircuitBreakerConfig.from_env()
+        self.assertEqual(config.failure_rate_threshold, 0.25)
+        self.assertEqual(config.cooldown, 5.0)
+        self.assertEqual(config.minimum_calls, 5)
+
+if __name__ == "__main__":
+    unittest.main()
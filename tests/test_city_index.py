@@ -0,0 +1,85 @@
+"""
+城市名称索引模块单元测试
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.api.city_index import City, CityIndex, normalize_city_name
+
+class TestNormalizeCityName(unittest.TestCase):
+
+    def test_case_width_space_and_accents(self):
+        """测试大小写、全角、空白、标点和拉丁变音符号被统一"""
+        self.assertEqual(normalize_city_name(" Beijing "), "beijing")
+        self.assertEqual(normalize_city_name("ＢＥＩＪＩＮＧ"), "beijing")
+        self.assertEqual(normalize_city_name("São Paulo"), "saopaulo")
+        self.assertEqual(normalize_city_name("sao-paulo"), "saopaulo")
+        self.assertEqual(normalize_city_name("New  York"), "newyork")
+        self.assertEqual(normalize_city_name("Xi'an"), "xian")
+
+    def test_non_latin_scripts_preserved(self):
+        """测试非拉丁文字保持不变，假名浊音符号不被去掉"""
+        self.assertEqual(normalize_city_name("北京"), "北京")
+        self.assertEqual(normalize_city_name("ソウル"), "ソウル")
+        self.assertNotEqual(normalize_city_name("バンコク"), normalize_city_name("ハンコク"))
+        self.assertEqual(normalize_city_name("   "), "")
+
+class TestCityIndex(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        self.index = CityIndex([
+            [1816670, "北京", ["Beijing", "Peking", "北京市"]],
+            [3448439, "圣保罗", ["São Paulo", "Sao Paulo"]],
+        ])
+
+    def test_aliases_resolve_to_same_city(self):
+        """测试同一城市的不同写法得到相同的城市和缓存键"""
+        for name in ["北京", "Beijing", "beijing ", "PEKING", "ＢＥＩＪＩＮＧ"]:
+            self.assertEqual(self.index.resolve(name), City(1816670, "北京"))
+            self.assertEqual(self.index.cache_key(name), "id:1816670")
+        self.assertEqual(self.index.cache_key("sao paulo"), "id:3448439")
+        self.assertEqual(len(self.index), 2)
+
+    def test_city_suffix_stripped(self):
+        """测试索引中没有时去掉"市"后缀再查找"""
+        index = CityIndex([[1796236, "上海", ["Shanghai"]]])
+        self.assertEqual(index.resolve("上海市"), City(1796236, "上海"))
+        self.assertIsNone(index.resolve("市"))
+
+    def test_unknown_city_uses_normalized_name(self):
+        """测试索引中没有的城市使用规范化名称作为缓存键"""
+        self.assertIsNone(self.index.resolve("Atlantis"))
+        self.assertEqual(self.index.cache_key(" ATLANTIS "), "name:atlantis")
+        self.assertEqual(self.index.cache_key("Atlantis"), self.index.cache_key("atlantis"))
+
+    def test_load(self):
+        """测试从文件加载索引，文件不存在或格式错误时返回空索引"""
+        test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, test_dir, True)
+        path = os.path.join(test_dir, "cities.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([[1850147, "东京", ["Tokyo", "東京"]]], f, ensure_ascii=False)
+        self.assertEqual(CityIndex.load(path).cache_key("東京"), "id:1850147")
+        self.assertEqual(len(CityIndex.load(os.path.join(test_dir, "missing.json"))), 0)
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("not json")
+        self.assertEqual(len(CityIndex.load(path)), 0)
+
+    def test_default_data(self):
+        """测试默认城市数据可以加载且常用写法能解析"""
+        index = CityIndex.load()
+        self.assertGreater(len(index), 0)
+        self.assertEqual(index.cache_key("北京市"), index.cache_key("Beijing"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+连接预热模块单元测试
+"""
+
+import os
+import sys
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.api.api_config import APIConfig
+from src.modules.utils.http_utils import HTTPUtils
+from src.modules.utils.connection_warmer import ConnectionWarmer
+
+class _Handler(BaseHTTPRequestHandler):
+    """记录请求方法的本地测试服务（HTTP/1.1，支持连接复用）"""
+
+    protocol_version = 'HTTP/1.1'
+    methods = []
+
+    def _reply(self):
+        self.methods.append(self.command)
+        body = b'{}' if self.command == 'GET' else b''
+        self.send_response(401 if self.command == 'HEAD' else 200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _reply
+    do_HEAD = _reply
+
+    def log_message(self, *args):
+        pass
+
+class TestConnectionWarmer(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        _Handler.methods = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.host = f'127.0.0.1:{self.server.server_address[1]}'
+        self.api_config = APIConfig()
+        self.api_config._config = {
+            'weather': {'base_url': f'http://{self.host}/data/2.5/weather', 'enabled': True},
+            'news': {'base_url': f'http://{self.host}/v2/top-headlines', 'enabled': True},
+            'stocks': {'base_url': 'http://127.0.0.1:9/query', 'enabled': False},
+        }
+        self.http_utils = HTTPUtils()
+
+    def tearDown(self):
+        """每个测试方法执行后的清理"""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_warm_up_then_reuse(self):
+        """测试预热建立的连接被后续请求复用"""
+        warmer = ConnectionWarmer(self.http_utils, self.api_config)
+        self.assertEqual(warmer.target_urls(), [f'http://{self.host}/data/2.5/weather'])
+        self.assertEqual(warmer.warm_up(), {self.host: True})
+        self.assertEqual(_Handler.methods, ['HEAD'])
+
+        self.http_utils.get(f'http://{self.host}/data/2.5/weather', cache=False)
+        self.http_utils.get(f'http://{self.host}/data/2.5/weather', cache=False, deadline=5)
+        endpoint = self.http_utils.metrics()[self.host]['GET /data/2.5/weather']
+        self.assertEqual(endpoint['new_connections'], 0)
+
+    def test_skips_open_circuit(self):
+        """测试熔断器打开的主机不预热"""
+        breaker = self.http_utils.circuit_breakers.get(self.host)
+        for _ in range(10):
+            breaker.record_failure()
+        warmer = ConnectionWarmer(self.http_utils, self.api_config)
+        self.assertEqual(warmer.warm_up(), {})
+        self.assertEqual(_Handler.methods, [])
+
+    def test_refresh_thread(self):
+        """测试后台线程定期刷新连接"""
+        warmer = ConnectionWarmer(self.http_utils, self.api_config, refresh_interval=0.05)
+        warmer.start()
+        try:
+            for _ in range(100):
+                if len(_Handler.methods) >= 2:
+                    break
+                threading.Event().wait(0.02)
+        finally:
+            warmer.stop()
+        self.assertGreaterEqual(len(_Handler.methods), 2)
+
+    def test_unreachable_host(self):
+        """测试无法连接的主机预热失败但不抛出异常"""
+        self.assertFalse(self.http_utils.warm_connection('http://127.0.0.1:9/query', timeout=1))
+
+if __name__ == "__main__":
+    unittest.main()
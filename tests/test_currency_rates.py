@@ -0,0 +1,116 @@
+"""
+汇率表模块单元测试
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.api.currency_rates import CurrencyRates, RateTable, UnknownCurrencyError
+from src.modules.cache.cache_manager import CacheManager, CacheNamespace
+
+# 1美元可兑换的各货币数量
+USD_RATES = {"USD": 1, "CNY": 7.2, "EUR": 0.9, "JPY": 150}
+
+class TestRateTable(unittest.TestCase):
+
+    def test_direct_inverse_and_cross_rates(self):
+        """测试直接汇率、反向汇率和经基准货币的交叉汇率"""
+        table = RateTable("usd", USD_RATES)
+        self.assertEqual(table.rate("USD", "CNY"), 7.2)
+        self.assertAlmostEqual(table.rate("CNY", "USD"), 1 / 7.2)
+        self.assertAlmostEqual(table.rate("eur", "jpy"), 150 / 0.9)
+        self.assertEqual(table.rate("JPY", "JPY"), 1)
+        with self.assertRaises(UnknownCurrencyError):
+            table.rate("USD", "XXX")
+
+class TestCurrencyRates(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        self.test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.test_dir, True)
+        self.cache = CacheNamespace("rates", ttl=600, cache=CacheManager(cache_dir=self.test_dir))
+        self.fetched = []
+        self.tables = {"USD": USD_RATES, "GBP": {"GBP": 1, "USD": 1.25, "KRW": 1700}}
+
+    def fetch(self, base):
+        self.fetched.append(base)
+        time.sleep(0.01)
+        if base not in self.tables:
+            raise UnknownCurrencyError(f"无法获取 {base} 的汇率表")
+        return RateTable(base, self.tables[base])
+
+    def test_one_fetch_serves_all_pairs(self):
+        """测试没有缓存时只获取枢轴货币的汇率表，之后所有货币对都不再请求"""
+        rates = CurrencyRates(self.fetch, self.cache, pivot="USD")
+        self.assertEqual(rates.rate("USD", "CNY"), 7.2)
+        self.assertAlmostEqual(rates.rate("CNY", "EUR"), 0.9 / 7.2)
+        rate, table = rates.quote("EUR", "JPY")
+        self.assertAlmostEqual(rate, 150 / 0.9)
+        self.assertEqual(table.base, "USD")
+        self.assertEqual(self.fetched, ["USD"])
+        # 每次换算只有实际使用的汇率表计入统计，探测其他候选汇率表不算未命中
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 1))
+
+    def test_demo_table_not_cached(self):
+        """测试上游不可用时返回的演示汇率表不写入缓存，恢复后立即使用真实汇率"""
+        available = []
+
+        def fetch(base):
+            self.fetched.append(base)
+            if not available:
+                return RateTable("USD", {"CNY": 1.0}, demo=True)
+            return RateTable(base, self.tables[base])
+
+        rates = CurrencyRates(fetch, self.cache, pivot="USD")
+        rate, table = rates.quote("USD", "CNY")
+        self.assertEqual((rate, table.demo), (1.0, True))
+        available.append(True)
+        rate, table = rates.quote("USD", "CNY")
+        self.assertEqual((rate, table.demo), (7.2, False))
+        self.assertEqual(rates.rate("USD", "CNY"), 7.2)
+        self.assertEqual(self.fetched, ["USD", "USD"])
+
+    def test_falls_back_to_source_table(self):
+        """测试枢轴货币的汇率表中没有该货币时获取原始货币的汇率表，之后直接使用其缓存"""
+        rates = CurrencyRates(self.fetch, self.cache, pivot="USD")
+        self.assertEqual(rates.rate("GBP", "KRW"), 1700)
+        self.assertEqual(rates.rate("KRW", "GBP"), 1 / 1700)
+        self.assertEqual(self.fetched, ["USD", "GBP"])
+        with self.assertRaises(UnknownCurrencyError):
+            rates.rate("CNY", "XXX")
+
+    def test_concurrent_requests_fetch_once(self):
+        """测试多个线程同时换算时同一基准货币只请求一次"""
+        rates = CurrencyRates(self.fetch, self.cache, pivot="USD")
+        threads = [threading.Thread(target=rates.rate, args=("USD", "CNY")) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.fetched, ["USD"])
+
+    def test_convert_batch(self):
+        """测试批量换算按numpy规则广播，每个货币对只查询一次汇率"""
+        rates = CurrencyRates(self.fetch, self.cache, pivot="USD")
+        converted = rates.convert_batch([100, 200, 300], ["USD", "cny", "USD"], "EUR")
+        np.testing.assert_allclose(converted, [90, 200 * 0.9 / 7.2, 270])
+
+        matrix = rates.convert_batch([[1], [2]], "USD", ["CNY", "JPY"])
+        np.testing.assert_allclose(matrix, [[7.2, 150], [14.4, 300]])
+        self.assertEqual(rates.convert_batch([], "USD", "CNY").shape, (0,))
+        self.assertEqual(self.fetched, ["USD"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+"""
+批量下载管理模块单元测试
+"""
+
+import os
+import sys
+import time
+import shutil
+import hashlib
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.utils.http_utils import HTTPUtils
+from src.modules.utils.download_manager import DownloadManager, DownloadStatus, file_matches
+
+class _Handler(BaseHTTPRequestHandler):
+    """返回固定文件内容的本地测试服务，记录请求数和最大并发数"""
+
+    protocol_version = 'HTTP/1.1'
+    lock = threading.Lock()
+    requests = {}
+    active = 0
+    max_active = 0
+
+    @staticmethod
+    def body_of(path: str) -> bytes:
+        return path.encode() * 10000
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.requests[self.path] = cls.requests.get(self.path, 0) + 1
+            attempt = cls.requests[self.path]
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+        try:
+            time.sleep(0.05)
+            # /flaky前两次返回500，/broken始终返回500
+            if self.path == '/broken' or (self.path == '/flaky' and attempt <= 2):
+                self.send_response(500)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body = self.body_of(self.path)
+            # /partial第一次只发送一半内容后断开连接
+            if self.path == '/partial' and attempt == 1:
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body[:len(body) // 2])
+                self.wfile.flush()
+                self.close_connection = True
+                return
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+class TestDownloadManager(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        _Handler.requests = {}
+        _Handler.active = _Handler.max_active = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.test_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_downloads")
+        os.makedirs(self.test_dir, exist_ok=True)
+        self.http_utils = HTTPUtils()
+
+    def tearDown(self):
+        """每个测试方法执行后的清理"""
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.test_dir, name)
+
+    def test_per_host_concurrency_and_progress(self):
+        """测试单主机并发数受限，并通过回调报告进度和吞吐量"""
+        reports = []
+        manager = DownloadManager(self.http_utils, max_workers=8, per_host=2,
+                                  progress_callback=reports.append, progress_interval=0.01)
+        for i in range(6):
+            manager.add(f'{self.base_url}/file{i}', self._path(f'file{i}'))
+        tasks = manager.run()
+
+        self.assertTrue(all(task.status == DownloadStatus.DONE for task in tasks))
+        self.assertEqual(_Handler.max_active, 2)
+        for i in range(6):
+            with open(self._path(f'file{i}'), 'rb') as f:
+                self.assertEqual(f.read(), _Handler.body_of(f'/file{i}'))
+        final = reports[-1]
+        self.assertEqual((final['total'], final['done'], final['running']), (6, 6, 0))
+        self.assertEqual(final['bytes_downloaded'], sum(len(_Handler.body_of(f'/file{i}')) for i in range(6)))
+        self.assertGreater(final['throughput'], 0)
+        self.assertEqual(reports[0]['pending'], 6)
+
+    def test_skip_matching_checksum(self):
+        """测试已有文件校验一致时跳过，不一致时重新下载"""
+        body = _Handler.body_of('/model')
+        checksum = hashlib.sha256(body).hexdigest()
+        with open(self._path('model'), 'wb') as f:
+            f.write(body)
+        with open(self._path('stale'), 'wb') as f:
+            f.write(b'old')
+
+        manager = DownloadManager(self.http_utils)
+        skipped = manager.add(f'{self.base_url}/model', self._path('model'), checksum=checksum)
+        stale = manager.add(f'{self.base_url}/stale', self._path('stale'),
+                            checksum=hashlib.sha256(_Handler.body_of('/stale')).hexdigest())
+        manager.run()
+
+        self.assertEqual(skipped.status, DownloadStatus.SKIPPED)
+        self.assertEqual(stale.status, DownloadStatus.DONE)
+        self.assertNotIn('/model', _Handler.requests)
+        self.assertTrue(file_matches(self._path('stale'), stale.checksum))
+
+    def test_retry_with_backoff(self):
+        """测试失败后退避重试，超过最大尝试次数后标记失败"""
+        http_utils = HTTPUtils()
+        # 关闭urllib3自动重试，由下载管理器负责重试
+        http_utils.session = http_utils._create_session(retries=False)
+        manager = DownloadManager(http_utils, max_attempts=3, backoff_factor=0.1)
+        flaky = manager.add(f'{self.base_url}/flaky', self._path('flaky'))
+        broken = manager.add(f'{self.base_url}/broken', self._path('broken'))
+        start = time.monotonic()
+        manager.run()
+
+        self.assertEqual((flaky.status, flaky.attempts), (DownloadStatus.DONE, 3))
+        self.assertEqual((broken.status, broken.attempts), (DownloadStatus.FAILED, 3))
+        self.assertFalse(os.path.exists(self._path('broken')))
+        # 第一次重试立即进行，第二次重试前等待0.2秒
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+        self.assertEqual(manager.progress()['failed'], 1)
+
+    def test_failed_attempt_bytes_not_counted(self):
+        """测试中途失败的尝试收到的字节不计入总下载量"""
+        http_utils = HTTPUtils()
+        http_utils.session = http_utils._create_session(retries=False)
+        manager = DownloadManager(http_utils, max_attempts=2, backoff_factor=0)
+        task = manager.add(f'{self.base_url}/partial', self._path('partial'))
+        manager.run()
+
+        size = len(_Handler.body_of('/partial'))
+        self.assertEqual((task.status, task.attempts), (DownloadStatus.DONE, 2))
+        self.assertEqual(task.bytes_downloaded, size)
+        self.assertEqual(manager.progress()['bytes_downloaded'], size)
+
+    def test_rerun_checks_finished_files(self):
+        """测试再次运行时已完成但文件被删除或改动的任务重新下载"""
+        body = _Handler.body_of('/checked')
+        manager = DownloadManager(self.http_utils)
+        plain = manager.add(f'{self.base_url}/plain', self._path('plain'))
+        checked = manager.add(f'{self.base_url}/checked', self._path('checked'),
+                              checksum=hashlib.sha256(body).hexdigest())
+        manager.run()
+        manager.run()
+        self.assertEqual(_Handler.requests, {'/plain': 1, '/checked': 1})
+
+        os.remove(self._path('plain'))
+        with open(self._path('checked'), 'wb') as f:
+            f.write(b'corrupted')
+        manager.run()
+
+        self.assertEqual(_Handler.requests, {'/plain': 2, '/checked': 2})
+        self.assertEqual((plain.status, checked.status), (DownloadStatus.DONE, DownloadStatus.DONE))
+        self.assertTrue(file_matches(self._path('checked'), checked.checksum))
+        self.assertEqual(manager.progress()['bytes_downloaded'], len(body) + len(_Handler.body_of('/plain')))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+上游替身服务单元测试
+"""
+
+import os
+import sys
+import shutil
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录和测试目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fake_upstream import FakeUpstream, UpstreamBehavior
+from src.modules.api.api_config import APIConfig
+from src.modules.cache.cache_manager import CacheManager
+from src.modules.utils.http_cache import HTTPCache
+from src.modules.utils.http_utils import HTTPUtils, HTTPRequestError
+
+class TestFakeUpstream(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        self.upstream = FakeUpstream(default_behavior=UpstreamBehavior(latency_ms=0), seed=1).start()
+        self.http_utils = HTTPUtils()
+
+    def tearDown(self):
+        """每个测试方法执行后的清理"""
+        self.upstream.stop()
+
+    def test_api_config_points_at_upstream(self):
+        """测试通过环境变量让APIConfig指向替身服务"""
+        with patch.dict(os.environ, self.upstream.env()):
+            config = APIConfig()
+        self.assertEqual(config.get_base_url('weather'), self.upstream.base_url + '/data/2.5/weather')
+        self.assertEqual(config.get_base_url('ipinfo'), self.upstream.base_url)
+        self.assertTrue(config.is_api_enabled('stocks'))
+
+    def test_response_shapes(self):
+        """测试各API的响应格式与app_with_apis.py读取的字段一致"""
+        urls = self.upstream.base_urls()
+        weather = self.http_utils.get(urls['weather'], params={'q': '北京'}, cache=False).json()
+        self.assertEqual(weather['name'], '北京')
+        self.assertIn('description', weather['weather'][0])
+        self.assertIn('feels_like', weather['main'])
+
+        translation = self.http_utils.post(urls['translation'], data={'q': '你好', 'target': 'en'}).json()
+        self.assertEqual(translation['data']['translations'][0]['translatedText'], '[en] 你好')
+
+        news = self.http_utils.get(urls['news'], params={'category': 'technology', 'pageSize': 3}, cache=False).json()
+        self.assertEqual(len(news['articles']), 3)
+        self.assertIn('name', news['articles'][0]['source'])
+
+        currency = self.http_utils.get(urls['currency'] + '/USD', cache=False).json()
+        self.assertEqual(currency['base'], 'USD')
+        self.assertIn('CNY', currency['rates'])
+
+        ipinfo = self.http_utils.get(urls['ipinfo'] + '/8.8.8.8/json', cache=False).json()
+        self.assertEqual(ipinfo['ip'], '8.8.8.8')
+
+        quote = self.http_utils.get(urls['stocks'], params={'function': 'GLOBAL_QUOTE', 'symbol': 'AAPL'},
+                                    cache=False).json()['Global Quote']
+        self.assertEqual(quote['01. symbol'], 'AAPL')
+        self.assertIn('10. change percent', quote)
+
+    def test_etag_revalidation(self):
+        """测试相同请求返回相同ETag，条件请求返回304"""
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_fake_upstream_cache")
+        self.addCleanup(shutil.rmtree, cache_dir, True)
+        http_utils = HTTPUtils(http_cache=HTTPCache(CacheManager(cache_dir=cache_dir)))
+        url = self.upstream.base_urls()['stocks']
+        first = http_utils.get(url, params={'symbol': 'MSFT'})
+        second = http_utils.get(url, params={'symbol': 'MSFT'})
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(self.upstream.stats()['stocks']['304'], 1)
+
+    def test_errors_and_rate_limits(self):
+        """测试按配置比例返回503和429"""
+        self.upstream.behaviors['news'] = UpstreamBehavior(latency_ms=0, rate_limit_rate=1.0)
+        self.upstream.behaviors['weather'] = UpstreamBehavior(latency_ms=0, error_rate=1.0)
+        with self.assertRaises(HTTPRequestError):
+            self.http_utils.get(self.upstream.base_urls()['news'], cache=False)
+        with self.assertRaises(HTTPRequestError):
+            self.http_utils.get(self.upstream.base_urls()['weather'], cache=False, deadline=2)
+        stats = self.upstream.stats()
+        # 429在重试状态码列表中，会按重试策略重试
+        self.assertGreaterEqual(stats['news']['429'], 1)
+        self.assertGreaterEqual(stats['weather']['503'], 1)
+
+    def test_latency_distribution(self):
+        """测试延迟按对数正态分布抽样，并按比例出现慢请求"""
+        import random
+        behavior = UpstreamBehavior(latency_ms=100, latency_sigma=0.5, slow_rate=0.1, slow_ms=3000)
+        rng = random.Random(7)
+        samples = sorted(behavior.sample_latency(rng) for _ in range(2000))
+        self.assertAlmostEqual(samples[len(samples) // 2], 0.1, delta=0.02)
+        self.assertAlmostEqual(sum(1 for s in samples if s == 3.0) / len(samples), 0.1, delta=0.03)
+        self.assertEqual(UpstreamBehavior(latency_ms=20, latency_sigma=0).sample_latency(random.Random()), 0.02)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,221 @@
+"""
+对冲请求模块单元测试
+"""
+
+import io
+import os
+import sys
+import time
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from src.modules.utils.latency_tracker import LatencyTracker
+from src.modules.utils.hedging import HedgeConfig, HedgeBudget, Hedger
+from src.modules.utils.http_utils import HTTPUtils
+
+HOST = 'api.example.com'
+
+def make_response(body):
+    """构造一个requests.Response对象"""
+    response = requests.Response()
+    response.status_code = 200
+    response._content = body
+    response.close = MagicMock()
+    return response
+
+def make_streamed_response(body):
+    """构造一个尚未读取响应体的流式响应"""
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(body)
+    response.close = MagicMock()
+    return response
+
+class TestLatencyTracker(unittest.TestCase):
+
+    def test_percentile(self):
+        """测试分位数计算和样本数下限"""
+        tracker = LatencyTracker(window_size=100)
+        for i in range(1, 101):
+            tracker.record(HOST, i / 100)
+        self.assertEqual(tracker.percentile(HOST, 0.95), 0.95)
+        self.assertEqual(tracker.percentile(HOST, 0.5), 0.5)
+        self.assertIsNone(tracker.percentile(HOST, 0.95, min_samples=200))
+        self.assertIsNone(tracker.percentile('other.example.com', 0.95))
+
+    def test_window_size(self):
+        """测试只保留最近的样本"""
+        tracker = LatencyTracker(window_size=3)
+        for seconds in (10.0, 1.0, 1.0, 1.0):
+            tracker.record(HOST, seconds)
+        self.assertEqual(tracker.count(HOST), 3)
+        self.assertEqual(tracker.percentile(HOST, 1.0), 1.0)
+
+class TestHedgeBudget(unittest.TestCase):
+
+    def test_ratio_and_burst(self):
+        """测试额度按比例积累且不超过上限"""
+        budget = HedgeBudget(ratio=0.5, burst=1)
+        self.assertFalse(budget.try_spend())
+        budget.deposit()
+        self.assertFalse(budget.try_spend())
+        for _ in range(10):
+            budget.deposit()
+        self.assertTrue(budget.try_spend())
+        self.assertFalse(budget.try_spend())
+
+class TestHedger(unittest.TestCase):
+
+    def make_hedger(self, **config):
+        """构造一个已有延迟样本（p95为10毫秒）的对冲执行器"""
+        tracker = LatencyTracker()
+        for _ in range(20):
+            tracker.record(HOST, 0.01)
+        options = dict(min_delay=0.01, min_samples=20, budget_ratio=1.0, budget_burst=5)
+        options.update(config)
+        return Hedger(HedgeConfig(**options), tracker)
+
+    def test_no_hedge_without_samples(self):
+        """测试样本不足时不发出对冲请求"""
+        hedger = Hedger(HedgeConfig(min_samples=20))
+        attempt = MagicMock(return_value=make_response(b'ok'))
+        self.assertEqual(hedger.send(HOST, attempt).content, b'ok')
+        self.assertEqual(attempt.call_count, 1)
+
+    def test_fast_response_not_hedged(self):
+        """测试在对冲延迟内返回的请求不会对冲"""
+        hedger = self.make_hedger(min_delay=1.0)
+        attempt = MagicMock(return_value=make_response(b'ok'))
+        hedger.send(HOST, attempt)
+        self.assertEqual(attempt.call_count, 1)
+        self.assertEqual(hedger.stats()['hedged'], 0)
+
+    def test_hedge_wins_and_loser_closed(self):
+        """测试原始请求过慢时对冲请求胜出，原始请求的响应被关闭"""
+        hedger = self.make_hedger()
+        release = threading.Event()
+        slow = make_response(b'slow')
+        fast = make_response(b'fast')
+        calls = []
+
+        def attempt():
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait(2)
+                return slow
+            return fast
+
+        response = hedger.send(HOST, attempt)
+        release.set()
+        self.assertEqual(response.content, b'fast')
+        self.assertEqual(hedger.stats()['hedge_wins'], 1)
+        for _ in range(100):
+            if slow.close.called:
+                break
+            time.sleep(0.01)
+        slow.close.assert_called_once()
+        fast.close.assert_not_called()
+
+    def test_budget_exhausted(self):
+        """测试额度用完后不再对冲"""
+        hedger = self.make_hedger(budget_ratio=0.0)
+        attempt = MagicMock(side_effect=lambda: time.sleep(0.05) or make_response(b'ok'))
+        hedger.send(HOST, attempt)
+        self.assertEqual(attempt.call_count, 1)
+        self.assertEqual(hedger.stats()['budget_exhausted'], 1)
+
+    def test_falls_back_when_hedge_fails(self):
+        """测试对冲请求失败时使用原始请求的结果"""
+        hedger = self.make_hedger()
+        calls = []
+
+        def attempt():
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.1)
+                return make_response(b'primary')
+            raise requests.exceptions.ConnectionError('reset')
+
+        self.assertEqual(hedger.send(HOST, attempt).content, b'primary')
+        self.assertEqual(len(calls), 2)
+
+    def test_pool_queueing_not_counted_as_delay(self):
+        """测试原始请求在线程池中排队的时间不计入对冲延迟，不会因排队发出对冲请求"""
+        hedger = self.make_hedger(min_delay=0.05, max_workers=1)
+        entered = threading.Event()
+
+        def slow_attempt():
+            entered.set()
+            time.sleep(0.2)
+            return make_response(b'slow')
+
+        fast_attempt = MagicMock(return_value=make_response(b'fast'))
+        slow_thread = threading.Thread(target=hedger.send, args=(HOST, slow_attempt))
+        slow_thread.start()
+        entered.wait(2)
+        # 唯一的原始请求线程被占用约0.2秒，超过对冲延迟
+        self.assertEqual(hedger.send(HOST, fast_attempt).content, b'fast')
+        slow_thread.join()
+        self.assertEqual(fast_attempt.call_count, 1)
+        # 只有真正慢的请求发出了对冲
+        self.assertEqual(hedger.stats()['hedged'], 1)
+
+class TestHTTPUtilsHedging(unittest.TestCase):
+
+    @patch('src.modules.utils.http_utils.HTTPUtils._create_session')
+    def test_hedge_only_for_get(self, mock_create_session):
+        """测试只有GET请求会对冲，并且使用流式请求"""
+        mock_session = MagicMock()
+        mock_session.request.return_value = make_response(b'ok')
+        mock_create_session.return_value = mock_session
+        http_utils = HTTPUtils(hedge_config=HedgeConfig(enabled=True))
+
+        http_utils.get('https://api.example.com/data')
+        self.assertTrue(mock_session.request.call_args.kwargs['stream'])
+
+        http_utils.post('https://api.example.com/data', json={'a': 1})
+        self.assertNotIn('stream', mock_session.request.call_args.kwargs)
+
+        http_utils.get('https://api.example.com/data', hedge=False)
+        self.assertNotIn('stream', mock_session.request.call_args.kwargs)
+        self.assertEqual(http_utils.hedge_status()['latency'][HOST]['samples'], 3)
+
+    @patch('src.modules.utils.http_utils.HTTPUtils._create_session')
+    def test_only_winner_body_read(self, mock_create_session):
+        """测试有响应体大小上限时按响应头先后决定胜出者，只读取胜出响应的响应体，落败的响应不下载响应体"""
+        slow = make_streamed_response(b'slow')
+        fast = make_streamed_response(b'fast')
+        calls = []
+
+        def request(**kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.2)
+                return slow
+            return fast
+
+        mock_session = MagicMock()
+        mock_session.request.side_effect = request
+        mock_create_session.return_value = mock_session
+        http_utils = HTTPUtils(
+            hedge_config=HedgeConfig(enabled=True, min_delay=0.01, min_samples=1, budget_ratio=1.0),
+            max_response_bytes=1000
+        )
+        http_utils.latency_tracker.record(HOST, 0.01)
+
+        self.assertEqual(http_utils.get('https://api.example.com/data').content, b'fast')
+        self.assertEqual(http_utils.hedge_status()['hedging']['hedged'], 1)
+        for _ in range(100):
+            if slow.close.called:
+                break
+            time.sleep(0.01)
+        slow.close.assert_called_once()
+        self.assertEqual(slow.raw.tell(), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+"""
+HTTP响应缓存模块单元测试
+"""
+
+import os
+import sys
+import time
+import shutil
+import unittest
+from email.utils import formatdate
+from unittest.mock import patch, MagicMock
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from src.modules.cache.cache_manager import CacheManager
+from src.modules.utils.http_cache import HTTPCache, parse_cache_control
+from src.modules.utils.http_utils import HTTPUtils
+
+URL = 'https://newsapi.org/v2/top-headlines?category=tech'
+
+def make_response(status_code=200, headers=None, content=b'{"ok": true}'):
+    """构造一个requests.Response对象"""
+    response = requests.Response()
+    response.status_code = status_code
+    response.reason = 'OK' if status_code == 200 else 'Not Modified'
+    response.headers.update(headers or {})
+    response._content = content
+    response.url = URL
+    return response
+
+class TestHTTPCache(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        self.test_cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_http_cache")
+        self.cache_manager = CacheManager(cache_dir=self.test_cache_dir)
+        self.http_cache = HTTPCache(self.cache_manager)
+
+    def tearDown(self):
+        """每个测试方法执行后的清理"""
+        self.cache_manager.clear()
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+
+    def test_parse_cache_control(self):
+        """测试解析Cache-Control头部"""
+        directives = parse_cache_control('public, max-age=60, No-Cache="Set-Cookie"')
+        self.assertEqual(directives, {'public': None, 'max-age': '60', 'no-cache': 'Set-Cookie'})
+        self.assertEqual(parse_cache_control(None), {})
+
+    def test_max_age_is_fresh(self):
+        """测试max-age范围内的响应为新鲜"""
+        self.assertTrue(self.http_cache.store(URL, None, make_response(headers={'Cache-Control': 'max-age=60'})))
+        entry = self.http_cache.lookup(URL)
+        self.assertTrue(self.http_cache.is_fresh(entry))
+
+        response = self.http_cache.build_response(entry)
+        self.assertEqual(response.json(), {'ok': True})
+        self.assertTrue(response.from_cache)
+        self.assertEqual(self.http_cache.stats()['hits'], 1)
+
+    def test_age_header_reduces_freshness(self):
+        """测试Age头部会扣减剩余新鲜度"""
+        self.http_cache.store(URL, None, make_response(headers={'Cache-Control': 'max-age=60', 'Age': '100'}))
+        self.assertIsNone(self.http_cache.lookup(URL))
+
+    def test_no_store_and_uncacheable(self):
+        """测试no-store、没有新鲜度且没有验证器的响应不缓存"""
+        self.assertFalse(self.http_cache.store(URL, None, make_response(headers={'Cache-Control': 'no-store, max-age=60'})))
+        self.assertFalse(self.http_cache.store(URL, None, make_response()))
+        self.assertFalse(self.http_cache.store(URL, None, make_response(status_code=500, headers={'Cache-Control': 'max-age=60'})))
+        self.assertIsNone(self.http_cache.lookup(URL))
+
+    def test_expires_header(self):
+        """测试根据Expires和Date计算新鲜度"""
+        now = time.time()
+        headers = {'Date': formatdate(now, usegmt=True), 'Expires': formatdate(now + 120, usegmt=True)}
+        self.http_cache.store(URL, None, make_response(headers=headers))
+        self.assertTrue(self.http_cache.is_fresh(self.http_cache.lookup(URL)))
+
+    def test_heuristic_freshness_from_last_modified(self):
+        """测试只有Last-Modified时使用启发式新鲜度"""
+        now = time.time()
+        headers = {'Date': formatdate(now, usegmt=True), 'Last-Modified': formatdate(now - 1000, usegmt=True)}
+        self.http_cache.store(URL, None, make_response(headers=headers))
+        entry = self.http_cache.lookup(URL)
+        self.assertTrue(self.http_cache.is_fresh(entry))
+        self.assertAlmostEqual(entry['expires_at'] - entry['stored_at'], 100, delta=2)
+
+    def test_stale_entry_with_validators(self):
+        """测试no-cache响应被保留用于重新验证并生成条件请求头"""
+        headers = {
+            'Cache-Control': 'no-cache',
+            'ETag': '"v1"',
+            'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT',
+        }
+        self.assertTrue(self.http_cache.store(URL, None, make_response(headers=headers)))
+        entry = self.http_cache.lookup(URL)
+        self.assertFalse(self.http_cache.is_fresh(entry))
+        self.assertEqual(self.http_cache.conditional_headers(entry), {
+            'If-None-Match': '"v1"',
+            'If-Modified-Since': 'Wed, 21 Oct 2015 07:28:00 GMT',
+        })
+
+    def test_revalidated_serves_stored_body(self):
+        """测试304响应使用已存储的响应体并刷新新鲜度"""
+        self.http_cache.store(URL, None, make_response(headers={'Cache-Control': 'max-age=0', 'ETag': '"v1"'}))
+        entry = self.http_cache.lookup(URL)
+
+        not_modified = make_response(status_code=304, headers={'Cache-Control': 'max-age=60', 'ETag': '"v1"'}, content=b'')
+        response = self.http_cache.revalidated(entry, None, not_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'{"ok": true}')
+        self.assertTrue(self.http_cache.is_fresh(self.http_cache.lookup(URL)))
+        self.assertEqual(self.http_cache.stats()['revalidated'], 1)
+
+    def test_vary_mismatch(self):
+        """测试Vary指定的请求头不一致时视为未命中"""
+        response = make_response(headers={'Cache-Control': 'max-age=60', 'Vary': 'Accept-Language'})
+        self.http_cache.store(URL, {'Accept-Language': 'zh'}, response)
+        self.assertIsNotNone(self.http_cache.lookup(URL, {'accept-language': 'zh'}))
+        self.assertIsNone(self.http_cache.lookup(URL, {'Accept-Language': 'en'}))
+
+    def test_request_no_cache_forces_revalidation(self):
+        """测试请求端Cache-Control: no-cache强制重新验证"""
+        self.http_cache.store(URL, None, make_response(headers={'Cache-Control': 'max-age=60', 'ETag': '"v1"'}))
+        entry = self.http_cache.lookup(URL, {'Cache-Control': 'no-cache'})
+        self.assertFalse(self.http_cache.is_fresh(entry))
+
+    def test_body_size_limits(self):
+        """测试响应体超过单条上限时不缓存，总字节数超过上限时淘汰最早写入的条目"""
+        http_cache = HTTPCache(self.cache_manager, max_body_bytes=100, max_total_bytes=250)
+        headers = {'Cache-Control': 'max-age=60'}
+        self.assertFalse(http_cache.store(URL, None, make_response(headers=headers, content=b'x' * 101)))
+        self.assertIsNone(http_cache.lookup(URL))
+
+        for i in range(3):
+            self.assertTrue(http_cache.store(f'{URL}&page={i}', None, make_response(headers=headers, content=b'x' * 100)))
+        self.assertIsNone(http_cache.lookup(f'{URL}&page=0'))
+        self.assertIsNotNone(http_cache.lookup(f'{URL}&page=2'))
+        stats = http_cache.stats()
+        self.assertEqual((stats['too_large'], stats['evicted'], stats['bytes']), (1, 1, 200))
+
+        # 替换已有条目按新的大小计算
+        http_cache.store(f'{URL}&page=2', None, make_response(headers=headers, content=b'x' * 10))
+        self.assertEqual(http_cache.stats()['bytes'], 110)
+
+class TestHTTPUtilsCaching(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        self.test_cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_http_cache")
+        self.cache_manager = CacheManager(cache_dir=self.test_cache_dir)
+
+    def tearDown(self):
+        """每个测试方法执行后的清理"""
+        self.cache_manager.clear()
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+
+    @patch('src.modules.utils.http_utils.HTTPUtils._create_session')
+    def test_fresh_hit_skips_network(self, mock_create_session):
+        """测试新鲜的缓存命中不再发出请求"""
+        mock_session = MagicMock()
+        mock_session.request.return_value = make_response(headers={'Cache-Control': 'max-age=60'})
+        mock_create_session.return_value = mock_session
+        http_utils = HTTPUtils(http_cache=HTTPCache(self.cache_manager))
+
+        http_utils.get('https://newsapi.org/v2/top-headlines', params={'category': 'tech'})
+        response = http_utils.get('https://newsapi.org/v2/top-headlines', params={'category': 'tech'})
+
+        self.assertEqual(mock_session.request.call_count, 1)
+        self.assertEqual(response.json(), {'ok': True})
+
+        # 非GET请求和显式关闭缓存的请求不使用缓存
+        http_utils.get('https://newsapi.org/v2/top-headlines', params={'category': 'tech'}, cache=False)
+        self.assertEqual(mock_session.request.call_count, 2)
+
+    @patch('src.modules.utils.http_utils.HTTPUtils._create_session')
+    def test_conditional_request_and_304(self, mock_create_session):
+        """测试过期条目发起条件请求，304时返回已存储的响应体"""
+        mock_session = MagicMock()
+        mock_session.request.side_effect = [
+            make_response(headers={'Cache-Control': 'no-cache', 'ETag': '"v1"'}),
+            make_response(status_code=304, headers={'ETag': '"v1"'}, content=b''),
+        ]
+        mock_create_session.return_value = mock_session
+        http_utils = HTTPUtils(http_cache=HTTPCache(self.cache_manager))
+
+        http_utils.get(URL)
+        response = http_utils.get(URL)
+
+        second_call = mock_session.request.call_args_list[1]
+        self.assertEqual(second_call.kwargs['headers'], {'If-None-Match': '"v1"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'ok': True})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+HTTP请求指标模块单元测试
+"""
+
+import os
+import sys
+import threading
+import unittest
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.utils.http_metrics import LogHistogram, HTTPMetrics, LATENCY_BUCKETS
+from src.modules.utils.http_utils import HTTPUtils, HTTPRequestError, RetryConfig
+
+class _Handler(BaseHTTPRequestHandler):
+    """返回固定内容的本地测试服务（HTTP/1.1，支持连接复用）"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'x' * 1000
+        self.send_response(404 if self.path.startswith('/missing') else 200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class TestLogHistogram(unittest.TestCase):
+
+    def test_buckets_and_quantiles(self):
+        """测试按对数刻度分桶并用桶上限近似分位数"""
+        histogram = LogHistogram(LATENCY_BUCKETS)
+        for _ in range(90):
+            histogram.observe(0.0015)
+        for _ in range(10):
+            histogram.observe(0.5)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot['count'], 100)
+        self.assertEqual(snapshot['p50'], 0.002)
+        self.assertEqual(snapshot['p95'], 0.512)
+        self.assertEqual(snapshot['buckets'], {'le_0.002': 90, 'le_0.512': 10})
+
+    def test_shards_from_multiple_threads(self):
+        """测试多线程写入各自分片，读取时合并"""
+        histogram = LogHistogram(LATENCY_BUCKETS)
+        threads = [
+            threading.Thread(target=lambda: [histogram.observe(0.01) for _ in range(1000)])
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(histogram.snapshot()['count'], 4000)
+        histogram.observe(1000)
+        self.assertEqual(histogram.snapshot()['buckets']['inf'], 1)
+
+    def test_shards_bounded_with_thread_churn(self):
+        """测试不断新建的线程共享固定数量的分片，计数不丢失"""
+        histogram = LogHistogram(LATENCY_BUCKETS, stripes=4)
+        for _ in range(20):
+            threads = [
+                threading.Thread(target=lambda: [histogram.observe(0.01) for _ in range(100)])
+                for _ in range(5)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(histogram._shards), 4)
+        self.assertEqual(histogram.snapshot()['count'], 10000)
+
+class TestHTTPMetrics(unittest.TestCase):
+
+    def test_endpoint_masks_ids_and_keys(self):
+        """测试端点名称中的ID和密钥被替换"""
+        self.assertEqual(HTTPMetrics.endpoint_of('get', '/v6/0123456789abcdef01234567/latest/USD'),
+                         'GET /v6/{id}/latest/USD')
+        self.assertEqual(HTTPMetrics.endpoint_of('GET', '/users/42'), 'GET /users/{id}')
+        self.assertEqual(HTTPMetrics.endpoint_of('GET', ''), 'GET /')
+
+    def test_endpoint_limit(self):
+        """测试单个主机的端点数超过上限后合并为other"""
+        metrics = HTTPMetrics(max_endpoints_per_host=2)
+        for path in ('/a', '/b', '/c', '/d'):
+            metrics.record('example.com', f'GET {path}', 0.01, {}, 0, '200', 0, 10)
+        self.assertEqual(sorted(metrics.snapshot()['example.com']), ['GET /a', 'GET /b', 'other'])
+        self.assertEqual(metrics.snapshot()['example.com']['other']['requests'], 2)
+
+class TestHTTPUtilsMetrics(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = HTTPServer(('127.0.0.1', 0), _Handler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_phase_breakdown(self):
+        """测试通过本地服务记录连接阶段、状态码和响应大小"""
+        http_utils = HTTPUtils()
+        http_utils.get(self.base_url + '/data', cache=False)
+        http_utils.get(self.base_url + '/data', cache=False)
+        with self.assertRaises(HTTPRequestError):
+            http_utils.get(self.base_url + '/missing', cache=False)
+
+        host = f'127.0.0.1:{self.server.server_address[1]}'
+        endpoint = http_utils.metrics()[host]['GET /data']
+        self.assertEqual(endpoint['requests'], 2)
+        self.assertEqual(endpoint['status'], {'200': 2})
+        # 第二次请求复用连接，只有一次DNS解析和建立连接
+        self.assertEqual(endpoint['new_connections'], 1)
+        self.assertEqual(endpoint['latency']['connect']['count'], 1)
+        self.assertEqual(endpoint['latency']['ttfb']['count'], 2)
+        self.assertEqual(endpoint['latency']['total']['count'], 2)
+        self.assertEqual(endpoint['latency']['tls']['count'], 0)
+        self.assertEqual(endpoint['response_bytes']['sum'], 2000)
+        self.assertEqual(http_utils.metrics()[host]['GET /missing']['status'], {'404': 1})
+
+    def test_connection_error_counts_retries(self):
+        """测试连接失败时记录异常类型和重试次数"""
+        # 先占用再释放一个端口，保证连接会被拒绝
+        server = HTTPServer(('127.0.0.1', 0), _Handler)
+        port = server.server_address[1]
+        server.server_close()
+
+        http_utils = HTTPUtils()
+        with self.assertRaises(HTTPRequestError):
+            http_utils.get(f'http://127.0.0.1:{port}/down', cache=False,
+                           retry_config=RetryConfig(total=2, backoff_factor=0))
+        endpoint = http_utils.metrics()[f'127.0.0.1:{port}']['GET /down']
+        self.assertEqual(endpoint['status'], {'ConnectionError': 1})
+        self.assertEqual(endpoint['retries']['sum'], 2)
+
+if __name__ == "__main__":
+    unittest.main()
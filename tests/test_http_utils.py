@@ -4,6 +4,7 @@ HTTP工具模块单元测试
 
 import os
 import sys
+import time
 import unittest
 from unittest import mock
 from unittest.mock import patch, MagicMock
@@ -12,9 +13,13 @@ from unittest.mock import patch, MagicMock
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import requests
+from src.modules.utils.circuit_breaker import CircuitBreakerConfig, CircuitState
+from src.modules.utils.rate_limiter import RateLimiter, RateLimitMode
+from src.modules.api.key_pool import APIKeyPools
+from src.modules.api.quota_tracker import QuotaTracker
 from src.modules.utils.http_utils import (
-    HTTPUtils, HTTPRequestError, RetryConfig,
-    http_get, http_post, http_put, http_delete
+    HTTPUtils, HTTPRequestError, HTTPStatusError, RetryConfig, CircuitOpenError, RateLimitedError,
+    DeadlineExceededError, DEFAULT_TIMEOUT, redact_secrets, http_get, http_post, http_put, http_delete
 )
 
 class TestHTTPUtils(unittest.TestCase):
@@ -23,6 +28,11 @@ class TestHTTPUtils(unittest.TestCase):
         """每个测试方法执行前的设置"""
         self.http_utils = HTTPUtils()
     
+    @staticmethod
+    def _key_pools():
+        """只在内存中统计配额的密钥池，测试不会写入src/cache/api_quota.json"""
+        return APIKeyPools(quota_tracker=QuotaTracker(path=''))
+    
     @patch('src.modules.utils.http_utils.requests.Session')
     def test_create_session(self, mock_session_class):
         """测试创建会话功能"""
@@ -65,7 +75,7 @@ class TestHTTPUtils(unittest.TestCase):
             params=None,
             data=None,
             json=None,
-            timeout=None,
+            timeout=DEFAULT_TIMEOUT,
             verify=True
         )
         mock_response.raise_for_status.assert_called_once()
@@ -87,6 +97,181 @@ class TestHTTPUtils(unittest.TestCase):
         with self.assertRaises(HTTPRequestError):
             self.http_utils.request('GET', 'https://example.com')
     
+    @patch('src.modules.utils.http_utils.HTTPUtils._create_session')
+    def test_circuit_opens_and_fails_fast(self, mock_create_session):
+        """测试连续失败后熔断器打开，后续请求快速失败"""
+        mock_session = MagicMock()
+        mock_session.request.side_effect = requests.exceptions.ConnectionError("Connection error")
+        mock_create_session.return_value = mock_session
+        
+        self.http_utils = HTTPUtils(CircuitBreakerConfig(minimum_calls=2, cooldown=60))
+        
+        for _ in range(2):
+            with self.assertRaises(HTTPRequestError):
+                self.http_utils.request('GET', 'https://example.com/a')
+        self.assertTrue(self.http_utils.is_circuit_open('https://example.com/b'))
+        
+        # 熔断期间不再发出请求
+        with self.assertRaises(CircuitOpenError):
+            self.http_utils.request('GET', 'https://example.com/a')
+        self.assertEqual(mock_session.request.call_count, 2)
+        self.assertFalse(self.http_utils.is_circuit_open('https://other.example.com'))
+        
+        status = self.http_utils.circuit_breaker_status()
+        self.assertEqual(status['example.com']['state'], CircuitState.OPEN)
+    
+    @patch('src.modules.utils.http_utils.HTTPUtils._create_session')
+    def test_client_errors_do_not_trip_circuit(self, mock_create_session):
+        """测试4xx响应不计入熔断失败"""
+        mock_response = MagicMock()
+        mock_response.status_code = 404
+        mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError(
+            "Not found", response=mock_response
+        )
+        mock_session = MagicMock()
+        mock_session.request.return_value = mock_response
+        mock_create_session.return_value = mock_session
+        
+        self.http_utils = HTTPUtils(CircuitBreakerConfig(minimum_calls=2))
+        
+        for _ in range(3):
+            with self.assertRaises(HTTPRequestError):
+                self.http_utils.request('GET', 'https://example.com')
+        self.assertFalse(self.http_utils.is_circuit_open('https://example.com'))
+    
+    @patch('src.modules.utils.http_utils.HTTPUtils._create_session')
+    def test_status_error_carries_code_and_redacts_keys(self, mock_create_session):
+        """测试非2xx响应抛出带状态码的HTTPStatusError，异常信息中的密钥参数已脱敏"""
+        mock_response = MagicMock()
+        mock_response.status_code = 401
+        mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError(
+            "401 Client Error: Unauthorized for url: https://example.com/data?q=x&appid=secret123",
+            response=mock_response
+        )
+        mock_session = MagicMock()
+        mock_session.request.return_value = mock_response
+        mock_create_session.return_value = mock_session
+        
+        self.http_utils = HTTPUtils()
+        with self.assertRaises(HTTPStatusError) as context:
+            self.http_utils.request('GET', 'https://example.com/data', params={'q': 'x'})
+        self.assertEqual(context.exception.status_code, 401)
+        self.assertNotIn('secret123', str(context.exception))
+        self.assertIn('q=x&appid=***', str(context.exception))
+    
+    def test_redact_secrets(self):
+        """测试各API的密钥参数都会脱敏，其他参数保持不变"""
+        self.assertEqual(
+            redact_secrets("https://a/x?apiKey=k1&page=2&token=k2 https://b/?key=k3&APIKEY=k4"),
+            "https://a/x?apiKey=***&page=2&token=*** https://b/?key=***&APIKEY=***"
+        )
+    
+    @patch('src.modules.utils.http_utils.HTTPUtils._create_session')
+    def test_rate_limited_request(self, mock_create_session):
+        """测试按API名称限流，超出配额时不发出请求"""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_session = MagicMock()
+        mock_session.request.return_value = mock_response
+        mock_create_session.return_value = mock_session
+        
+        limiter = RateLimiter({'stocks': {'requests': 1, 'per': 60, 'burst': 1}}.get)
+        self.http_utils = HTTPUtils(rate_limiter=limiter, key_pools=self._key_pools())
+        
+        self.http_utils.request('GET', 'https://example.com', api_name='stocks')
+        with self.assertRaises(RateLimitedError):
+            self.http_utils.request('GET', 'https://example.com', api_name='stocks',
+                                    rate_limit_mode=RateLimitMode.SHED)
+        # 未指定API名称的请求不受限流影响
+        self.http_utils.request('GET', 'https://example.com')
+        self.assertEqual(mock_session.request.call_count, 2)
+    
+    @patch('src.modules.utils.http_utils.HTTPUtils._create_session')
+    def test_429_drains_bucket(self, mock_create_session):
+        """测试收到429响应后清空令牌桶"""
+        mock_response = MagicMock()
+        mock_response.status_code = 429
+        mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError(
+            "Too many requests", response=mock_response
+        )
+        mock_session = MagicMock()
+        mock_session.request.return_value = mock_response
+        mock_create_session.return_value = mock_session
+        
+        limiter = RateLimiter({'news': {'requests': 10, 'per': 60, 'burst': 10}}.get)
+        self.http_utils = HTTPUtils(rate_limiter=limiter, key_pools=self._key_pools())
+        
+        with self.assertRaises(HTTPRequestError):
+            self.http_utils.request('GET', 'https://example.com', api_name='news')
+        self.assertLess(limiter.metrics()['news']['tokens'], 1)
+    
+    @patch('src.modules.utils.http_utils.HTTPUtils._create_session')
+    def test_deadline_retries_with_remaining_time(self, mock_create_session):
+        """测试截止时间内重试，每次尝试的超时不超过剩余时间"""
+        ok_response = MagicMock()
+        ok_response.status_code = 200
+        retry_response = MagicMock()
+        retry_response.status_code = 503
+        mock_session = MagicMock()
+        mock_session.request.side_effect = [
+            requests.exceptions.ConnectTimeout("connect timeout"),
+            retry_response,
+            ok_response,
+        ]
+        mock_create_session.return_value = mock_session
+        self.http_utils = HTTPUtils()
+        
+        response = self.http_utils.request(
+            'GET', 'https://example.com', timeout=10, deadline=2,
+            retry_config=RetryConfig(total=3, backoff_factor=0.01)
+        )
+        
+        self.assertEqual(response, ok_response)
+        self.assertEqual(mock_session.request.call_count, 3)
+        retry_response.close.assert_called_once()
+        for call in mock_session.request.call_args_list:
+            self.assertLessEqual(call.kwargs['timeout'], 2)
+        # 使用不自动重试的会话
+        mock_create_session.assert_any_call(retries=False)
+    
+    @patch('src.modules.utils.http_utils.HTTPUtils._create_session')
+    def test_deadline_exceeded(self, mock_create_session):
+        """测试超过截止时间后不再重试并抛出DeadlineExceededError"""
+        def slow_request(**kwargs):
+            time.sleep(min(kwargs['timeout'], 0.1))
+            raise requests.exceptions.ReadTimeout("read timeout")
+        mock_session = MagicMock()
+        mock_session.request.side_effect = slow_request
+        mock_create_session.return_value = mock_session
+        self.http_utils = HTTPUtils()
+        
+        start = time.monotonic()
+        with self.assertRaises(DeadlineExceededError):
+            self.http_utils.request(
+                'GET', 'https://example.com', timeout=10, deadline=0.25,
+                retry_config=RetryConfig(total=10, backoff_factor=0)
+            )
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertLessEqual(mock_session.request.call_count, 3)
+    
+    @patch('src.modules.utils.http_utils.HTTPUtils._create_session')
+    def test_deadline_includes_rate_limit_queue(self, mock_create_session):
+        """测试限流排队计入截止时间：剩余时间内拿不到令牌时立即拒绝，不先排队再用满截止时间"""
+        ok_response = MagicMock()
+        ok_response.status_code = 200
+        mock_session = MagicMock()
+        mock_session.request.return_value = ok_response
+        mock_create_session.return_value = mock_session
+        limiter = RateLimiter({'news': {'requests': 1, 'per': 2, 'burst': 1}}.get)
+        self.http_utils = HTTPUtils(rate_limiter=limiter, key_pools=self._key_pools())
+        
+        self.http_utils.request('GET', 'https://example.com', api_name='news', deadline=1)
+        start = time.monotonic()
+        with self.assertRaises(RateLimitedError):
+            self.http_utils.request('GET', 'https://example.com', api_name='news', deadline=0.5)
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertEqual(mock_session.request.call_count, 1)
+    
     @patch('src.modules.utils.http_utils.HTTPUtils.request')
     def test_get_method(self, mock_request):
         """测试GET方法"""
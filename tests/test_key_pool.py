@@ -0,0 +1,184 @@
+"""
+API密钥池模块单元测试
+"""
+
+import os
+import sys
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from unittest.mock import patch
+from urllib.parse import urlparse, parse_qs
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.api.api_config import APIConfig
+from src.modules.api.key_pool import APIKeyPool, APIKeyPools, KeyStrategy, parse_retry_after
+from src.modules.api.quota_tracker import QuotaTracker
+from src.modules.utils.http_utils import HTTPUtils, HTTPRequestError, RateLimitedError, RetryConfig
+from src.modules.utils.rate_limiter import RateLimiter
+
+class FakeClock:
+    """可控的单调时钟"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+class _Handler(BaseHTTPRequestHandler):
+    """记录每次请求使用的密钥，密钥limited始终返回429"""
+
+    protocol_version = 'HTTP/1.1'
+    keys = []
+
+    def do_GET(self):
+        key = parse_qs(urlparse(self.path).query).get('appid', [''])[0]
+        type(self).keys.append(key)
+        status = 429 if key == 'limited' else 200
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', '30')
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+class TestAPIKeyPool(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        self.clock = FakeClock()
+        for target in ('src.modules.api.key_pool.time', 'src.modules.api.quota_tracker.time',
+                       'src.modules.utils.rate_limiter.time'):
+            patcher = patch(target, self.clock)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # 每个密钥每分钟5次
+        self.rate_limit = {'requests': 5, 'per': 60, 'burst': 5}
+
+    def test_least_used_spreads_evenly(self):
+        """测试按剩余配额选择密钥，调用均匀分摊到各密钥"""
+        pool = APIKeyPool('stocks', ['a', 'b', 'c'], self.rate_limit)
+        used = [pool.acquire() for _ in range(9)]
+        self.assertEqual(sorted(used), ['a'] * 3 + ['b'] * 3 + ['c'] * 3)
+        self.assertEqual([state['uses'] for state in pool.snapshot()], [3, 3, 3])
+
+    def test_round_robin_skips_exhausted_key(self):
+        """测试轮询时跳过配额已用完的密钥"""
+        pool = APIKeyPool('stocks', ['a', 'b'], {'requests': 1, 'per': 60, 'burst': 1},
+                          strategy=KeyStrategy.ROUND_ROBIN)
+        self.assertEqual([pool.acquire(), pool.acquire()], ['a', 'b'])
+        self.clock.now += 60
+        self.assertEqual(pool.acquire(), 'a')
+        # a的配额已用完，轮到a时选择仍有配额的b
+        self.clock.now += 60
+        pool.acquire()
+        self.assertEqual(pool.acquire(), 'a')
+
+    def test_throttled_key_cools_down(self):
+        """测试收到429的密钥在Retry-After期间不再被选择"""
+        pool = APIKeyPool('stocks', ['a', 'b'], self.rate_limit, cooldown=60)
+        pool.report('a', 429, '10')
+        self.assertEqual({pool.acquire() for _ in range(3)}, {'b'})
+        self.assertFalse(pool.all_cooling())
+
+        pool.report('b', 429)
+        self.assertTrue(pool.all_cooling())
+        # 全部冷却时选择最早结束冷却的密钥
+        self.assertEqual(pool.acquire(), 'a')
+        self.clock.now += 10
+        self.assertFalse(pool.all_cooling())
+
+        snapshot = pool.snapshot()
+        self.assertEqual(snapshot[0]['throttled'], 1)
+        self.assertEqual(snapshot[1]['cooldown_remaining'], 50)
+
+    def test_snapshot_masks_keys(self):
+        """测试状态中只显示密钥末4位"""
+        pool = APIKeyPool('stocks', ['secret-key-1234'])
+        self.assertEqual(pool.snapshot()[0]['key'], '****1234')
+
+    def test_parse_retry_after(self):
+        """测试解析秒数和HTTP日期格式的Retry-After"""
+        self.assertEqual(parse_retry_after('120'), 120)
+        self.assertEqual(parse_retry_after('Thu, 01 Jan 1970 00:17:20 GMT'), 40)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertIsNone(parse_retry_after(None))
+
+class TestAPIConfigKeys(unittest.TestCase):
+
+    @patch.dict(os.environ, {'STOCKS_API_KEYS': 'k1, k2,,k1', 'STOCKS_API_KEY': 'single',
+                             'STOCKS_API_RATE_LIMIT': '5/60', 'STOCKS_API_RATE_BURST': '2'})
+    def test_multiple_keys_and_total_quota(self):
+        """测试解析逗号分隔的多个密钥，总配额按密钥数放大"""
+        config = APIConfig()
+        self.assertEqual(config.get_api_keys('stocks'), ['k1', 'k2'])
+        self.assertEqual(config.get_api_key('stocks'), 'k1')
+        self.assertEqual(config.get_total_rate_limit('stocks'), {'requests': 10, 'per': 60, 'burst': 4})
+        self.assertEqual(config.get_rate_limit('stocks')['requests'], 5)
+
+    @patch.dict(os.environ, {'NEWS_API_KEY': 'only'})
+    def test_single_key_fallback(self):
+        """测试未设置密钥列表时使用单个密钥"""
+        os.environ.pop('NEWS_API_KEYS', None)
+        config = APIConfig()
+        self.assertEqual(config.get_api_keys('news'), ['only'])
+        self.assertEqual(config.get_total_rate_limit('news'), config.get_rate_limit('news'))
+
+class TestHTTPUtilsKeyPool(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        _Handler.keys = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/weather'
+
+    def tearDown(self):
+        """每个测试方法执行后的清理"""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _http_utils(self, keys):
+        with patch.dict(os.environ, {'WEATHER_API_KEYS': ','.join(keys), 'WEATHER_API_RATE_LIMIT': 'none'}):
+            config = APIConfig()
+        return HTTPUtils(rate_limiter=RateLimiter(config.get_total_rate_limit), key_pools=APIKeyPools(
+            config, cooldown=60, quota_tracker=QuotaTracker(path='', api_config=config)
+        ))
+
+    def test_key_injected_and_rotated(self):
+        """测试请求时自动填入密钥参数，多次调用分摊到各密钥"""
+        http_utils = self._http_utils(['k1', 'k2'])
+        for _ in range(4):
+            http_utils.get(self.url, params={'q': 'Beijing'}, api_name='weather', cache=False)
+        self.assertEqual(sorted(_Handler.keys), ['k1', 'k1', 'k2', 'k2'])
+
+    def test_throttled_key_avoided(self):
+        """测试收到429的密钥进入冷却，全部冷却后不再发出请求"""
+        http_utils = self._http_utils(['limited', 'ok'])
+        no_retry = RetryConfig(total=0)
+        # 两个密钥使用次数相同时先选择limited
+        with self.assertRaises(HTTPRequestError):
+            http_utils.get(self.url, api_name='weather', cache=False, retry_config=no_retry)
+        for _ in range(3):
+            http_utils.get(self.url, api_name='weather', cache=False, retry_config=no_retry)
+        self.assertEqual(_Handler.keys.count('limited'), 1)
+
+        http_utils = self._http_utils(['limited'])
+        with self.assertRaises(HTTPRequestError):
+            http_utils.get(self.url, api_name='weather', cache=False, retry_config=no_retry)
+        requests_sent = len(_Handler.keys)
+        with self.assertRaises(RateLimitedError):
+            http_utils.get(self.url, api_name='weather', cache=False)
+        self.assertEqual(len(_Handler.keys), requests_sent)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+本地语言识别模块单元测试
+"""
+
+import os
+import sys
+import math
+import json
+import shutil
+import tempfile
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.api.language_id import LanguageIdentifier, char_script, extract_ngrams
+
+class TestLanguageIdentifier(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        self.identifier = LanguageIdentifier()
+
+    def test_script_languages(self):
+        """测试只有一种语言使用的文字直接确定语言，假名占比高的汉字文本为日文"""
+        cases = {
+            "東京は日本の首都です。": "ja",
+            "안녕하세요, 반갑습니다.": "ko",
+        }
+        for text, language in cases.items():
+            guess = self.identifier.identify(text)
+            self.assertEqual(guess.language, language, text)
+            self.assertEqual(guess.margin, math.inf)
+            self.assertEqual(self.identifier.detect(text), language, text)
+        self.assertIsNone(self.identifier.detect("12345 !!! ..."))
+        self.assertIsNone(self.identifier._ids)
+
+    def test_shared_scripts_not_detected(self):
+        """测试多种语言共用的文字只给出猜测，detect返回None（乌克兰文、只有汉字的日文不会被误判）"""
+        cases = {
+            "今天天气很好，我们去公园吧。": "zh",
+            "東京都庁舎": "zh",
+            "Привет, как дела?": "ru",
+            "Доброго ранку, як справи?": "ru",
+            "مرحبا بالعالم": "ar",
+        }
+        for text, language in cases.items():
+            guess = self.identifier.identify(text)
+            self.assertEqual(guess, (language, 0.0), text)
+            self.assertIsNone(self.identifier.detect(text), text)
+
+    def test_latin_languages(self):
+        """测试拉丁字母的句子用n-gram模型区分语言"""
+        cases = {
+            "The meeting has been moved to next Tuesday afternoon.": "en",
+            "La réunion a été déplacée à mardi prochain.": "fr",
+            "Das Treffen wurde auf nächsten Dienstag verschoben.": "de",
+            "La reunión se ha trasladado al próximo martes.": "es",
+            "Is that your dog?": "en",
+            "Ist das dein Hund?": "de",
+        }
+        for text, language in cases.items():
+            self.assertEqual(self.identifier.detect(text), language, text)
+
+    def test_low_confidence_returns_none(self):
+        """测试可信度不足的短文本detect返回None，identify仍给出猜测"""
+        guess = self.identifier.identify("Hello")
+        self.assertLess(guess.margin, self.identifier.min_margin)
+        self.assertIsNone(self.identifier.detect("Hello"))
+        self.assertEqual(LanguageIdentifier(min_margin=0).detect("Hello"), "en")
+
+    def test_profiles_loaded_lazily_into_arrays(self):
+        """测试频率表在第一次识别拉丁字母文本时加载为排序的数组"""
+        test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, test_dir, True)
+        path = os.path.join(test_dir, "profiles.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"languages": {"aa": {"a": 10, " a": 5}, "bb": {"b": 10, "b ": 5}}}, f)
+
+        identifier = LanguageIdentifier(profile_path=path)
+        self.assertIsNone(identifier._ids)
+        self.assertEqual(identifier.identify("bbb").language, "bb")
+        self.assertEqual(list(identifier._ids), sorted(identifier._ids))
+        self.assertEqual(identifier._log_probs.shape, (4, 2))
+
+    def test_helpers(self):
+        """测试文字判断和n-gram提取"""
+        self.assertEqual(char_script("é"), "latin")
+        self.assertEqual(char_script("ア"), "kana")
+        self.assertIsNone(char_script("1"))
+        self.assertEqual(extract_ngrams("Ab!", max_n=2), ["a", "b", " a", "ab", "b "])
+
+if __name__ == "__main__":
+    unittest.main()
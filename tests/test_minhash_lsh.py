@@ -0,0 +1,91 @@
+"""
+近似重复查找模块单元测试
+"""
+
+import os
+import sys
+import random
+import string
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.utils.minhash_lsh import MinHashLSH, jaccard, numbers, shingles
+
+SENTENCE = "The quick brown fox jumps over the lazy dog near the river bank."
+
+class TestShingles(unittest.TestCase):
+
+    def test_whitespace_and_punctuation_ignored(self):
+        """测试空白、标点、大小写和全角的差异不影响n-gram集合"""
+        self.assertEqual(shingles("Hello,  World!"), shingles("hello world"))
+        self.assertEqual(shingles("ＡＢＣＤ"), shingles("abcd"))
+        self.assertEqual(shingles("ab"), frozenset(["ab"]))
+        self.assertEqual(shingles("..."), frozenset())
+        self.assertAlmostEqual(jaccard(shingles("abcd"), shingles("abce")), 1 / 3)
+
+class TestMinHashLSH(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        rng = random.Random(7)
+        self.index = MinHashLSH(threshold=0.8)
+        for i in range(500):
+            self.index.add(i, "".join(rng.choices(string.ascii_lowercase + " ", k=60)), f"noise-{i}")
+
+    def test_near_duplicate_found(self):
+        """测试只有空白、标点或个别字词不同的文本能找到，不相似的文本找不到"""
+        self.index.add("fox", SENTENCE, "译文")
+        match = self.index.query("The quick brown fox  jumps over the lazy dog, near the river bank!")
+        self.assertEqual((match.key, match.value, match.similarity), ("fox", "译文", 1.0))
+        match = self.index.query(SENTENCE.replace("jumps", "jumped"))
+        self.assertEqual(match.key, "fox")
+        self.assertGreaterEqual(match.similarity, 0.8)
+        self.assertIsNone(self.index.query("A completely different sentence about weather."))
+        self.assertIsNone(self.index.query("!!!"))
+
+        stats = self.index.stats()
+        self.assertEqual((stats["queries"], stats["hits"]), (3, 2))
+        self.assertAlmostEqual(stats["hit_rate"], 2 / 3)
+
+    def test_different_numbers_not_matched(self):
+        """测试只差一个数字的句子相似度超过阈值也不匹配，千分位和全角写法相同的数字仍然匹配"""
+        index = MinHashLSH(threshold=0.9)
+        original = "Please transfer 1000 dollars from the checking account to the savings account before the end of today."
+        index.add("1000", original, "译文")
+        other = original.replace("1000", "9000")
+        self.assertGreaterEqual(jaccard(shingles(other), shingles(original)), 0.9)
+        self.assertIsNone(index.query(other))
+        self.assertIsNone(index.query(original + " 2"))
+        self.assertEqual(index.query(original.replace("1000", "1,000")).key, "1000")
+        self.assertEqual(index.query(original.replace("1000", "１０００")).key, "1000")
+        self.assertEqual(numbers("v1.2 costs 1,000 or 3.5"), ("1.2", "1000", "3.5"))
+
+    def test_namespaces_are_separate(self):
+        """测试不同命名空间的条目互不匹配"""
+        self.index.add("en-zh", SENTENCE, "译文", namespace=("en", "zh"))
+        self.assertIsNone(self.index.query(SENTENCE, namespace=("en", "ja")))
+        self.assertEqual(self.index.query(SENTENCE, namespace=("en", "zh")).key, "en-zh")
+
+    def test_bounded_lru(self):
+        """测试超过条目上限时淘汰最久未使用的条目，桶中不残留被淘汰的键"""
+        index = MinHashLSH(threshold=0.8, max_entries=2)
+        index.add("a", "first sentence here", 1)
+        index.add("b", "second sentence here", 2)
+        self.assertEqual(index.query("first sentence here").key, "a")
+        index.add("c", "third sentence here", 3)
+
+        self.assertEqual(len(index), 2)
+        self.assertIsNone(index.query("second sentence here"))
+        self.assertEqual(index.query("first sentence here").key, "a")
+        self.assertEqual(index.stats()["evictions"], 1)
+        self.assertNotIn("b", set().union(*index._buckets.values()))
+
+        # 替换已有的键不增加条目
+        index.add("a", "first sentence changed", 10)
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.query("first sentence changed").value, 10)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+缓存预刷新调度模块单元测试
+"""
+
+import os
+import sys
+import random
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.api.prefetch_scheduler import PrefetchScheduler
+
+class TestPrefetchScheduler(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        self.refreshed = []
+        self.scheduler = PrefetchScheduler(
+            self.refresh, ttl=900, lead=60, jitter=30, min_interval=10,
+            min_hits=1, max_idle_cycles=2, rng=random.Random(0)
+        )
+        self.addCleanup(self.scheduler.stop)
+
+    def refresh(self, key):
+        self.refreshed.append(key)
+        if key == "bad":
+            raise ValueError("upstream error")
+        self.scheduler.mark_refreshed(key, now=self.now)
+
+    def run_at(self, now):
+        self.now = now
+        return self.scheduler.run_once(now=now)
+
+    def test_refresh_before_expiry_with_jitter_and_rate_limit(self):
+        """测试预设查询在注册后的抖动时间内刷新，两次刷新间隔不少于min_interval"""
+        self.scheduler.register(["a", "b"], now=0)
+        first = self.run_at(30)
+        # 限速期间不刷新另一个查询
+        self.assertIsNone(self.run_at(35))
+        second = self.run_at(40)
+        self.assertEqual(sorted([first, second]), ["a", "b"])
+        self.assertIsNone(self.run_at(100))
+        self.assertEqual(self.scheduler.stats(now=100)["refreshes"], 2)
+
+    def test_next_refresh_lead_before_expiry(self):
+        """测试缓存写入（包括用户查询写入）后，在到期前lead~lead+jitter秒刷新"""
+        self.scheduler.record_hit("a", now=0)
+        self.scheduler.mark_refreshed("a", now=0)
+        self.assertIsNone(self.run_at(900 - 60 - 30 - 1))
+        self.assertEqual(self.run_at(900 - 60), "a")
+
+        self.scheduler.record_hit("a", now=1000)
+        self.scheduler.mark_refreshed("a", now=1000)
+        self.assertGreaterEqual(self.scheduler.stats(now=1000)["next_in"], 900 - 60 - 30)
+        self.assertIsNone(self.run_at(1000 + 900 - 60 - 30 - 1))
+        self.assertEqual(self.run_at(1000 + 900 - 60), "a")
+
+    def test_busy_queries_first_and_idle_queries_dropped(self):
+        """测试同时到期时访问多的优先，连续两个周期没有访问的查询退出调度，再次访问时重新加入"""
+        self.scheduler.register(["quiet", "busy"], now=0)
+        self.run_at(30)
+        self.run_at(40)
+        for _ in range(3):
+            self.scheduler.record_hit("busy", now=100)
+
+        # 两者都到期时先刷新busy；quiet第一个周期没有访问，仍然刷新
+        self.assertEqual(self.run_at(900), "busy")
+        self.assertEqual(self.run_at(910), "quiet")
+
+        # 第二个周期quiet仍没有访问，退出调度
+        self.scheduler.record_hit("busy", now=1000)
+        self.assertEqual(self.run_at(1800), "busy")
+        self.assertIsNone(self.run_at(1810))
+        stats = self.scheduler.stats(now=1810)
+        self.assertEqual((stats["scheduled"], stats["idle"], stats["dropped"]), (1, 1, 1))
+
+        # 再次被访问后重新加入调度
+        self.scheduler.record_hit("quiet", now=1820)
+        self.assertEqual(self.run_at(1830), "quiet")
+        self.assertEqual(self.scheduler.stats(now=1830)["scheduled"], 2)
+
+    def test_failed_refresh_retried_next_cycle(self):
+        """测试刷新失败时记录错误，在下一个周期再重试"""
+        self.scheduler.register(["bad"], now=0)
+        self.scheduler.record_hit("bad", now=0)
+        self.assertEqual(self.run_at(30), "bad")
+        self.assertIsNone(self.run_at(100))
+        self.assertEqual(self.scheduler.stats(now=100)["errors"], 1)
+        self.assertEqual(self.run_at(30 + 840), "bad")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+发布/订阅模块单元测试
+"""
+
+import os
+import sys
+import asyncio
+import threading
+import unittest
+from contextlib import aclosing
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.utils.pubsub import PubSubHub
+
+class TestPubSubHub(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        self.hub = PubSubHub()
+
+    async def _wait_subscribers(self, count):
+        while self.hub.stats()['subscribers'] < count:
+            await asyncio.sleep(0.001)
+
+    async def test_fan_out_to_all_subscribers(self):
+        """测试在其他线程的一次发布送达所有订阅该主题的订阅者，其他主题的订阅者不受影响"""
+        async def first_update(topics):
+            async with aclosing(self.hub.subscribe(topics, max_seconds=5)) as stream:
+                async for updates in stream:
+                    return updates
+
+        tasks = [
+            asyncio.create_task(first_update(topics))
+            for topics in (["stock:AAPL"], ["stock:AAPL", "stock:TSLA"], ["news:x"])
+        ]
+        await self._wait_subscribers(3)
+
+        await asyncio.to_thread(self.hub.publish, "stock:AAPL", {"price": 1})
+        self.assertEqual(await tasks[0], {"stock:AAPL": {"price": 1}})
+        self.assertEqual(await tasks[1], {"stock:AAPL": {"price": 1}})
+        self.assertFalse(tasks[2].done())
+
+        await asyncio.to_thread(self.hub.publish, "news:x", "headlines")
+        self.assertEqual(await tasks[2], {"news:x": "headlines"})
+        self.assertEqual(self.hub.stats(), {"topics": 2, "subscribers": 0, "published": 2, "delivered": 3})
+
+    async def test_only_new_messages_and_coalescing(self):
+        """测试订阅只收到订阅后的消息，处理慢时多条更新合并为最新一条"""
+        self.hub.publish("t", "old")
+        stream = self.hub.subscribe(["t"], max_seconds=5)
+        self.hub.publish("t", "v1")
+        self.hub.publish("t", "v2")
+        self.assertEqual(await stream.__anext__(), {"t": "v2"})
+        self.assertEqual(self.hub.latest("t"), "v2")
+        self.assertIsNone(self.hub.latest("missing"))
+        await stream.aclose()
+        self.assertEqual(self.hub.stats()["subscribers"], 0)
+
+    async def test_heartbeat_and_max_seconds(self):
+        """测试没有更新时按心跳产出空字典，到达最长时间后结束"""
+        updates = [u async for u in self.hub.subscribe(["t"], heartbeat=0.01, max_seconds=0.035)]
+        self.assertEqual(updates, [{}, {}, {}])
+        self.assertEqual([u async for u in self.hub.subscribe(["t"], max_seconds=0.01)], [])
+
+    async def test_waiting_subscribers_use_no_threads(self):
+        """测试大量订阅者等待时不占用线程，取消（会话断开）后立即退出订阅"""
+        threads = threading.active_count()
+
+        async def consume():
+            async for _ in self.hub.subscribe(["t"]):
+                pass
+
+        tasks = [asyncio.create_task(consume()) for _ in range(200)]
+        await self._wait_subscribers(200)
+        self.assertEqual(threading.active_count(), threads)
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.assertEqual(self.hub.stats()["subscribers"], 0)
+        self.assertEqual(self.hub._waiters, {})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+"""
+API配额统计模块单元测试
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.api.api_config import APIConfig
+from src.modules.api.key_pool import APIKeyPools
+from src.modules.api.quota_tracker import QuotaTracker, key_id, parse_quota_headers
+from src.modules.utils.http_utils import HTTPUtils, RateLimitedError
+from src.modules.utils.rate_limiter import RateLimiter
+
+class FakeClock:
+    """可控的时钟，time和monotonic同步推进"""
+
+    def __init__(self):
+        self.now = 1700000000.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+class _Handler(BaseHTTPRequestHandler):
+    """返回配额响应头的本地测试服务，第二次请求起报告剩余配额为0"""
+
+    protocol_version = 'HTTP/1.1'
+    count = 0
+
+    def do_GET(self):
+        type(self).count += 1
+        self.send_response(200)
+        self.send_header('X-RateLimit-Limit', '2')
+        self.send_header('X-RateLimit-Remaining', str(max(0, 2 - type(self).count)))
+        self.send_header('X-RateLimit-Reset', '120')
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+class TestQuotaTracker(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        self.clock = FakeClock()
+        for target in ('src.modules.api.quota_tracker.time', 'src.modules.api.key_pool.time'):
+            patcher = patch(target, self.clock)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.test_dir, True)
+        self.path = os.path.join(self.test_dir, 'quota.json')
+        with patch.dict(os.environ, {'NEWS_API_RATE_LIMIT': '3/86400', 'STOCKS_API_RATE_LIMIT': '5/45'}):
+            self.config = APIConfig()
+
+    def _tracker(self):
+        return QuotaTracker(self.path, self.config, flush_interval=0)
+
+    def test_window_counts(self):
+        """测试按分钟、小时、天统计调用次数，窗口过去后重新计数"""
+        tracker = self._tracker()
+        tracker.record('weather', 'k1', 200)
+        tracker.record('weather', 'k1', 200, calls=2)
+        tracker.record('weather', 'k2', 200)
+        usage = {item['key']: item for item in tracker.usage('weather')}
+        self.assertEqual((usage[key_id('k1')]['minute'], usage[key_id('k1')]['day']), (3, 3))
+
+        self.clock.now += 3600
+        tracker.record('weather', 'k1', 200)
+        usage = {item['key']: item for item in tracker.usage('weather')}
+        self.assertEqual(usage[key_id('k1')]['minute'], 1)
+        self.assertEqual(usage[key_id('k1')]['total'], 4)
+        self.assertEqual(usage[key_id('k2')]['minute'], 0)
+
+    def test_parse_quota_headers(self):
+        """测试解析剩余配额，重置时间支持剩余秒数和时间戳"""
+        now = self.clock.now
+        self.assertEqual(
+            parse_quota_headers({'X-RateLimit-Remaining': '7', 'X-RateLimit-Limit': '10', 'X-RateLimit-Reset': '30'}, now),
+            {'remaining': 7, 'limit': 10, 'reset_at': now + 30}
+        )
+        self.assertEqual(parse_quota_headers({'RateLimit-Reset': str(int(now) + 90)}, now)['reset_at'], now + 90)
+        self.assertEqual(parse_quota_headers({}, now), {'remaining': None, 'limit': None, 'reset_at': None})
+
+    def test_blocked_by_reported_quota(self):
+        """测试服务商报告剩余配额为0或返回429时，在重置前调用必然被拒绝"""
+        tracker = self._tracker()
+        tracker.record('weather', 'k1', 200, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '60'})
+        tracker.record('weather', 'k2', 429, {'Retry-After': '30'})
+        tracker.record('weather', 'k3', 429)
+        self.assertEqual(tracker.blocked_until('weather', 'k1'), self.clock.now + 60)
+        self.assertEqual(tracker.blocked_until('weather', 'k2'), self.clock.now + 30)
+        # 没有重置时间的429交给密钥池的冷却处理
+        self.assertIsNone(tracker.blocked_until('weather', 'k3'))
+        self.clock.now += 60
+        self.assertIsNone(tracker.blocked_until('weather', 'k1'))
+
+    def test_blocked_by_configured_quota(self):
+        """测试配置的每日配额在当天用完后调用必然被拒绝，周期不是整分钟/小时/天时不判断"""
+        tracker = self._tracker()
+        tracker.record('news', None, 200, calls=3)
+        day_end = (int(self.clock.now) // 86400 + 1) * 86400
+        self.assertEqual(tracker.blocked_until('news'), day_end)
+        tracker.record('stocks', 'k1', 200, calls=10)
+        self.assertIsNone(tracker.blocked_until('stocks', 'k1'))
+
+    def test_persisted_across_restarts(self):
+        """测试统计保存到文件，重启后仍然生效，文件中不包含密钥原文"""
+        tracker = self._tracker()
+        tracker.record('news', 'secret-key', 200, calls=3)
+        tracker.record('weather', 'secret-key', 200, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '60'})
+        with open(self.path, encoding='utf-8') as f:
+            self.assertNotIn('secret-key', f.read())
+
+        restarted = self._tracker()
+        self.assertEqual(restarted.usage('news')[0]['day'], 3)
+        self.assertIsNotNone(restarted.blocked_until('news', 'secret-key'))
+        self.assertIsNotNone(restarted.blocked_until('weather', 'secret-key'))
+
+    def test_corrupt_store_ignored(self):
+        """测试统计文件损坏时从空白开始"""
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('{broken')
+        self.assertEqual(self._tracker().snapshot(), {})
+
+    def test_key_pool_skips_exhausted_key(self):
+        """测试密钥池跳过配额已用完的密钥，全部用完时视为冷却中"""
+        with patch.dict(os.environ, {'WEATHER_API_KEYS': 'k1,k2'}):
+            config = APIConfig()
+        tracker = QuotaTracker('', config)
+        pool = APIKeyPools(config, quota_tracker=tracker).get('weather')
+        tracker.record('weather', 'k1', 200, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '60'})
+        self.assertEqual({pool.acquire() for _ in range(3)}, {'k2'})
+        self.assertEqual(pool.snapshot()[0]['cooldown_remaining'], 60)
+
+        tracker.record('weather', 'k2', 200, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '30'})
+        self.assertTrue(pool.all_cooling())
+        self.assertEqual(pool.acquire(), 'k2')
+
+class TestHTTPUtilsQuota(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        _Handler.count = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/latest/USD'
+
+    def tearDown(self):
+        """每个测试方法执行后的清理"""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_exhausted_quota_not_called(self):
+        """测试服务商报告配额用完后，重置前的调用在本地直接被拒绝"""
+        with patch.dict(os.environ, {'CURRENCY_API_RATE_LIMIT': 'none'}):
+            config = APIConfig()
+        tracker = QuotaTracker('', config)
+        http_utils = HTTPUtils(
+            rate_limiter=RateLimiter(config.get_total_rate_limit),
+            key_pools=APIKeyPools(config, quota_tracker=tracker)
+        )
+        for _ in range(2):
+            http_utils.get(self.url, api_name='currency', cache=False)
+        with self.assertRaises(RateLimitedError):
+            http_utils.get(self.url, api_name='currency', cache=False)
+        self.assertEqual(_Handler.count, 2)
+        usage = tracker.usage('currency')[0]
+        self.assertEqual((usage['key'], usage['minute'], usage['remaining'], usage['limit']), ('-', 2, 0, 2))
+
+if __name__ == "__main__":
+    unittest.main()
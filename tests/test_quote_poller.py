@@ -0,0 +1,83 @@
+"""
+自选股行情轮询模块单元测试
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.api.quote_poller import QuotePoller
+from src.modules.cache.cache_manager import CacheManager, CacheNamespace
+
+class TestQuotePoller(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        self.test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.test_dir, True)
+        self.cache = CacheNamespace("stocks", ttl=300, cache=CacheManager(cache_dir=self.test_dir))
+        self.fetched = []
+        # 测试中手动调用poll_once，后台线程的间隔足够长不会触发
+        self.poller = QuotePoller(self.fetch, self.cache, interval=3600, min_age=60, viewer_ttl=600, max_symbols=3)
+        self.addCleanup(self.poller.stop)
+
+    def fetch(self, symbol):
+        self.fetched.append(symbol)
+        if symbol == "BAD":
+            raise ValueError("upstream error")
+        return {"symbol": symbol, "price": "1.00"}
+
+    def test_union_polled_once_and_read_from_cache(self):
+        """测试多个用户关注的股票只请求一次，查看时只读缓存"""
+        self.assertEqual(self.poller.watch("u1", ["aapl", " tsla", "AAPL", ""], now=0), ["AAPL", "TSLA"])
+        self.poller.watch("u2", ["AAPL"], now=0)
+        self.assertEqual(self.poller.read("u1", now=0), {"AAPL": None, "TSLA": None})
+
+        # 关注人数多的新股票先刷新，之后在min_age内不再刷新
+        self.assertEqual(self.poller.poll_once(now=1), "AAPL")
+        self.assertEqual(self.poller.poll_once(now=2), "TSLA")
+        self.assertIsNone(self.poller.poll_once(now=3))
+        self.assertEqual(self.fetched, ["AAPL", "TSLA"])
+
+        for viewer in ("u1", "u2"):
+            self.assertEqual(self.poller.read(viewer, now=4)["AAPL"], {"symbol": "AAPL", "price": "1.00"})
+        self.assertEqual(self.fetched, ["AAPL", "TSLA"])
+        self.assertTrue(self.poller.stats(now=4)["running"])
+
+    def test_priority_by_watchers_and_age(self):
+        """测试按关注人数 × 距上次刷新时间选择下一只股票"""
+        self.poller.watch("u1", ["AAA", "BBB"], now=0)
+        self.poller.watch("u2", ["AAA"], now=0)
+        self.poller.poll_once(now=0)
+        self.poller.poll_once(now=50)
+        self.assertEqual(self.fetched, ["AAA", "BBB"])
+
+        # t=110: AAA 2人×110秒 > BBB 1人×60秒
+        self.assertEqual(self.poller.next_symbol(now=110), "AAA")
+        # t=200: AAA 2人×200秒 > BBB 1人×150秒；只剩u1关注时 BBB 150秒 < AAA 200秒仍选AAA
+        self.poller.unwatch("u2")
+        self.assertEqual(self.poller.next_symbol(now=200), "AAA")
+        self.poller.poll_once(now=200)
+        self.assertEqual(self.poller.next_symbol(now=260), "BBB")
+
+    def test_errors_and_expired_viewers(self):
+        """测试请求失败的股票在min_age内不再重试，长时间未查看的用户不再计入"""
+        self.poller.watch("u1", ["BAD"], now=0)
+        self.assertEqual(self.poller.poll_once(now=0), "BAD")
+        self.assertIsNone(self.poller.poll_once(now=30))
+        self.assertEqual(self.poller.stats(now=30)["errors"], 1)
+        self.assertIsNone(self.cache.get("BAD"))
+
+        self.poller.watch("u2", ["AAPL", "MSFT", "GOOG", "AMZN"], now=0)
+        self.assertEqual(self.poller.watchers(now=100), {"BAD": 1, "AAPL": 1, "MSFT": 1, "GOOG": 1})
+        self.poller.read("u1", now=500)
+        self.assertEqual(self.poller.watchers(now=700), {"BAD": 1})
+        self.assertEqual(self.poller.read("u2", now=700), {})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+"""
+分段下载模块单元测试
+"""
+
+import os
+import sys
+import json
+import hashlib
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from src.modules.utils.http_utils import HTTPUtils
+from src.modules.utils.ranged_download import RangedDownloader, DownloadError
+
+URL = 'https://example.com/model.bin'
+
+class FakeResponse:
+    """支持上下文管理和iter_content的模拟响应"""
+
+    def __init__(self, status_code, body, headers, fail_after=None):
+        self.status_code = status_code
+        self.headers = requests.structures.CaseInsensitiveDict(headers)
+        self._body = body
+        self._fail_after = fail_after
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code}")
+
+    def iter_content(self, chunk_size=1):
+        body = self._body if self._fail_after is None else self._body[:self._fail_after]
+        for i in range(0, len(body), chunk_size):
+            yield body[i:i + chunk_size]
+        if self._fail_after is not None:
+            raise requests.exceptions.ConnectionError("connection reset")
+
+class FakeRangeSession:
+    """按Range请求返回内存中文件内容的模拟会话"""
+
+    def __init__(self, data, support_ranges=True, etag='"v1"'):
+        self.data = data
+        self.support_ranges = support_ranges
+        self.etag = etag
+        self.ranges = []
+        # 起始偏移为该值的分段请求会在传输部分数据后中断
+        self.fail_start = None
+
+    def get(self, url, headers=None, stream=False, **kwargs):
+        headers = headers or {}
+        range_header = headers.get('Range')
+        base_headers = {'ETag': self.etag}
+        if not range_header or not self.support_ranges:
+            return FakeResponse(200, self.data, dict(base_headers, **{'Content-Length': str(len(self.data))}))
+        start, end = range_header[len('bytes='):].split('-')
+        start, end = int(start), int(end)
+        self.ranges.append((start, end))
+        body = self.data[start:end + 1]
+        fail_after = None
+        if self.fail_start == start:
+            fail_after = len(body) // 2
+        return FakeResponse(206, body, dict(base_headers, **{
+            'Content-Range': f'bytes {start}-{end}/{len(self.data)}',
+            'Content-Length': str(len(body)),
+        }), fail_after=fail_after)
+
+class TestRangedDownloader(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.save_path = os.path.join(self.tmpdir.name, 'model.bin')
+        self.data = os.urandom(4096) * 1000  # 约4MB
+        self.digest = hashlib.sha256(self.data).hexdigest()
+        patcher = patch('src.modules.utils.ranged_download.MIN_SEGMENT_SIZE', 512 * 1024)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """每个测试方法执行后的清理"""
+        self.tmpdir.cleanup()
+
+    def read_saved(self):
+        with open(self.save_path, 'rb') as f:
+            return f.read()
+
+    def test_parallel_download_with_checksum(self):
+        """测试多分段并行下载并校验摘要"""
+        session = FakeRangeSession(self.data)
+        RangedDownloader(session, URL, self.save_path, segments=4, checksum=self.digest).run()
+
+        self.assertEqual(self.read_saved(), self.data)
+        # 探测请求 + 4个分段
+        self.assertEqual(len(session.ranges), 5)
+        self.assertFalse(os.path.exists(self.save_path + '.part'))
+        self.assertFalse(os.path.exists(self.save_path + '.part.json'))
+
+    def test_checksum_mismatch(self):
+        """测试摘要不一致时失败并删除临时文件"""
+        session = FakeRangeSession(self.data)
+        with self.assertRaises(DownloadError):
+            RangedDownloader(session, URL, self.save_path, segments=4, checksum='0' * 64).run()
+        self.assertFalse(os.path.exists(self.save_path))
+        self.assertFalse(os.path.exists(self.save_path + '.part'))
+
+    def test_resume_after_interruption(self):
+        """测试中断后从进度文件继续，只请求剩余部分"""
+        session = FakeRangeSession(self.data)
+        segment_size = len(self.data) // 4
+        session.fail_start = segment_size * 2
+
+        downloader = RangedDownloader(session, URL, self.save_path, segments=4, resume=True, checksum=self.digest)
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            downloader.run()
+        self.assertFalse(os.path.exists(self.save_path))
+        with open(self.save_path + '.part.json', 'r', encoding='utf-8') as f:
+            progress = json.load(f)
+        failed_segment = [s for s in progress['segments'] if s[0] == segment_size * 2][0]
+        self.assertGreater(failed_segment[2], 0)
+        self.assertLess(failed_segment[2], segment_size)
+
+        session.fail_start = None
+        session.ranges = []
+        RangedDownloader(session, URL, self.save_path, segments=4, resume=True, checksum=self.digest).run()
+
+        self.assertEqual(self.read_saved(), self.data)
+        # 探测请求之外只请求进度文件中未完成分段的剩余部分
+        remaining = sorted((start + done, end) for start, end, done in progress['segments'] if start + done <= end)
+        self.assertEqual(sorted(session.ranges[1:]), remaining)
+        self.assertIn((segment_size * 2 + failed_segment[2], segment_size * 3 - 1), session.ranges)
+        self.assertFalse(os.path.exists(self.save_path + '.part.json'))
+
+    def test_resume_discarded_when_remote_changed(self):
+        """测试远程文件ETag变化时丢弃旧进度重新下载"""
+        session = FakeRangeSession(self.data)
+        session.fail_start = 0
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            RangedDownloader(session, URL, self.save_path, segments=4, resume=True).run()
+
+        session = FakeRangeSession(self.data, etag='"v2"')
+        RangedDownloader(session, URL, self.save_path, segments=4, resume=True).run()
+        self.assertEqual(self.read_saved(), self.data)
+        self.assertEqual(len(session.ranges), 5)
+
+    def test_fallback_without_range_support(self):
+        """测试服务器不支持Range时整文件下载"""
+        session = FakeRangeSession(self.data, support_ranges=False)
+        RangedDownloader(session, URL, self.save_path, segments=4, checksum=self.digest).run()
+        self.assertEqual(self.read_saved(), self.data)
+
+class TestDownloadFileModes(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.save_path = os.path.join(self.tmpdir.name, 'file.bin')
+        self.data = b'hello world' * 100
+
+    def tearDown(self):
+        """每个测试方法执行后的清理"""
+        self.tmpdir.cleanup()
+
+    @patch('src.modules.utils.http_utils.HTTPUtils._create_session')
+    def test_single_stream_checksum(self, mock_create_session):
+        """测试单连接下载时增量校验"""
+        mock_create_session.return_value = FakeRangeSession(self.data)
+        http_utils = HTTPUtils()
+
+        self.assertTrue(http_utils.download_file(URL, self.save_path, checksum=hashlib.sha256(self.data).hexdigest()))
+        self.assertFalse(http_utils.download_file(URL, self.save_path, checksum='deadbeef'))
+        self.assertFalse(os.path.exists(self.save_path))
+
+    @patch('src.modules.utils.http_utils.HTTPUtils._create_session')
+    def test_ranged_failure_keeps_partial_when_resuming(self, mock_create_session):
+        """测试断点续传模式失败时保留临时文件"""
+        session = FakeRangeSession(self.data)
+        session.fail_start = 0
+        mock_create_session.return_value = session
+        http_utils = HTTPUtils()
+
+        self.assertFalse(http_utils.download_file(URL, self.save_path, resume=True))
+        self.assertTrue(os.path.exists(self.save_path + '.part'))
+        self.assertTrue(os.path.exists(self.save_path + '.part.json'))
+
+        self.assertFalse(http_utils.download_file(URL, self.save_path, segments=2))
+        self.assertFalse(os.path.exists(self.save_path + '.part'))
+
+if __name__ == "__main__":
+    unittest.main()
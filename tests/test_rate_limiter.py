@@ -0,0 +1,142 @@
+"""
+客户端限流模块单元测试
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.api.api_config import APIConfig
+from src.modules.utils.rate_limiter import RateLimiter, RateLimitMode, TokenBucket
+
+class FakeClock:
+    """可控的单调时钟，sleep会直接推进时间"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+class TestTokenBucket(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        self.clock = FakeClock()
+        patcher = patch('src.modules.utils.rate_limiter.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # 每分钟5次，突发容量2
+        self.bucket = TokenBucket(rate=5 / 60, capacity=2)
+
+    def test_burst_then_shed(self):
+        """测试突发容量用完后SHED模式立即拒绝"""
+        self.assertTrue(self.bucket.acquire(RateLimitMode.SHED))
+        self.assertTrue(self.bucket.acquire(RateLimitMode.SHED))
+        self.assertFalse(self.bucket.acquire(RateLimitMode.SHED))
+        self.assertEqual(self.clock.sleeps, [])
+
+        metrics = self.bucket.metrics()
+        self.assertEqual(metrics['acquired'], 2)
+        self.assertEqual(metrics['rejected'], 1)
+
+    def test_refill_over_time(self):
+        """测试令牌按速率补充"""
+        self.bucket.acquire(RateLimitMode.SHED)
+        self.bucket.acquire(RateLimitMode.SHED)
+        self.clock.now += 12
+        self.assertTrue(self.bucket.acquire(RateLimitMode.SHED))
+        self.assertFalse(self.bucket.acquire(RateLimitMode.SHED))
+
+    def test_queue_with_deadline(self):
+        """测试QUEUE模式在截止时间内等待，超出截止时间则放弃"""
+        self.bucket.acquire(RateLimitMode.SHED)
+        self.bucket.acquire(RateLimitMode.SHED)
+
+        # 下一个令牌需要12秒，截止时间5秒时放弃且不预约
+        self.assertFalse(self.bucket.acquire(RateLimitMode.QUEUE, timeout=5))
+        self.assertAlmostEqual(self.bucket.metrics()['tokens'], 0.0)
+
+        self.assertTrue(self.bucket.acquire(RateLimitMode.QUEUE, timeout=15))
+        self.assertEqual(len(self.clock.sleeps), 1)
+        self.assertAlmostEqual(self.clock.sleeps[0], 12.0)
+        self.assertEqual(self.bucket.metrics()['waited'], 1)
+
+    def test_block_reserves_in_order(self):
+        """测试BLOCK模式预约令牌，后来的调用等待更久"""
+        self.bucket.acquire(RateLimitMode.SHED)
+        self.bucket.acquire(RateLimitMode.SHED)
+        with patch.object(self.clock, 'sleep') as mock_sleep:
+            self.bucket.acquire(RateLimitMode.BLOCK)
+            self.bucket.acquire(RateLimitMode.BLOCK)
+        waits = [call.args[0] for call in mock_sleep.call_args_list]
+        self.assertAlmostEqual(waits[0], 12.0)
+        self.assertAlmostEqual(waits[1], 24.0)
+
+    def test_drain(self):
+        """测试收到429后清空令牌"""
+        self.bucket.drain()
+        self.assertFalse(self.bucket.acquire(RateLimitMode.SHED))
+
+class TestRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        limits = {'stocks': {'requests': 1, 'per': 60, 'burst': 1}}
+        self.limiter = RateLimiter(limits.get, default_mode=RateLimitMode.SHED)
+
+    def test_unlimited_api(self):
+        """测试未配置限流的API总是放行"""
+        for _ in range(10):
+            self.assertTrue(self.limiter.acquire('weather'))
+        self.assertNotIn('weather', self.limiter.metrics())
+
+    def test_limited_api(self):
+        """测试按API名称限流并输出指标"""
+        self.assertTrue(self.limiter.acquire('stocks'))
+        self.assertFalse(self.limiter.acquire('stocks'))
+        metrics = self.limiter.metrics()
+        self.assertEqual(metrics['stocks']['acquired'], 1)
+        self.assertEqual(metrics['stocks']['rejected'], 1)
+
+    def test_penalize(self):
+        """测试penalize清空令牌桶"""
+        self.limiter.penalize('stocks')
+        self.assertFalse(self.limiter.acquire('stocks'))
+
+class TestRateLimitConfig(unittest.TestCase):
+
+    @patch.dict(os.environ, {'STOCKS_API_RATE_LIMIT': '25/86400', 'STOCKS_API_RATE_BURST': '3',
+                             'WEATHER_API_RATE_LIMIT': 'off'})
+    def test_parse_rate_limit_from_env(self):
+        """测试从环境变量解析限流配置"""
+        config = APIConfig()
+        self.assertEqual(config.get_rate_limit('stocks'), {'requests': 25.0, 'per': 86400.0, 'burst': 3.0})
+        self.assertIsNone(config.get_rate_limit('weather'))
+        self.assertIsNone(config.get_rate_limit('unknown'))
+
+    def test_default_rate_limit(self):
+        """测试Alpha Vantage默认每分钟5次"""
+        with patch.dict(os.environ, {}, clear=True):
+            config = APIConfig()
+        self.assertEqual(config.get_rate_limit('stocks'), {'requests': 5.0, 'per': 60.0, 'burst': 5.0})
+
+    @patch.dict(os.environ, {'STOCKS_API_RATE_LIMIT': 'five/minute', 'NEWS_API_RATE_BURST': '-1'})
+    def test_invalid_rate_limit_falls_back_to_default(self):
+        """测试限流配置无效时记录警告并使用默认值，不影响启动"""
+        with self.assertLogs('src.modules.api.api_config', level='WARNING'):
+            config = APIConfig()
+        self.assertEqual(config.get_rate_limit('stocks'), {'requests': 5.0, 'per': 60.0, 'burst': 5.0})
+        self.assertEqual(config.get_rate_limit('news'), {'requests': 100.0, 'per': 86400.0, 'burst': 10.0})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+重试预算模块单元测试
+"""
+
+import os
+import sys
+import threading
+import unittest
+from unittest.mock import patch
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.utils.retry_budget import RetryBudget, RetryBudgetConfig
+from src.modules.utils.rate_limiter import RateLimiter
+from src.modules.api.key_pool import APIKeyPools
+from src.modules.api.quota_tracker import QuotaTracker
+from src.modules.utils.http_utils import HTTPUtils, HTTPRequestError, RetryConfig
+
+class _Handler(BaseHTTPRequestHandler):
+    """始终返回503的本地测试服务"""
+
+    protocol_version = 'HTTP/1.1'
+    count = 0
+
+    def do_GET(self):
+        type(self).count += 1
+        self.send_response(503)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+class TestRetryBudget(unittest.TestCase):
+
+    def test_ratio_and_min_retries(self):
+        """测试重试数受最少重试数加请求数比例限制"""
+        budget = RetryBudget('host', RetryBudgetConfig(ratio=0.1, window=10, min_retries=1))
+        for _ in range(20):
+            budget.record_request()
+        self.assertEqual([budget.try_retry() for _ in range(4)], [True, True, True, False])
+        snapshot = budget.snapshot()
+        self.assertEqual((snapshot['requests'], snapshot['retries']), (20, 3))
+        self.assertEqual((snapshot['granted'], snapshot['denied']), (3, 1))
+
+    def test_window_slides(self):
+        """测试超出窗口的请求和重试不再计入"""
+        budget = RetryBudget('host', RetryBudgetConfig(ratio=0, window=10, min_retries=1))
+        with patch('src.modules.utils.retry_budget.time.monotonic', return_value=100.0):
+            self.assertTrue(budget.try_retry())
+            self.assertFalse(budget.try_retry())
+        with patch('src.modules.utils.retry_budget.time.monotonic', return_value=105.0):
+            self.assertFalse(budget.try_retry())
+        with patch('src.modules.utils.retry_budget.time.monotonic', return_value=110.5):
+            self.assertTrue(budget.try_retry())
+            self.assertEqual(budget.snapshot()['retries'], 1)
+
+class TestHTTPUtilsRetryBudget(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        _Handler.count = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.host = f'127.0.0.1:{self.server.server_address[1]}'
+        self.http_utils = HTTPUtils(retry_budget_config=RetryBudgetConfig(ratio=0, min_retries=2))
+
+    def tearDown(self):
+        """每个测试方法执行后的清理"""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_urllib3_retries_limited(self):
+        """测试urllib3自动重试超出预算后不再重试"""
+        retry_config = RetryConfig(total=3, backoff_factor=0)
+        for _ in range(3):
+            with self.assertRaises(HTTPRequestError):
+                self.http_utils.get(f'http://{self.host}/fail', cache=False, retry_config=retry_config)
+        # 3次请求 + 预算内的2次重试
+        self.assertEqual(_Handler.count, 5)
+        status = self.http_utils.retry_budget_status()[self.host]
+        self.assertEqual((status['requests'], status['granted'], status['denied']), (3, 2, 3))
+
+    def test_deadline_retries_limited(self):
+        """测试带截止时间的重试同样受预算限制"""
+        retry_config = RetryConfig(total=3, backoff_factor=0)
+        for _ in range(3):
+            with self.assertRaises(HTTPRequestError):
+                self.http_utils.get(f'http://{self.host}/fail', cache=False, deadline=5, retry_config=retry_config)
+        self.assertEqual(_Handler.count, 5)
+        self.assertEqual(self.http_utils.retry_budget_status()[self.host]['denied'], 3)
+
+    def test_retries_take_rate_limit_tokens(self):
+        """测试两种重试都消耗该API的限流令牌，令牌用完后不再重试"""
+        retry_config = RetryConfig(total=3, backoff_factor=0)
+        for options in ({}, {'deadline': 5}):
+            _Handler.count = 0
+            limiter = RateLimiter({'news': {'requests': 1, 'per': 3600, 'burst': 2}}.get)
+            http_utils = HTTPUtils(
+                rate_limiter=limiter,
+                retry_budget_config=RetryBudgetConfig(min_retries=10),
+                key_pools=APIKeyPools(quota_tracker=QuotaTracker(path=''))
+            )
+            with self.assertRaises(HTTPRequestError):
+                http_utils.get(
+                    f'http://{self.host}/fail', cache=False, api_name='news',
+                    retry_config=retry_config, **options
+                )
+            # 首次请求和1次重试各消耗一个令牌
+            self.assertEqual(_Handler.count, 2, options)
+            self.assertEqual(limiter.metrics()['news']['rejected'], 1)
+
+if __name__ == "__main__":
+    unittest.main()
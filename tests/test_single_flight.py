@@ -0,0 +1,75 @@
+"""
+并发去重模块单元测试
+"""
+
+import os
+import sys
+import threading
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.utils.single_flight import SingleFlight
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        self.flight = SingleFlight()
+        self.release = threading.Event()
+        self.calls = []
+
+    def _run_concurrently(self, keys, fn):
+        """每个键启动一个线程调用do，等所有线程进入等待后放行加载函数"""
+        results, errors = {}, {}
+
+        def worker(index, key):
+            try:
+                results[index] = self.flight.do(key, fn(key))
+            except Exception as e:
+                errors[index] = e
+
+        threads = [threading.Thread(target=worker, args=(i, key)) for i, key in enumerate(keys)]
+        for thread in threads:
+            thread.start()
+        # 等待除各键的首个调用外其余调用都已合并
+        while self.flight.stats()['shared'] < len(keys) - len(set(keys)):
+            threading.Event().wait(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_concurrent_calls_share_one_load(self):
+        """测试同一键的并发调用只执行一次加载并共享结果，不同键互不影响"""
+        def load(key):
+            def fn():
+                self.calls.append(key)
+                self.release.wait()
+                return f'{key}-value'
+            return fn
+
+        results, errors = self._run_concurrently(['a'] * 5 + ['b'] * 3, load)
+        self.assertEqual(errors, {})
+        self.assertEqual(sorted(self.calls), ['a', 'b'])
+        self.assertEqual([results[i] for i in range(8)], ['a-value'] * 5 + ['b-value'] * 3)
+        self.assertEqual(self.flight.stats(), {'in_flight': 0, 'shared': 6})
+
+    def test_error_shared_and_next_call_retries(self):
+        """测试加载失败时所有等待者收到同一异常，之后的调用重新加载"""
+        def load(key):
+            def fn():
+                self.calls.append(key)
+                self.release.wait()
+                raise ValueError('upstream down')
+            return fn
+
+        results, errors = self._run_concurrently(['a'] * 3, load)
+        self.assertEqual(results, {})
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(len({id(error) for error in errors.values()}), 1)
+        self.assertEqual(self.flight.do('a', lambda: 'recovered'), 'recovered')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+翻译记忆模块单元测试
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.api.translation_memory import TranslationError, TranslationMemory, split_sentences
+from src.modules.cache.cache_manager import CacheManager, CacheNamespace
+from src.modules.utils.minhash_lsh import MinHashLSH
+
+class TestSplitSentences(unittest.TestCase):
+
+    def test_round_trip(self):
+        """测试中英文句子切分，拼接后与原文完全相同"""
+        text = "你好。今天天气怎么样？\n\nHello world. It is 3.14 today!  Bye"
+        pieces = split_sentences(text)
+        self.assertEqual("".join(pieces), text)
+        self.assertEqual(
+            [piece.strip() for piece in pieces],
+            ["你好。", "今天天气怎么样？", "Hello world.", "It is 3.14 today!", "Bye"]
+        )
+        self.assertEqual(split_sentences(""), [])
+
+    def test_closing_quotes_stay_with_sentence(self):
+        """测试句末标点后的引号归属当前句子"""
+        self.assertEqual(split_sentences("他说：“好。”然后走了。"), ["他说：“好。”", "然后走了。"])
+
+class TestTranslationMemory(unittest.TestCase):
+
+    def setUp(self):
+        """每个测试方法执行前的设置"""
+        self.test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.test_dir, True)
+        self.cache = CacheNamespace("tm", ttl=600, cache=CacheManager(cache_dir=self.test_dir))
+        self.requests = []
+
+    def translate_batch(self, sentences, source, target):
+        self.requests.append(list(sentences))
+        return [{"translatedText": f"<{sentence}>", "detectedSourceLanguage": "en"} for sentence in sentences]
+
+    def test_only_missing_sentences_sent(self):
+        """测试重复的句子只请求一次，再次翻译时命中翻译记忆"""
+        memory = TranslationMemory(self.translate_batch, self.cache)
+        result = memory.translate("Hi. Footer.\nHi. Body.", "en", "zh")
+        self.assertEqual(result.text, "<Hi.> <Footer.>\n<Hi.> <Body.>")
+        self.assertEqual(self.requests, [["Hi.", "Footer.", "Body."]])
+        self.assertEqual((result.segments, result.memory_hits, result.sent_segments), (4, 0, 3))
+        self.assertEqual(result.detected_language, "en")
+
+        result = memory.translate("New text. Footer.", "en", "zh")
+        self.assertEqual(result.text, "<New text.> <Footer.>")
+        self.assertEqual(self.requests[-1], ["New text."])
+        self.assertEqual((result.memory_hits, result.sent_chars), (1, len("New text.")))
+
+        # 全部命中翻译记忆时仍返回记忆中保存的检测语言
+        result = memory.translate("Hi. Body.", "auto", "zh")
+        self.assertEqual(self.requests[-1], ["Hi.", "Body."])
+        result = memory.translate("Hi. Body.", "auto", "zh")
+        self.assertEqual((result.memory_hits, result.sent_segments), (2, 0))
+        self.assertEqual(result.detected_language, "en")
+
+        # 语言对不同时不共用翻译记忆
+        memory.translate("Footer.", "en", "ja")
+        self.assertEqual(self.requests[-1], ["Footer."])
+
+    def test_fuzzy_match_served_without_request(self):
+        """测试翻译记忆未命中但有近似的历史句子时直接使用其译文"""
+        memory = TranslationMemory(self.translate_batch, self.cache, fuzzy=MinHashLSH(threshold=0.9))
+        memory.translate("Please contact our support team for assistance.", "en", "zh")
+        result = memory.translate("Please  contact our support team, for assistance! Thanks.", "en", "zh")
+
+        self.assertEqual(result.text, "<Please contact our support team for assistance.> <Thanks.>")
+        self.assertEqual(self.requests[-1], ["Thanks."])
+        (sentence, match), = result.fuzzy_matches
+        self.assertEqual(sentence, "Please  contact our support team, for assistance!")
+        self.assertEqual(match.similarity, 1.0)
+
+        # 近似匹配不跨语言对
+        memory.translate("Please contact our support team for assistance.", "en", "ja")
+        self.assertEqual(self.requests[-1], ["Please contact our support team for assistance."])
+
+        # 只差一个数字的句子不使用历史译文
+        sentence = "Please transfer 1000 dollars from the checking account to the savings account before the end of today."
+        memory.translate(sentence, "en", "zh")
+        result = memory.translate(sentence.replace("1000", "9000"), "en", "zh")
+        self.assertEqual(self.requests[-1], [sentence.replace("1000", "9000")])
+        self.assertEqual(result.fuzzy_matches, ())
+
+    def test_demo_results_not_remembered(self):
+        """测试带demo标记的结果（上游不可用时的演示译文）不写入翻译记忆和近似匹配索引"""
+        fuzzy = MinHashLSH(threshold=0.5)
+        memory = TranslationMemory(
+            lambda sentences, source, target: [{"translatedText": "[demo]", "demo": True} for _ in sentences],
+            self.cache, fuzzy=fuzzy
+        )
+        self.assertEqual(memory.translate("Hello there.", "en", "zh").text, "[demo]")
+        self.assertEqual(fuzzy.stats()["entries"], 0)
+
+        # 上游恢复后重新请求，得到真实译文
+        memory.translate_batch = self.translate_batch
+        result = memory.translate("Hello there.", "en", "zh")
+        self.assertEqual((result.text, result.memory_hits), ("<Hello there.>", 0))
+        self.assertEqual(self.requests, [["Hello there."]])
+
+    def test_batches_split_by_count_and_chars(self):
+        """测试未命中的句子按句子数和字符数上限分批请求"""
+        memory = TranslationMemory(self.translate_batch, self.cache, batch_size=2, batch_chars=12)
+        memory.translate("A. B. C. Long sentence!", "en", "zh")
+        self.assertEqual(self.requests, [["A.", "B."], ["C."], ["Long sentence!"]])
+
+    def test_mismatched_response_raises(self):
+        """测试上游返回的译文数量与请求不符时抛出异常"""
+        memory = TranslationMemory(lambda sentences, source, target: [], self.cache)
+        with self.assertRaises(TranslationError):
+            memory.translate("One. Two.", "en", "zh")
+
+if __name__ == "__main__":
+    unittest.main()